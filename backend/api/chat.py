@@ -0,0 +1,213 @@
+"""
+PromptLab Chat API Endpoints
+Multi-turn conversation tests over Ollama's chat endpoint with server-side sessions
+"""
+
+from flask import Blueprint, request, jsonify
+from backend.config import KEEP_ALIVE_PATTERN
+from backend.api.ollama import validate_test_request
+from backend.api.responses import handle_ollama_error
+from backend.services.ollama_service import OllamaConnectionError, OllamaTimeoutError
+from backend.services.ollama_pool import ollama_pool
+from backend.services.chat_sessions import chat_sessions, ChatSessionFullError
+
+# Create Blueprint for chat API endpoints
+chat_bp = Blueprint('chat', __name__, url_prefix='/api')
+
+def session_not_found(session_id):
+    """Return the response for an unknown or expired session"""
+    return jsonify({
+        'error': True,
+        'message': f'Chat session {session_id} not found or expired',
+        'code': 'SESSION_NOT_FOUND'
+    }), 404
+
+def get_json_body():
+    """
+    Parse the request body as JSON
+    
+    Returns:
+        tuple: (data dict, error response or None)
+    """
+    try:
+        data = request.get_json(force=True)
+    except Exception:
+        return None, (jsonify({
+            'error': True,
+            'message': 'Request body must contain valid JSON data',
+            'code': 'INVALID_JSON'
+        }), 400)
+    
+    if not data:
+        return None, (jsonify({
+            'error': True,
+            'message': 'Request body must contain JSON data',
+            'code': 'INVALID_JSON'
+        }), 400)
+    
+    return data, None
+
+@chat_bp.route('/chat/sessions', methods=['POST'])
+def create_session():
+    """
+    Start a conversation
+    
+    Request Body:
+        system_prompt (str): System message for the conversation
+        model (str, optional): Model to use for every turn
+        temperature (float, optional): Temperature setting (0.0-2.0)
+        keep_alive (str, optional): How long Ollama keeps the model loaded between turns
+        message (str, optional): First user message to send right away
+    
+    Returns:
+        JSON response with the new session (201), plus the first reply if a message was given
+    """
+    data, error_response = get_json_body()
+    if error_response:
+        return error_response
+    
+    message = data.get('message')
+    message = message.strip() if isinstance(message, str) else ''
+    params, errors = validate_test_request({
+        'system_prompt': data.get('system_prompt') or '',
+        'user_input': message,
+        'model': data.get('model') or '',
+        'temperature': data.get('temperature')
+    })
+    
+    # Unlike user_input in a prompt test, the first message is optional
+    user_input_error = errors.pop('user_input', None)
+    if message and user_input_error:
+        errors['message'] = user_input_error.replace('User input', 'Message')
+    
+    keep_alive = data.get('keep_alive')
+    if keep_alive is not None:
+        keep_alive = str(keep_alive).strip()
+        if not KEEP_ALIVE_PATTERN.match(keep_alive):
+            errors['keep_alive'] = 'Keep alive must be a duration such as "300", "5m" or "-1"'
+    
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    session = chat_sessions.create(params['system_prompt'], params['model'], params['temperature'], keep_alive)
+    response = {
+        'success': True,
+        'message': 'Chat session created',
+        'session': session.to_dict(include_messages=False)
+    }
+    
+    if message:
+        try:
+            response['reply'] = session.send(message, ollama_pool)
+        except (OllamaConnectionError, OllamaTimeoutError) as e:
+            chat_sessions.delete(session.id)
+            return handle_ollama_error(e)
+        response['session'] = session.to_dict(include_messages=False)
+    
+    return jsonify(response), 201
+
+@chat_bp.route('/chat/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """
+    Get a conversation with its message history and per-turn stats
+    
+    Args:
+        session_id (str): Session identifier
+    
+    Returns:
+        JSON response with the session
+    """
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    
+    return jsonify({
+        'success': True,
+        'session': session.to_dict()
+    })
+
+@chat_bp.route('/chat/sessions/<session_id>/messages', methods=['POST'])
+def send_message(session_id):
+    """
+    Send the next user message in a conversation
+    
+    Request Body:
+        message (str): User message
+    
+    Args:
+        session_id (str): Session identifier
+    
+    Returns:
+        JSON response with the assistant reply, turn number and generation stats
+    """
+    data, error_response = get_json_body()
+    if error_response:
+        return error_response
+    
+    message = data.get('message')
+    message = message.strip() if isinstance(message, str) else ''
+    if not message:
+        error = 'Message is required'
+    elif len(message) > 10000:
+        error = 'Message cannot exceed 10,000 characters'
+    else:
+        error = None
+    
+    if error:
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': {'message': error}
+        }), 400
+    
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    
+    try:
+        reply = session.send(message, ollama_pool)
+    except ChatSessionFullError as e:
+        return jsonify({
+            'error': True,
+            'message': str(e),
+            'code': 'SESSION_FULL'
+        }), 409
+    except (OllamaConnectionError, OllamaTimeoutError) as e:
+        return handle_ollama_error(e)
+    except Exception:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to send chat message',
+            'code': 'CHAT_ERROR'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'session_id': session.id,
+        'reply': reply
+    })
+
+@chat_bp.route('/chat/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """
+    End a conversation
+    
+    Args:
+        session_id (str): Session identifier
+    
+    Returns:
+        JSON response confirming deletion
+    """
+    if not chat_sessions.delete(session_id):
+        return session_not_found(session_id)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Chat session deleted'
+    })
@@ -5,7 +5,9 @@ Configuration management and system settings
 
 from flask import Blueprint, request, jsonify
 from backend.config import config, AppConfig
-from backend.services.ollama_service import OllamaService
+from backend.services.ollama_service import get_ollama_service
+from backend.services.health_monitor import health_monitor, is_live_request
+from backend.services.ollama_pool import reload_ollama_pool
 import os
 import json
 from pathlib import Path
@@ -13,6 +15,16 @@ from pathlib import Path
 # Create Blueprint for configuration API endpoints
 config_bp = Blueprint('config', __name__, url_prefix='/api')
 
+# Settings that change how generations are routed across Ollama endpoints
+POOL_SETTINGS = {'ollama_endpoint', 'ollama_endpoints', 'ollama_routing_strategy',
+                 'circuit_breaker_threshold', 'circuit_breaker_reset_seconds'}
+
+def is_connected(connection_status):
+    """Reduce a check_connection() result to a boolean"""
+    if isinstance(connection_status, dict):
+        return bool(connection_status.get('connected', False))
+    return bool(connection_status)
+
 def validate_config_update(data):
     """Validate configuration update data"""
     errors = {}
@@ -33,6 +45,9 @@ def get_config():
     """
     Get current application configuration
     
+    Query Parameters:
+        live (str): '1' to probe Ollama now instead of using the health monitor's snapshot
+    
     Returns:
         JSON response with current configuration settings
     """
@@ -40,19 +55,33 @@ def get_config():
         # Get current configuration
         config_data = config.to_dict()
         
-        # Test Ollama connection status
-        ollama_service = OllamaService()
-        connection_status = ollama_service.check_connection()
+        snapshot = None
+        if health_monitor.is_running and not is_live_request(request.args):
+            snapshot = health_monitor.get_snapshot()
+        
+        if snapshot is not None:
+            ollama_status = {
+                'connected': snapshot['ollama']['healthy'],
+                'endpoint': snapshot['ollama']['endpoint'],
+                'checked_at': snapshot['ollama']['checked_at'],
+                'cached': True
+            }
+        else:
+            # Single quick probe rather than a retry/backoff cycle
+            ollama_service = get_ollama_service(config.ollama_endpoint)
+            connection_status = ollama_service.check_connection(timeout=config.health_probe_timeout, max_retries=1)
+            ollama_status = {
+                'connected': is_connected(connection_status),
+                'endpoint': config.ollama_endpoint,
+                'cached': False
+            }
         
         return jsonify({
             'success': True,
             'config': config_data,
-            'ollama_status': {
-                'connected': connection_status,
-                'endpoint': config.ollama_endpoint
-            }
+            'ollama_status': ollama_status
         })
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
@@ -87,7 +116,7 @@ def update_config():
                 'message': 'Request body must contain valid JSON data',
                 'code': 'INVALID_JSON'
             }), 400
-            
+        
         if not data:
             return jsonify({
                 'error': True,
@@ -114,8 +143,13 @@ def update_config():
         # Test new Ollama connection if endpoint was updated
         connection_status = False
         if 'ollama_endpoint' in data:
-            ollama_service = OllamaService()
-            connection_status = ollama_service.check_connection()
+            ollama_service = get_ollama_service(config.ollama_endpoint)
+            connection_status = is_connected(ollama_service.check_connection())
+            health_monitor.request_probe()
+        
+        # Route generations through the new endpoints and breaker settings
+        if POOL_SETTINGS & set(data):
+            reload_ollama_pool(config)
         
         return jsonify({
             'success': True,
@@ -126,7 +160,7 @@ def update_config():
                 'endpoint': config.ollama_endpoint
             }
         })
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
@@ -168,8 +202,8 @@ def test_ollama_connection():
             }), 400
         
         # Test connection
-        ollama_service = OllamaService(endpoint=endpoint)
-        connection_status = ollama_service.check_connection()
+        ollama_service = get_ollama_service(endpoint)
+        connection_status = is_connected(ollama_service.check_connection())
         
         response_data = {
             'success': True,
@@ -188,7 +222,7 @@ def test_ollama_connection():
                 response_data['models'] = []
         
         return jsonify(response_data)
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
@@ -245,7 +279,7 @@ def save_config_to_file():
             'path': str(config_file.absolute()),
             'format': file_format
         })
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
@@ -314,10 +348,11 @@ def load_config_from_file():
         # Update global configuration
         global config
         config = new_config
+        reload_ollama_pool(config)
         
         # Test Ollama connection with new config
-        ollama_service = OllamaService()
-        connection_status = ollama_service.check_connection()
+        ollama_service = get_ollama_service(config.ollama_endpoint)
+        connection_status = is_connected(ollama_service.check_connection())
         
         return jsonify({
             'success': True,
@@ -328,7 +363,7 @@ def load_config_from_file():
                 'endpoint': config.ollama_endpoint
             }
         })
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
@@ -354,8 +389,8 @@ def get_models_with_config():
         force_refresh = request.args.get('refresh', 'false').lower() == 'true'
         include_default = request.args.get('include_default', 'true').lower() == 'true'
         
-        # Get models from Ollama service
-        ollama_service = OllamaService()
+        # Get models from the shared Ollama service so its model cache is reused
+        ollama_service = get_ollama_service(config.ollama_endpoint)
         
         if force_refresh:
             models = ollama_service.refresh_models_cache()
@@ -386,7 +421,7 @@ def get_models_with_config():
                 response_data['suggested_models'] = models[:3]  # First 3 available models
         
         return jsonify(response_data)
-        
+    
     except Exception as e:
         return jsonify({
             'error': True,
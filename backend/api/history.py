@@ -0,0 +1,251 @@
+"""
+PromptLab Test History API Endpoints
+Paginated test-run history and latency percentiles per prompt and model
+"""
+
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, request, jsonify
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from backend.database import get_db_session, close_db_session
+from backend.models.test_run import TestRun
+from backend.api.prompts import encode_cursor, handle_database_error
+from backend.services.stats import summarize_latencies
+
+# Create Blueprint for test history API endpoints
+history_bp = Blueprint('history', __name__, url_prefix='/api')
+
+# Page size used by GET /api/test-runs when no limit is given
+DEFAULT_HISTORY_PAGE_SIZE = 50
+
+# Largest page size accepted by GET /api/test-runs
+MAX_HISTORY_PAGE_SIZE = 500
+
+# Longest window accepted by GET /api/test-runs/stats
+MAX_STATS_DAYS = 365
+
+def decode_history_cursor(token):
+    """Decode a test-run pagination token produced by encode_cursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        created_at = datetime.fromisoformat(data['created_at'])
+    except Exception:
+        raise ValueError('Malformed cursor')
+    
+    if not isinstance(data.get('id'), int):
+        raise ValueError('Malformed cursor')
+    return created_at, data['id']
+
+def parse_history_filters(args, errors):
+    """
+    Parse the prompt_id and model filters shared by the history endpoints
+    
+    Args:
+        args: Request query arguments
+        errors (dict): Validation errors, updated in place
+    
+    Returns:
+        tuple: (prompt_id or None, model or None)
+    """
+    prompt_id = args.get('prompt_id')
+    if prompt_id is not None:
+        try:
+            prompt_id = int(prompt_id)
+            if prompt_id < 1:
+                errors['prompt_id'] = 'Prompt ID must be a positive integer'
+        except (ValueError, TypeError):
+            errors['prompt_id'] = 'Prompt ID must be a positive integer'
+    
+    model = args.get('model', '').strip() or None
+    return prompt_id, model
+
+def validation_error(errors):
+    """Return the response for invalid query parameters"""
+    return jsonify({
+        'error': True,
+        'message': 'Invalid query parameters',
+        'code': 'VALIDATION_ERROR',
+        'details': errors
+    }), 400
+
+@history_bp.route('/test-runs', methods=['GET'])
+def get_test_runs():
+    """
+    Get recorded prompt tests, newest first
+    
+    Query Parameters:
+        prompt_id (int, optional): Only runs of this saved prompt
+        model (str, optional): Only runs of this model
+        limit (int, optional): Page size (1-500, default 50)
+        cursor (str, optional): Opaque 'next_cursor' from a previous page
+    
+    Returns:
+        JSON response with test runs and 'next_cursor' (None on the last page)
+    """
+    errors = {}
+    prompt_id, model = parse_history_filters(request.args, errors)
+    
+    limit = request.args.get('limit', DEFAULT_HISTORY_PAGE_SIZE)
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > MAX_HISTORY_PAGE_SIZE:
+            errors['limit'] = f'Limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}'
+    except (ValueError, TypeError):
+        errors['limit'] = 'Limit must be an integer'
+    
+    cursor = None
+    cursor_token = request.args.get('cursor')
+    if cursor_token:
+        try:
+            cursor = decode_history_cursor(cursor_token)
+        except ValueError:
+            errors['cursor'] = 'Cursor is invalid or expired'
+    
+    if errors:
+        return validation_error(errors)
+    
+    session = None
+    try:
+        session = get_db_session()
+        query = session.query(TestRun)
+        if prompt_id is not None:
+            query = query.filter(TestRun.prompt_id == prompt_id)
+        if model:
+            query = query.filter(TestRun.model == model)
+        
+        # Keyset pagination on (created_at, id) is served by the composite indexes
+        if cursor:
+            query = query.filter(tuple_(TestRun.created_at, TestRun.id) < cursor)
+        
+        runs = query.order_by(TestRun.created_at.desc(), TestRun.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(runs) > limit:
+            runs = runs[:limit]
+            next_cursor = encode_cursor({'created_at': runs[-1].created_at.isoformat(), 'id': runs[-1].id})
+        
+        return jsonify({
+            'success': True,
+            'test_runs': [run.to_dict() for run in runs],
+            'count': len(runs),
+            'next_cursor': next_cursor
+        })
+    
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to retrieve test runs',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+@history_bp.route('/test-runs/stats', methods=['GET'])
+def get_test_run_stats():
+    """
+    Get latency percentiles and throughput per prompt and model
+    
+    Query Parameters:
+        prompt_id (int, optional): Only runs of this saved prompt
+        model (str, optional): Only runs of this model
+        days (int, optional): Only runs from the last N days (1-365)
+        by_day (bool, optional): Also break each group down per calendar day (UTC)
+    
+    Returns:
+        JSON response with one entry per (prompt_id, model) combination;
+        runs answered from the response cache are counted in cached_runs
+        and left out of the latency and throughput figures
+    """
+    errors = {}
+    prompt_id, model = parse_history_filters(request.args, errors)
+    
+    days = request.args.get('days')
+    if days is not None:
+        try:
+            days = int(days)
+            if days < 1 or days > MAX_STATS_DAYS:
+                errors['days'] = f'Days must be between 1 and {MAX_STATS_DAYS}'
+        except (ValueError, TypeError):
+            errors['days'] = 'Days must be an integer'
+    
+    by_day = request.args.get('by_day', '').lower() in ('1', 'true', 'yes')
+    
+    if errors:
+        return validation_error(errors)
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        # Only the columns being aggregated, not the prompt and response text
+        query = session.query(TestRun.prompt_id, TestRun.model, TestRun.latency,
+                              TestRun.tokens_per_second, TestRun.cached, TestRun.created_at)
+        if prompt_id is not None:
+            query = query.filter(TestRun.prompt_id == prompt_id)
+        if model:
+            query = query.filter(TestRun.model == model)
+        if days is not None:
+            query = query.filter(TestRun.created_at >= datetime.now(timezone.utc) - timedelta(days=days))
+        
+        groups = OrderedDict()
+        for row in query.order_by(TestRun.created_at, TestRun.id):
+            groups.setdefault((row.prompt_id, row.model), []).append(row)
+        
+        stats = [summarize_runs(rows, by_day, prompt_id=key[0], model=key[1]) for key, rows in groups.items()]
+        
+        return jsonify({
+            'success': True,
+            'stats': stats,
+            'count': len(stats)
+        })
+    
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to compute test run statistics',
+            'code': 'STATS_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+def summarize_runs(rows, by_day=False, **identity):
+    """
+    Summarize test runs ordered by creation time
+    
+    Args:
+        rows (list): Rows with latency, tokens_per_second, cached and created_at
+        by_day (bool): Whether to add a per-day breakdown
+        **identity: Fields identifying the group, copied into the result
+    
+    Returns:
+        dict: Run counts, latency summary, mean tokens per second and time range
+    """
+    # Cache hits replay a stored response, so their timings say nothing about the model
+    measured = [row for row in rows if not row.cached]
+    throughput = [row.tokens_per_second for row in measured if row.tokens_per_second is not None]
+    summary = dict(identity)
+    summary.update({
+        'runs': len(measured),
+        'cached_runs': len(rows) - len(measured),
+        'latency': summarize_latencies(row.latency for row in measured),
+        'tokens_per_second': round(sum(throughput) / len(throughput), 2) if throughput else None,
+        'first_run': rows[0].created_at.isoformat() if rows else None,
+        'last_run': rows[-1].created_at.isoformat() if rows else None
+    })
+    
+    if by_day:
+        days = OrderedDict()
+        for row in rows:
+            days.setdefault(row.created_at.date().isoformat(), []).append(row)
+        summary['by_day'] = [summarize_runs(day_rows, date=date) for date, day_rows in days.items()]
+    
+    return summary
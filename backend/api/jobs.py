@@ -0,0 +1,422 @@
+"""
+PromptLab Background Job API Endpoints
+Submit library imports, exports and batch tests as background jobs and track their progress
+"""
+
+import json
+import os
+from flask import Blueprint, request, jsonify, send_file
+from sqlalchemy import func
+from backend.config import config
+from backend.database import get_db_session, close_db_session
+from backend.models.job import JOB_STATUSES
+from backend.models.prompt import Prompt
+from backend.api.prompts import iter_library, import_prompt_batches, IMPORT_BATCH_SIZE
+from backend.api.ollama import validate_batch_request
+from backend.services.batch_service import build_batch_items, run_batch
+from backend.services.library_export import (
+    EXPORT_FORMATS, EXPORT_CONTENT_TYPES, build_export_metadata, iter_export, buffer_chunks, yaml
+)
+from backend.services.library_import import IMPORT_FORMATS, open_import_stream
+from backend.services.ollama_pool import ollama_pool
+from backend.services.semantic_search import stale_prompts, sync_embeddings
+from backend.services.job_queue import job_manager, UnknownJobTypeError
+
+# Create Blueprint for job API endpoints
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api')
+
+# Largest number of jobs returned by GET /api/jobs
+MAX_JOB_LIST_SIZE = 200
+
+def run_export_job(context):
+    """Write the whole library to the job's result file"""
+    export_format = context.params['format']
+    session = get_db_session()
+    try:
+        total = session.query(func.count(Prompt.id)).scalar()
+        context.report(0, total, force=True)
+        
+        def prompts():
+            for count, prompt in enumerate(iter_library(session), start=1):
+                context.check_cancelled()
+                yield prompt
+                context.report(count, total)
+        
+        with open(context.result_path(export_format), 'wb') as output:
+            for chunk in buffer_chunks(iter_export(prompts(), build_export_metadata(total), export_format)):
+                output.write(chunk)
+        
+        context.report(total, total, force=True)
+        return {'format': export_format, 'total_prompts': total}
+    finally:
+        close_db_session(session)
+
+def run_import_job(context):
+    """Import the uploaded library file in batches"""
+    params = context.params
+    session = get_db_session()
+    try:
+        with open(context.input_path, 'rb') as upload:
+            prompts = open_import_stream(upload, params.get('format'), params.get('filename'))
+            for event in import_prompt_batches(session, prompts, params['conflict_resolution'], IMPORT_BATCH_SIZE):
+                processed = event['summary']['total_processed']
+                if event['type'] == 'done':
+                    context.report(processed, processed, message=f'{processed} prompts processed', force=True)
+                    return {'summary': event['summary'], 'errors': event['errors']}
+                
+                # Batches already written stay imported if the job is cancelled here
+                context.report(processed, message=f'{processed} prompts processed')
+                context.check_cancelled()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        close_db_session(session)
+
+def run_batch_test_job(context):
+    """Run a batch test and write each result as a line of NDJSON"""
+    params = context.params
+    items = build_batch_items(params['inputs'], params['models'], params['temperatures'])
+    context.report(0, len(items), force=True)
+    
+    summary = None
+    completed = 0
+    events = run_batch(ollama_pool, params['system_prompt'], items, params['concurrency'])
+    try:
+        with open(context.result_path('ndjson'), 'w', encoding='utf-8') as output:
+            for event in events:
+                if event['type'] == 'summary':
+                    summary = event
+                    continue
+                output.write(json.dumps(event, ensure_ascii=False) + '\n')
+                completed += 1
+                context.report(completed, len(items))
+                context.check_cancelled()
+    finally:
+        # Closing the generator drops tests that have not started yet
+        events.close()
+    
+    context.report(completed, len(items), force=True)
+    return summary
+
+def run_embed_job(context):
+    """Embed every prompt added or changed since it was last embedded"""
+    model = context.params['model']
+    session = get_db_session()
+    try:
+        total = stale_prompts(session, model).count()
+        context.report(0, total, force=True)
+        
+        def progress(processed):
+            context.report(processed, total, message=f'{processed} prompts processed')
+            # Batches already embedded are kept if the job is cancelled here
+            context.check_cancelled()
+        
+        summary = sync_embeddings(session, ollama_pool, model, on_batch=progress)
+        context.report(total, total, force=True)
+        return dict(summary, model=model)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        close_db_session(session)
+
+job_manager.register('export', run_export_job, concurrency=config.job_max_concurrency)
+job_manager.register('batch_test', run_batch_test_job, concurrency=config.job_max_concurrency)
+# SQLite has a single writer, so concurrent imports would only queue on the database lock
+job_manager.register('import', run_import_job, concurrency=1)
+job_manager.register('embed', run_embed_job, concurrency=1)
+
+def job_not_found(job_id):
+    """Return the response for an unknown job"""
+    return jsonify({
+        'error': True,
+        'message': f'Job {job_id} not found',
+        'code': 'JOB_NOT_FOUND'
+    }), 404
+
+def validate_job_request(job_type, params, upload):
+    """
+    Validate job parameters for a job type
+    
+    Args:
+        job_type (str): Requested job type
+        params (dict): Job parameters from the request
+        upload: Uploaded file storage, or None
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    errors = {}
+    
+    if job_type == 'export':
+        export_format = str(params.get('format', 'json')).lower()
+        if export_format not in EXPORT_FORMATS:
+            errors['format'] = 'Format must be "json", "yaml" or "ndjson"'
+        elif export_format == 'yaml' and yaml is None:
+            errors['format'] = 'YAML support not available'
+        return {'format': export_format}, errors
+    
+    if job_type == 'import':
+        if upload is None:
+            errors['file'] = 'Import jobs require a multipart upload with a "file" field'
+        
+        conflict_resolution = str(params.get('conflict_resolution', 'skip')).lower()
+        if conflict_resolution not in ('skip', 'overwrite', 'rename'):
+            errors['conflict_resolution'] = 'Conflict resolution must be "skip", "overwrite", or "rename"'
+        
+        data_format = str(params.get('format') or '').lower() or None
+        if data_format and data_format not in IMPORT_FORMATS:
+            errors['format'] = 'Format must be "json", "ndjson" or "yaml"'
+        
+        return {
+            'conflict_resolution': conflict_resolution,
+            'format': data_format,
+            'filename': upload.filename if upload is not None else None
+        }, errors
+    
+    if job_type == 'batch_test':
+        return validate_batch_request(params)
+    
+    if job_type == 'embed':
+        model = params.get('model') or config.embedding_model
+        if not isinstance(model, str) or not model.strip() or len(model.strip()) > 100:
+            errors['model'] = 'Model must be a non-empty string of at most 100 characters'
+            return {}, errors
+        return {'model': model.strip()}, errors
+    
+    errors['type'] = f'Job type must be one of: {", ".join(job_manager.job_types)}'
+    return {}, errors
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a background job
+    
+    Request Body (JSON, or multipart/form-data for imports):
+        type (str): 'export', 'import', 'batch_test' or 'embed'
+        params (object): Job parameters; a JSON string in multipart requests
+            export: format ('json', 'yaml' or 'ndjson')
+            import: conflict_resolution, format (optional)
+            batch_test: the /api/run-test/batch request body
+            embed: model (optional, defaults to the configured embedding model)
+        file (file): Library file, for import jobs
+    
+    Returns:
+        JSON response with the queued job (202)
+    """
+    upload = None
+    if request.mimetype == 'multipart/form-data':
+        job_type = request.form.get('type', '')
+        try:
+            params = json.loads(request.form.get('params') or '{}')
+        except json.JSONDecodeError:
+            params = None
+        upload = request.files.get('file')
+    else:
+        try:
+            data = request.get_json(force=True)
+        except Exception:
+            data = None
+        if not isinstance(data, dict):
+            return jsonify({
+                'error': True,
+                'message': 'Request body must contain valid JSON data',
+                'code': 'INVALID_JSON'
+            }), 400
+        job_type = data.get('type', '')
+        params = data.get('params') or {}
+    
+    if not isinstance(params, dict):
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': {'params': 'Params must be a JSON object'}
+        }), 400
+    
+    params, errors = validate_job_request(str(job_type), params, upload)
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    try:
+        job = job_manager.submit(job_type, params, upload.stream if upload is not None else None)
+    except UnknownJobTypeError as e:
+        return jsonify({
+            'error': True,
+            'message': str(e),
+            'code': 'VALIDATION_ERROR',
+            'details': {'type': str(e)}
+        }), 400
+    
+    response = jsonify({
+        'success': True,
+        'message': 'Job queued',
+        'job': job
+    })
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    List background jobs, newest first
+    
+    Query Parameters:
+        type (str, optional): Only jobs of this type
+        status (str, optional): Only jobs with this status
+        limit (int, optional): Maximum number of jobs (1-200, default 50)
+    
+    Returns:
+        JSON response with jobs
+    """
+    errors = {}
+    
+    status = request.args.get('status') or None
+    if status and status not in JOB_STATUSES:
+        errors['status'] = f'Status must be one of: {", ".join(JOB_STATUSES)}'
+    
+    limit = request.args.get('limit', 50)
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > MAX_JOB_LIST_SIZE:
+            errors['limit'] = f'Limit must be between 1 and {MAX_JOB_LIST_SIZE}'
+    except (ValueError, TypeError):
+        errors['limit'] = 'Limit must be an integer'
+    
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    jobs = job_manager.list_jobs(request.args.get('type') or None, status, limit)
+    return jsonify({
+        'success': True,
+        'jobs': jobs,
+        'count': len(jobs)
+    })
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get a job's status, progress and result summary
+    
+    Args:
+        job_id (str): Job identifier
+    
+    Returns:
+        JSON response with the job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@jobs_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def download_job_result(job_id):
+    """
+    Download the file produced by a finished job
+    
+    Args:
+        job_id (str): Job identifier
+    
+    Returns:
+        The result file as an attachment
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    
+    path = job_manager.get_result_path(job_id)
+    if path is None:
+        if job['status'] in ('queued', 'running'):
+            return jsonify({
+                'error': True,
+                'message': f'Job {job_id} is still {job["status"]}',
+                'code': 'JOB_NOT_FINISHED'
+            }), 409
+        return jsonify({
+            'error': True,
+            'message': f'Job {job_id} has no result file',
+            'code': 'NO_RESULT_FILE'
+        }), 404
+    
+    extension = os.path.splitext(path)[1].lstrip('.')
+    return send_file(
+        path,
+        mimetype=EXPORT_CONTENT_TYPES.get(extension, 'application/octet-stream'),
+        as_attachment=True,
+        download_name=f"promptlab-{job['type'].replace('_', '-')}-{job_id}.{extension}"
+    )
+
+@jobs_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job
+    
+    Running jobs stop at their next checkpoint; batches an import already
+    wrote are kept.
+    
+    Args:
+        job_id (str): Job identifier
+    
+    Returns:
+        JSON response with the job (202 while cancellation is pending)
+    """
+    if job_manager.get(job_id) is None:
+        return job_not_found(job_id)
+    
+    if not job_manager.cancel(job_id):
+        return jsonify({
+            'error': True,
+            'message': f'Job {job_id} has already finished',
+            'code': 'JOB_FINISHED'
+        }), 409
+    
+    job = job_manager.get(job_id)
+    return jsonify({
+        'success': True,
+        'message': 'Cancellation requested',
+        'job': job
+    }), 200 if job['status'] == 'cancelled' else 202
+
+@jobs_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """
+    Delete a finished job and its result file
+    
+    Args:
+        job_id (str): Job identifier
+    
+    Returns:
+        JSON response confirming deletion
+    """
+    try:
+        deleted = job_manager.delete(job_id)
+    except ValueError as e:
+        return jsonify({
+            'error': True,
+            'message': str(e),
+            'code': 'JOB_ACTIVE'
+        }), 409
+    
+    if not deleted:
+        return job_not_found(job_id)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Job deleted'
+    })
@@ -3,33 +3,228 @@ PromptLab Ollama API Endpoints
 Endpoints for AI model interaction, prompt refinement, and testing
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import yaml
+from backend.config import config
 from backend.services.ollama_service import ollama_service, OllamaConnectionError, OllamaTimeoutError
+from backend.services.ollama_pool import ollama_pool
+from backend.services.batch_service import build_batch_items, run_batch
+from backend.services.test_history import test_run_recorder, build_test_run
+from backend.api.responses import format_sse, handle_ollama_error
 
 # Create Blueprint for Ollama API endpoints
 ollama_bp = Blueprint('ollama', __name__, url_prefix='/api')
 
-def handle_ollama_error(error):
-    """Handle Ollama service errors and return appropriate response"""
-    if isinstance(error, OllamaTimeoutError):
-        return jsonify({
-            'error': True,
-            'message': 'Request to Ollama timed out. Please check your connection and try again.',
-            'code': 'OLLAMA_TIMEOUT'
-        }), 408
-    elif isinstance(error, OllamaConnectionError):
-        return jsonify({
-            'error': True,
-            'message': str(error),
-            'code': 'OLLAMA_CONNECTION_ERROR'
-        }), 503
+# Upper bound on tests expanded from a single batch request
+MAX_BATCH_ITEMS = 1000
+
+# Upper bound on model/temperature combinations in a single comparison
+MAX_COMPARE_ITEMS = 32
+
+def validate_test_request(data):
+    """
+    Validate prompt test request data
+    
+    Args:
+        data (dict): Request body containing system_prompt, user_input,
+            and optional model, temperature and prompt_id
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    errors = {}
+    
+    system_prompt = data.get('system_prompt', '').strip()
+    if not system_prompt:
+        errors['system_prompt'] = 'System prompt is required'
+    elif len(system_prompt) > 50000:
+        errors['system_prompt'] = 'System prompt cannot exceed 50,000 characters'
+    
+    user_input = data.get('user_input', '').strip()
+    if not user_input:
+        errors['user_input'] = 'User input is required'
+    elif len(user_input) > 10000:
+        errors['user_input'] = 'User input cannot exceed 10,000 characters'
+    
+    # Validate optional fields
+    model = data.get('model', '').strip() or None
+    if model and len(model) > 100:
+        errors['model'] = 'Model name cannot exceed 100 characters'
+    
+    temperature = data.get('temperature')
+    if temperature is not None:
+        try:
+            temperature = float(temperature)
+            if temperature < 0.0 or temperature > 2.0:
+                errors['temperature'] = 'Temperature must be between 0.0 and 2.0'
+        except (ValueError, TypeError):
+            errors['temperature'] = 'Temperature must be a valid number'
+    
+    prompt_id = data.get('prompt_id')
+    if prompt_id is not None:
+        if isinstance(prompt_id, bool) or not isinstance(prompt_id, int) or prompt_id < 1:
+            errors['prompt_id'] = 'Prompt ID must be a positive integer'
+    
+    params = {
+        'system_prompt': system_prompt,
+        'user_input': user_input,
+        'model': model,
+        'temperature': temperature,
+        'prompt_id': prompt_id
+    }
+    
+    return params, errors
+
+def validate_batch_request(data):
+    """
+    Validate batch prompt test request data
+    
+    Args:
+        data (dict): Request body containing system_prompt, inputs and
+            optional models, temperatures and concurrency
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    errors = {}
+    
+    system_prompt = data.get('system_prompt', '').strip()
+    if not system_prompt:
+        errors['system_prompt'] = 'System prompt is required'
+    elif len(system_prompt) > 50000:
+        errors['system_prompt'] = 'System prompt cannot exceed 50,000 characters'
+    
+    inputs = data.get('inputs')
+    if not isinstance(inputs, list) or not inputs:
+        errors['inputs'] = 'Inputs must be a non-empty list of strings'
+        inputs = []
     else:
-        return jsonify({
-            'error': True,
-            'message': 'Unexpected error communicating with Ollama',
-            'code': 'OLLAMA_ERROR'
-        }), 500
+        inputs = [item.strip() if isinstance(item, str) else item for item in inputs]
+        if any(not isinstance(item, str) or not item for item in inputs):
+            errors['inputs'] = 'Each input must be a non-empty string'
+        elif any(len(item) > 10000 for item in inputs):
+            errors['inputs'] = 'Each input cannot exceed 10,000 characters'
+    
+    models = data.get('models')
+    if models is not None:
+        if not isinstance(models, list) or any(not isinstance(m, str) or not m.strip() for m in models):
+            errors['models'] = 'Models must be a list of model names'
+        elif any(len(m.strip()) > 100 for m in models):
+            errors['models'] = 'Model name cannot exceed 100 characters'
+        else:
+            models = [m.strip() for m in models]
+    
+    temperatures = data.get('temperatures')
+    if temperatures is not None:
+        try:
+            if not isinstance(temperatures, list):
+                raise TypeError
+            temperatures = [float(t) for t in temperatures]
+            if any(t < 0.0 or t > 2.0 for t in temperatures):
+                errors['temperatures'] = 'Temperatures must be between 0.0 and 2.0'
+        except (ValueError, TypeError):
+            errors['temperatures'] = 'Temperatures must be a list of numbers'
+    
+    concurrency = data.get('concurrency', config.batch_max_concurrency)
+    try:
+        concurrency = int(concurrency)
+        if concurrency < 1:
+            errors['concurrency'] = 'Concurrency must be at least 1'
+        # Never exceed the server-wide limit
+        concurrency = min(concurrency, config.batch_max_concurrency)
+    except (ValueError, TypeError):
+        errors['concurrency'] = 'Concurrency must be an integer'
+    
+    if not errors:
+        item_count = len(inputs) * len(models or [None]) * len(temperatures or [None])
+        if item_count > MAX_BATCH_ITEMS:
+            errors['inputs'] = f'Batch cannot exceed {MAX_BATCH_ITEMS} tests (requested {item_count})'
+    
+    params = {
+        'system_prompt': system_prompt,
+        'inputs': inputs,
+        'models': models,
+        'temperatures': temperatures,
+        'concurrency': concurrency
+    }
+    
+    return params, errors
+
+def validate_compare_request(data):
+    """
+    Validate model comparison request data
+    
+    Args:
+        data (dict): Request body containing system_prompt, user_input,
+            models and optional temperatures
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    params, errors = validate_test_request({
+        'system_prompt': data.get('system_prompt', ''),
+        'user_input': data.get('user_input', '')
+    })
+    
+    models = data.get('models')
+    if not isinstance(models, list) or not models:
+        errors['models'] = 'Models must be a non-empty list of model names'
+        models = []
+    elif any(not isinstance(m, str) or not m.strip() for m in models):
+        errors['models'] = 'Models must be a list of model names'
+    elif any(len(m.strip()) > 100 for m in models):
+        errors['models'] = 'Model name cannot exceed 100 characters'
+    else:
+        # Keep request order but drop repeated names
+        models = list(dict.fromkeys(m.strip() for m in models))
+    
+    temperatures = data.get('temperatures')
+    if temperatures is not None:
+        try:
+            if not isinstance(temperatures, list):
+                raise TypeError
+            temperatures = [float(t) for t in temperatures]
+            if any(t < 0.0 or t > 2.0 for t in temperatures):
+                errors['temperatures'] = 'Temperatures must be between 0.0 and 2.0'
+        except (ValueError, TypeError):
+            errors['temperatures'] = 'Temperatures must be a list of numbers'
+    
+    if not errors:
+        item_count = len(models) * len(temperatures or [None])
+        if item_count > MAX_COMPARE_ITEMS:
+            errors['models'] = f'Comparison cannot exceed {MAX_COMPARE_ITEMS} model/temperature combinations (requested {item_count})'
+    
+    params = {
+        'system_prompt': params['system_prompt'],
+        'user_input': params['user_input'],
+        'models': models,
+        'temperatures': temperatures
+    }
+    
+    return params, errors
+
+def rank_comparison(results):
+    """
+    Order successful comparison results from fastest to slowest
+    
+    Args:
+        results (list): 'result' events from run_batch
+    
+    Returns:
+        list: Model, temperature, latency and tokens/sec per result, by latency
+    """
+    ranking = []
+    for result in sorted(results, key=lambda event: event['latency']):
+        stats = result.get('stats') or {}
+        ranking.append({
+            'model': result['model'],
+            'temperature': result['temperature'],
+            'latency': result['latency'],
+            'tokens_per_second': stats.get('tokens_per_second'),
+            'completion_tokens': stats.get('completion_tokens'),
+            'load_time': stats.get('load_time')
+        })
+    return ranking
 
 @ollama_bp.route('/refine-prompt', methods=['POST'])
 def refine_prompt():
@@ -82,7 +277,7 @@ def refine_prompt():
         target_model = data.get('target_model', '').strip() or None
         
         # Call Ollama service to refine the prompt
-        refined_prompt = ollama_service.refine_prompt(objective, target_model)
+        refined_prompt = ollama_pool.refine_prompt(objective, target_model)
         
         return jsonify({
             'success': True,
@@ -111,9 +306,11 @@ def run_test():
         user_input (str): User message to send with the system prompt
         model (str, optional): Model to use for testing
         temperature (float, optional): Temperature setting (0.0-2.0)
+        prompt_id (int, optional): Saved prompt the test belongs to, for test history
     
     Returns:
-        JSON response with AI response and YAML configuration
+        JSON response with AI response, token counts and timings from Ollama,
+        and YAML configuration
     """
     try:
         # Get JSON data with error handling
@@ -133,35 +330,8 @@ def run_test():
                 'code': 'INVALID_JSON'
             }), 400
         
-        # Validate required fields
-        errors = {}
-        
-        system_prompt = data.get('system_prompt', '').strip()
-        if not system_prompt:
-            errors['system_prompt'] = 'System prompt is required'
-        elif len(system_prompt) > 50000:
-            errors['system_prompt'] = 'System prompt cannot exceed 50,000 characters'
-        
-        user_input = data.get('user_input', '').strip()
-        if not user_input:
-            errors['user_input'] = 'User input is required'
-        elif len(user_input) > 10000:
-            errors['user_input'] = 'User input cannot exceed 10,000 characters'
-        
-        # Validate optional fields
-        model = data.get('model', '').strip() or None
-        if model and len(model) > 100:
-            errors['model'] = 'Model name cannot exceed 100 characters'
-        
-        temperature = data.get('temperature')
-        if temperature is not None:
-            try:
-                temperature = float(temperature)
-                if temperature < 0.0 or temperature > 2.0:
-                    errors['temperature'] = 'Temperature must be between 0.0 and 2.0'
-            except (ValueError, TypeError):
-                errors['temperature'] = 'Temperature must be a valid number'
-        
+        # Validate request fields
+        params, errors = validate_test_request(data)
         if errors:
             return jsonify({
                 'error': True,
@@ -170,8 +340,14 @@ def run_test():
                 'details': errors
             }), 400
         
+        system_prompt = params['system_prompt']
+        user_input = params['user_input']
+        
         # Call Ollama service to test the prompt
-        test_result = ollama_service.test_prompt(system_prompt, user_input, model, temperature)
+        test_result = ollama_pool.test_prompt(system_prompt, user_input, params['model'], params['temperature'])
+        
+        # Queued for the history writer thread, so the response never waits on the database
+        test_run_recorder.record(build_test_run(test_result, system_prompt, user_input, params['prompt_id']))
         
         # Generate YAML configuration
         yaml_config = {
@@ -185,6 +361,13 @@ def run_test():
             }
         }
         
+        stats = test_result.get('stats')
+        if stats:
+            # Only what Ollama reported, so older servers do not produce null fields
+            yaml_config['prompt_configuration']['performance'] = {
+                key: value for key, value in stats.items() if value is not None
+            }
+        
         yaml_string = yaml.dump(yaml_config, default_flow_style=False, sort_keys=False)
         
         return jsonify({
@@ -194,6 +377,9 @@ def run_test():
             'execution_time': test_result['execution_time'],
             'model': test_result['model'],
             'temperature': test_result['temperature'],
+            'stats': test_result.get('stats'),
+            'cached': test_result.get('cached', False),
+            'endpoint': test_result.get('endpoint'),
             'yaml_config': yaml_string
         })
         
@@ -206,6 +392,218 @@ def run_test():
             'code': 'TEST_ERROR'
         }), 500
 
+@ollama_bp.route('/run-test/stream', methods=['POST'])
+def run_test_stream():
+    """
+    Test a system prompt, streaming the response as Server-Sent Events
+    
+    Request Body:
+        system_prompt (str): The system prompt to test
+        user_input (str): User message to send with the system prompt
+        model (str, optional): Model to use for testing
+        temperature (float, optional): Temperature setting (0.0-2.0)
+    
+    Returns:
+        text/event-stream response with 'token' events carrying response text
+        and a final 'done' event with time to first token, tokens/sec and
+        the serving endpoint
+    """
+    try:
+        # Get JSON data with error handling
+        try:
+            data = request.get_json(force=True)
+        except Exception:
+            return jsonify({
+                'error': True,
+                'message': 'Request body must contain valid JSON data',
+                'code': 'INVALID_JSON'
+            }), 400
+            
+        if not data:
+            return jsonify({
+                'error': True,
+                'message': 'Request body must contain JSON data',
+                'code': 'INVALID_JSON'
+            }), 400
+        
+        params, errors = validate_test_request(data)
+        if errors:
+            return jsonify({
+                'error': True,
+                'message': 'Validation failed',
+                'code': 'VALIDATION_ERROR',
+                'details': errors
+            }), 400
+        
+        events = ollama_pool.stream_test_prompt(
+            params['system_prompt'], params['user_input'], params['model'], params['temperature']
+        )
+        
+        # Pull the first event before responding so connection failures
+        # still produce a regular JSON error with a proper status code
+        first_event = next(events)
+        
+    except (OllamaConnectionError, OllamaTimeoutError) as e:
+        return handle_ollama_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to run prompt test',
+            'code': 'TEST_ERROR'
+        }), 500
+    
+    def generate():
+        try:
+            yield format_sse(first_event['type'], first_event)
+            for event in events:
+                yield format_sse(event['type'], event)
+        except OllamaTimeoutError:
+            yield format_sse('error', {
+                'message': 'Request to Ollama timed out. Please check your connection and try again.',
+                'code': 'OLLAMA_TIMEOUT'
+            })
+        except OllamaConnectionError as e:
+            yield format_sse('error', {
+                'message': str(e),
+                'code': 'OLLAMA_CONNECTION_ERROR'
+            })
+        except Exception:
+            yield format_sse('error', {
+                'message': 'Failed to run prompt test',
+                'code': 'TEST_ERROR'
+            })
+        finally:
+            events.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@ollama_bp.route('/run-test/batch', methods=['POST'])
+def run_test_batch():
+    """
+    Test one system prompt against many inputs concurrently
+    
+    Request Body:
+        system_prompt (str): The system prompt to test
+        inputs (list): User messages to test the prompt with
+        models (list, optional): Models to test each input against
+        temperatures (list, optional): Temperatures to test each input with
+        concurrency (int, optional): Maximum tests in flight (capped by config)
+    
+    Returns:
+        text/event-stream response with a 'result' or 'error' event per test
+        as it completes and a final 'summary' event with latency percentiles
+    """
+    # Get JSON data with error handling
+    try:
+        data = request.get_json(force=True)
+    except Exception:
+        return jsonify({
+            'error': True,
+            'message': 'Request body must contain valid JSON data',
+            'code': 'INVALID_JSON'
+        }), 400
+        
+    if not data:
+        return jsonify({
+            'error': True,
+            'message': 'Request body must contain JSON data',
+            'code': 'INVALID_JSON'
+        }), 400
+    
+    params, errors = validate_batch_request(data)
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    items = build_batch_items(params['inputs'], params['models'], params['temperatures'])
+    
+    def generate():
+        events = run_batch(ollama_pool, params['system_prompt'], items, params['concurrency'])
+        try:
+            for event in events:
+                yield format_sse(event['type'], event)
+        finally:
+            events.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@ollama_bp.route('/compare', methods=['POST'])
+def compare_models():
+    """
+    Run one prompt across several models (and temperatures) in parallel
+    
+    Request Body:
+        system_prompt (str): The system prompt to test
+        user_input (str): User message to send with the system prompt
+        models (list): Models to compare
+        temperatures (list, optional): Temperatures to run each model with
+    
+    Returns:
+        text/event-stream response with a 'result' or 'error' event per
+        model/temperature as it completes, carrying latency, token counts,
+        tokens/sec and load time, and a final 'summary' event with a
+        ranking from fastest to slowest
+    """
+    # Get JSON data with error handling
+    try:
+        data = request.get_json(force=True)
+    except Exception:
+        return jsonify({
+            'error': True,
+            'message': 'Request body must contain valid JSON data',
+            'code': 'INVALID_JSON'
+        }), 400
+        
+    if not data:
+        return jsonify({
+            'error': True,
+            'message': 'Request body must contain JSON data',
+            'code': 'INVALID_JSON'
+        }), 400
+    
+    params, errors = validate_compare_request(data)
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Validation failed',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    items = build_batch_items([params['user_input']], params['models'], params['temperatures'])
+    
+    def generate():
+        # Every combination runs at once so the call takes as long as the slowest model
+        events = run_batch(ollama_pool, params['system_prompt'], items, len(items))
+        results = []
+        try:
+            for event in events:
+                if event['type'] == 'result':
+                    results.append(event)
+                elif event['type'] == 'summary':
+                    event['ranking'] = rank_comparison(results)
+                yield format_sse(event['type'], event)
+        finally:
+            events.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @ollama_bp.route('/models', methods=['GET'])
 def get_models():
     """
@@ -298,6 +696,60 @@ def get_cache_info():
             'code': 'CACHE_INFO_ERROR'
         }), 500
 
+@ollama_bp.route('/response-cache', methods=['GET'])
+def get_response_cache_info():
+    """
+    Get information about the prompt test response cache
+    
+    Returns:
+        JSON response with cache statistics, or enabled=false when caching is off
+    """
+    try:
+        if ollama_service.response_cache is None:
+            return jsonify({
+                'success': True,
+                'enabled': False,
+                'message': 'Response cache is disabled'
+            })
+        
+        return jsonify({
+            'success': True,
+            'enabled': True,
+            'message': 'Response cache information retrieved successfully',
+            'cache_info': ollama_service.response_cache.get_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to retrieve response cache information',
+            'code': 'CACHE_INFO_ERROR'
+        }), 500
+
+@ollama_bp.route('/response-cache', methods=['DELETE'])
+def clear_response_cache():
+    """
+    Clear the prompt test response cache
+    
+    Returns:
+        JSON response confirming cache clearance
+    """
+    try:
+        if ollama_service.response_cache is not None:
+            ollama_service.response_cache.clear()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Response cache cleared successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to clear response cache',
+            'code': 'CACHE_CLEAR_ERROR'
+        }), 500
+
 @ollama_bp.route('/ollama/health', methods=['GET'])
 def ollama_health():
     """
@@ -327,4 +779,26 @@ def ollama_health():
             'error': True,
             'message': 'Failed to check Ollama health',
             'code': 'HEALTH_CHECK_ERROR'
+        }), 500
+
+@ollama_bp.route('/ollama/backends', methods=['GET'])
+def get_ollama_backends():
+    """
+    Get routing state for every configured Ollama endpoint
+    
+    Returns:
+        JSON response with the routing strategy and per-backend circuit state, load and models
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'strategy': ollama_pool.strategy,
+            'backends': ollama_pool.get_status()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to get Ollama backend status',
+            'code': 'BACKEND_STATUS_ERROR'
         }), 500
\ No newline at end of file
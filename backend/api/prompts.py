@@ -3,21 +3,52 @@ PromptLab Prompt API Endpoints
 CRUD operations for prompt management with search functionality
 """
 
+import base64
+import difflib
 import json
 from datetime import datetime, timezone
 try:
     import yaml
 except ImportError:
     yaml = None
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, defer, undefer
 from backend.database import get_db_session, close_db_session
 from backend.models.prompt import Prompt
+from backend.models.prompt_body import PromptBody, acquire_bodies, release_bodies, purge_orphan_bodies
+from backend.models.prompt_version import PromptVersion, VERSIONED_FIELDS, record_versions, load_version_body
+from backend.services.search_service import search_prompts, format_snippet, index_prompts, unindex_prompts
+from backend.services.similarity import (
+    DEFAULT_SIMILARITY_THRESHOLD, MIN_SIMILARITY_THRESHOLD, find_similar_prompts, cluster_similar_prompts
+)
+from backend.services.library_export import (
+    EXPORT_FORMATS, EXPORT_CONTENT_TYPES, build_export_metadata, iter_export, buffer_chunks
+)
+from backend.services.library_import import IMPORT_FORMATS, ImportParseError, open_import_stream
+from backend.services.semantic_search import stale_prompts, semantic_search
+from backend.services.ollama_service import OllamaConnectionError, OllamaTimeoutError
+from backend.services.ollama_pool import ollama_pool
+from backend.config import config
+from backend.api.responses import format_sse, handle_ollama_error
 
 # Create Blueprint for prompt API endpoints
 prompts_bp = Blueprint('prompts', __name__, url_prefix='/api')
 
+# Largest page size accepted by GET /api/prompts
+MAX_PAGE_SIZE = 500
+
+# Prompts fetched from the database per round trip while streaming an export
+EXPORT_FETCH_SIZE = 500
+
+# Prompts validated and written per transaction by the streaming import
+IMPORT_BATCH_SIZE = 500
+
+# Per-prompt errors listed in the final event of a streaming import
+MAX_REPORTED_IMPORT_ERRORS = 100
+
 def handle_database_error(error):
     """Handle database errors and return appropriate response"""
     if isinstance(error, IntegrityError):
@@ -89,47 +120,695 @@ def validate_prompt_data(data, required_fields=None):
     
     return errors
 
+@prompts_bp.route('/prompts/duplicates', methods=['GET'])
+def get_duplicate_prompts():
+    """
+    Find prompts whose system prompts are identical
+    
+    Bodies are content-addressed, so duplicates are read from the
+    reference counts of the body store instead of comparing prompts.
+    
+    Query Parameters:
+        limit (int): Maximum groups returned (1-500, default 100)
+    
+    Returns:
+        JSON response with groups of prompts sharing a body, largest first
+    """
+    limit = request.args.get('limit', 100)
+    try:
+        limit = int(limit)
+        error = None if 1 <= limit <= MAX_PAGE_SIZE else f'Limit must be between 1 and {MAX_PAGE_SIZE}'
+    except (ValueError, TypeError):
+        error = 'Limit must be an integer'
+    
+    if error:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': {'limit': error}
+        }), 400
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        shared = session.query(PromptBody).filter(PromptBody.ref_count > 1)
+        total_groups, redundant_copies = shared.with_entities(
+            func.count(PromptBody.hash), func.coalesce(func.sum(PromptBody.ref_count - 1), 0)
+        ).one()
+        
+        groups = {}
+        for body_hash, length in (shared.with_entities(PromptBody.hash, func.length(func.inflate_text(PromptBody.body)))
+                                  .order_by(PromptBody.ref_count.desc(), PromptBody.hash)
+                                  .limit(limit)):
+            groups[body_hash] = {'hash': body_hash, 'length': length, 'prompts': []}
+        
+        members = (session.query(Prompt.id, Prompt.name, Prompt.body_hash)
+                   .filter(Prompt.body_hash.in_(list(groups)))
+                   .order_by(Prompt.name, Prompt.id))
+        for prompt_id, name, body_hash in members:
+            groups[body_hash]['prompts'].append({'id': prompt_id, 'name': name})
+        
+        group_list = []
+        for group in groups.values():
+            group['count'] = len(group['prompts'])
+            group_list.append(group)
+        
+        return jsonify({
+            'success': True,
+            'groups': group_list,
+            'count': len(group_list),
+            'total_groups': total_groups,
+            'redundant_copies': redundant_copies
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to find duplicate prompts',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+def parse_similarity_params(args):
+    """
+    Parse the threshold and limit query parameters of similarity endpoints
+    
+    Args:
+        args: Request query arguments
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    errors = {}
+    
+    threshold = args.get('threshold', DEFAULT_SIMILARITY_THRESHOLD)
+    try:
+        threshold = float(threshold)
+        if not MIN_SIMILARITY_THRESHOLD <= threshold <= 1.0:
+            errors['threshold'] = f'Threshold must be between {MIN_SIMILARITY_THRESHOLD} and 1.0'
+    except (ValueError, TypeError):
+        errors['threshold'] = 'Threshold must be a number'
+    
+    limit = args.get('limit', 100)
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            errors['limit'] = f'Limit must be between 1 and {MAX_PAGE_SIZE}'
+    except (ValueError, TypeError):
+        errors['limit'] = 'Limit must be an integer'
+    
+    return {'threshold': threshold, 'limit': limit}, errors
+
+@prompts_bp.route('/prompts/<int:prompt_id>/similar', methods=['GET'])
+def get_similar_prompts(prompt_id):
+    """
+    Find prompts with system prompts similar to a prompt's
+    
+    Path Parameters:
+        prompt_id (int): ID of the prompt to compare against
+    
+    Query Parameters:
+        threshold (float): Minimum estimated similarity (0.5-1.0, default 0.8)
+        limit (int): Maximum prompts returned (1-500, default 100)
+    
+    Returns:
+        JSON response with similar prompts, most similar first
+    """
+    params, errors = parse_similarity_params(request.args)
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        prompt = session.query(Prompt).filter(Prompt.id == prompt_id).first()
+        if not prompt:
+            return jsonify({
+                'error': True,
+                'message': 'Prompt not found',
+                'code': 'NOT_FOUND'
+            }), 404
+        
+        similar = find_similar_prompts(session, prompt, params['threshold'], params['limit'])
+        return jsonify({
+            'success': True,
+            'prompt': prompt.to_dict(['id', 'name']),
+            'similar': similar,
+            'count': len(similar),
+            'threshold': params['threshold']
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to find similar prompts',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+@prompts_bp.route('/prompts/near-duplicates', methods=['GET'])
+def get_near_duplicate_prompts():
+    """
+    Group the library into clusters of near-duplicate prompts
+    
+    Query Parameters:
+        threshold (float): Minimum estimated similarity linking two prompts (0.5-1.0, default 0.8)
+        limit (int): Maximum clusters returned (1-500, default 100)
+    
+    Returns:
+        JSON response with clusters, largest first
+    """
+    params, errors = parse_similarity_params(request.args)
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        clusters = cluster_similar_prompts(session, params['threshold'])
+        return jsonify({
+            'success': True,
+            'clusters': clusters[:params['limit']],
+            'count': min(len(clusters), params['limit']),
+            'total_clusters': len(clusters),
+            'threshold': params['threshold']
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to cluster prompts',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+@prompts_bp.route('/prompts/semantic-search', methods=['GET'])
+def search_prompts_semantic():
+    """
+    Search prompts by meaning using Ollama embeddings
+    
+    Only the query is embedded, so latency does not depend on how many
+    prompts changed. Prompts added or changed since they were last
+    embedded are not matched until an 'embed' background job has run;
+    'pending' counts them.
+    
+    Query Parameters:
+        query (str): What the prompt should do, in plain words
+        limit (int): Maximum prompts returned (1-100, default 20)
+        min_score (float): Minimum cosine similarity (0.0-1.0, default 0.0)
+    
+    Returns:
+        JSON response with matching prompts and their scores, best match first
+    """
+    errors = {}
+    
+    query = request.args.get('query', '').strip()
+    if not query:
+        errors['query'] = 'Query is required'
+    elif len(query) > 1000:
+        errors['query'] = 'Query cannot exceed 1,000 characters'
+    
+    limit = request.args.get('limit', 20)
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > 100:
+            errors['limit'] = 'Limit must be between 1 and 100'
+    except (ValueError, TypeError):
+        errors['limit'] = 'Limit must be an integer'
+    
+    min_score = request.args.get('min_score', 0.0)
+    try:
+        min_score = float(min_score)
+        if not 0.0 <= min_score <= 1.0:
+            errors['min_score'] = 'Minimum score must be between 0.0 and 1.0'
+    except (ValueError, TypeError):
+        errors['min_score'] = 'Minimum score must be a number'
+    
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    model = config.embedding_model
+    session = None
+    try:
+        session = get_db_session()
+        
+        query_vector = ollama_pool.embed([query], model)[0]
+        results = semantic_search(session, query_vector, model, limit, min_score)
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'model': model,
+            'results': results,
+            'count': len(results),
+            'pending': stale_prompts(session, model).count()
+        })
+        
+    except (OllamaConnectionError, OllamaTimeoutError) as e:
+        return handle_ollama_error(e)
+    except SQLAlchemyError as e:
+        if session:
+            session.rollback()
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to search prompts',
+            'code': 'SEARCH_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+def prompt_not_found():
+    """Return the response for an unknown prompt"""
+    return jsonify({
+        'error': True,
+        'message': 'Prompt not found',
+        'code': 'NOT_FOUND'
+    }), 404
+
+def version_not_found(version):
+    """Return the response for an unknown prompt version"""
+    return jsonify({
+        'error': True,
+        'message': f'Version {version} not found',
+        'code': 'VERSION_NOT_FOUND'
+    }), 404
+
+@prompts_bp.route('/prompts/<int:prompt_id>/versions', methods=['GET'])
+def get_prompt_versions(prompt_id):
+    """
+    List the saved versions of a prompt, newest first
+    
+    Path Parameters:
+        prompt_id (int): ID of the prompt
+    
+    Query Parameters:
+        limit (int): Maximum versions returned (1-500, default 100)
+    
+    Returns:
+        JSON response with version metadata; system prompt text is fetched per version
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+        limit_error = None if 1 <= limit <= MAX_PAGE_SIZE else f'Limit must be between 1 and {MAX_PAGE_SIZE}'
+    except (ValueError, TypeError):
+        limit_error = 'Limit must be an integer'
+    
+    if limit_error:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': {'limit': limit_error}
+        }), 400
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        prompt = session.query(Prompt).options(load_only(Prompt.id, Prompt.name)).filter(Prompt.id == prompt_id).first()
+        if not prompt:
+            return prompt_not_found()
+        
+        total = session.query(func.count(PromptVersion.id)).filter(PromptVersion.prompt_id == prompt_id).scalar()
+        rows = (session.query(PromptVersion, func.length(PromptVersion.body_data))
+                .options(defer(PromptVersion.body_data))
+                .filter(PromptVersion.prompt_id == prompt_id)
+                .order_by(PromptVersion.version.desc())
+                .limit(limit)
+                .all())
+        versions = [dict(version.to_dict(), stored_bytes=stored_bytes) for version, stored_bytes in rows]
+        
+        return jsonify({
+            'success': True,
+            'prompt': prompt.to_dict(['id', 'name']),
+            'versions': versions,
+            'count': len(versions),
+            'total': total
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to retrieve prompt versions',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+@prompts_bp.route('/prompts/<int:prompt_id>/versions/<int:version>', methods=['GET'])
+def get_prompt_version(prompt_id, version):
+    """
+    Get one version of a prompt with its system prompt text
+    
+    Path Parameters:
+        prompt_id (int): ID of the prompt
+        version (int): Version number
+    
+    Returns:
+        JSON response with the version
+    """
+    session = None
+    try:
+        session = get_db_session()
+        
+        record = (session.query(PromptVersion)
+                  .options(defer(PromptVersion.body_data))
+                  .filter(PromptVersion.prompt_id == prompt_id, PromptVersion.version == version)
+                  .first())
+        if not record:
+            if not session.query(Prompt.id).filter(Prompt.id == prompt_id).first():
+                return prompt_not_found()
+            return version_not_found(version)
+        
+        return jsonify({
+            'success': True,
+            'version': dict(record.to_dict(), system_prompt=load_version_body(session, prompt_id, version))
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to retrieve prompt version',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+@prompts_bp.route('/prompts/<int:prompt_id>/versions/diff', methods=['GET'])
+def diff_prompt_versions(prompt_id):
+    """
+    Compare two versions of a prompt
+    
+    Path Parameters:
+        prompt_id (int): ID of the prompt
+    
+    Query Parameters:
+        from (int): Older version (defaults to the version before 'to')
+        to (int): Newer version (defaults to the latest version)
+    
+    Returns:
+        JSON response with changed fields (the system prompt by length) and a
+        unified diff of the system prompt text
+    """
+    errors = {}
+    versions = {}
+    for param in ('from', 'to'):
+        value = request.args.get(param)
+        if value is None:
+            continue
+        try:
+            versions[param] = int(value)
+            if versions[param] < 1:
+                errors[param] = 'Version must be a positive integer'
+        except (ValueError, TypeError):
+            errors[param] = 'Version must be an integer'
+    
+    if errors:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid query parameters',
+            'code': 'VALIDATION_ERROR',
+            'details': errors
+        }), 400
+    
+    session = None
+    try:
+        session = get_db_session()
+        
+        if not session.query(Prompt.id).filter(Prompt.id == prompt_id).first():
+            return prompt_not_found()
+        
+        if 'to' not in versions:
+            versions['to'] = session.query(func.max(PromptVersion.version)).filter(
+                PromptVersion.prompt_id == prompt_id).scalar() or 1
+        if 'from' not in versions:
+            versions['from'] = max(versions['to'] - 1, 1)
+        
+        records = {}
+        for param, number in versions.items():
+            record = (session.query(PromptVersion)
+                      .options(defer(PromptVersion.body_data))
+                      .filter(PromptVersion.prompt_id == prompt_id, PromptVersion.version == number)
+                      .first())
+            if not record:
+                return version_not_found(number)
+            records[param] = record
+        
+        old, new = records['from'], records['to']
+        changes = {
+            field: {'from': getattr(old, field), 'to': getattr(new, field)}
+            for field in VERSIONED_FIELDS if getattr(old, field) != getattr(new, field)
+        }
+        
+        diff = ''
+        if old.body_hash != new.body_hash:
+            # Every line ends in a newline so the last lines stay separate in the diff
+            diff = ''.join(difflib.unified_diff(
+                [line + '\n' for line in load_version_body(session, prompt_id, old.version).splitlines()],
+                [line + '\n' for line in load_version_body(session, prompt_id, new.version).splitlines()],
+                fromfile=f'version {old.version}', tofile=f'version {new.version}'
+            ))
+            changes['system_prompt'] = {'from_length': old.body_length, 'to_length': new.body_length}
+        
+        return jsonify({
+            'success': True,
+            'from': old.version,
+            'to': new.version,
+            'changes': changes,
+            'diff': diff
+        })
+        
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return jsonify({
+            'error': True,
+            'message': 'Failed to compare prompt versions',
+            'code': 'RETRIEVAL_ERROR'
+        }), 500
+    finally:
+        if session:
+            close_db_session(session)
+
+def parse_list_params(args):
+    """
+    Parse pagination and projection query parameters for the prompt list
+    
+    Args:
+        args: Request query arguments
+    
+    Returns:
+        tuple: (parsed parameters dict, validation errors dict)
+    """
+    errors = {}
+    
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                errors['limit'] = f'Limit must be between 1 and {MAX_PAGE_SIZE}'
+        except (ValueError, TypeError):
+            errors['limit'] = 'Limit must be an integer'
+    
+    cursor = None
+    cursor_token = args.get('cursor')
+    if cursor_token:
+        try:
+            cursor = decode_cursor(cursor_token)
+        except ValueError:
+            errors['cursor'] = 'Cursor is invalid or expired'
+    
+    fields = None
+    fields_param = args.get('fields')
+    if fields_param:
+        fields = [field.strip() for field in fields_param.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in Prompt.SERIALIZABLE_FIELDS]
+        if unknown:
+            errors['fields'] = f'Unknown fields: {", ".join(unknown)}'
+        elif 'id' not in fields:
+            fields.insert(0, 'id')
+    
+    params = {
+        'limit': limit,
+        'cursor': cursor,
+        'fields': fields
+    }
+    
+    return params, errors
+
+def encode_cursor(data):
+    """Encode a pagination position as an opaque URL-safe token"""
+    payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_cursor(token):
+    """Decode a pagination token produced by encode_cursor"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception:
+        raise ValueError('Malformed cursor')
+    
+    if not isinstance(data, dict):
+        raise ValueError('Malformed cursor')
+    if 'offset' in data:
+        if not isinstance(data['offset'], int) or data['offset'] < 0:
+            raise ValueError('Malformed cursor')
+    elif not isinstance(data.get('name'), str) or not isinstance(data.get('id'), int):
+        raise ValueError('Malformed cursor')
+    return data
+
 @prompts_bp.route('/prompts', methods=['GET'])
 def get_prompts():
     """
-    Get all prompts with optional search functionality
+    Get prompts with optional search, pagination and field projection
     
     Query Parameters:
-        search (str): Search term to filter prompts by name and description
+        search (str): Search term matched against name, description and
+            system prompt; results are ranked by relevance and include a
+            highlighted 'search_snippet'
+        limit (int): Page size (1-500); when omitted all prompts are returned
+        cursor (str): Opaque 'next_cursor' from a previous page
+        fields (str): Comma-separated fields to return, e.g.
+            'id,name,model,updated_at'; other columns are not loaded
     
     Returns:
-        JSON response with list of prompts
+        JSON response with list of prompts, plus 'next_cursor' when paginating.
+        The X-Total-Count header carries the number of matching prompts.
     """
     session = None
     try:
+        params, errors = parse_list_params(request.args)
+        if errors:
+            return jsonify({
+                'error': True,
+                'message': 'Invalid query parameters',
+                'code': 'VALIDATION_ERROR',
+                'details': errors
+            }), 400
+        
+        limit = params['limit']
+        cursor = params['cursor']
+        fields = params['fields']
+        
         session = get_db_session()
         
         # Get search parameter
         search_term = request.args.get('search', '').strip()
         
-        # Build query
-        query = session.query(Prompt)
+        # Use the ranked full-text index when available
+        query = search_prompts(session, search_term) if search_term else None
+        ranked = query is not None
         
-        # Apply search filter if provided
-        if search_term:
-            # Case-insensitive search across name and description
-            search_filter = f"%{search_term}%"
-            query = query.filter(
-                (Prompt.name.ilike(search_filter)) |
-                (Prompt.description.ilike(search_filter))
-            )
+        if not ranked:
+            # Build query
+            query = session.query(Prompt)
+            
+            # Apply search filter if provided
+            if search_term:
+                # Case-insensitive search across name and description
+                search_filter = f"%{search_term}%"
+                query = query.filter(
+                    (Prompt.name.ilike(search_filter)) |
+                    (func.inflate_text(Prompt.description).ilike(search_filter))
+                )
+        
+        total_count = None
+        if limit is not None:
+            total_count = query.with_entities(func.count(Prompt.id)).order_by(None).scalar()
+        
+        # Only load the requested columns
+        if fields:
+            columns = [getattr(Prompt, field) for field in fields]
+            query = query.options(load_only(*columns))
+        else:
+            query = query.options(undefer(Prompt.system_prompt))
+        
+        if ranked:
+            # Relevance order cannot be keyed on columns, so page by offset
+            offset = cursor.get('offset', 0) if cursor else 0
+            if limit is not None:
+                query = query.offset(offset).limit(limit + 1)
+            rows = query.all()
+        else:
+            # Keyset pagination on (name, id) stays fast at any depth
+            if cursor:
+                query = query.filter(tuple_(Prompt.name, Prompt.id) > (cursor.get('name', ''), cursor.get('id', 0)))
+            
+            # Order by name for consistent results
+            query = query.order_by(Prompt.name, Prompt.id)
+            if limit is not None:
+                query = query.limit(limit + 1)
+            rows = [(prompt, None) for prompt in query.all()]
         
-        # Order by name for consistent results
-        prompts = query.order_by(Prompt.name).all()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            if ranked:
+                next_cursor = encode_cursor({'offset': offset + limit})
+            else:
+                last_prompt = rows[-1][0]
+                next_cursor = encode_cursor({'name': last_prompt.name, 'id': last_prompt.id})
         
         # Convert to dictionaries
-        prompt_list = [prompt.to_dict() for prompt in prompts]
+        prompt_list = []
+        for prompt, snippet in rows:
+            prompt_data = prompt.to_dict(fields)
+            if ranked:
+                prompt_data['search_snippet'] = format_snippet(snippet)
+            prompt_list.append(prompt_data)
         
-        return jsonify({
+        response_data = {
             'success': True,
             'prompts': prompt_list,
             'count': len(prompt_list)
-        })
+        }
+        if limit is not None:
+            response_data['next_cursor'] = next_cursor
+        
+        response = jsonify(response_data)
+        response.headers['X-Total-Count'] = str(total_count if total_count is not None else len(prompt_list))
+        return response
         
     except SQLAlchemyError as e:
         return handle_database_error(e)
@@ -352,7 +1031,7 @@ def delete_prompt(prompt_id):
         session = get_db_session()
         
         # Find existing prompt
-        prompt = session.query(Prompt).filter(Prompt.id == prompt_id).first()
+        prompt = session.query(Prompt).options(undefer(Prompt.system_prompt)).filter(Prompt.id == prompt_id).first()
         if not prompt:
             return jsonify({
                 'error': True,
@@ -420,16 +1099,11 @@ def export_library():
         session = get_db_session()
         
         # Get all prompts
-        prompts = session.query(Prompt).order_by(Prompt.name).all()
+        prompts = session.query(Prompt).options(undefer(Prompt.system_prompt)).order_by(Prompt.name).all()
         
         # Create export data structure
         export_data = {
-            'metadata': {
-                'export_timestamp': datetime.now(timezone.utc).isoformat(),
-                'total_prompts': len(prompts),
-                'format_version': '1.0',
-                'exported_by': 'PromptLab'
-            },
+            'metadata': build_export_metadata(len(prompts)),
             'prompts': [prompt.to_dict() for prompt in prompts]
         }
         
@@ -481,6 +1155,67 @@ def export_library():
         if session:
             close_db_session(session)
 
+def iter_library(session):
+    """
+    Read every prompt in export order, a batch of rows at a time
+    
+    Args:
+        session: Database session
+    
+    Yields:
+        dict: Prompt dictionaries ordered by name
+    """
+    query = (session.query(Prompt).options(undefer(Prompt.system_prompt))
+             .order_by(Prompt.name, Prompt.id).yield_per(EXPORT_FETCH_SIZE))
+    for prompt in query:
+        yield prompt.to_dict()
+
+@prompts_bp.route('/export-library', methods=['GET'])
+def download_library():
+    """
+    Download all prompts as a file, serialized and sent as they are read
+    
+    Unlike POST /api/export-library, the library is never held in memory as
+    a whole: prompts are read in batches and written to the response in
+    chunks, so memory use stays flat regardless of library size.
+    
+    Query Parameters:
+        format (str, optional): 'json', 'yaml' or 'ndjson' (default: 'json')
+    
+    Returns:
+        Streamed file download in the requested format
+    """
+    export_format = request.args.get('format', 'json').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid export format. Must be "json", "yaml" or "ndjson"',
+            'code': 'INVALID_FORMAT'
+        }), 400
+    
+    if export_format == 'yaml' and yaml is None:
+        return jsonify({
+            'error': True,
+            'message': 'YAML support not available',
+            'code': 'YAML_NOT_AVAILABLE'
+        }), 500
+    
+    def generate():
+        session = get_db_session()
+        try:
+            # Count and rows are read in one transaction, so the metadata matches the contents
+            total = session.query(func.count(Prompt.id)).scalar()
+            yield from buffer_chunks(iter_export(iter_library(session), build_export_metadata(total), export_format))
+        finally:
+            close_db_session(session)
+    
+    filename = f"promptlab-library-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_CONTENT_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @prompts_bp.route('/import-library', methods=['POST'])
 def import_library():
     """
@@ -701,6 +1436,88 @@ def import_library():
         if session:
             close_db_session(session)
 
+@prompts_bp.route('/import-library/stream', methods=['POST'])
+def stream_import_library():
+    """
+    Import a library file of any size, reporting progress as Server-Sent Events
+    
+    The file is parsed incrementally and written in batches with bulk
+    INSERT statements (INSERT ... ON CONFLICT for the overwrite strategy).
+    Each batch is committed on its own, so batches reported in 'progress'
+    events are kept even if a later part of the file fails to parse.
+    
+    Query Parameters:
+        conflict_resolution (str, optional): 'skip', 'overwrite' or 'rename' (default: 'skip')
+        format (str, optional): 'json', 'ndjson' or 'yaml' (detected if not provided)
+    
+    Request Body:
+        The library file, sent raw or as the 'file' field of a multipart upload
+    
+    Returns:
+        Event stream with a 'progress' event per batch and a final 'done' or 'error' event
+    """
+    conflict_resolution = request.args.get('conflict_resolution', 'skip').lower()
+    if conflict_resolution not in ['skip', 'overwrite', 'rename']:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid conflict_resolution. Must be "skip", "overwrite", or "rename"',
+            'code': 'INVALID_CONFLICT_RESOLUTION'
+        }), 400
+    
+    data_format = request.args.get('format', '').lower() or None
+    if data_format and data_format not in IMPORT_FORMATS:
+        return jsonify({
+            'error': True,
+            'message': 'Invalid import format. Must be "json", "ndjson" or "yaml"',
+            'code': 'INVALID_FORMAT'
+        }), 400
+    
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({
+                'error': True,
+                'message': 'Multipart uploads must contain a "file" field',
+                'code': 'MISSING_IMPORT_DATA'
+            }), 400
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+    
+    try:
+        prompts = open_import_stream(stream, data_format, filename, content_type)
+    except ImportParseError as e:
+        return jsonify({
+            'error': True,
+            'message': str(e),
+            'code': e.code
+        }), 400
+    
+    def generate():
+        session = get_db_session()
+        events = import_prompt_batches(session, prompts, conflict_resolution, IMPORT_BATCH_SIZE)
+        try:
+            for event in events:
+                yield format_sse(event['type'], event)
+        except ImportParseError as e:
+            session.rollback()
+            yield format_sse('error', {'type': 'error', 'message': str(e), 'code': e.code})
+        except SQLAlchemyError as e:
+            session.rollback()
+            yield format_sse('error', {'type': 'error', 'message': 'Database operation failed', 'code': 'DATABASE_ERROR'})
+        except Exception:
+            session.rollback()
+            yield format_sse('error', {'type': 'error', 'message': 'Failed to import library', 'code': 'IMPORT_ERROR'})
+        finally:
+            events.close()
+            close_db_session(session)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 def validate_imported_prompt_data(prompt_data):
     """
     Validate imported prompt data structure and content
@@ -783,4 +1600,163 @@ def generate_unique_name(original_name, existing_prompts):
         candidate_name = f"{base_name} ({counter})"
         if candidate_name.lower() not in existing_prompts:
             return candidate_name
-        counter += 1
\ No newline at end of file
+        counter += 1
+
+def build_import_row(prompt_data):
+    """
+    Validate an imported prompt and convert it to a prompts table row
+    
+    Runs the same checks as the model, without creating a session-bound object.
+    
+    Args:
+        prompt_data: Prompt entry from an import file
+    
+    Returns:
+        tuple: (row dict or None, list of validation errors)
+    """
+    if not isinstance(prompt_data, dict):
+        return None, ['Prompt entry must be an object']
+    
+    errors = validate_imported_prompt_data(prompt_data)
+    if errors:
+        return None, errors
+    
+    try:
+        prompt = Prompt(
+            name=prompt_data['name'],
+            system_prompt=prompt_data['system_prompt'],
+            model=prompt_data.get('model', 'llama2'),
+            temperature=prompt_data.get('temperature', 0.7),
+            description=prompt_data.get('description')
+        )
+    except ValueError as e:
+        return None, [str(e)]
+    
+    return {
+        'name': prompt.name,
+        'system_prompt': prompt.system_prompt,
+        'body_hash': prompt.body_hash,
+        'model': prompt.model,
+        'temperature': float(prompt.temperature),
+        'description': prompt.description
+    }, []
+
+def write_import_batch(session, rows, overwrite):
+    """
+    Insert a batch of prompt rows and refresh their search index entries
+    
+    Args:
+        session: Database session
+        rows (list): Rows from build_import_row
+        overwrite (bool): Update prompts whose name already exists instead of failing
+    """
+    # A name repeated within a batch is upserted once, keeping the last entry like sequential writes would
+    rows = list({row['name']: row for row in rows}.values())
+    
+    now = datetime.now(timezone.utc)
+    bodies = []
+    for row in rows:
+        bodies.append((row['body_hash'], row.pop('system_prompt')))
+        row['created_at'] = now
+        row['updated_at'] = now
+    
+    # Bulk statements skip the ORM events that maintain prompt bodies and the full-text index
+    connection = session.connection()
+    names = [row['name'] for row in rows]
+    acquire_bodies(connection, bodies)
+    
+    statement = sqlite_insert(Prompt.__table__)
+    if overwrite:
+        existing_ids = [prompt_id for (prompt_id,) in session.query(Prompt.id).filter(Prompt.name.in_(names))]
+        # Overwritten prompts leave the index while their old text is still stored
+        unindex_prompts(connection, existing_ids)
+        release_bodies(connection, existing_ids)
+        statement = statement.on_conflict_do_update(
+            index_elements=['name'],
+            set_={column: statement.excluded[column]
+                  for column in ('description', 'body_hash', 'model', 'temperature', 'updated_at')}
+        )
+    session.execute(statement, rows)
+    
+    prompt_ids = [prompt_id for (prompt_id,) in session.query(Prompt.id).filter(Prompt.name.in_(names))]
+    # Versions are recorded while overwritten bodies are still stored
+    record_versions(connection, prompt_ids)
+    if overwrite:
+        purge_orphan_bodies(connection)
+    index_prompts(connection, prompt_ids)
+    
+    session.commit()
+
+def import_prompt_batches(session, prompts, conflict_resolution, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate and write imported prompts in batches
+    
+    Only existing prompt names are loaded for conflict detection, and rows
+    are written with Core statements, so no ORM objects accumulate.
+    
+    Args:
+        session: Database session
+        prompts: Iterable of prompt entries, typically from open_import_stream
+        conflict_resolution (str): 'skip', 'overwrite' or 'rename'
+        batch_size (int): Prompts processed per transaction
+    
+    Yields:
+        dict: 'progress' events with running counts after each batch, then
+            one 'done' event with the final counts and the first per-prompt errors
+    
+    Raises:
+        ImportParseError: If the import file turns out to be malformed
+        SQLAlchemyError: If a batch cannot be written
+    """
+    # Lowercase name -> stored name, for case-insensitive conflict detection
+    existing_names = {name.lower(): name for (name,) in session.query(Prompt.name).yield_per(EXPORT_FETCH_SIZE)}
+    
+    counts = {
+        'total_processed': 0,
+        'imported': 0,
+        'skipped': 0,
+        'overwritten': 0,
+        'renamed': 0,
+        'errors': 0
+    }
+    errors = []
+    batch = []
+    
+    for prompt_data in prompts:
+        counts['total_processed'] += 1
+        row, validation_errors = build_import_row(prompt_data)
+        
+        if validation_errors:
+            counts['errors'] += 1
+            if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                name = prompt_data.get('name', 'Unknown') if isinstance(prompt_data, dict) else 'Unknown'
+                errors.append({'name': name, 'errors': validation_errors})
+        else:
+            name_lower = row['name'].lower()
+            if name_lower not in existing_names:
+                counts['imported'] += 1
+            elif conflict_resolution == 'skip':
+                row = None
+                counts['skipped'] += 1
+            elif conflict_resolution == 'overwrite':
+                row['name'] = existing_names[name_lower]
+                counts['overwritten'] += 1
+            else:
+                row['name'] = generate_unique_name(row['name'], existing_names)
+                counts['renamed'] += 1
+                counts['imported'] += 1
+            
+            if row is not None:
+                existing_names[row['name'].lower()] = row['name']
+                batch.append(row)
+        
+        if counts['total_processed'] % batch_size == 0:
+            if batch:
+                write_import_batch(session, batch, conflict_resolution == 'overwrite')
+                batch = []
+            yield {'type': 'progress', 'summary': dict(counts)}
+    
+    if batch:
+        write_import_batch(session, batch, conflict_resolution == 'overwrite')
+    
+    yield {'type': 'done', 'summary': counts, 'errors': errors}
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+PromptLab API Response Helpers
+Response formatting shared by the API blueprints
+"""
+
+import json
+from flask import jsonify
+from backend.services.ollama_service import OllamaConnectionError, OllamaTimeoutError
+
+def format_sse(event, data):
+    """Format a payload as a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def handle_ollama_error(error):
+    """Handle Ollama service errors and return appropriate response"""
+    if isinstance(error, OllamaTimeoutError):
+        return jsonify({
+            'error': True,
+            'message': 'Request to Ollama timed out. Please check your connection and try again.',
+            'code': 'OLLAMA_TIMEOUT'
+        }), 408
+    elif isinstance(error, OllamaConnectionError):
+        return jsonify({
+            'error': True,
+            'message': str(error),
+            'code': 'OLLAMA_CONNECTION_ERROR'
+        }), 503
+    else:
+        return jsonify({
+            'error': True,
+            'message': 'Unexpected error communicating with Ollama',
+            'code': 'OLLAMA_ERROR'
+        }), 500
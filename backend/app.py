@@ -3,16 +3,22 @@ PromptLab Backend Application
 Main Flask application with CORS configuration, enhanced logging, and health checks
 """
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, send_from_directory, jsonify, request, g, Response
 from flask_cors import CORS
 import os
+import time
 import logging
 from datetime import datetime
 from backend.database import init_database
 from backend.api.prompts import prompts_bp
 from backend.api.ollama import ollama_bp
 from backend.api.config import config_bp
+from backend.api.chat import chat_bp
+from backend.api.history import history_bp
+from backend.api.jobs import jobs_bp
 from backend.config import config
+from backend.services import metrics
+from backend.services.health_monitor import health_monitor, is_live_request
 
 def create_app():
     """Create and configure the Flask application with enhanced features"""
@@ -43,35 +49,54 @@ def create_app():
     app.register_blueprint(prompts_bp)
     app.register_blueprint(ollama_bp)
     app.register_blueprint(config_bp)
+    app.register_blueprint(chat_bp)
+    app.register_blueprint(history_bp)
+    app.register_blueprint(jobs_bp)
     
-    # Enhanced health check endpoint with system status
+    # Request latency metrics, labelled by route template to bound cardinality
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        start_time = g.pop('request_start_time', None)
+        if start_time is not None:
+            labels = {
+                'blueprint': request.blueprint or 'app',
+                'route': request.url_rule.rule if request.url_rule else 'unmatched',
+                'method': request.method,
+                'status': response.status_code
+            }
+            # Streamed bodies are still being generated here, so stop the timer
+            # once the server has finished sending the response
+            response.call_on_close(
+                lambda: metrics.http_request_duration.observe(time.perf_counter() - start_time, **labels)
+            )
+        return response
+    
+    @app.route('/api/metrics')
+    def metrics_endpoint():
+        """Expose application metrics in Prometheus text format"""
+        return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+    
+    # Health check endpoint answered from the background monitor's snapshot
     @app.route('/api/health')
     def health_check():
-        """Comprehensive health check with system information"""
+        """
+        Health check with database and Ollama status
+        
+        Query Parameters:
+            live (str): '1' to probe now instead of returning the cached snapshot
+        """
         try:
-            # Check database connectivity
-            from backend.database import get_db_connection
-            from sqlalchemy import text
-            db_status = "healthy"
-            try:
-                conn = get_db_connection()
-                conn.execute(text("SELECT 1")).fetchone()
-                conn.close()
-            except Exception as e:
-                db_status = f"error: {str(e)}"
-            
-            # Check Ollama connectivity
-            ollama_status = "unknown"
-            try:
-                import requests
-                response = requests.get(f"{config.ollama_endpoint}/api/tags", timeout=2)
-                if response.status_code == 200:
-                    models = response.json().get('models', [])
-                    ollama_status = f"healthy ({len(models)} models)"
-                else:
-                    ollama_status = f"error: HTTP {response.status_code}"
-            except Exception as e:
-                ollama_status = f"error: {str(e)}"
+            # Serve the cached snapshot while the monitor is running, otherwise probe now
+            snapshot = None
+            if health_monitor.is_running and not is_live_request(request.args):
+                snapshot = health_monitor.get_snapshot()
+            cached = snapshot is not None
+            if snapshot is None:
+                snapshot = health_monitor.probe()
             
             return jsonify({
                 'status': 'healthy',
@@ -79,9 +104,16 @@ def create_app():
                 'timestamp': datetime.now().isoformat(),
                 'version': '1.0.0',
                 'components': {
-                    'database': db_status,
-                    'ollama': ollama_status
+                    'database': snapshot['database']['status'],
+                    'ollama': snapshot['ollama']['status']
+                },
+                'checks': {
+                    'database': snapshot['database'],
+                    'ollama': snapshot['ollama']
                 },
+                'cached': cached,
+                'checked_at': snapshot['checked_at'],
+                'snapshot_age_seconds': snapshot['age_seconds'],
                 'config': {
                     'ollama_endpoint': config.ollama_endpoint,
                     'database_path': config.database_path,
@@ -0,0 +1,519 @@
+"""
+PromptLab Benchmark Harness
+Drives the real Flask app with concurrent clients against a local fake Ollama server
+
+Usage:
+    python -m backend.bench --clients 8 --requests 200 --output results.json
+    python -m backend.bench --baseline results.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from backend.services.stats import summarize_latencies
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FAKE_MODELS = ['bench-small', 'bench-large']
+
+
+class FakeOllamaServer:
+    """
+    Minimal stand-in for the Ollama HTTP API
+    
+    Serves /api/tags and /api/generate (streaming and non-streaming) with a
+    fixed base latency plus a simulated generation time derived from the
+    token rate, so PromptLab's own overhead can be measured in isolation.
+    """
+    
+    def __init__(self, latency_ms: float = 20.0, tokens_per_second: float = 500.0, response_tokens: int = 50,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize fake server
+        
+        Args:
+            latency_ms: Delay before the first token in milliseconds
+            tokens_per_second: Simulated generation speed
+            response_tokens: Number of tokens in each generated response
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+        """
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> 'FakeOllamaServer':
+        """Start serving on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-ollama', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop the server and release its socket"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> 'FakeOllamaServer':
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+    
+    def _count_request(self):
+        with self._lock:
+            self.requests_served += 1
+    
+    def _make_handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                fake._count_request()
+                if self.path != '/api/tags':
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+                self._send_json({'models': [
+                    {
+                        'name': name,
+                        'size': 1024 * 1024 * 100,
+                        'modified_at': '2024-01-01T00:00:00Z',
+                        'digest': f'sha256:{index:064x}',
+                        'details': {'family': 'bench', 'parameter_size': '1B'}
+                    }
+                    for index, name in enumerate(FAKE_MODELS)
+                ]})
+            
+            def do_POST(self):
+                fake._count_request()
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._send_json({'error': 'invalid json'}, 400)
+                    return
+                
+                if self.path != '/api/generate':
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+                
+                time.sleep(fake.latency_ms / 1000.0)
+                token_delay = 1.0 / fake.tokens_per_second if fake.tokens_per_second > 0 else 0.0
+                tokens = [f'token{index} ' for index in range(fake.response_tokens)]
+                eval_duration = int(token_delay * fake.response_tokens * 1e9)
+                final = {
+                    'model': payload.get('model', FAKE_MODELS[0]),
+                    'done': True,
+                    'prompt_eval_count': len(payload.get('prompt', '').split()),
+                    'eval_count': fake.response_tokens,
+                    'eval_duration': eval_duration,
+                    'total_duration': eval_duration + int(fake.latency_ms * 1e6)
+                }
+                
+                if payload.get('stream', True):
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    for token in tokens:
+                        time.sleep(token_delay)
+                        self._write_chunk({'model': final['model'], 'response': token, 'done': False})
+                    self._write_chunk(dict(final, response=''))
+                    self.wfile.write(b'0\r\n\r\n')
+                else:
+                    time.sleep(token_delay * fake.response_tokens)
+                    self._send_json(dict(final, response=''.join(tokens)))
+            
+            def _write_chunk(self, payload):
+                line = json.dumps(payload).encode('utf-8') + b'\n'
+                self.wfile.write(f'{len(line):x}\r\n'.encode('ascii') + line + b'\r\n')
+                self.wfile.flush()
+        
+        return Handler
+
+
+def _import_payload(batch: int, count: int = 20) -> Dict[str, Any]:
+    """Build an import request body whose prompt names are unique per batch"""
+    prompts = [
+        {
+            'name': f'Bench Import {batch:05d}-{index:02d}',
+            'description': 'Imported by the benchmark harness',
+            'system_prompt': f'You are benchmark assistant number {index}.',
+            'model': FAKE_MODELS[0],
+            'temperature': 0.5
+        }
+        for index in range(count)
+    ]
+    return {
+        'import_data': json.dumps({'prompts': prompts}),
+        'format': 'json',
+        'conflict_resolution': 'skip'
+    }
+
+
+def build_scenarios() -> Dict[str, Dict[str, Any]]:
+    """
+    Define the request issued by each benchmark scenario
+    
+    Returns:
+        Mapping of scenario name to method, path and optional JSON body.
+        A callable body is called with the request number, so concurrent
+        imports do not race on the same prompt names.
+    """
+    return {
+        'list_prompts': {'method': 'GET', 'path': '/api/prompts'},
+        'list_prompts_page': {'method': 'GET', 'path': '/api/prompts?limit=50&fields=id,name,model'},
+        'search_prompts': {'method': 'GET', 'path': '/api/prompts?search=assistant'},
+        'models': {'method': 'GET', 'path': '/api/models'},
+        'run_test': {
+            'method': 'POST',
+            'path': '/api/run-test',
+            'json': {
+                'system_prompt': 'You are a concise assistant.',
+                'user_input': 'Summarize the benefits of benchmarking.',
+                'model': FAKE_MODELS[0],
+                'temperature': 0.7
+            }
+        },
+        'export': {'method': 'POST', 'path': '/api/export-library', 'json': {'format': 'json'}},
+        'import': {'method': 'POST', 'path': '/api/import-library', 'json': _import_payload}
+    }
+
+
+def seed_prompts(count: int) -> None:
+    """
+    Insert prompts directly through the ORM so list and search have data
+    
+    Args:
+        count: Number of prompts to create
+    """
+    from backend.database import get_db_session, close_db_session
+    from backend.models.prompt import Prompt
+    
+    session = get_db_session()
+    try:
+        for index in range(count):
+            session.add(Prompt(
+                name=f'Bench Prompt {index:05d}',
+                description=f'Seeded benchmark prompt {index}',
+                system_prompt=f'You are assistant {index}. Answer questions about topic {index % 37} clearly.',
+                model=FAKE_MODELS[index % len(FAKE_MODELS)],
+                temperature=0.7
+            ))
+        session.commit()
+    finally:
+        close_db_session(session)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in megabytes, if available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def run_scenario(app, name: str, spec: Dict[str, Any], clients: int, total_requests: int,
+                 trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Issue requests for one scenario from concurrent clients
+    
+    Args:
+        app: Flask application under test
+        name: Scenario name
+        spec: Request definition from build_scenarios
+        clients: Number of concurrent clients
+        total_requests: Total requests to issue across all clients
+        trace_memory: Measure Python allocation peak with tracemalloc (slower)
+    
+    Returns:
+        Dictionary with throughput, latency percentiles, errors and memory
+    """
+    local = threading.local()
+    status_counts = {}
+    counts_lock = threading.Lock()
+    
+    def issue(request_number):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        
+        body = spec.get('json')
+        if callable(body):
+            body = body(request_number)
+        
+        start = time.perf_counter()
+        response = client.open(spec['path'], method=spec['method'], json=body)
+        response.get_data()
+        latency = time.perf_counter() - start
+        response.close()
+        
+        with counts_lock:
+            status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+        return latency, response.status_code < 400
+    
+    if trace_memory:
+        tracemalloc.start()
+    
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients, thread_name_prefix=f'bench-{name}') as executor:
+        outcomes = list(executor.map(issue, range(total_requests)))
+    wall_time = time.perf_counter() - start_time
+    
+    memory = {'peak_rss_mb': _peak_rss_mb()}
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory['python_peak_mb'] = round(peak / (1024 * 1024), 2)
+    
+    latencies = [latency for latency, ok in outcomes if ok]
+    errors = sum(1 for _, ok in outcomes if not ok)
+    
+    return {
+        'name': name,
+        'method': spec['method'],
+        'path': spec['path'],
+        'clients': clients,
+        'requests': total_requests,
+        'errors': errors,
+        'status_counts': {str(status): count for status, count in sorted(status_counts.items())},
+        'wall_time': round(wall_time, 3),
+        'throughput_rps': round(total_requests / wall_time, 2) if wall_time > 0 else None,
+        'latency': summarize_latencies(latencies),
+        'memory': memory
+    }
+
+
+def run_benchmark(scenarios: Optional[List[str]] = None, clients: int = 8, requests_per_scenario: int = 100,
+                  seed: int = 500, latency_ms: float = 20.0, tokens_per_second: float = 500.0,
+                  response_tokens: int = 50, trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Run the benchmark against a fresh temporary database and fake Ollama
+    
+    Global configuration and the shared Ollama client are pointed at the
+    benchmark fixtures for the duration of the run and restored afterwards.
+    
+    Args:
+        scenarios: Scenario names to run (defaults to all)
+        clients: Number of concurrent clients per scenario
+        requests_per_scenario: Requests issued per scenario
+        seed: Number of prompts to seed the database with
+        latency_ms: Fake Ollama time to first token
+        tokens_per_second: Fake Ollama generation speed
+        response_tokens: Tokens per fake response
+        trace_memory: Measure Python allocation peaks with tracemalloc
+    
+    Returns:
+        Machine-readable results with run metadata and per-scenario metrics
+    
+    Raises:
+        ValueError: If an unknown scenario is requested
+    """
+    from backend.config import config
+    from backend.services.ollama_service import ollama_service
+    
+    available = build_scenarios()
+    selected = scenarios or list(available)
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}. Available: {', '.join(available)}")
+    
+    db_fd, db_path = tempfile.mkstemp(suffix='.db', prefix='promptlab-bench-')
+    os.close(db_fd)
+    
+    original_db_path = config.database_path
+    original_config_endpoint = config.ollama_endpoint
+    original_service_endpoint = ollama_service.endpoint
+    original_response_cache = ollama_service.response_cache
+    
+    fake = FakeOllamaServer(latency_ms=latency_ms, tokens_per_second=tokens_per_second,
+                            response_tokens=response_tokens)
+    try:
+        fake.start()
+        config.database_path = db_path
+        config.ollama_endpoint = fake.url
+        ollama_service.endpoint = fake.url
+        ollama_service.response_cache = None
+        ollama_service.clear_models_cache()
+        
+        from backend.app import create_app
+        app = create_app()
+        app.config['TESTING'] = True
+        seed_prompts(seed)
+        
+        results = [
+            run_scenario(app, name, available[name], clients, requests_per_scenario, trace_memory)
+            for name in selected
+        ]
+    finally:
+        fake.stop()
+        config.database_path = original_db_path
+        config.ollama_endpoint = original_config_endpoint
+        ollama_service.endpoint = original_service_endpoint
+        ollama_service.response_cache = original_response_cache
+        ollama_service.clear_models_cache()
+        
+        from backend.database import engine
+        if engine is not None:
+            engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.unlink(db_path + suffix)
+            except (OSError, PermissionError):
+                pass
+    
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'clients': clients,
+            'requests_per_scenario': requests_per_scenario,
+            'seeded_prompts': seed,
+            'fake_ollama': {
+                'latency_ms': latency_ms,
+                'tokens_per_second': tokens_per_second,
+                'response_tokens': response_tokens,
+                'requests_served': fake.requests_served
+            }
+        },
+        'scenarios': results
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float = 0.2,
+                    metric: str = 'p95') -> List[Dict[str, Any]]:
+    """
+    Find scenarios whose latency regressed beyond a tolerance
+    
+    Args:
+        baseline: Earlier output of run_benchmark
+        current: New output of run_benchmark
+        max_regression: Allowed relative slowdown (0.2 means 20%)
+        metric: Latency summary key to compare
+    
+    Returns:
+        List of regressions with baseline and current values
+    """
+    baseline_by_name = {scenario['name']: scenario for scenario in baseline.get('scenarios', [])}
+    regressions = []
+    
+    for scenario in current.get('scenarios', []):
+        previous = baseline_by_name.get(scenario['name'])
+        if previous is None:
+            continue
+        
+        before = previous.get('latency', {}).get(metric)
+        after = scenario.get('latency', {}).get(metric)
+        if not before or after is None:
+            continue
+        
+        change = (after - before) / before
+        if change > max_regression:
+            regressions.append({
+                'name': scenario['name'],
+                'metric': metric,
+                'baseline': before,
+                'current': after,
+                'change': round(change, 3)
+            })
+    
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Benchmark PromptLab against a local fake Ollama server")
+    parser.add_argument('--scenarios', default=None,
+                        help=f"comma-separated scenarios (default: all of {', '.join(build_scenarios())})")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent clients per scenario")
+    parser.add_argument('--requests', type=int, default=100, help="requests per scenario")
+    parser.add_argument('--seed', type=int, default=500, help="prompts to seed the database with")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="fake Ollama time to first token")
+    parser.add_argument('--tokens-per-second', type=float, default=500.0, help="fake Ollama generation speed")
+    parser.add_argument('--response-tokens', type=int, default=50, help="tokens per fake response")
+    parser.add_argument('--trace-memory', action='store_true', help="record Python allocation peaks (slower)")
+    parser.add_argument('--output', default=None, help="write JSON results to this file instead of stdout")
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="allowed relative p95 slowdown versus the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line and return the exit status"""
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(',')] if args.scenarios else None
+    
+    try:
+        results = run_benchmark(
+            scenarios=scenarios,
+            clients=args.clients,
+            requests_per_scenario=args.requests,
+            seed=args.seed,
+            latency_ms=args.latency_ms,
+            tokens_per_second=args.tokens_per_second,
+            response_tokens=args.response_tokens,
+            trace_memory=args.trace_memory
+        )
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.max_regression)
+        results['regressions'] = regressions
+        if regressions:
+            exit_code = 1
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,22 +3,74 @@ PromptLab Configuration Management
 """
 
 import os
+import re
 import json
 import yaml
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
+# Accepted values for the SQLite storage profile
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Accepted strategies for spreading generations across Ollama endpoints
+OLLAMA_ROUTING_STRATEGIES = ('least_outstanding', 'latency')
+
+# Ollama keep_alive durations: seconds ("300", "-1" keeps the model loaded) or "30s", "5m", "1h"
+KEEP_ALIVE_PATTERN = re.compile(r'^-?\d+(\.\d+)?(ms|s|m|h)?$')
+
+def parse_endpoint_list(value) -> List[str]:
+    """Parse a list or comma-separated string of endpoint URLs"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(endpoint).strip() for endpoint in value if str(endpoint).strip()]
+
 @dataclass
 class AppConfig:
     """Application configuration with default values"""
     ollama_endpoint: str = "http://localhost:11434"
+    ollama_endpoints: List[str] = field(default_factory=list)
+    ollama_routing_strategy: str = "least_outstanding"
+    circuit_breaker_threshold: int = 3
+    circuit_breaker_reset_seconds: int = 30
+    ollama_keep_alive: str = "5m"
+    chat_session_ttl: int = 1800
+    chat_max_sessions: int = 100
+    test_history_enabled: bool = True
+    test_history_flush_interval: int = 2
+    jobs_dir: str = "promptlab_jobs"
+    job_max_concurrency: int = 2
     default_model: str = "llama2"
+    embedding_model: str = "nomic-embed-text"
     default_temperature: float = 0.7
     database_path: str = "promptlab.db"
     flask_host: str = "127.0.0.1"
     flask_port: int = 5000
     flask_debug: bool = True
+    batch_max_concurrency: int = 4
+    response_cache_enabled: bool = False
+    response_cache_ttl: int = 3600
+    response_cache_max_bytes: int = 50 * 1024 * 1024
+    response_cache_path: str = ""
+    db_journal_mode: str = "WAL"
+    db_synchronous: str = "NORMAL"
+    db_cache_size_kb: int = 65536
+    db_mmap_size: int = 268435456
+    db_busy_timeout_ms: int = 5000
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    text_compression_enabled: bool = False
+    text_compression_min_bytes: int = 512
+    server_threads: int = 8
+    server_connection_limit: int = 100
+    server_channel_timeout: int = 120
+    server_drain_timeout: int = 30
+    health_check_interval: int = 30
+    health_probe_timeout: int = 2
     
     def validate(self) -> Dict[str, str]:
         """Validate configuration values and return errors if any"""
@@ -30,12 +82,38 @@ class AppConfig:
         elif not self.ollama_endpoint.startswith(('http://', 'https://')):
             errors['ollama_endpoint'] = 'Ollama endpoint must start with http:// or https://'
         
+        # Validate additional Ollama endpoints and routing
+        if not isinstance(self.ollama_endpoints, list):
+            errors['ollama_endpoints'] = 'Ollama endpoints must be a list of URL strings'
+        elif any(not isinstance(endpoint, str) or not endpoint.startswith(('http://', 'https://'))
+                 for endpoint in self.ollama_endpoints):
+            errors['ollama_endpoints'] = 'Every Ollama endpoint must start with http:// or https://'
+        
+        if self.ollama_routing_strategy not in OLLAMA_ROUTING_STRATEGIES:
+            errors['ollama_routing_strategy'] = f'Ollama routing strategy must be one of: {", ".join(OLLAMA_ROUTING_STRATEGIES)}'
+        
+        if not isinstance(self.ollama_keep_alive, str) or not KEEP_ALIVE_PATTERN.match(self.ollama_keep_alive):
+            errors['ollama_keep_alive'] = 'Ollama keep alive must be a duration such as "300", "5m" or "-1"'
+        
+        for field_name, label in (('circuit_breaker_threshold', 'Circuit breaker threshold'),
+                                  ('circuit_breaker_reset_seconds', 'Circuit breaker reset seconds'),
+                                  ('chat_session_ttl', 'Chat session TTL'),
+                                  ('chat_max_sessions', 'Chat max sessions'),
+                                  ('test_history_flush_interval', 'Test history flush interval'),
+                                  ('job_max_concurrency', 'Job max concurrency')):
+            value = getattr(self, field_name)
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                errors[field_name] = f'{label} must be a positive integer'
+        
         # Validate default_model
         if not self.default_model or not isinstance(self.default_model, str):
             errors['default_model'] = 'Default model must be a non-empty string'
         elif len(self.default_model.strip()) == 0:
             errors['default_model'] = 'Default model cannot be empty'
         
+        if not isinstance(self.embedding_model, str) or not self.embedding_model.strip():
+            errors['embedding_model'] = 'Embedding model must be a non-empty string'
+        
         # Validate default_temperature
         if not isinstance(self.default_temperature, (int, float)):
             errors['default_temperature'] = 'Default temperature must be a number'
@@ -60,6 +138,85 @@ class AppConfig:
         if not isinstance(self.flask_debug, bool):
             errors['flask_debug'] = 'Flask debug must be a boolean value'
         
+        # Validate batch_max_concurrency
+        if not isinstance(self.batch_max_concurrency, int) or isinstance(self.batch_max_concurrency, bool):
+            errors['batch_max_concurrency'] = 'Batch max concurrency must be an integer'
+        elif not (1 <= self.batch_max_concurrency <= 64):
+            errors['batch_max_concurrency'] = 'Batch max concurrency must be between 1 and 64'
+        
+        # Validate response cache settings
+        if not isinstance(self.response_cache_enabled, bool):
+            errors['response_cache_enabled'] = 'Response cache enabled must be a boolean value'
+        
+        if not isinstance(self.response_cache_ttl, int) or self.response_cache_ttl <= 0:
+            errors['response_cache_ttl'] = 'Response cache TTL must be a positive integer'
+        
+        if not isinstance(self.response_cache_max_bytes, int) or self.response_cache_max_bytes <= 0:
+            errors['response_cache_max_bytes'] = 'Response cache max bytes must be a positive integer'
+        
+        if not isinstance(self.response_cache_path, str):
+            errors['response_cache_path'] = 'Response cache path must be a string'
+        
+        if not isinstance(self.test_history_enabled, bool):
+            errors['test_history_enabled'] = 'Test history enabled must be a boolean value'
+        
+        if not self.jobs_dir or not isinstance(self.jobs_dir, str):
+            errors['jobs_dir'] = 'Jobs directory must be a non-empty string'
+        
+        # Validate SQLite storage profile
+        if not isinstance(self.db_journal_mode, str) or self.db_journal_mode.upper() not in SQLITE_JOURNAL_MODES:
+            errors['db_journal_mode'] = f'Database journal mode must be one of: {", ".join(SQLITE_JOURNAL_MODES)}'
+        
+        if not isinstance(self.db_synchronous, str) or self.db_synchronous.upper() not in SQLITE_SYNCHRONOUS_MODES:
+            errors['db_synchronous'] = f'Database synchronous mode must be one of: {", ".join(SQLITE_SYNCHRONOUS_MODES)}'
+        
+        for field_name, label in (('db_cache_size_kb', 'Database cache size'),
+                                  ('db_mmap_size', 'Database mmap size'),
+                                  ('db_busy_timeout_ms', 'Database busy timeout'),
+                                  ('db_max_overflow', 'Database max overflow')):
+            value = getattr(self, field_name)
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                errors[field_name] = f'{label} must be a non-negative integer'
+        
+        # Validate connection pool sizing
+        if not isinstance(self.db_pool_size, int) or isinstance(self.db_pool_size, bool):
+            errors['db_pool_size'] = 'Database pool size must be an integer'
+        elif not (1 <= self.db_pool_size <= 100):
+            errors['db_pool_size'] = 'Database pool size must be between 1 and 100'
+        
+        if not isinstance(self.db_pool_timeout, int) or isinstance(self.db_pool_timeout, bool) or self.db_pool_timeout <= 0:
+            errors['db_pool_timeout'] = 'Database pool timeout must be a positive integer'
+        
+        # Validate compressed text storage
+        if not isinstance(self.text_compression_enabled, bool):
+            errors['text_compression_enabled'] = 'Text compression enabled must be a boolean value'
+        
+        if (not isinstance(self.text_compression_min_bytes, int) or isinstance(self.text_compression_min_bytes, bool)
+                or self.text_compression_min_bytes < 0):
+            errors['text_compression_min_bytes'] = 'Text compression min bytes must be a non-negative integer'
+        
+        # Validate production server settings
+        if not isinstance(self.server_threads, int) or isinstance(self.server_threads, bool):
+            errors['server_threads'] = 'Server threads must be an integer'
+        elif not (1 <= self.server_threads <= 256):
+            errors['server_threads'] = 'Server threads must be between 1 and 256'
+        
+        for field_name, label in (('server_connection_limit', 'Server connection limit'),
+                                  ('server_channel_timeout', 'Server channel timeout'),
+                                  ('server_drain_timeout', 'Server drain timeout')):
+            value = getattr(self, field_name)
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                errors[field_name] = f'{label} must be a positive integer'
+        
+        # Validate health monitor settings
+        if not isinstance(self.health_check_interval, int) or isinstance(self.health_check_interval, bool):
+            errors['health_check_interval'] = 'Health check interval must be an integer'
+        elif not (0 <= self.health_check_interval <= 3600):
+            errors['health_check_interval'] = 'Health check interval must be between 0 and 3600 seconds'
+        
+        if not isinstance(self.health_probe_timeout, int) or isinstance(self.health_probe_timeout, bool) or self.health_probe_timeout <= 0:
+            errors['health_probe_timeout'] = 'Health probe timeout must be a positive integer'
+        
         return errors
     
     def to_dict(self) -> Dict[str, Any]:
@@ -75,9 +232,21 @@ class AppConfig:
         if 'ollama_endpoint' in data:
             config_data['ollama_endpoint'] = str(data['ollama_endpoint'])
         
+        if 'ollama_endpoints' in data:
+            config_data['ollama_endpoints'] = parse_endpoint_list(data['ollama_endpoints'])
+        
+        if 'ollama_routing_strategy' in data:
+            config_data['ollama_routing_strategy'] = str(data['ollama_routing_strategy']).lower()
+        
+        if 'ollama_keep_alive' in data:
+            config_data['ollama_keep_alive'] = str(data['ollama_keep_alive']).strip()
+        
         if 'default_model' in data:
             config_data['default_model'] = str(data['default_model'])
         
+        if 'embedding_model' in data:
+            config_data['embedding_model'] = str(data['embedding_model']).strip()
+        
         if 'default_temperature' in data:
             try:
                 config_data['default_temperature'] = float(data['default_temperature'])
@@ -104,6 +273,71 @@ class AppConfig:
             else:
                 config_data['flask_debug'] = cls.flask_debug
         
+        if 'batch_max_concurrency' in data:
+            try:
+                config_data['batch_max_concurrency'] = int(data['batch_max_concurrency'])
+            except (ValueError, TypeError):
+                config_data['batch_max_concurrency'] = cls.batch_max_concurrency
+        
+        if 'response_cache_enabled' in data:
+            if isinstance(data['response_cache_enabled'], bool):
+                config_data['response_cache_enabled'] = data['response_cache_enabled']
+            elif isinstance(data['response_cache_enabled'], str):
+                config_data['response_cache_enabled'] = data['response_cache_enabled'].lower() in ('true', '1', 'yes', 'on')
+            else:
+                config_data['response_cache_enabled'] = cls.response_cache_enabled
+        
+        if 'response_cache_ttl' in data:
+            try:
+                config_data['response_cache_ttl'] = int(data['response_cache_ttl'])
+            except (ValueError, TypeError):
+                config_data['response_cache_ttl'] = cls.response_cache_ttl
+        
+        if 'response_cache_max_bytes' in data:
+            try:
+                config_data['response_cache_max_bytes'] = int(data['response_cache_max_bytes'])
+            except (ValueError, TypeError):
+                config_data['response_cache_max_bytes'] = cls.response_cache_max_bytes
+        
+        if 'test_history_enabled' in data:
+            if isinstance(data['test_history_enabled'], bool):
+                config_data['test_history_enabled'] = data['test_history_enabled']
+            elif isinstance(data['test_history_enabled'], str):
+                config_data['test_history_enabled'] = data['test_history_enabled'].lower() in ('true', '1', 'yes', 'on')
+            else:
+                config_data['test_history_enabled'] = cls.test_history_enabled
+        
+        if 'text_compression_enabled' in data:
+            if isinstance(data['text_compression_enabled'], bool):
+                config_data['text_compression_enabled'] = data['text_compression_enabled']
+            elif isinstance(data['text_compression_enabled'], str):
+                config_data['text_compression_enabled'] = data['text_compression_enabled'].lower() in ('true', '1', 'yes', 'on')
+            else:
+                config_data['text_compression_enabled'] = cls.text_compression_enabled
+        
+        if 'response_cache_path' in data:
+            config_data['response_cache_path'] = str(data['response_cache_path'] or '')
+        
+        if 'jobs_dir' in data:
+            config_data['jobs_dir'] = str(data['jobs_dir'] or '').strip() or cls.jobs_dir
+        
+        for field_name in ('db_journal_mode', 'db_synchronous'):
+            if field_name in data:
+                config_data[field_name] = str(data[field_name]).upper()
+        
+        for field_name in ('db_cache_size_kb', 'db_mmap_size', 'db_busy_timeout_ms',
+                           'db_pool_size', 'db_max_overflow', 'db_pool_timeout',
+                           'server_threads', 'server_connection_limit', 'server_channel_timeout',
+                           'server_drain_timeout', 'health_check_interval', 'health_probe_timeout',
+                           'circuit_breaker_threshold', 'circuit_breaker_reset_seconds',
+                           'chat_session_ttl', 'chat_max_sessions', 'test_history_flush_interval',
+                           'job_max_concurrency', 'text_compression_min_bytes'):
+            if field_name in data:
+                try:
+                    config_data[field_name] = int(data[field_name])
+                except (ValueError, TypeError):
+                    config_data[field_name] = getattr(cls, field_name)
+        
         return cls(**config_data)
     
     @classmethod
@@ -138,12 +372,45 @@ class AppConfig:
         """Load configuration from environment variables"""
         return cls(
             ollama_endpoint=os.getenv('OLLAMA_ENDPOINT', cls.ollama_endpoint),
+            ollama_endpoints=parse_endpoint_list(os.getenv('OLLAMA_ENDPOINTS', '')),
+            ollama_routing_strategy=os.getenv('OLLAMA_ROUTING_STRATEGY', cls.ollama_routing_strategy).lower(),
+            circuit_breaker_threshold=int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', str(cls.circuit_breaker_threshold))),
+            circuit_breaker_reset_seconds=int(os.getenv('CIRCUIT_BREAKER_RESET_SECONDS', str(cls.circuit_breaker_reset_seconds))),
+            ollama_keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', cls.ollama_keep_alive),
+            chat_session_ttl=int(os.getenv('CHAT_SESSION_TTL', str(cls.chat_session_ttl))),
+            chat_max_sessions=int(os.getenv('CHAT_MAX_SESSIONS', str(cls.chat_max_sessions))),
+            test_history_enabled=os.getenv('TEST_HISTORY_ENABLED', 'True').lower() == 'true',
+            test_history_flush_interval=int(os.getenv('TEST_HISTORY_FLUSH_INTERVAL', str(cls.test_history_flush_interval))),
+            jobs_dir=os.getenv('JOBS_DIR', cls.jobs_dir),
+            job_max_concurrency=int(os.getenv('JOB_MAX_CONCURRENCY', str(cls.job_max_concurrency))),
             default_model=os.getenv('DEFAULT_MODEL', cls.default_model),
+            embedding_model=os.getenv('EMBEDDING_MODEL', cls.embedding_model),
             default_temperature=float(os.getenv('DEFAULT_TEMPERATURE', str(cls.default_temperature))),
             database_path=os.getenv('DATABASE_PATH', cls.database_path),
             flask_host=os.getenv('FLASK_HOST', cls.flask_host),
             flask_port=int(os.getenv('FLASK_PORT', str(cls.flask_port))),
-            flask_debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+            flask_debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true',
+            batch_max_concurrency=int(os.getenv('BATCH_MAX_CONCURRENCY', str(cls.batch_max_concurrency))),
+            response_cache_enabled=os.getenv('RESPONSE_CACHE_ENABLED', 'False').lower() == 'true',
+            response_cache_ttl=int(os.getenv('RESPONSE_CACHE_TTL', str(cls.response_cache_ttl))),
+            response_cache_max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(cls.response_cache_max_bytes))),
+            response_cache_path=os.getenv('RESPONSE_CACHE_PATH', cls.response_cache_path),
+            db_journal_mode=os.getenv('DB_JOURNAL_MODE', cls.db_journal_mode).upper(),
+            db_synchronous=os.getenv('DB_SYNCHRONOUS', cls.db_synchronous).upper(),
+            db_cache_size_kb=int(os.getenv('DB_CACHE_SIZE_KB', str(cls.db_cache_size_kb))),
+            db_mmap_size=int(os.getenv('DB_MMAP_SIZE', str(cls.db_mmap_size))),
+            db_busy_timeout_ms=int(os.getenv('DB_BUSY_TIMEOUT_MS', str(cls.db_busy_timeout_ms))),
+            db_pool_size=int(os.getenv('DB_POOL_SIZE', str(cls.db_pool_size))),
+            db_max_overflow=int(os.getenv('DB_MAX_OVERFLOW', str(cls.db_max_overflow))),
+            db_pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', str(cls.db_pool_timeout))),
+            text_compression_enabled=os.getenv('TEXT_COMPRESSION_ENABLED', 'False').lower() == 'true',
+            text_compression_min_bytes=int(os.getenv('TEXT_COMPRESSION_MIN_BYTES', str(cls.text_compression_min_bytes))),
+            server_threads=int(os.getenv('SERVER_THREADS', str(cls.server_threads))),
+            server_connection_limit=int(os.getenv('SERVER_CONNECTION_LIMIT', str(cls.server_connection_limit))),
+            server_channel_timeout=int(os.getenv('SERVER_CHANNEL_TIMEOUT', str(cls.server_channel_timeout))),
+            server_drain_timeout=int(os.getenv('SERVER_DRAIN_TIMEOUT', str(cls.server_drain_timeout))),
+            health_check_interval=int(os.getenv('HEALTH_CHECK_INTERVAL', str(cls.health_check_interval))),
+            health_probe_timeout=int(os.getenv('HEALTH_PROBE_TIMEOUT', str(cls.health_probe_timeout)))
         )
     
     @classmethod
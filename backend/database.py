@@ -4,11 +4,15 @@ SQLAlchemy setup with SQLite database connection
 """
 
 import os
-from sqlalchemy import create_engine, event
+import sqlite3
+import time
+from sqlalchemy import MetaData, create_engine, event, text
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from backend.config import config
+from backend.services import metrics
 
 # Create declarative base for models
 Base = declarative_base()
@@ -17,10 +21,88 @@ Base = declarative_base()
 engine = None
 SessionLocal = None
 
+def build_sqlite_pragmas(app_config=None):
+    """
+    Build the per-connection PRAGMA statements for the storage profile
+    
+    Args:
+        app_config: Configuration to read the profile from (defaults to global config)
+    
+    Returns:
+        List of PRAGMA statements in the order they should be applied
+    """
+    app_config = app_config or config
+    return [
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA busy_timeout={int(app_config.db_busy_timeout_ms)}",
+        f"PRAGMA journal_mode={app_config.db_journal_mode.upper()}",
+        f"PRAGMA synchronous={app_config.db_synchronous.upper()}",
+        # Negative cache_size is interpreted by SQLite as KiB rather than pages
+        f"PRAGMA cache_size=-{int(app_config.db_cache_size_kb)}",
+        f"PRAGMA mmap_size={int(app_config.db_mmap_size)}",
+        "PRAGMA temp_store=MEMORY"
+    ]
+
+def configure_sqlite_engine(target_engine, app_config=None):
+    """
+    Apply the storage profile to every new connection of an engine
+    
+    Args:
+        target_engine: SQLAlchemy engine for a SQLite database
+        app_config: Configuration to read the profile from (defaults to global config)
+    """
+    pragmas = build_sqlite_pragmas(app_config)
+    
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+def register_sqlite_functions(target_engine):
+    """
+    Register the SQL functions used by raw queries on every new connection of an engine
+    
+    Args:
+        target_engine: SQLAlchemy engine for a SQLite database
+    """
+    from backend.models.compressed_text import INFLATE_FUNCTION, inflate_value
+    
+    @event.listens_for(target_engine, "connect")
+    def create_sqlite_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function(INFLATE_FUNCTION, 1, inflate_value, deterministic=True)
+
+def register_query_metrics(target_engine):
+    """
+    Record statement execution time for an engine in the metrics registry
+    
+    Args:
+        target_engine: SQLAlchemy engine to instrument
+    """
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+    
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get('query_start_times')
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        if keyword not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE'):
+            keyword = 'OTHER'
+        metrics.db_query_duration.observe(elapsed, statement=keyword)
+
 def init_database():
     """Initialize database connection and create tables"""
     global engine, SessionLocal
     
+    # Release pooled connections held by a previous engine
+    if engine is not None:
+        engine.dispose()
+    
     # Create database directory if it doesn't exist
     db_dir = os.path.dirname(config.database_path)
     if db_dir and not os.path.exists(db_dir):
@@ -31,34 +113,320 @@ def init_database():
     engine = create_engine(
         database_url,
         echo=False,  # Set to True for SQL debugging
-        connect_args={"check_same_thread": False}  # Allow SQLite to work with multiple threads
+        connect_args={
+            "check_same_thread": False,  # Allow SQLite to work with multiple threads
+            "timeout": config.db_busy_timeout_ms / 1000.0
+        },
+        poolclass=QueuePool,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout
     )
     
-    # Enable foreign key constraints for SQLite
-    @event.listens_for(Engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        if 'sqlite' in str(dbapi_connection):
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
+    # Apply WAL mode, foreign keys and cache tuning to each pooled connection
+    configure_sqlite_engine(engine)
+    register_sqlite_functions(engine)
+    register_query_metrics(engine)
     
     # Create session factory
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
     # Import models to ensure they are registered with Base
+    from backend.models.prompt_body import PromptBody, PromptBodyBucket
     from backend.models.prompt import Prompt
+    from backend.models.test_run import TestRun
+    from backend.models.job import Job
+    from backend.models.prompt_embedding import PromptEmbedding
+    from backend.models.prompt_version import PromptVersionSnapshot, PromptVersion
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
+    # Convert tables created by earlier versions
+    upgrade_schema(engine)
+    
+    # Create and sync the full-text search index
+    from backend.services.search_service import init_search_index
+    init_search_index(engine)
+    
     return engine
 
+def upgrade_schema(target_engine):
+    """
+    Bring tables created by earlier versions in line with the models
+    
+    create_all only adds missing tables, so column changes to existing
+    tables are applied here. Each step checks the current schema first and
+    is a no-op once applied.
+    
+    Args:
+        target_engine: SQLAlchemy engine for the prompt database
+    
+    Returns:
+        list: Names of the steps that were applied
+    """
+    applied = []
+    with target_engine.connect() as connection:
+        # A table rebuild drops the old table, which must not cascade to rows
+        # referencing it; SQLite ignores this pragma inside a transaction
+        connection.execute(text("PRAGMA foreign_keys=OFF"))
+        connection.commit()
+        try:
+            with connection.begin():
+                # pysqlite only opens a transaction at the first data change, so
+                # start it here to roll schema changes back with the data they move
+                connection.exec_driver_sql("BEGIN")
+                if move_prompt_bodies(connection):
+                    applied.append('prompt_bodies')
+                if sign_prompt_bodies(connection):
+                    applied.append('prompt_body_signatures')
+                if share_version_snapshots(connection):
+                    applied.append('prompt_version_snapshots')
+                if snapshot_prompt_versions(connection):
+                    applied.append('prompt_versions')
+        finally:
+            connection.execute(text("PRAGMA foreign_keys=ON"))
+            connection.commit()
+    return applied
+
+def move_prompt_bodies(connection, batch_size=500):
+    """
+    Move system prompt text from the prompts table into prompt_bodies
+    
+    Identical bodies end up stored once. The freed pages are reused by
+    SQLite; run VACUUM afterwards to shrink the database file itself.
+    
+    Args:
+        connection: Connection within an open transaction
+        batch_size (int): Prompts converted per statement
+    
+    Returns:
+        bool: True if the prompts table had to be converted
+    """
+    from backend.models.prompt_body import hash_body, acquire_bodies
+    
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(prompts)"))}
+    if 'system_prompt' not in columns:
+        return False
+    
+    if 'body_hash' not in columns:
+        connection.execute(text("ALTER TABLE prompts ADD COLUMN body_hash VARCHAR(64) REFERENCES prompt_bodies (hash)"))
+    
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text("SELECT id, system_prompt FROM prompts WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': batch_size}
+        ).fetchall()
+        if not rows:
+            break
+        
+        hashes = [(hash_body(body), body) for _, body in rows]
+        acquire_bodies(connection, hashes)
+        connection.execute(
+            text("UPDATE prompts SET body_hash = :body_hash WHERE id = :id"),
+            [{'id': prompt_id, 'body_hash': body_hash} for (prompt_id, _), (body_hash, _) in zip(rows, hashes)]
+        )
+        last_id = rows[-1][0]
+    
+    drop_column(connection, 'prompts', 'system_prompt')
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_body_hash ON prompts (body_hash)"))
+    return True
+
+def drop_column(connection, table_name, column):
+    """
+    Drop a column from a model's table
+    
+    SQLite added DROP COLUMN in 3.35; on older versions the table is rebuilt
+    from its model definition and the surviving columns are copied across.
+    
+    Args:
+        connection: Connection within an open transaction, with foreign keys off
+        table_name (str): Table registered on Base.metadata
+        column (str): Column to remove
+    """
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        connection.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column}"))
+        return
+    
+    table = Base.metadata.tables[table_name]
+    existing = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table_name})"))}
+    kept = ', '.join(name for name in table.columns.keys() if name in existing)
+    # Copy into a scratch metadata so the renamed table can resolve its foreign keys
+    metadata = MetaData()
+    for other in Base.metadata.sorted_tables:
+        other.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f'{table_name}_rebuild')
+    
+    connection.execute(CreateTable(rebuilt))
+    connection.execute(text(f"INSERT INTO {rebuilt.name} ({kept}) SELECT {kept} FROM {table_name}"))
+    connection.execute(text(f"DROP TABLE {table_name}"))
+    # Leave views and foreign keys naming the old table pointing at the new one
+    connection.execute(text("PRAGMA legacy_alter_table=ON"))
+    connection.execute(text(f"ALTER TABLE {rebuilt.name} RENAME TO {table_name}"))
+    connection.execute(text("PRAGMA legacy_alter_table=OFF"))
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+def sign_prompt_bodies(connection, batch_size=200):
+    """
+    Add MinHash signatures and LSH buckets to bodies stored without them
+    
+    Args:
+        connection: Connection within an open transaction
+        batch_size (int): Bodies signed per statement
+    
+    Returns:
+        bool: True if the prompt_bodies table had to be converted
+    """
+    from backend.models.prompt_body import index_body_signatures
+    from backend.services.minhash import minhash_signature
+    
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(prompt_bodies)"))}
+    if 'minhash' in columns:
+        return False
+    
+    connection.execute(text("ALTER TABLE prompt_bodies ADD COLUMN minhash BLOB"))
+    while True:
+        rows = connection.execute(
+            text("SELECT hash, inflate_text(body) FROM prompt_bodies WHERE minhash IS NULL LIMIT :limit"),
+            {'limit': batch_size}
+        ).fetchall()
+        if not rows:
+            break
+        
+        signatures = {body_hash: minhash_signature(body) for body_hash, body in rows}
+        connection.execute(
+            text("UPDATE prompt_bodies SET minhash = :minhash WHERE hash = :hash"),
+            [{'hash': body_hash, 'minhash': signature} for body_hash, signature in signatures.items()]
+        )
+        index_body_signatures(connection, signatures)
+    return True
+
+def share_version_snapshots(connection):
+    """
+    Move version snapshots stored in each version row into the shared snapshot table
+    
+    Earlier versions compressed a private snapshot into every snapshot
+    version, so identical bodies were stored once per prompt and save.
+    
+    Args:
+        connection: Connection within an open transaction
+    
+    Returns:
+        bool: True if any version held its own snapshot
+    """
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_prompt_versions_body_hash ON prompt_versions (body_hash)"))
+    
+    private = connection.execute(text(
+        "SELECT 1 FROM prompt_versions WHERE storage = 'snapshot' AND length(body_data) > 0 LIMIT 1"
+    )).first()
+    if private is None:
+        return False
+    
+    connection.execute(text(
+        "INSERT OR IGNORE INTO prompt_version_snapshots (hash, data) "
+        "SELECT body_hash, body_data FROM prompt_versions WHERE storage = 'snapshot' AND length(body_data) > 0"
+    ))
+    connection.execute(text("UPDATE prompt_versions SET body_data = X'' WHERE storage = 'snapshot'"))
+    return True
+
+def snapshot_prompt_versions(connection, batch_size=500):
+    """
+    Record a first version for prompts saved before version history existed
+    
+    Args:
+        connection: Connection within an open transaction
+        batch_size (int): Prompts recorded per statement
+    
+    Returns:
+        bool: True if any prompt had no versions
+    """
+    from backend.models.prompt_version import record_versions
+    
+    applied = False
+    last_id = 0
+    while True:
+        prompt_ids = [prompt_id for (prompt_id,) in connection.execute(
+            text("SELECT id FROM prompts WHERE id > :last_id AND NOT EXISTS "
+                 "(SELECT 1 FROM prompt_versions WHERE prompt_versions.prompt_id = prompts.id) "
+                 "ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': batch_size}
+        )]
+        if not prompt_ids:
+            break
+        
+        record_versions(connection, prompt_ids)
+        applied = True
+        last_id = prompt_ids[-1]
+    return applied
+
+def convert_text_storage(target_engine, batch_size=500, vacuum=True):
+    """
+    Rewrite stored system prompts and descriptions in the configured text storage
+    
+    Covers prompt bodies, prompt descriptions and the system prompts of
+    recorded test runs.
+    
+    With text_compression_enabled, large values stored as plain text are
+    compressed; with it disabled, compressed values are stored as plain
+    text again. Only the storage changes, so prompts keep their updated_at
+    and the search index, embeddings and versions stay valid.
+    
+    Args:
+        target_engine: SQLAlchemy engine for the prompt database
+        batch_size (int): Rows read per statement
+        vacuum (bool): Run VACUUM afterwards so the file shrinks
+    
+    Returns:
+        dict: Rows 'converted', and stored text size 'bytes_before' and 'bytes_after'
+    """
+    from backend.models.compressed_text import compress_value, inflate_value
+    
+    summary = {'converted': 0, 'bytes_before': 0, 'bytes_after': 0}
+    
+    def stored_size(value):
+        return len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+    
+    # Table, key column with a value below every key, and text column
+    for table, key, last_key, column in (('prompt_bodies', 'hash', '', 'body'),
+                                         ('prompts', 'id', 0, 'description'),
+                                         ('test_runs', 'id', 0, 'system_prompt')):
+        while True:
+            with target_engine.begin() as connection:
+                rows = connection.execute(
+                    text(f"SELECT {key}, {column} FROM {table} WHERE {key} > :last_key AND {column} IS NOT NULL "
+                         f"ORDER BY {key} LIMIT :limit"),
+                    {'last_key': last_key, 'limit': batch_size}
+                ).fetchall()
+                if not rows:
+                    break
+                
+                updates = []
+                for row_key, value in rows:
+                    stored = compress_value(inflate_value(value))
+                    summary['bytes_before'] += stored_size(value)
+                    summary['bytes_after'] += stored_size(stored)
+                    if type(stored) is not type(value):
+                        updates.append({'key': row_key, 'value': stored})
+                if updates:
+                    connection.execute(text(f"UPDATE {table} SET {column} = :value WHERE {key} = :key"), updates)
+                    summary['converted'] += len(updates)
+                last_key = rows[-1][0]
+    
+    if vacuum and summary['converted']:
+        # VACUUM cannot run inside a transaction
+        with target_engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text("VACUUM"))
+    return summary
+
 def get_db_session():
     """Get database session with proper cleanup"""
     if SessionLocal is None:
         raise RuntimeError("Database not initialized. Call init_database() first.")
     
     session = SessionLocal()
+    metrics.db_sessions_opened.inc()
     try:
         return session
     except Exception:
@@ -69,6 +437,7 @@ def close_db_session(session):
     """Close database session properly"""
     if session:
         session.close()
+        metrics.db_sessions_closed.inc()
 
 def reset_database():
     """Reset database by dropping and recreating all tables"""
@@ -76,13 +445,22 @@ def reset_database():
         raise RuntimeError("Database not initialized. Call init_database() first.")
     
     # Import models to ensure they are registered
+    from backend.models.prompt_body import PromptBody, PromptBodyBucket
     from backend.models.prompt import Prompt
+    from backend.models.test_run import TestRun
+    from backend.models.job import Job
+    from backend.models.prompt_embedding import PromptEmbedding
+    from backend.models.prompt_version import PromptVersionSnapshot, PromptVersion
     
     # Drop all tables
     Base.metadata.drop_all(bind=engine)
     
     # Recreate all tables
     Base.metadata.create_all(bind=engine)
+    
+    # Resync the full-text search index with the emptied tables
+    from backend.services.search_service import init_search_index
+    init_search_index(engine)
 
 def get_db_connection():
     """Get raw database connection for health checks"""
@@ -3,6 +3,12 @@ PromptLab Models Package
 Exports all database models for the application
 """
 
+from .prompt_body import PromptBody, PromptBodyBucket
 from .prompt import Prompt
+from .test_run import TestRun
+from .job import Job
+from .prompt_embedding import PromptEmbedding
+from .prompt_version import PromptVersionSnapshot, PromptVersion
 
-__all__ = ['Prompt']
\ No newline at end of file
+__all__ = ['PromptBody', 'PromptBodyBucket', 'Prompt', 'TestRun', 'Job', 'PromptEmbedding', 'PromptVersionSnapshot',
+           'PromptVersion']
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+PromptLab Compressed Text Column Type
+Text columns that store large values zlib-compressed and read back as plain strings
+"""
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+from backend.config import config
+from backend.services.text_delta import compress_text, decompress_text
+
+# SQL function that returns the plain text of a compressed or plain value
+INFLATE_FUNCTION = 'inflate_text'
+
+def compress_value(value):
+    """
+    Return a text value in the configured storage form
+    
+    With compression enabled, values of at least text_compression_min_bytes
+    UTF-8 bytes are stored as compressed bytes when that is smaller. Other
+    values are stored as plain text.
+    
+    Args:
+        value (str): Text to store, or None
+    
+    Returns:
+        Compressed bytes, or the value unchanged
+    """
+    if value is None or not config.text_compression_enabled:
+        return value
+    size = len(value.encode('utf-8'))
+    if size < config.text_compression_min_bytes:
+        return value
+    data = compress_text(value)
+    return data if len(data) < size else value
+
+def inflate_value(value):
+    """Return the plain text of a stored value, decompressing it if needed"""
+    if isinstance(value, bytes):
+        return decompress_text(value)
+    return value
+
+class CompressedText(TypeDecorator):
+    """
+    Text column whose large values may be stored compressed
+    
+    Compressed values are stored as BLOBs in the TEXT column, so plain and
+    compressed rows can live side by side and switching the setting never
+    requires converting the table. Raw SQL that reads the column must wrap
+    it in inflate_text() (registered by database.register_sqlite_functions);
+    comparing it with LIKE or length() directly sees compressed bytes.
+    """
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return compress_value(value)
+    
+    def process_result_value(self, value, dialect):
+        return inflate_value(value)
+    
+    def coerce_compared_value(self, op, value):
+        # Compare against plain text; a LIKE pattern must never be compressed
+        return Text()
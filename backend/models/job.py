@@ -0,0 +1,89 @@
+"""
+PromptLab Background Job Data Model
+SQLAlchemy model tracking the state, progress and result of background jobs
+"""
+
+import json
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from backend.database import Base
+
+# Every job status, in lifecycle order
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+
+# Statuses after which a job no longer changes
+FINISHED_JOB_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+class Job(Base):
+    """
+    Background job model
+    
+    Params and result are stored as JSON text. Jobs that produce a file
+    (exports, batch test results) record its name in result_file; the file
+    itself lives in the configured jobs directory.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+    
+    # Random hex identifier, so job URLs cannot be enumerated
+    id = Column(String(32), primary_key=True)
+    
+    type = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False, default='queued')
+    params = Column(Text, nullable=False, default='{}')
+    
+    # Progress as reported by the job; total is None when unknown
+    progress_current = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    message = Column(Text, nullable=True)
+    
+    # Outcome
+    result = Column(Text, nullable=True)
+    result_file = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    @property
+    def is_finished(self):
+        """Whether the job has reached a final status"""
+        return self.status in FINISHED_JOB_STATUSES
+    
+    def to_dict(self):
+        """
+        Convert Job instance to dictionary for API responses
+        
+        Returns:
+            dict: Dictionary representation of the job
+        """
+        percent = None
+        if self.progress_total:
+            percent = round(min(self.progress_current / self.progress_total, 1.0) * 100, 1)
+        
+        return {
+            'id': self.id,
+            'type': self.type,
+            'status': self.status,
+            'params': json.loads(self.params) if self.params else {},
+            'progress': {
+                'current': self.progress_current,
+                'total': self.progress_total,
+                'percent': percent
+            },
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'has_result_file': self.result_file is not None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        """String representation of Job instance"""
+        return f"<Job(id='{self.id}', type='{self.type}', status='{self.status}')>"
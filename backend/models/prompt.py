@@ -4,9 +4,12 @@ SQLAlchemy model for storing and managing prompts
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime
-from sqlalchemy.orm import validates
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, event, inspect, select
+from sqlalchemy.orm import validates, column_property
 from backend.database import Base
+from backend.models.compressed_text import CompressedText
+from backend.models.prompt_body import PromptBody, hash_body, acquire_bodies, release_bodies, purge_orphan_bodies
+from backend.models.prompt_version import VERSIONED_FIELDS, record_versions, purge_orphan_snapshots
 
 class Prompt(Base):
     """
@@ -15,20 +18,38 @@ class Prompt(Base):
     Represents a saved prompt with all necessary configuration
     for AI model interaction including system prompt text,
     model selection, and temperature settings.
+    
+    The system prompt text lives in the content-addressed prompt_bodies
+    table; each prompt stores the hash of its body, so identical bodies
+    are stored once however many prompts use them.
     """
     __tablename__ = 'prompts'
     
+    # Fields exposed by to_dict, in response order
+    SERIALIZABLE_FIELDS = ('id', 'name', 'description', 'system_prompt', 'model', 'temperature', 'created_at', 'updated_at')
+    
     # Primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Required fields
     name = Column(String(255), unique=True, nullable=False, index=True)
-    system_prompt = Column(Text, nullable=False)
+    body_hash = Column(String(64), ForeignKey('prompt_bodies.hash'), nullable=False, index=True)
     model = Column(String(100), nullable=False, default='llama2')
     temperature = Column(Float, nullable=False, default=0.7)
     
-    # Optional fields
-    description = Column(Text, nullable=True)
+    # Optional fields (stored compressed when large and text compression is enabled)
+    description = Column(CompressedText, nullable=True)
+    
+    # Body text, read from prompt_bodies on first access, so queries that do
+    # not need it never read or decompress it; undefer it when listing full
+    # prompts. Writes go through the validator, which updates body_hash, and
+    # the flush events below store the body. The text is content-addressed,
+    # so a value set in memory stays valid after the flush.
+    system_prompt = column_property(
+        select(PromptBody.body).where(PromptBody.hash == body_hash).correlate_except(PromptBody).scalar_subquery(),
+        deferred=True,
+        expire_on_flush=False
+    )
     
     # Timestamps
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -69,6 +90,7 @@ class Prompt(Base):
         if len(system_prompt) > 50000:  # Reasonable limit for prompt length
             raise ValueError("System prompt cannot exceed 50,000 characters")
         
+        self.body_hash = hash_body(system_prompt)
         return system_prompt
     
     @validates('model')
@@ -110,23 +132,30 @@ class Prompt(Base):
             return description if description else None
         return description
     
-    def to_dict(self):
+    def to_dict(self, fields=None):
         """
         Convert Prompt instance to dictionary for API responses
         
+        Args:
+            fields (iterable, optional): Subset of SERIALIZABLE_FIELDS to include.
+                Only the requested attributes are touched, so deferred columns
+                are not loaded.
+        
         Returns:
             dict: Dictionary representation of the prompt
         """
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'system_prompt': self.system_prompt,
-            'model': self.model,
-            'temperature': self.temperature,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        if fields is None:
+            fields = self.SERIALIZABLE_FIELDS
+        
+        data = {}
+        for field in self.SERIALIZABLE_FIELDS:
+            if field not in fields:
+                continue
+            value = getattr(self, field)
+            if field in ('created_at', 'updated_at'):
+                value = value.isoformat() if value else None
+            data[field] = value
+        return data
     
     def update_from_dict(self, data):
         """
@@ -150,4 +179,48 @@ class Prompt(Base):
     
     def __str__(self):
         """Human-readable string representation"""
-        return f"Prompt '{self.name}' using {self.model} (temp: {self.temperature})"
\ No newline at end of file
+        return f"Prompt '{self.name}' using {self.model} (temp: {self.temperature})"
+
+def _store_body(mapper, connection, target):
+    """Store a new prompt's body before its row references it"""
+    acquire_bodies(connection, [(target.body_hash, target.system_prompt)])
+
+def _swap_body(mapper, connection, target):
+    """Move an updated prompt's reference from its old body to the new one"""
+    if inspect(target).attrs.body_hash.history.has_changes():
+        release_bodies(connection, [target.id])
+        acquire_bodies(connection, [(target.body_hash, target.system_prompt)])
+
+def _release_body(mapper, connection, target):
+    """Give up a deleted prompt's reference while its row still exists"""
+    release_bodies(connection, [target.id])
+
+def _record_created_version(mapper, connection, target):
+    """Record version 1 of a new prompt"""
+    record_versions(connection, [target.id])
+
+def _record_updated_version(mapper, connection, target):
+    """Record the next version of an updated prompt while its old body is still stored"""
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in VERSIONED_FIELDS + ('body_hash',)):
+        record_versions(connection, [target.id])
+
+def _purge_swapped_body(mapper, connection, target):
+    """Delete the old body of an updated prompt if nothing else uses it"""
+    if inspect(target).attrs.body_hash.history.has_changes():
+        purge_orphan_bodies(connection)
+
+def _purge_released_body(mapper, connection, target):
+    """Delete a deleted prompt's body and version snapshots if nothing else uses them"""
+    purge_orphan_bodies(connection)
+    purge_orphan_snapshots(connection)
+
+# Keep prompt_bodies and its reference counts in sync with ORM writes, and
+# record versions before replaced bodies are purged
+event.listen(Prompt, 'before_insert', _store_body)
+event.listen(Prompt, 'after_insert', _record_created_version)
+event.listen(Prompt, 'before_update', _swap_body)
+event.listen(Prompt, 'after_update', _record_updated_version)
+event.listen(Prompt, 'after_update', _purge_swapped_body)
+event.listen(Prompt, 'before_delete', _release_body)
+event.listen(Prompt, 'after_delete', _purge_released_body)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+PromptLab Prompt Body Data Model
+Content-addressed storage for system prompt text shared between prompts
+"""
+
+import hashlib
+from collections import Counter
+from sqlalchemy import Column, String, Integer, BigInteger, LargeBinary, text, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.database import Base
+from backend.models.compressed_text import CompressedText
+from backend.services.minhash import minhash_signature, band_buckets
+
+class PromptBody(Base):
+    """
+    Prompt body model storing each distinct system prompt text once
+    
+    Rows are keyed by the SHA-256 of the text and count the prompts that
+    reference them. Prompts with identical bodies share one row, and a row
+    is deleted when its last prompt is deleted or changed.
+    """
+    __tablename__ = 'prompt_bodies'
+    
+    # SHA-256 hex digest of the body
+    hash = Column(String(64), primary_key=True)
+    
+    # Stored compressed when large and text compression is enabled
+    body = Column(CompressedText, nullable=False)
+    
+    # Indexed so orphans and duplicated bodies are found without a table scan
+    ref_count = Column(Integer, nullable=False, default=0, index=True)
+    
+    # MinHash signature for near-duplicate detection, computed once per distinct body
+    minhash = Column(LargeBinary, nullable=True)
+    
+    def __repr__(self):
+        """String representation of PromptBody instance"""
+        return f"<PromptBody(hash='{self.hash[:12]}', ref_count={self.ref_count})>"
+
+class PromptBodyBucket(Base):
+    """
+    LSH bucket index over body MinHash signatures
+    
+    Each body has one row per signature band. Bodies sharing a bucket are
+    candidate near-duplicates. Like the full-text index this is derived
+    data, kept in sync by acquire_bodies and purge_orphan_bodies.
+    """
+    __tablename__ = 'prompt_body_buckets'
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    bucket = Column(BigInteger, primary_key=True, autoincrement=False)
+    body_hash = Column(String(64), primary_key=True)
+    
+    def __repr__(self):
+        """String representation of PromptBodyBucket instance"""
+        return f"<PromptBodyBucket(bucket={self.bucket}, body_hash='{self.body_hash[:12]}')>"
+
+def index_body_signatures(connection, signatures):
+    """
+    Add bodies to the LSH bucket index
+    
+    Args:
+        connection: Connection within an open transaction
+        signatures (dict): Body hash -> MinHash signature
+    """
+    rows = [{'bucket': bucket, 'body_hash': body_hash}
+            for body_hash, signature in signatures.items() for bucket in band_buckets(signature)]
+    if rows:
+        connection.execute(sqlite_insert(PromptBodyBucket.__table__).on_conflict_do_nothing(), rows)
+
+def hash_body(body):
+    """Return the content address of a system prompt text"""
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+def acquire_bodies(connection, bodies):
+    """
+    Store bodies that are not stored yet and add one reference per use
+    
+    Args:
+        connection: Connection within an open transaction
+        bodies: Iterable of (hash, body) pairs, one per referencing prompt
+    """
+    counts = Counter()
+    texts = {}
+    for body_hash, body in bodies:
+        counts[body_hash] += 1
+        texts[body_hash] = body
+    if not counts:
+        return
+    
+    # Signatures are only computed for bodies that are not stored yet
+    hashes = bindparam('hashes', expanding=True)
+    stored = {body_hash for (body_hash,) in connection.execute(
+        text("SELECT hash FROM prompt_bodies WHERE hash IN :hashes").bindparams(hashes), {'hashes': list(counts)}
+    )}
+    signatures = {body_hash: minhash_signature(texts[body_hash]) for body_hash in counts if body_hash not in stored}
+    
+    table = PromptBody.__table__
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['hash'],
+        set_={'ref_count': table.c.ref_count + statement.excluded.ref_count}
+    )
+    connection.execute(statement, [
+        {'hash': body_hash, 'body': texts[body_hash], 'ref_count': count, 'minhash': signatures.get(body_hash)}
+        for body_hash, count in counts.items()
+    ])
+    index_body_signatures(connection, signatures)
+
+def release_bodies(connection, prompt_ids):
+    """
+    Drop the references held by prompts that are about to change body or be deleted
+    
+    Must run before the prompts rows are updated or deleted. Bodies left
+    without references are removed by purge_orphan_bodies afterwards.
+    
+    Args:
+        connection: Connection within an open transaction
+        prompt_ids: IDs of the prompts giving up their current body
+    """
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids:
+        return
+    
+    ids = bindparam('ids', expanding=True)
+    connection.execute(text(
+        "UPDATE prompt_bodies SET ref_count = ref_count - "
+        "(SELECT COUNT(*) FROM prompts WHERE prompts.body_hash = prompt_bodies.hash AND prompts.id IN :ids) "
+        "WHERE hash IN (SELECT body_hash FROM prompts WHERE id IN :ids)"
+    ).bindparams(ids), {'ids': prompt_ids})
+
+def purge_orphan_bodies(connection):
+    """
+    Delete bodies no prompt references any more
+    
+    Args:
+        connection: Connection within an open transaction
+    """
+    orphans = connection.execute(text("SELECT hash, minhash FROM prompt_bodies WHERE ref_count <= 0")).fetchall()
+    if not orphans:
+        return
+    
+    buckets = [{'bucket': bucket, 'body_hash': body_hash}
+               for body_hash, signature in orphans if signature is not None for bucket in band_buckets(signature)]
+    if buckets:
+        connection.execute(text("DELETE FROM prompt_body_buckets WHERE bucket = :bucket AND body_hash = :body_hash"),
+                           buckets)
+    connection.execute(text("DELETE FROM prompt_bodies WHERE ref_count <= 0"))
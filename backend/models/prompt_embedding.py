@@ -0,0 +1,38 @@
+"""
+PromptLab Prompt Embedding Data Model
+Stored embedding vectors used by semantic prompt search
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, ForeignKey
+from backend.database import Base
+
+class PromptEmbedding(Base):
+    """
+    Prompt embedding model holding one vector per prompt
+    
+    Vectors are unit-length float32 arrays packed little-endian, so a cosine
+    similarity is a plain dot product. The prompt's updated_at at embedding
+    time is kept to find prompts changed since, and the hash of the embedded
+    text lets edits that do not touch the text skip the Ollama call.
+    Embeddings are deleted with their prompt.
+    """
+    __tablename__ = 'prompt_embeddings'
+    
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    
+    # Embedding model that produced the vector
+    model = Column(String(100), nullable=False)
+    
+    # SHA-256 of the embedded text and the prompt version it was taken from
+    content_hash = Column(String(64), nullable=False)
+    prompt_updated_at = Column(DateTime, nullable=False)
+    
+    dimensions = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    
+    embedded_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    def __repr__(self):
+        """String representation of PromptEmbedding instance"""
+        return f"<PromptEmbedding(prompt_id={self.prompt_id}, model='{self.model}', dimensions={self.dimensions})>"
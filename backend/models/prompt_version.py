@@ -0,0 +1,245 @@
+"""
+PromptLab Prompt Version Data Model
+Revision history of prompts with delta-compressed system prompt text
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, LargeBinary, ForeignKey, Index, text, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.database import Base
+from backend.services.text_delta import compress_text, decompress_text, encode_delta, apply_delta
+
+# Longest run of versions rebuilt from one snapshot. Every version is rebuilt
+# by decompressing one snapshot and applying fewer than this many deltas.
+SNAPSHOT_INTERVAL = 10
+
+# Prompt fields recorded in full with every version
+VERSIONED_FIELDS = ('name', 'description', 'model', 'temperature')
+
+class PromptVersionSnapshot(Base):
+    """
+    Compressed system prompt text shared by the version snapshots of every prompt
+    
+    Rows are keyed by body hash, so a body saved by many prompts, or by one
+    prompt many times, is compressed and stored once. A row is deleted
+    when no version snapshot refers to it any more.
+    """
+    __tablename__ = 'prompt_version_snapshots'
+    
+    # SHA-256 hex digest of the body, as in prompt_bodies
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        """String representation of PromptVersionSnapshot instance"""
+        return f"<PromptVersionSnapshot(hash='{self.hash[:12]}')>"
+
+class PromptVersion(Base):
+    """
+    Prompt version model recording each saved state of a prompt
+    
+    Version 1 is the prompt as created, and every save that changes its
+    name, description, system prompt, model or temperature adds the next
+    version. The system prompt is stored either as a snapshot, which
+    refers to the shared PromptVersionSnapshot of its body hash, or as a
+    compressed delta against the previous version, with a snapshot at
+    least every SNAPSHOT_INTERVAL versions. Versions are deleted with
+    their prompt.
+    """
+    __tablename__ = 'prompt_versions'
+    __table_args__ = (
+        Index('ix_prompt_versions_prompt_id_version', 'prompt_id', 'version', unique=True),
+        Index('ix_prompt_versions_body_hash', 'body_hash'),
+    )
+    
+    # Fields exposed by to_dict, in response order
+    SERIALIZABLE_FIELDS = ('version', 'name', 'description', 'model', 'temperature', 'body_hash', 'body_length',
+                           'storage', 'created_at')
+    
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), nullable=False)
+    version = Column(Integer, nullable=False)
+    
+    # Prompt fields as saved
+    name = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    model = Column(String(100), nullable=False)
+    temperature = Column(Float, nullable=False)
+    
+    # System prompt: content hash and length of the text, and how it is stored
+    body_hash = Column(String(64), nullable=False)
+    body_length = Column(Integer, nullable=False)
+    storage = Column(String(8), nullable=False)  # 'snapshot' or 'delta'
+    body_data = Column(LargeBinary, nullable=False)  # Delta; empty for snapshots
+    
+    # Version holding the snapshot this version is rebuilt from
+    snapshot_version = Column(Integer, nullable=False)
+    
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    def to_dict(self):
+        """
+        Convert PromptVersion instance to dictionary for API responses
+        
+        The system prompt text is not included; use load_version_body.
+        
+        Returns:
+            dict: Dictionary representation of the version
+        """
+        data = {field: getattr(self, field) for field in self.SERIALIZABLE_FIELDS}
+        data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        return data
+    
+    def __repr__(self):
+        """String representation of PromptVersion instance"""
+        return f"<PromptVersion(prompt_id={self.prompt_id}, version={self.version}, storage='{self.storage}')>"
+
+def _latest_versions(connection, prompt_ids):
+    """Return the newest version row of each prompt, keyed by prompt ID"""
+    ids = bindparam('ids', expanding=True)
+    rows = connection.execute(text(
+        "SELECT v.prompt_id, v.version, v.name, v.description, v.model, v.temperature, v.body_hash, "
+        "v.snapshot_version FROM prompt_versions v JOIN "
+        "(SELECT prompt_id, MAX(version) AS version FROM prompt_versions WHERE prompt_id IN :ids GROUP BY prompt_id) "
+        "AS latest ON latest.prompt_id = v.prompt_id AND latest.version = v.version"
+    ).bindparams(ids), {'ids': prompt_ids})
+    return {row.prompt_id: row for row in rows}
+
+def _saved_state(row):
+    return tuple(getattr(row, field) for field in VERSIONED_FIELDS) + (row.body_hash,)
+
+def record_versions(connection, prompt_ids):
+    """
+    Add a version for each prompt whose saved state differs from its newest version
+    
+    Reads the prompts as currently written, so it runs after their rows are
+    inserted or updated but before replaced bodies are purged, which lets
+    deltas be computed against the old body without rebuilding it. A body
+    that already has a shared snapshot is recorded as a snapshot at no
+    storage cost; other bodies are compressed at most once per call.
+    
+    Args:
+        connection: Connection within an open transaction
+        prompt_ids: IDs of prompts that were created or may have changed
+    """
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids:
+        return
+    
+    ids = bindparam('ids', expanding=True)
+    current = connection.execute(text(
+        "SELECT p.id, p.name, inflate_text(p.description) AS description, p.model, p.temperature, p.body_hash, "
+        "inflate_text(b.body) AS body "
+        "FROM prompts p JOIN prompt_bodies b ON b.hash = p.body_hash WHERE p.id IN :ids"
+    ).bindparams(ids), {'ids': prompt_ids}).fetchall()
+    latest = _latest_versions(connection, prompt_ids)
+    
+    changed = [row for row in current if row.id not in latest or _saved_state(latest[row.id]) != _saved_state(row)]
+    if not changed:
+        return
+    
+    # Previous bodies that are still stored, so most deltas need no rebuild
+    previous_hashes = {latest[row.id].body_hash for row in changed
+                       if row.id in latest and latest[row.id].body_hash != row.body_hash}
+    previous_bodies = {}
+    if previous_hashes:
+        hashes = bindparam('hashes', expanding=True)
+        previous_bodies = dict(connection.execute(
+            text("SELECT hash, inflate_text(body) FROM prompt_bodies WHERE hash IN :hashes").bindparams(hashes),
+            {'hashes': list(previous_hashes)}
+        ).fetchall())
+    
+    # Bodies with a stored snapshot are recorded as snapshots without storing anything new
+    hashes = bindparam('hashes', expanding=True)
+    shared = {body_hash for (body_hash,) in connection.execute(
+        text("SELECT hash FROM prompt_version_snapshots WHERE hash IN :hashes").bindparams(hashes),
+        {'hashes': list({row.body_hash for row in changed})}
+    )}
+    compressed = {}
+    snapshots = []
+    
+    now = datetime.now(timezone.utc)
+    versions = []
+    for row in changed:
+        previous = latest.get(row.id)
+        version = previous.version + 1 if previous else 1
+        storage, body_data, snapshot_version = 'snapshot', b'', version
+        
+        if (row.body_hash not in shared and previous is not None
+                and version - previous.snapshot_version < SNAPSHOT_INTERVAL):
+            if previous.body_hash == row.body_hash:
+                old_body = row.body
+            else:
+                old_body = previous_bodies.get(previous.body_hash)
+                if old_body is None:
+                    old_body = load_version_body(connection, row.id, previous.version)
+            delta = encode_delta(old_body, row.body)
+            if row.body_hash not in compressed:
+                compressed[row.body_hash] = compress_text(row.body)
+            if len(delta) < len(compressed[row.body_hash]):
+                storage, body_data, snapshot_version = 'delta', delta, previous.snapshot_version
+        
+        if storage == 'snapshot' and row.body_hash not in shared:
+            snapshots.append({'hash': row.body_hash, 'data': compressed.get(row.body_hash) or compress_text(row.body)})
+            shared.add(row.body_hash)
+        
+        versions.append({
+            'prompt_id': row.id,
+            'version': version,
+            'name': row.name,
+            'description': row.description,
+            'model': row.model,
+            'temperature': row.temperature,
+            'body_hash': row.body_hash,
+            'body_length': len(row.body),
+            'storage': storage,
+            'body_data': body_data,
+            'snapshot_version': snapshot_version,
+            'created_at': now
+        })
+    
+    if snapshots:
+        connection.execute(sqlite_insert(PromptVersionSnapshot.__table__).on_conflict_do_nothing(), snapshots)
+    connection.execute(PromptVersion.__table__.insert(), versions)
+
+def purge_orphan_snapshots(connection):
+    """
+    Delete shared snapshots no version refers to any more
+    
+    Args:
+        connection: Connection within an open transaction
+    """
+    connection.execute(text(
+        "DELETE FROM prompt_version_snapshots WHERE NOT EXISTS (SELECT 1 FROM prompt_versions "
+        "WHERE prompt_versions.body_hash = prompt_version_snapshots.hash AND prompt_versions.storage = 'snapshot')"
+    ))
+
+def load_version_body(connection, prompt_id, version):
+    """
+    Rebuild the system prompt text of a version
+    
+    Reads the version's snapshot and the deltas after it, so the cost is
+    bounded by SNAPSHOT_INTERVAL however long the history is.
+    
+    Args:
+        connection: Connection or session
+        prompt_id (int): Prompt ID
+        version (int): Version number
+    
+    Returns:
+        str: System prompt text, or None if the version does not exist
+    """
+    rows = connection.execute(text(
+        "SELECT v.storage, v.body_data, s.data FROM prompt_versions v "
+        "LEFT JOIN prompt_version_snapshots s ON v.storage = 'snapshot' AND s.hash = v.body_hash "
+        "WHERE v.prompt_id = :prompt_id AND v.version <= :version "
+        "AND v.version >= (SELECT snapshot_version FROM prompt_versions WHERE prompt_id = :prompt_id AND version = :version) "
+        "ORDER BY v.version"
+    ), {'prompt_id': prompt_id, 'version': version}).fetchall()
+    
+    body = None
+    for storage, body_data, snapshot in rows:
+        body = decompress_text(snapshot) if storage == 'snapshot' else apply_delta(body, body_data)
+    return body
@@ -0,0 +1,74 @@
+"""
+PromptLab Test Run Data Model
+SQLAlchemy model recording the inputs, output and performance of each prompt test
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, Index
+from backend.database import Base
+from backend.models.compressed_text import CompressedText
+
+class TestRun(Base):
+    """
+    Test run model for tracking prompt performance over time
+    
+    Each row is one /api/run-test call. Runs of a saved prompt reference it
+    and are deleted with it; ad-hoc runs have no prompt_id. Token counts and
+    timings are Ollama's own statistics and are None when not reported.
+    """
+    __tablename__ = 'test_runs'
+    __table_args__ = (
+        Index('ix_test_runs_prompt_id_created_at', 'prompt_id', 'created_at'),
+        Index('ix_test_runs_model_created_at', 'model', 'created_at'),
+    )
+    
+    # Tell pytest this is not a test class despite the name
+    __test__ = False
+    
+    # Fields exposed by to_dict, in response order
+    SERIALIZABLE_FIELDS = ('id', 'prompt_id', 'model', 'temperature', 'system_prompt', 'user_input', 'response',
+                           'latency', 'prompt_tokens', 'completion_tokens', 'tokens_per_second',
+                           'prompt_tokens_per_second', 'load_time', 'total_time', 'endpoint', 'cached', 'created_at')
+    
+    # Primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # Saved prompt the run belongs to, if any
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), nullable=True)
+    
+    # Inputs and output
+    model = Column(String(100), nullable=False)
+    temperature = Column(Float, nullable=False)
+    # Repeated in full by every run, so stored compressed when large and text compression is enabled
+    system_prompt = Column(CompressedText, nullable=False)
+    user_input = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    
+    # Performance
+    latency = Column(Float, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    tokens_per_second = Column(Float, nullable=True)
+    prompt_tokens_per_second = Column(Float, nullable=True)
+    load_time = Column(Float, nullable=True)
+    total_time = Column(Float, nullable=True)
+    endpoint = Column(String(255), nullable=True)
+    cached = Column(Boolean, nullable=False, default=False)
+    
+    # Timestamp of the test, not of the (batched) insert
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    def to_dict(self):
+        """
+        Convert TestRun instance to dictionary for API responses
+        
+        Returns:
+            dict: Dictionary representation of the test run
+        """
+        data = {field: getattr(self, field) for field in self.SERIALIZABLE_FIELDS}
+        data['created_at'] = self.created_at.isoformat() if self.created_at else None
+        return data
+    
+    def __repr__(self):
+        """String representation of TestRun instance"""
+        return f"<TestRun(id={self.id}, prompt_id={self.prompt_id}, model='{self.model}', latency={self.latency})>"
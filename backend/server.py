@@ -0,0 +1,176 @@
+"""
+PromptLab Production Server
+Multi-threaded WSGI serving with in-flight request tracking and graceful drain
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Optional
+from backend.config import config
+
+try:
+    from waitress.server import create_server
+except ImportError:
+    create_server = None
+
+logger = logging.getLogger('promptlab')
+
+
+class DrainingMiddleware:
+    """
+    WSGI middleware that counts in-flight requests and refuses new ones while draining
+    
+    A request stays in flight until its response iterable is closed, so
+    streamed responses (Server-Sent Events, exports) are drained as well.
+    """
+    
+    def __init__(self, app: Callable):
+        """
+        Initialize middleware
+        
+        Args:
+            app: WSGI application to wrap
+        """
+        self.app = app
+        self.draining = False
+        self._in_flight = 0
+        self._condition = threading.Condition()
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently being served"""
+        with self._condition:
+            return self._in_flight
+    
+    def __call__(self, environ, start_response):
+        with self._condition:
+            if self.draining:
+                refused = True
+            else:
+                refused = False
+                self._in_flight += 1
+        
+        if refused:
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'application/json'),
+                ('Connection', 'close'),
+                ('Retry-After', '5')
+            ])
+            return [b'{"error": true, "message": "Server is shutting down", "code": "SHUTTING_DOWN"}']
+        
+        try:
+            result = self.app(environ, start_response)
+        except Exception:
+            self._finish()
+            raise
+        return _ClosingIterator(result, self._finish)
+    
+    def start_draining(self) -> None:
+        """Stop accepting new requests"""
+        with self._condition:
+            self.draining = True
+    
+    def wait_for_drain(self, timeout: float) -> bool:
+        """
+        Block until all in-flight requests finish
+        
+        Args:
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            True if every request finished, False if the timeout expired
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+    
+    def _finish(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+
+class _ClosingIterator:
+    """Response iterable wrapper that reports completion exactly once"""
+    
+    def __init__(self, iterable, on_close: Callable[[], None]):
+        self._iterable = iterable
+        self._iterator = iter(iterable)
+        self._on_close = on_close
+        self._closed = False
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self._iterator)
+    
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            self._on_close()
+
+
+def serve(app, should_stop: Callable[[], bool], host: Optional[str] = None, port: Optional[int] = None,
+          threads: Optional[int] = None, drain_timeout: Optional[int] = None) -> None:
+    """
+    Serve a WSGI application with waitress until should_stop() returns True
+    
+    The server runs on a background thread so the main thread keeps
+    receiving signals. Once should_stop() is true, new requests get a 503
+    and in-flight requests are given drain_timeout seconds to finish.
+    
+    Args:
+        app: WSGI application to serve
+        should_stop: Callable polled by the main thread to request shutdown
+        host: Interface to bind (defaults to config)
+        port: Port to bind (defaults to config)
+        threads: Number of worker threads (defaults to config)
+        drain_timeout: Seconds to wait for in-flight requests (defaults to config)
+    
+    Raises:
+        RuntimeError: If waitress is not installed
+    """
+    if create_server is None:
+        raise RuntimeError("waitress is required for --server mode. Install it with: pip install waitress")
+    
+    drain_timeout = drain_timeout if drain_timeout is not None else config.server_drain_timeout
+    middleware = DrainingMiddleware(app)
+    
+    server = create_server(
+        middleware,
+        host=host or config.flask_host,
+        port=port or config.flask_port,
+        threads=threads or config.server_threads,
+        connection_limit=config.server_connection_limit,
+        channel_timeout=config.server_channel_timeout,
+        ident='PromptLab'
+    )
+    
+    server_thread = threading.Thread(target=server.run, name='promptlab-server', daemon=True)
+    server_thread.start()
+    logger.info(f"✓ Serving with waitress ({threads or config.server_threads} threads, "
+                f"{config.server_connection_limit} connections)")
+    
+    while not should_stop() and server_thread.is_alive():
+        time.sleep(0.5)
+    
+    logger.info(f"⏳ Draining {middleware.in_flight} in-flight request(s)...")
+    middleware.start_draining()
+    if middleware.wait_for_drain(drain_timeout):
+        logger.info("✓ All requests completed")
+    else:
+        logger.warning(f"⚠ Drain timed out after {drain_timeout}s with {middleware.in_flight} request(s) still running")
+    
+    server.close()
@@ -0,0 +1,321 @@
+"""
+Asynchronous Ollama Integration Service
+asyncio counterpart of OllamaService for multiplexing many concurrent generations
+"""
+
+import asyncio
+import time
+from typing import List, Dict, Any
+from datetime import datetime, timedelta
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+from backend.config import config
+from backend.services import metrics
+from backend.services.ollama_service import (
+    OllamaClientError,
+    OllamaConnectionError,
+    OllamaTimeoutError,
+    REFINE_META_PROMPT,
+    format_keep_alive,
+    format_test_prompt,
+    parse_generation_stats,
+    parse_models_response
+)
+
+
+class AsyncOllamaService:
+    """
+    Async service for communicating with Ollama API
+    
+    Mirrors the public interface of OllamaService with coroutine methods.
+    A single aiohttp session is reused for all requests so connections are
+    pooled; call close() (or use ``async with``) when finished.
+    """
+    
+    def __init__(self, endpoint: str = None, timeout: int = 30, max_retries: int = 3, cache_duration: int = 300,
+                 pool_size: int = 100):
+        """
+        Initialize async Ollama service
+        
+        Args:
+            endpoint: Ollama API endpoint URL
+            timeout: Request timeout in seconds
+            max_retries: Maximum number of retry attempts
+            cache_duration: Model cache duration in seconds (default: 5 minutes)
+            pool_size: Maximum number of simultaneous connections
+        """
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for AsyncOllamaService. Install it with: pip install aiohttp")
+        
+        self.endpoint = endpoint or config.ollama_endpoint
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache_duration = cache_duration
+        self.pool_size = pool_size
+        self.session = None
+        
+        # Model cache
+        self._models_cache = None
+        self._models_cache_time = None
+    
+    async def __aenter__(self) -> 'AsyncOllamaService':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    def _get_session(self):
+        """Return the shared client session, creating it on the running loop"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+    
+    async def close(self) -> None:
+        """Close the underlying client session and its pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+    
+    async def _make_request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """
+        Make HTTP request to Ollama with retry logic
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            path: API path (without leading slash)
+            **kwargs: Additional arguments for aiohttp
+        
+        Returns:
+            Decoded JSON response body
+        
+        Raises:
+            OllamaClientError: If Ollama rejects the request (4xx)
+            OllamaConnectionError: If connection fails after retries or the body is not valid JSON
+            OllamaTimeoutError: If request times out
+        """
+        url = f"{self.endpoint.rstrip('/')}/{path.lstrip('/')}"
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=self.timeout))
+        
+        last_exception = None
+        start_time = time.perf_counter()
+        
+        for attempt in range(self.max_retries):
+            try:
+                async with self._get_session().request(method, url, **kwargs) as response:
+                    if response.status >= 500:
+                        # Server error, retry
+                        last_exception = OllamaConnectionError(f"Ollama server error: {response.status}")
+                    elif response.status >= 400:
+                        # Client error, don't retry
+                        text = await response.text()
+                        metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                                method=method, path=path, outcome='client_error')
+                        raise OllamaClientError(f"Ollama API error: {response.status} - {text}")
+                    else:
+                        try:
+                            data = await response.json(content_type=None)
+                        except (aiohttp.ContentTypeError, ValueError) as e:
+                            # A malformed body will not improve on retry
+                            metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                                    method=method, path=path, outcome='error')
+                            raise OllamaConnectionError(f"Invalid JSON response from Ollama: {str(e)}") from e
+                        metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                                method=method, path=path, outcome='ok')
+                        return data
+            
+            except OllamaConnectionError:
+                raise
+            
+            except asyncio.TimeoutError:
+                metrics.ollama_timeouts.inc(path=path)
+                last_exception = OllamaTimeoutError(f"Request timed out after {self.timeout} seconds")
+            
+            except aiohttp.ClientConnectionError:
+                last_exception = OllamaConnectionError(f"Failed to connect to Ollama at {self.endpoint}")
+            
+            except aiohttp.ClientError as e:
+                last_exception = OllamaConnectionError(f"Unexpected error communicating with Ollama: {str(e)}")
+            
+            # Wait before retry (exponential backoff)
+            if attempt < self.max_retries - 1:
+                metrics.ollama_retries.inc(path=path)
+                wait_time = 2 ** attempt
+                await asyncio.sleep(wait_time)
+        
+        # All retries failed
+        outcome = 'timeout' if isinstance(last_exception, OllamaTimeoutError) else 'error'
+        metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                method=method, path=path, outcome=outcome)
+        raise last_exception
+    
+    async def check_connection(self) -> Dict[str, Any]:
+        """
+        Test connection to Ollama instance
+        
+        Returns:
+            Dictionary with connection status and details
+        """
+        try:
+            await self._make_request('GET', 'api/tags')
+            return {
+                'connected': True,
+                'endpoint': self.endpoint,
+                'status': 'healthy',
+                'message': 'Successfully connected to Ollama'
+            }
+        except (OllamaConnectionError, OllamaTimeoutError) as e:
+            return {
+                'connected': False,
+                'endpoint': self.endpoint,
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    def _is_cache_valid(self) -> bool:
+        """Check if the models cache is still valid"""
+        if self._models_cache is None or self._models_cache_time is None:
+            return False
+        
+        cache_expiry = self._models_cache_time + timedelta(seconds=self.cache_duration)
+        return datetime.now() < cache_expiry
+    
+    async def get_available_models(self, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Fetch list of available models from Ollama with caching
+        
+        Args:
+            use_cache: Whether to use cached results if available
+        
+        Returns:
+            List of model information dictionaries
+        
+        Raises:
+            OllamaConnectionError: If unable to fetch models
+            OllamaTimeoutError: If request times out
+        """
+        if use_cache and self._is_cache_valid():
+            metrics.model_cache_lookups.inc(result='hit')
+            return self._models_cache.copy()
+        
+        metrics.model_cache_lookups.inc(result='miss' if use_cache else 'bypass')
+        
+        try:
+            data = await self._make_request('GET', 'api/tags')
+            models = parse_models_response(data)
+            
+            self._models_cache = models.copy()
+            self._models_cache_time = datetime.now()
+            
+            return models
+        
+        except Exception as e:
+            if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
+                raise
+            raise OllamaConnectionError(f"Failed to parse models response: {str(e)}")
+    
+    def clear_models_cache(self) -> None:
+        """Clear the models cache"""
+        self._models_cache = None
+        self._models_cache_time = None
+    
+    async def refine_prompt(self, objective: str, target_model: str = None) -> str:
+        """
+        Use meta-prompt technique to convert objective into detailed system prompt
+        
+        Args:
+            objective: Simple objective or goal for the prompt
+            target_model: Model to use for refinement (defaults to config default)
+        
+        Returns:
+            Refined system prompt text
+        
+        Raises:
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        model = target_model or config.default_model
+        
+        try:
+            with metrics.generations_in_flight.track_inprogress(kind='refine'):
+                data = await self._make_request('POST', 'api/generate', json={
+                    'model': model,
+                    'prompt': REFINE_META_PROMPT.format(objective=objective),
+                    'stream': False,
+                    'options': {
+                        'temperature': 0.3,
+                        'top_p': 0.9
+                    }
+                })
+            
+            refined_prompt = data.get('response', '').strip()
+            
+            if not refined_prompt:
+                raise OllamaConnectionError("Received empty response from Ollama during prompt refinement")
+            
+            return refined_prompt
+        
+        except Exception as e:
+            if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
+                raise
+            raise OllamaConnectionError(f"Failed to refine prompt: {str(e)}")
+    
+    async def test_prompt(self, system_prompt: str, user_input: str, model: str = None,
+                          temperature: float = None) -> Dict[str, Any]:
+        """
+        Test a system prompt with user input using specified model and parameters
+        
+        Args:
+            system_prompt: The system prompt to test
+            user_input: User message to send with the system prompt
+            model: Model to use for testing (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+        
+        Returns:
+            Dictionary containing response and metadata
+        
+        Raises:
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        model = model or config.default_model
+        temperature = temperature if temperature is not None else config.default_temperature
+        
+        start_time = time.perf_counter()
+        
+        try:
+            with metrics.generations_in_flight.track_inprogress(kind='test'):
+                data = await self._make_request('POST', 'api/generate', json={
+                    'model': model,
+                    'prompt': format_test_prompt(system_prompt, user_input),
+                    'stream': False,
+                    'keep_alive': format_keep_alive(config.ollama_keep_alive),
+                    'options': {
+                        'temperature': temperature,
+                        'top_p': 0.9
+                    }
+                })
+            
+            execution_time = time.perf_counter() - start_time
+            
+            ai_response = data.get('response', '').strip()
+            
+            if not ai_response:
+                raise OllamaConnectionError("Received empty response from Ollama during prompt testing")
+            
+            return {
+                'response': ai_response,
+                'execution_time': round(execution_time, 2),
+                'stats': parse_generation_stats(data),
+                'model': model,
+                'temperature': temperature,
+                'system_prompt': system_prompt,
+                'user_input': user_input
+            }
+        
+        except Exception as e:
+            if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
+                raise
+            raise OllamaConnectionError(f"Failed to test prompt: {str(e)}")
@@ -0,0 +1,117 @@
+"""
+Batch Prompt Testing Service
+Runs many prompt tests concurrently through a bounded worker pool
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional
+from backend.services.ollama_service import OllamaConnectionError, OllamaTimeoutError
+from backend.services.stats import summarize_latencies
+
+
+def build_batch_items(inputs: List[str], models: Optional[List[str]] = None,
+                      temperatures: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Expand inputs, models and temperatures into individual test items
+    
+    Every input is tested against every model/temperature combination.
+    A missing models or temperatures list means the service default.
+    
+    Args:
+        inputs: User inputs to test
+        models: Models to test with (optional)
+        temperatures: Temperatures to test with (optional)
+    
+    Returns:
+        List of item dictionaries with index, user_input, model and temperature
+    """
+    items = []
+    for user_input in inputs:
+        for model in (models or [None]):
+            for temperature in (temperatures if temperatures else [None]):
+                items.append({
+                    'index': len(items),
+                    'user_input': user_input,
+                    'model': model,
+                    'temperature': temperature
+                })
+    return items
+
+
+def run_batch(service, system_prompt: str, items: List[Dict[str, Any]], concurrency: int) -> Iterator[Dict[str, Any]]:
+    """
+    Run prompt tests for all items, yielding each result as it completes
+    
+    Args:
+        service: OllamaService used for every test (its session is shared)
+        system_prompt: The system prompt to test
+        items: Test items as produced by build_batch_items
+        concurrency: Maximum number of tests in flight at once
+    
+    Yields:
+        'result' or 'error' events per item in completion order, then a
+        final 'summary' event with aggregate latency percentiles
+    """
+    start_time = time.perf_counter()
+    latencies = []
+    failed = 0
+    
+    def run_item(item):
+        item_start = time.perf_counter()
+        result = service.test_prompt(system_prompt, item['user_input'], item['model'], item['temperature'])
+        return result, time.perf_counter() - item_start
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='promptlab-batch')
+    futures = {executor.submit(run_item, item): item for item in items}
+    
+    try:
+        for future in as_completed(futures):
+            item = futures[future]
+            event = {
+                'index': item['index'],
+                'user_input': item['user_input']
+            }
+            
+            try:
+                result, latency = future.result()
+            except OllamaTimeoutError as e:
+                failed += 1
+                event.update({'type': 'error', 'code': 'OLLAMA_TIMEOUT', 'message': str(e),
+                              'model': item['model'], 'temperature': item['temperature']})
+            except OllamaConnectionError as e:
+                failed += 1
+                event.update({'type': 'error', 'code': 'OLLAMA_CONNECTION_ERROR', 'message': str(e),
+                              'model': item['model'], 'temperature': item['temperature']})
+            except Exception:
+                failed += 1
+                event.update({'type': 'error', 'code': 'TEST_ERROR', 'message': 'Failed to run prompt test',
+                              'model': item['model'], 'temperature': item['temperature']})
+            else:
+                latencies.append(latency)
+                event.update({
+                    'type': 'result',
+                    'response': result['response'],
+                    'model': result['model'],
+                    'temperature': result['temperature'],
+                    'execution_time': result['execution_time'],
+                    'latency': round(latency, 3),
+                    'stats': result.get('stats')
+                })
+            
+            yield event
+    finally:
+        # Drop queued work if the consumer stops early (e.g. client disconnect)
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+    
+    yield {
+        'type': 'summary',
+        'total': len(items),
+        'succeeded': len(latencies),
+        'failed': failed,
+        'concurrency': concurrency,
+        'wall_time': round(time.perf_counter() - start_time, 3),
+        'latency': summarize_latencies(latencies)
+    }
@@ -0,0 +1,205 @@
+"""
+Chat Sessions
+Server-side conversation state for multi-turn prompt tests over Ollama's chat endpoint
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from backend.config import config
+
+# Upper bound on user turns kept in one conversation
+MAX_SESSION_TURNS = 100
+
+
+class ChatSessionFullError(Exception):
+    """Raised when a conversation has reached MAX_SESSION_TURNS"""
+    pass
+
+
+class ChatSession:
+    """
+    One conversation: the system prompt, generation settings and message history
+    
+    The session remembers which Ollama endpoint served the previous turn so
+    follow-ups go back to the server that already holds the conversation in
+    its KV cache.
+    """
+    
+    def __init__(self, system_prompt: str, model: Optional[str] = None, temperature: Optional[float] = None,
+                 keep_alive: Optional[str] = None):
+        """
+        Initialize session
+        
+        Args:
+            system_prompt: System message that starts the conversation
+            model: Model to use (defaults to config default at each turn)
+            temperature: Temperature setting (defaults to config default at each turn)
+            keep_alive: How long Ollama keeps the model loaded between turns (defaults to config)
+        """
+        self.id = uuid.uuid4().hex
+        self.system_prompt = system_prompt
+        self.model = model
+        self.temperature = temperature
+        self.keep_alive = keep_alive
+        self.messages = [{'role': 'system', 'content': system_prompt}]
+        self.turns = []
+        self.endpoint = None
+        self.created_at = datetime.now()
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def send(self, content: str, backend) -> Dict[str, Any]:
+        """
+        Add a user message, get the assistant reply and record both
+        
+        Turns of one session run one at a time. If the request fails the
+        user message is not kept, so the turn can be retried.
+        
+        Args:
+            content: User message
+            backend: Object with a chat() method, normally the Ollama pool
+        
+        Returns:
+            The chat result with the 1-based 'turn' number added
+        
+        Raises:
+            ChatSessionFullError: If the session already has MAX_SESSION_TURNS turns
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        with self._lock:
+            if len(self.turns) >= MAX_SESSION_TURNS:
+                raise ChatSessionFullError(f"Conversation cannot exceed {MAX_SESSION_TURNS} turns")
+            
+            messages = self.messages + [{'role': 'user', 'content': content}]
+            result = backend.chat(messages, self.model, self.temperature, self.keep_alive, endpoint=self.endpoint)
+            
+            self.messages = messages + [{'role': 'assistant', 'content': result['message']}]
+            self.endpoint = result.get('endpoint', self.endpoint)
+            self.last_used = time.monotonic()
+            self.turns.append({
+                'execution_time': result['execution_time'],
+                'stats': result.get('stats')
+            })
+            return dict(result, turn=len(self.turns))
+    
+    def to_dict(self, include_messages: bool = True) -> Dict[str, Any]:
+        """Convert session to dictionary"""
+        data = {
+            'id': self.id,
+            'system_prompt': self.system_prompt,
+            'model': self.model or config.default_model,
+            'temperature': self.temperature if self.temperature is not None else config.default_temperature,
+            'keep_alive': self.keep_alive or config.ollama_keep_alive,
+            'endpoint': self.endpoint,
+            'turn_count': len(self.turns),
+            'created_at': self.created_at.isoformat()
+        }
+        if include_messages:
+            data['messages'] = list(self.messages)
+            data['turns'] = list(self.turns)
+        return data
+
+
+class ChatSessionStore:
+    """
+    In-memory sessions with idle expiry and a size bound
+    
+    Sessions idle for longer than ttl seconds are dropped, and the least
+    recently used session is dropped when more than max_sessions exist.
+    """
+    
+    def __init__(self, max_sessions: Optional[int] = None, ttl: Optional[int] = None):
+        """
+        Initialize store
+        
+        Args:
+            max_sessions: Maximum sessions kept at once (defaults to config)
+            ttl: Seconds an idle session is kept (defaults to config)
+        """
+        self.max_sessions = max_sessions or config.chat_max_sessions
+        self.ttl = ttl or config.chat_session_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._sessions)
+    
+    def create(self, system_prompt: str, model: Optional[str] = None, temperature: Optional[float] = None,
+               keep_alive: Optional[str] = None) -> ChatSession:
+        """
+        Start a new session
+        
+        Args:
+            system_prompt: System message that starts the conversation
+            model: Model to use (optional)
+            temperature: Temperature setting (optional)
+            keep_alive: Ollama keep_alive duration (optional)
+        
+        Returns:
+            The new session
+        """
+        session = ChatSession(system_prompt, model, temperature, keep_alive)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+    
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Look up a live session and mark it as recently used
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The session, or None if it does not exist or expired
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+    
+    def delete(self, session_id: str) -> bool:
+        """
+        Remove a session
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            True if the session existed
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    
+    def sessions(self) -> List[ChatSession]:
+        """List live sessions from least to most recently used"""
+        with self._lock:
+            self._expire()
+            return list(self._sessions.values())
+    
+    def clear(self) -> None:
+        """Remove every session"""
+        with self._lock:
+            self._sessions.clear()
+    
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [sid for sid, session in self._sessions.items() if session.last_used < cutoff]:
+            del self._sessions[session_id]
+
+
+# Global session store
+chat_sessions = ChatSessionStore()
@@ -0,0 +1,174 @@
+"""
+Background Health Monitor
+Probes the database and Ollama on an interval so health endpoints can answer from a cached snapshot
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+from sqlalchemy import text
+from backend.config import config
+from backend.services.ollama_service import get_ollama_service
+
+
+class HealthMonitor:
+    """
+    Periodically probe dependencies and keep the latest result in memory
+    
+    Probes use a short timeout and no retries, so a down Ollama instance
+    costs one timeout per interval on the monitor thread instead of a
+    retry/backoff cycle inside every health request.
+    """
+    
+    def __init__(self, interval: Optional[int] = None, probe_timeout: Optional[int] = None):
+        """
+        Initialize health monitor
+        
+        Args:
+            interval: Seconds between probes (defaults to config)
+            probe_timeout: Ollama probe timeout in seconds (defaults to config)
+        """
+        self.interval = interval if interval is not None else config.health_check_interval
+        self.probe_timeout = probe_timeout if probe_timeout is not None else config.health_probe_timeout
+        
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether the background probe thread is active"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> bool:
+        """
+        Start probing in a background thread
+        
+        Returns:
+            True if the monitor is running, False if it is disabled by an interval of 0
+        """
+        if self.interval <= 0:
+            return False
+        if self.is_running:
+            return True
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='promptlab-health', daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the background thread"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def request_probe(self) -> None:
+        """Ask the background thread to probe now instead of waiting for the interval"""
+        self._wake_event.set()
+    
+    def get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent probe result
+        
+        Returns:
+            Snapshot dictionary with an 'age_seconds' field, or None if no probe has run
+        """
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        
+        result = dict(snapshot)
+        result['age_seconds'] = round(time.monotonic() - snapshot['_monotonic'], 3)
+        del result['_monotonic']
+        return result
+    
+    def probe(self) -> Dict[str, Any]:
+        """
+        Probe the database and Ollama now and store the result
+        
+        Returns:
+            The new snapshot
+        """
+        # Serialize probes so concurrent live requests do not stack up parallel probes
+        with self._probe_lock:
+            snapshot = {
+                'checked_at': datetime.now().isoformat(),
+                'database': self._probe_database(),
+                'ollama': self._probe_ollama(),
+                '_monotonic': time.monotonic()
+            }
+            with self._lock:
+                self._snapshot = snapshot
+        return self.get_snapshot()
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.probe()
+                # Keep the pool's model listings warm so routing never waits on /api/tags
+                from backend.services.ollama_pool import ollama_pool
+                ollama_pool.refresh_models()
+            except Exception:
+                # A failing probe must never kill the monitor thread
+                pass
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+    
+    def _probe_database(self) -> Dict[str, Any]:
+        from backend.database import get_db_connection
+        
+        start_time = time.perf_counter()
+        try:
+            conn = get_db_connection()
+            try:
+                conn.execute(text("SELECT 1")).fetchone()
+            finally:
+                conn.close()
+            healthy, status = True, 'healthy'
+        except Exception as e:
+            healthy, status = False, f"error: {str(e)}"
+        
+        return {
+            'healthy': healthy,
+            'status': status,
+            'latency_ms': round((time.perf_counter() - start_time) * 1000, 2),
+            'checked_at': datetime.now().isoformat()
+        }
+    
+    def _probe_ollama(self) -> Dict[str, Any]:
+        ollama_service = get_ollama_service(config.ollama_endpoint)
+        
+        models_count = None
+        start_time = time.perf_counter()
+        try:
+            response = ollama_service._make_request('GET', 'api/tags', max_retries=1, timeout=self.probe_timeout)
+            models_count = len(response.json().get('models', []))
+            healthy, status = True, f"healthy ({models_count} models)"
+        except Exception as e:
+            healthy, status = False, f"error: {str(e)}"
+        
+        return {
+            'healthy': healthy,
+            'status': status,
+            'endpoint': ollama_service.endpoint,
+            'models_count': models_count,
+            'latency_ms': round((time.perf_counter() - start_time) * 1000, 2),
+            'checked_at': datetime.now().isoformat()
+        }
+
+
+def is_live_request(args) -> bool:
+    """Check whether query arguments ask for an on-demand probe (?live=1)"""
+    return args.get('live', '').lower() in ('1', 'true', 'yes')
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
@@ -0,0 +1,416 @@
+"""
+Background Job Queue
+Runs long operations on per-type worker pools and persists their state and progress in the jobs table
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, Optional
+from backend.config import config
+
+logger = logging.getLogger('promptlab')
+
+# Minimum seconds between progress writes to the jobs table
+PROGRESS_WRITE_INTERVAL = 0.5
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job when cancellation was requested"""
+    pass
+
+
+class UnknownJobTypeError(ValueError):
+    """Raised when submitting a job type that has no registered handler"""
+    pass
+
+
+class JobContext:
+    """
+    Handle passed to a job handler
+    
+    Gives the handler its parameters and input file, a place to write its
+    result file, throttled progress reporting and cooperative cancellation.
+    """
+    
+    def __init__(self, manager: 'JobManager', job_id: str, params: Dict[str, Any], cancel_event: threading.Event):
+        self.manager = manager
+        self.job_id = job_id
+        self.params = params
+        self.result_file = None
+        self._cancel_event = cancel_event
+        self._last_report = 0.0
+    
+    @property
+    def input_path(self) -> str:
+        """Path of the file uploaded with the job"""
+        return os.path.join(self.manager.jobs_dir, f"{self.job_id}.input")
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested"""
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self) -> None:
+        """
+        Stop the job if cancellation was requested
+        
+        Raises:
+            JobCancelledError: If the job was cancelled
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelledError(f"Job {self.job_id} was cancelled")
+    
+    def result_path(self, extension: str) -> str:
+        """
+        Reserve the job's result file
+        
+        Args:
+            extension: File extension without the dot
+        
+        Returns:
+            Absolute path the handler should write the result to
+        """
+        self.result_file = f"{self.job_id}.{extension}"
+        return os.path.join(self.manager.jobs_dir, self.result_file)
+    
+    def report(self, current: int, total: Optional[int] = None, message: Optional[str] = None,
+               force: bool = False) -> None:
+        """
+        Record progress, writing to the database at most every PROGRESS_WRITE_INTERVAL seconds
+        
+        Args:
+            current: Units of work done
+            total: Total units of work, if known
+            message: Short human-readable status (optional)
+            force: Write even if the last write was recent
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_WRITE_INTERVAL:
+            return
+        self._last_report = now
+        
+        values = {'progress_current': current}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message
+        self.manager._update(self.job_id, **values)
+
+
+class JobManager:
+    """
+    In-process job runner with bounded concurrency per job type
+    
+    Each registered job type gets its own thread pool, so for example a
+    large import cannot starve batch tests. Job state is persisted in the
+    jobs table, which makes status and results available across requests
+    and lets jobs interrupted by a restart be marked as failed.
+    """
+    
+    def __init__(self, jobs_dir: Optional[str] = None):
+        """
+        Initialize job manager
+        
+        Args:
+            jobs_dir: Directory for uploaded inputs and result files (defaults to config)
+        """
+        self._jobs_dir = jobs_dir
+        self._handlers = {}
+        self._active = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def jobs_dir(self) -> str:
+        """Absolute path of the directory holding job inputs and results"""
+        return os.path.abspath(self._jobs_dir or config.jobs_dir)
+    
+    @property
+    def job_types(self) -> List[str]:
+        """Registered job types"""
+        return sorted(self._handlers)
+    
+    def register(self, job_type: str, handler: Callable[[JobContext], Optional[Dict[str, Any]]],
+                 concurrency: int = 1) -> None:
+        """
+        Register the handler for a job type
+        
+        Args:
+            job_type: Job type name used by submit
+            handler: Callable receiving a JobContext and returning a JSON-serializable result
+            concurrency: Maximum jobs of this type running at once
+        """
+        with self._lock:
+            previous = self._handlers.get(job_type)
+            executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=f'promptlab-job-{job_type}')
+            self._handlers[job_type] = (handler, executor)
+        if previous is not None:
+            previous[1].shutdown(wait=False)
+    
+    def submit(self, job_type: str, params: Optional[Dict[str, Any]] = None, upload=None) -> Dict[str, Any]:
+        """
+        Queue a job
+        
+        Args:
+            job_type: Registered job type
+            params: JSON-serializable job parameters
+            upload: Binary file object copied to the job's input file (optional)
+        
+        Returns:
+            The queued job as a dictionary
+        
+        Raises:
+            UnknownJobTypeError: If no handler is registered for job_type
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        if job_type not in self._handlers:
+            raise UnknownJobTypeError(f"Unknown job type: {job_type}")
+        
+        params = params or {}
+        job_id = uuid.uuid4().hex
+        
+        if upload is not None:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            with open(os.path.join(self.jobs_dir, f"{job_id}.input"), 'wb') as target:
+                shutil.copyfileobj(upload, target)
+        
+        session = get_db_session()
+        try:
+            job = Job(id=job_id, type=job_type, status='queued', params=json.dumps(params))
+            session.add(job)
+            session.commit()
+            data = job.to_dict()
+        finally:
+            close_db_session(session)
+        
+        cancel_event = threading.Event()
+        handler, executor = self._handlers[job_type]
+        with self._lock:
+            future = executor.submit(self._run, job_id, handler, params, cancel_event)
+            self._active[job_id] = (future, cancel_event)
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return data
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job
+        
+        Args:
+            job_id: Job identifier
+        
+        Returns:
+            The job as a dictionary, or None if it does not exist
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            job = session.get(Job, job_id)
+            return job.to_dict() if job else None
+        finally:
+            close_db_session(session)
+    
+    def list_jobs(self, job_type: Optional[str] = None, status: Optional[str] = None,
+                  limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        List jobs, newest first
+        
+        Args:
+            job_type: Only jobs of this type (optional)
+            status: Only jobs with this status (optional)
+            limit: Maximum number of jobs returned
+        
+        Returns:
+            List of job dictionaries
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            query = session.query(Job)
+            if job_type:
+                query = query.filter(Job.type == job_type)
+            if status:
+                query = query.filter(Job.status == status)
+            jobs = query.order_by(Job.created_at.desc(), Job.id).limit(limit).all()
+            return [job.to_dict() for job in jobs]
+        finally:
+            close_db_session(session)
+    
+    def get_result_path(self, job_id: str) -> Optional[str]:
+        """
+        Get the result file of a finished job
+        
+        Args:
+            job_id: Job identifier
+        
+        Returns:
+            Path to the result file, or None if the job has none
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            job = session.get(Job, job_id)
+            if job is None or job.status != 'succeeded' or not job.result_file:
+                return None
+            path = os.path.join(self.jobs_dir, job.result_file)
+            return path if os.path.exists(path) else None
+        finally:
+            close_db_session(session)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a queued or running job
+        
+        A queued job is cancelled immediately; a running job stops at its
+        next cancellation check.
+        
+        Args:
+            job_id: Job identifier
+        
+        Returns:
+            True if the job was active and cancellation was requested
+        """
+        with self._lock:
+            entry = self._active.get(job_id)
+        if entry is None:
+            return False
+        
+        future, cancel_event = entry
+        cancel_event.set()
+        if future.cancel():
+            self._finish(job_id, 'cancelled', message='Cancelled before it started')
+            self._remove_files(job_id, None)
+        return True
+    
+    def delete(self, job_id: str) -> bool:
+        """
+        Remove a finished job and its files
+        
+        Args:
+            job_id: Job identifier
+        
+        Returns:
+            True if the job existed and was deleted
+        
+        Raises:
+            ValueError: If the job is still queued or running
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                return False
+            if not job.is_finished:
+                raise ValueError(f"Job {job_id} is still {job.status}")
+            result_file = job.result_file
+            session.delete(job)
+            session.commit()
+        finally:
+            close_db_session(session)
+        
+        self._remove_files(job_id, result_file)
+        return True
+    
+    def recover_interrupted(self) -> int:
+        """
+        Mark jobs left queued or running by a previous process as failed
+        
+        Returns:
+            Number of jobs marked as failed
+        """
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            count = session.query(Job).filter(Job.status.in_(('queued', 'running'))).update({
+                'status': 'failed',
+                'error': 'Interrupted by a server restart',
+                'finished_at': datetime.now(timezone.utc)
+            }, synchronize_session=False)
+            session.commit()
+            return count
+        finally:
+            close_db_session(session)
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Cancel active jobs and stop the worker pools"""
+        with self._lock:
+            active = list(self._active.values())
+            executors = [executor for handler, executor in self._handlers.values()]
+        for future, cancel_event in active:
+            cancel_event.set()
+        for executor in executors:
+            executor.shutdown(wait=wait, cancel_futures=True)
+    
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._active.pop(job_id, None)
+    
+    def _run(self, job_id: str, handler, params: Dict[str, Any], cancel_event: threading.Event):
+        if cancel_event.is_set():
+            self._finish(job_id, 'cancelled', message='Cancelled before it started')
+            self._remove_files(job_id, None)
+            return
+        
+        self._update(job_id, status='running', started_at=datetime.now(timezone.utc))
+        context = JobContext(self, job_id, params, cancel_event)
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            result = handler(context)
+        except JobCancelledError:
+            self._finish(job_id, 'cancelled', message='Cancelled')
+            self._remove_files(job_id, context.result_file)
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            self._finish(job_id, 'failed', error=str(e) or type(e).__name__)
+            self._remove_files(job_id, context.result_file)
+        else:
+            self._finish(job_id, 'succeeded', result=json.dumps(result) if result is not None else None,
+                         result_file=context.result_file)
+            self._remove_files(job_id, None)
+    
+    def _finish(self, job_id: str, status: str, **values):
+        self._update(job_id, status=status, finished_at=datetime.now(timezone.utc), **values)
+    
+    def _update(self, job_id: str, **values):
+        from backend.database import get_db_session, close_db_session
+        from backend.models.job import Job
+        
+        session = get_db_session()
+        try:
+            session.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            session.commit()
+        finally:
+            close_db_session(session)
+    
+    def _remove_files(self, job_id: str, result_file: Optional[str]):
+        # The uploaded input is only needed while the job runs
+        names = [f"{job_id}.input"] + ([result_file] if result_file else [])
+        for name in names:
+            try:
+                os.unlink(os.path.join(self.jobs_dir, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove job file {name}: {e}")
+
+
+# Global job manager; handlers are registered by the jobs API module
+job_manager = JobManager()
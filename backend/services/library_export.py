@@ -0,0 +1,118 @@
+"""
+Library Export
+Incremental JSON, YAML and NDJSON serialization of the prompt library
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, Iterator
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Formats accepted by the streaming export
+EXPORT_FORMATS = ('json', 'yaml', 'ndjson')
+
+# Response content type for each export format
+EXPORT_CONTENT_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/x-yaml',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Bytes of serialized prompts collected before a chunk is sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def build_export_metadata(total_prompts: int) -> Dict[str, Any]:
+    """
+    Build the metadata block written at the top of an export
+    
+    Args:
+        total_prompts: Number of prompts in the export
+    
+    Returns:
+        Metadata dictionary
+    """
+    return {
+        'export_timestamp': datetime.now(timezone.utc).isoformat(),
+        'total_prompts': total_prompts,
+        'format_version': '1.0',
+        'exported_by': 'PromptLab'
+    }
+
+
+def iter_export(prompts: Iterable[Dict[str, Any]], metadata: Dict[str, Any], export_format: str) -> Iterator[str]:
+    """
+    Serialize an export one prompt at a time
+    
+    JSON and YAML output has the same structure as the non-streaming export
+    ({'metadata': ..., 'prompts': [...]}) so it can be imported unchanged.
+    NDJSON output is one {'metadata': ...} line followed by one prompt
+    object per line.
+    
+    Args:
+        prompts: Prompt dictionaries in export order
+        metadata: Metadata block from build_export_metadata
+        export_format: One of EXPORT_FORMATS
+    
+    Yields:
+        Serialized text fragments
+    
+    Raises:
+        ValueError: If the format is unknown or YAML support is not available
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == 'yaml' and yaml is None:
+        raise ValueError("YAML support not available")
+    
+    if export_format == 'ndjson':
+        yield json.dumps({'metadata': metadata}, ensure_ascii=False) + '\n'
+        for prompt in prompts:
+            yield json.dumps(prompt, ensure_ascii=False) + '\n'
+    
+    elif export_format == 'yaml':
+        yield yaml.dump({'metadata': metadata}, default_flow_style=False, sort_keys=False)
+        key = 'prompts:\n'
+        for prompt in prompts:
+            # A one-item list dumps as a '- ' sequence entry that can be concatenated
+            yield key + yaml.dump([prompt], default_flow_style=False, sort_keys=False, allow_unicode=True)
+            key = ''
+        if key:
+            yield 'prompts: []\n'
+    
+    else:
+        header = json.dumps(metadata, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        yield '{\n  "metadata": ' + header + ',\n  "prompts": ['
+        separator = '\n'
+        for prompt in prompts:
+            yield separator + '    ' + json.dumps(prompt, ensure_ascii=False)
+            separator = ',\n'
+        yield '\n  ]\n}\n' if separator == ',\n' else ']\n}\n'
+
+
+def buffer_chunks(fragments: Iterable[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Join small text fragments into UTF-8 chunks of roughly chunk_size bytes
+    
+    Args:
+        fragments: Text fragments such as those produced by iter_export
+        chunk_size: Target chunk size in bytes
+    
+    Yields:
+        Encoded chunks; only the last one may be smaller than chunk_size
+    """
+    buffer = []
+    size = 0
+    for fragment in fragments:
+        data = fragment.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
@@ -0,0 +1,372 @@
+"""
+Library Import Parsing
+Incremental JSON, NDJSON and YAML readers that yield prompts one at a time from an upload stream
+"""
+
+import codecs
+import json
+from typing import Any, Iterator, Optional
+try:
+    import yaml
+    from yaml.events import MappingStartEvent, MappingEndEvent, SequenceStartEvent, SequenceEndEvent
+except ImportError:
+    yaml = None
+
+# Formats accepted by the streaming import
+IMPORT_FORMATS = ('json', 'ndjson', 'yaml')
+
+# Characters read from the upload per refill
+IMPORT_READ_SIZE = 64 * 1024
+
+# Largest single JSON value accepted; a prompt entry is far smaller than this
+MAX_IMPORT_VALUE_SIZE = 1024 * 1024
+
+# Bytes inspected to detect the format of an upload
+SNIFF_SIZE = 4096
+
+
+class ImportParseError(Exception):
+    """Raised when an import file cannot be parsed"""
+    
+    # API error code reported for the failure
+    code = 'PARSE_ERROR'
+
+
+class EmptyImportError(ImportParseError):
+    """Raised when an import file has no content"""
+    
+    code = 'MISSING_IMPORT_DATA'
+
+
+class _PrefixedStream:
+    """Binary stream that replays bytes already read for format detection"""
+    
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = prefix
+        self._stream = stream
+    
+    def read(self, size: int = -1) -> bytes:
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._stream.read(), b''
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            return data
+        return self._stream.read(size)
+
+
+class _TextStream:
+    """UTF-8 text view of an upload that reports undecodable bytes as parse errors"""
+    
+    def __init__(self, stream):
+        self._reader = codecs.getreader('utf-8-sig')(stream, errors='strict')
+    
+    def _decoded(self, read, *args):
+        try:
+            return read(*args)
+        except UnicodeDecodeError as e:
+            raise ImportParseError(f"Import file is not valid UTF-8: {e.reason}")
+    
+    def read(self, size: int = -1) -> str:
+        return self._decoded(self._reader.read, size)
+    
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            line = self._decoded(self._reader.readline)
+            if not line:
+                return
+            yield line
+
+
+class _JsonReader:
+    """Pull-based JSON reader that decodes one value at a time from a text stream"""
+    
+    def __init__(self, stream, read_size: int = IMPORT_READ_SIZE):
+        self._stream = stream
+        self._read_size = read_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._read_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop consumed text so the buffer only holds the value being decoded
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at end of input)"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be char"""
+        found = self.peek()
+        if found != char:
+            raise ImportParseError(f"Invalid JSON: expected '{char}' but found {found!r}" if found
+                                   else f"Invalid JSON: expected '{char}' but the file ended")
+        self._pos += 1
+    
+    def value(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer end may be a truncated number
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise ImportParseError(f"Invalid JSON: {e}")
+            
+            if len(self._buffer) - self._pos > MAX_IMPORT_VALUE_SIZE:
+                raise ImportParseError("Invalid JSON: entry is malformed or exceeds 1 MB")
+            self._fill()
+    
+    def array_items(self) -> Iterator[Any]:
+        """Decode the items of the array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def iter_json_prompts(stream) -> Iterator[Any]:
+    """
+    Yield prompt entries from a JSON export without loading the whole file
+    
+    Accepts the export structure ({'metadata': ..., 'prompts': [...]}) or a
+    bare array of prompts.
+    
+    Args:
+        stream: Text stream
+    
+    Yields:
+        Prompt entries as decoded from the file
+    
+    Raises:
+        ImportParseError: If the file is not valid JSON or has no prompts array
+    """
+    reader = _JsonReader(stream)
+    first = reader.peek()
+    if first == '[':
+        yield from reader.array_items()
+        return
+    if first != '{':
+        raise ImportParseError('Import data must be a JSON object')
+    
+    reader.expect('{')
+    found = False
+    if reader.peek() != '}':
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ImportParseError('Invalid JSON: object keys must be strings')
+            reader.expect(':')
+            
+            if key == 'prompts':
+                if reader.peek() != '[':
+                    raise ImportParseError('Prompts field must be an array')
+                found = True
+                yield from reader.array_items()
+            else:
+                # Metadata and unknown fields are small and only skipped
+                reader.value()
+            
+            if reader.peek() != ',':
+                break
+            reader.expect(',')
+    reader.expect('}')
+    
+    if not found:
+        raise ImportParseError('Import data must contain a "prompts" field')
+
+
+def iter_ndjson_prompts(stream) -> Iterator[Any]:
+    """
+    Yield prompt entries from NDJSON, one JSON object per line
+    
+    A leading {'metadata': ...} line, as written by the NDJSON export, is skipped.
+    
+    Args:
+        stream: Text stream
+    
+    Yields:
+        Prompt entries as decoded from the file
+    
+    Raises:
+        ImportParseError: If a line is not valid JSON
+    """
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportParseError(f"Invalid JSON on line {line_number}: {e}")
+        
+        if line_number == 1 and isinstance(entry, dict) and list(entry) == ['metadata']:
+            continue
+        yield entry
+
+
+def iter_yaml_prompts(stream) -> Iterator[Any]:
+    """
+    Yield prompt entries from a YAML export without loading the whole document
+    
+    Accepts the export structure (metadata and prompts keys) or a bare
+    sequence of prompts. Each entry is constructed from parser events on its
+    own, so memory use is bounded by the largest entry.
+    
+    Args:
+        stream: Text stream
+    
+    Yields:
+        Prompt entries as decoded from the file
+    
+    Raises:
+        ImportParseError: If the file is not valid YAML or has no prompts sequence
+    """
+    if yaml is None:
+        raise ImportParseError('YAML support not available')
+    
+    loader = yaml.SafeLoader(stream)
+    
+    def construct_next():
+        node = loader.compose_node(None, None)
+        value = loader.construct_object(node, deep=True)
+        # Forget constructed entries and anchors so they can be garbage collected
+        loader.constructed_objects = {}
+        loader.recursive_objects = {}
+        loader.anchors = {}
+        return value
+    
+    def sequence_items():
+        loader.get_event()
+        while not loader.check_event(SequenceEndEvent):
+            yield construct_next()
+        loader.get_event()
+    
+    try:
+        # Stream and document start
+        loader.get_event()
+        loader.get_event()
+        
+        if loader.check_event(SequenceStartEvent):
+            yield from sequence_items()
+            return
+        if not loader.check_event(MappingStartEvent):
+            raise ImportParseError('Import data must be a YAML mapping')
+        
+        loader.get_event()
+        found = False
+        while not loader.check_event(MappingEndEvent):
+            key = construct_next()
+            if key == 'prompts':
+                if not loader.check_event(SequenceStartEvent):
+                    raise ImportParseError('Prompts field must be an array')
+                found = True
+                yield from sequence_items()
+            else:
+                construct_next()
+        
+        if not found:
+            raise ImportParseError('Import data must contain a "prompts" field')
+    except yaml.YAMLError as e:
+        raise ImportParseError(f"Invalid YAML: {e}")
+    finally:
+        loader.dispose()
+
+
+def detect_import_format(head: bytes, filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """
+    Work out the format of an upload from its name, content type or first bytes
+    
+    Args:
+        head: First bytes of the upload
+        filename: Uploaded file name (optional)
+        content_type: Upload content type (optional)
+    
+    Returns:
+        One of IMPORT_FORMATS
+    """
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    
+    if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+    if filename.endswith(('.yaml', '.yml')) or 'yaml' in content_type:
+        return 'yaml'
+    
+    text = head.decode('utf-8', errors='ignore').lstrip('﻿').lstrip()
+    if text.startswith('['):
+        return 'json'
+    if text.startswith('{'):
+        # One complete object per line is NDJSON; a pretty-printed export spans lines
+        first_line = text.split('\n', 1)[0]
+        try:
+            entry = json.loads(first_line)
+        except json.JSONDecodeError:
+            return 'json'
+        return 'json' if isinstance(entry, dict) and 'prompts' in entry else 'ndjson'
+    if filename.endswith('.json') or 'json' in content_type:
+        return 'json'
+    return 'yaml'
+
+
+def open_import_stream(stream, data_format: Optional[str] = None, filename: Optional[str] = None,
+                       content_type: Optional[str] = None) -> Iterator[Any]:
+    """
+    Prepare an upload for incremental parsing
+    
+    Args:
+        stream: Binary stream of the upload
+        data_format: One of IMPORT_FORMATS, or None to detect it
+        filename: Uploaded file name, used for detection (optional)
+        content_type: Upload content type, used for detection (optional)
+    
+    Returns:
+        Lazy iterator of prompt entries; parse errors surface while iterating
+    
+    Raises:
+        EmptyImportError: If the upload is empty
+        ImportParseError: If the format is not supported
+    """
+    head = stream.read(SNIFF_SIZE)
+    if not head.strip():
+        raise EmptyImportError('Import file is empty')
+    
+    data_format = data_format or detect_import_format(head, filename, content_type)
+    if data_format not in IMPORT_FORMATS:
+        raise ImportParseError(f"Unknown import format: {data_format}")
+    if data_format == 'yaml' and yaml is None:
+        raise ImportParseError('YAML support not available')
+    
+    text_stream = _TextStream(_PrefixedStream(head, stream))
+    if data_format == 'ndjson':
+        return iter_ndjson_prompts(text_stream)
+    if data_format == 'yaml':
+        return iter_yaml_prompts(text_stream)
+    return iter_json_prompts(text_stream)
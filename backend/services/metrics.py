@@ -0,0 +1,293 @@
+"""
+Application Metrics
+Lightweight thread-safe counters, gauges and histograms rendered in Prometheus text format
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Iterable
+
+# Latency buckets in seconds, from fast DB queries to long generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Iterable[str], values: Iterable, extra: str = '') -> str:
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base class holding per-label-set values behind a lock"""
+    
+    metric_type = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if len(labels) != len(self.label_names) or any(name not in labels for name in self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+    
+    def clear(self) -> None:
+        """Reset all recorded values"""
+        with self._lock:
+            self._values.clear()
+    
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    
+    metric_type = 'counter'
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    
+    metric_type = 'gauge'
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+    
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+    
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Increment the gauge for the duration of a block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+    
+    metric_type = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+    
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            items = sorted((key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items())
+        
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together by the metrics endpoint"""
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+    
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+    
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+    
+    def clear(self) -> None:
+        """Reset every metric's values (used by tests)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+    
+    def render(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format
+        
+        Returns:
+            Exposition text ending in a newline
+        """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Global registry and application metrics
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'promptlab_http_request_duration_seconds',
+    'HTTP request latency by blueprint and route',
+    ('blueprint', 'route', 'method', 'status')
+)
+
+ollama_request_duration = registry.histogram(
+    'promptlab_ollama_request_duration_seconds',
+    'Latency of individual Ollama API calls including retries',
+    ('method', 'path', 'outcome')
+)
+
+ollama_retries = registry.counter(
+    'promptlab_ollama_retries_total',
+    'Ollama API attempts that were retried',
+    ('path',)
+)
+
+ollama_timeouts = registry.counter(
+    'promptlab_ollama_timeouts_total',
+    'Ollama API attempts that timed out',
+    ('path',)
+)
+
+model_cache_lookups = registry.counter(
+    'promptlab_model_cache_lookups_total',
+    'Model list cache lookups by result',
+    ('result',)
+)
+
+generations_in_flight = registry.gauge(
+    'promptlab_generations_in_flight',
+    'Ollama generations currently running',
+    ('kind',)
+)
+
+ollama_backend_requests = registry.counter(
+    'promptlab_ollama_backend_requests_total',
+    'Generations routed to each Ollama backend by outcome',
+    ('endpoint', 'outcome')
+)
+
+ollama_backend_in_flight = registry.gauge(
+    'promptlab_ollama_backend_in_flight',
+    'Generations currently outstanding on each Ollama backend',
+    ('endpoint',)
+)
+
+ollama_circuit_open = registry.gauge(
+    'promptlab_ollama_circuit_open',
+    'Whether the circuit breaker for an Ollama backend is open (1) or closed (0)',
+    ('endpoint',)
+)
+
+test_runs_recorded = registry.counter(
+    'promptlab_test_runs_recorded_total',
+    'Prompt test results written to the history table'
+)
+
+test_runs_dropped = registry.counter(
+    'promptlab_test_runs_dropped_total',
+    'Prompt test results not recorded because the queue was full or the write failed'
+)
+
+db_sessions_opened = registry.counter(
+    'promptlab_db_sessions_opened_total',
+    'Database sessions opened'
+)
+
+db_sessions_closed = registry.counter(
+    'promptlab_db_sessions_closed_total',
+    'Database sessions closed'
+)
+
+db_query_duration = registry.histogram(
+    'promptlab_db_query_duration_seconds',
+    'Database statement execution time by statement type',
+    ('statement',)
+)
@@ -0,0 +1,149 @@
+"""
+MinHash Signatures
+Word shingling, MinHash signatures and LSH banding for near-duplicate prompt detection
+"""
+
+import hashlib
+import random
+import re
+import struct
+import zlib
+from typing import List, Set
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Signature length; the similarity estimate has a standard error of about 0.04
+NUM_PERMUTATIONS = 128
+
+# LSH bands of ROWS_PER_BAND signature values. Bodies sharing any band are
+# candidates: about 95% of pairs at 0.8 similarity and nearly all pairs at
+# 0.9 share a band, while only 1 in 4 pairs at 0.6 and almost no pairs
+# below 0.5 do.
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SIGNATURE_FORMAT = f'<{NUM_PERMUTATIONS}I'
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERMUTATIONS)]
+
+# Shingles hashed per vectorized step, bounding the temporary arrays to a few MB
+_SHINGLE_CHUNK = 2048
+
+if np is not None:
+    # Permutation coefficients as columns, with a split into its high 29 and
+    # low 32 bits so every product fits in 64 bits
+    _A_HIGH = np.array([a >> 32 for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _A_LOW = np.array([a & 0xFFFFFFFF for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+
+def shingle_hashes(text: str) -> Set[int]:
+    """
+    Split text into overlapping word shingles and hash each one
+    
+    Text is lowercased and reduced to words, so whitespace, punctuation and
+    case changes do not affect similarity.
+    
+    Args:
+        text: Text to shingle
+    
+    Returns:
+        Set of 32-bit shingle hashes (one shingle for texts shorter than SHINGLE_SIZE words)
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+            for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text: str) -> bytes:
+    """
+    Compute the MinHash signature of a text
+    
+    Args:
+        text: Text to sign
+    
+    Returns:
+        Packed signature of NUM_PERMUTATIONS 32-bit values
+    """
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return struct.pack(_SIGNATURE_FORMAT, *([_MAX_HASH] * NUM_PERMUTATIONS))
+    if np is not None:
+        return _signature_values(np.fromiter(hashes, dtype=np.uint64, count=len(hashes))).astype('<u4').tobytes()
+    return struct.pack(_SIGNATURE_FORMAT, *(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a, b in _PERMUTATIONS
+    ))
+
+
+def _signature_values(hashes):
+    """
+    Apply every permutation to an array of shingle hashes at once and keep the minimum of each
+    
+    Computes the same (a * x + b) mod 2^61 - 1 as the pure-Python path in
+    uint64 arithmetic: a * x is split into a low product and a high product
+    that is rotated into place, which equals multiplying by 2^32 modulo a
+    Mersenne prime.
+    """
+    signature = np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(hashes), _SHINGLE_CHUNK):
+        values = hashes[None, start:start + _SHINGLE_CHUNK]
+        low = _A_LOW * values
+        high = _A_HIGH * values
+        permuted = (((high & np.uint64((1 << 29) - 1)) << np.uint64(32)) + (high >> np.uint64(29))
+                    + (low & np.uint64(_MERSENNE_PRIME)) + (low >> np.uint64(61)) + _B)
+        permuted = (permuted & np.uint64(_MERSENNE_PRIME)) + (permuted >> np.uint64(61))
+        permuted = np.where(permuted >= np.uint64(_MERSENNE_PRIME), permuted - np.uint64(_MERSENNE_PRIME), permuted)
+        np.minimum(signature, (permuted & np.uint64(_MAX_HASH)).min(axis=1), out=signature)
+    return signature
+
+
+def estimate_similarity(signature_a: bytes, signature_b: bytes) -> float:
+    """
+    Estimate the Jaccard similarity of two texts' shingle sets from their signatures
+    
+    Args:
+        signature_a: Signature from minhash_signature
+        signature_b: Signature from minhash_signature
+    
+    Returns:
+        Fraction of matching signature values, between 0.0 and 1.0
+    """
+    values_a = struct.unpack(_SIGNATURE_FORMAT, signature_a)
+    values_b = struct.unpack(_SIGNATURE_FORMAT, signature_b)
+    return sum(1 for a, b in zip(values_a, values_b) if a == b) / NUM_PERMUTATIONS
+
+
+def band_buckets(signature: bytes) -> List[int]:
+    """
+    Hash each band of a signature to an LSH bucket
+    
+    The band number is part of the hash, so equal values in different bands
+    land in different buckets.
+    
+    Args:
+        signature: Signature from minhash_signature
+    
+    Returns:
+        One bucket per band, as signed 64-bit integers
+    """
+    band_size = ROWS_PER_BAND * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + signature[band * band_size:(band + 1) * band_size], digest_size=8).digest(),
+            'big', signed=True
+        )
+        for band in range(NUM_BANDS)
+    ]
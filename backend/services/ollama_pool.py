@@ -0,0 +1,581 @@
+"""
+Ollama Backend Pool
+Routes generations across several Ollama endpoints with circuit breakers and model-aware selection
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from backend.config import config, OLLAMA_ROUTING_STRATEGIES
+from backend.services import metrics
+from backend.services.ollama_service import (
+    OllamaService, OllamaConnectionError, OllamaTimeoutError, OllamaClientError,
+    parse_models_response, ollama_service, ollama_services
+)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one backend
+    
+    After failure_threshold consecutive failures the circuit opens and the
+    backend is taken out of rotation. Once reset_timeout seconds have passed
+    a single trial request is let through (half-open): success closes the
+    circuit, failure opens it for another reset_timeout.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize circuit breaker
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds an open circuit waits before a trial request
+            clock: Monotonic time source (replaceable in tests)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            return self._state()
+    
+    @property
+    def failures(self) -> int:
+        """Consecutive failures since the last success"""
+        with self._lock:
+            return self._failures
+    
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+    
+    def is_available(self) -> bool:
+        """Check whether a request could be sent now, without claiming the half-open trial"""
+        with self._lock:
+            state = self._state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and not self._trial_in_flight)
+    
+    def acquire(self) -> bool:
+        """
+        Claim permission to send a request
+        
+        Returns:
+            True if the circuit is closed or this caller won the half-open trial
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def release(self) -> None:
+        """Give up a claimed trial without recording an outcome"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful request"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold or after a failed trial"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class OllamaBackend:
+    """One Ollama endpoint in the pool together with its routing state"""
+    
+    def __init__(self, service: OllamaService, breaker: CircuitBreaker, latency_alpha: float = 0.3):
+        """
+        Initialize backend
+        
+        Args:
+            service: Shared service for the endpoint
+            breaker: Circuit breaker guarding the endpoint
+            latency_alpha: Weight of the newest sample in the latency moving average
+        """
+        self.service = service
+        self.breaker = breaker
+        self.latency_alpha = latency_alpha
+        self.outstanding = 0
+        self.latency = None
+        self.models = None
+        self.models_checked_at = None
+    
+    @property
+    def endpoint(self) -> str:
+        return self.service.endpoint
+    
+    def serves_model(self, model: str) -> bool:
+        """Check the last /api/tags listing for a model; unknown listings match everything"""
+        if self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+    
+    def record_latency(self, seconds: float) -> None:
+        """Fold a request duration into the exponentially weighted moving average"""
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = self.latency_alpha * seconds + (1 - self.latency_alpha) * self.latency
+
+
+class OllamaPool:
+    """
+    Spread generations across Ollama endpoints
+    
+    Each request goes to the healthy backend with the fewest outstanding
+    requests ('least_outstanding') or the lowest latency average weighted by
+    outstanding requests ('latency'). When the pool has several backends,
+    those whose /api/tags listing includes the requested model are
+    preferred; listings are cached and refreshed off the request path. A
+    request that fails on transport, timeout or a server error is retried
+    once on every other backend before the error is raised, and counts
+    against the backend's circuit breaker. Requests Ollama rejects
+    (4xx, such as an unknown model) are raised at once and do not count.
+    If every circuit is open the pool routes anyway rather than failing
+    without trying.
+    """
+    
+    def __init__(self, services: List[OllamaService], strategy: str = 'least_outstanding',
+                 failure_threshold: int = 3, reset_timeout: float = 30, models_ttl: float = 60,
+                 probe_timeout: Optional[int] = None):
+        """
+        Initialize pool
+        
+        Args:
+            services: One service per endpoint
+            strategy: Routing strategy, one of OLLAMA_ROUTING_STRATEGIES
+            failure_threshold: Consecutive failures that take a backend out of rotation
+            reset_timeout: Seconds before an unhealthy backend gets a trial request
+            models_ttl: Seconds a backend's model listing is trusted
+            probe_timeout: Timeout for model listing requests (defaults to config)
+        
+        Raises:
+            ValueError: If no services are given or the strategy is unknown
+        """
+        if not services:
+            raise ValueError("OllamaPool requires at least one service")
+        if strategy not in OLLAMA_ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy}. Available: {', '.join(OLLAMA_ROUTING_STRATEGIES)}")
+        
+        self.strategy = strategy
+        self.models_ttl = models_ttl
+        self.probe_timeout = probe_timeout or config.health_probe_timeout
+        self.backends = [OllamaBackend(service, CircuitBreaker(failure_threshold, reset_timeout))
+                         for service in services]
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+    
+    def test_prompt(self, system_prompt: str, user_input: str, model: str = None,
+                    temperature: float = None) -> Dict[str, Any]:
+        """
+        Test a prompt on the best available backend
+        
+        Args:
+            system_prompt: The system prompt to test
+            user_input: User message to send with the system prompt
+            model: Model to use for testing (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+        
+        Returns:
+            OllamaService.test_prompt result with the serving 'endpoint' added
+        
+        Raises:
+            OllamaConnectionError: If every backend failed
+            OllamaTimeoutError: If the last backend tried timed out
+        """
+        def operation(backend):
+            result = backend.service.test_prompt(system_prompt, user_input, model, temperature)
+            return dict(result, endpoint=backend.endpoint)
+        
+        return self._call(model or config.default_model, operation)
+    
+    def stream_test_prompt(self, system_prompt: str, user_input: str, model: str = None,
+                           temperature: float = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a prompt test from the best available backend
+        
+        A backend that fails before producing the first event is skipped like
+        in test_prompt. Once events have been yielded the stream stays on its
+        backend, and a later failure is raised to the caller. The backend
+        counts as outstanding until the stream ends or is closed.
+        
+        Args:
+            system_prompt: The system prompt to test
+            user_input: User message to send with the system prompt
+            model: Model to use for testing (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+        
+        Yields:
+            OllamaService.stream_test_prompt events, with the serving
+            'endpoint' added to the final 'done' event
+        
+        Raises:
+            OllamaConnectionError: If every backend failed or the stream was interrupted
+            OllamaTimeoutError: If the last backend tried timed out
+        """
+        tried = []
+        last_error = None
+        for _ in range(len(self.backends)):
+            backend, granted = self._acquire(model or config.default_model, tried)
+            tried.append(backend)
+            
+            start_time = time.perf_counter()
+            try:
+                events = backend.service.stream_test_prompt(system_prompt, user_input, model, temperature)
+                event = next(events)
+            except OllamaClientError:
+                self._release(backend, 'error', granted=granted)
+                raise
+            except (OllamaConnectionError, OllamaTimeoutError) as e:
+                self._release(backend, 'failure')
+                last_error = e
+                continue
+            except Exception:
+                self._release(backend, 'error', granted=granted)
+                raise
+            break
+        else:
+            raise last_error
+        
+        outcome = 'error'
+        try:
+            for event in itertools.chain([event], events):
+                yield dict(event, endpoint=backend.endpoint) if event['type'] == 'done' else event
+            outcome = 'success'
+        except OllamaClientError:
+            raise
+        except (OllamaConnectionError, OllamaTimeoutError):
+            outcome = 'failure'
+            raise
+        finally:
+            events.close()
+            self._release(backend, outcome, time.perf_counter() - start_time if outcome == 'success' else None,
+                          granted=granted)
+    
+    def refine_prompt(self, objective: str, target_model: str = None) -> str:
+        """
+        Refine an objective on the best available backend
+        
+        Args:
+            objective: Simple objective or goal for the prompt
+            target_model: Model to use for refinement (defaults to config default)
+        
+        Returns:
+            Refined system prompt text
+        
+        Raises:
+            OllamaConnectionError: If every backend failed
+            OllamaTimeoutError: If the last backend tried timed out
+        """
+        return self._call(target_model or config.default_model,
+                          lambda backend: backend.service.refine_prompt(objective, target_model))
+    
+    def chat(self, messages: List[Dict[str, str]], model: str = None, temperature: float = None,
+             keep_alive: str = None, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run a chat turn, preferring the backend that served earlier turns
+        
+        Staying on one backend lets Ollama reuse the conversation prefix it
+        already evaluated instead of processing the whole history again.
+        
+        Args:
+            messages: Chat messages with 'role' and 'content'
+            model: Model to use (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+            keep_alive: How long Ollama keeps the model loaded afterwards
+            endpoint: Endpoint to stick to while it is healthy (optional)
+        
+        Returns:
+            OllamaService.chat result with the serving 'endpoint' added
+        
+        Raises:
+            OllamaConnectionError: If every backend failed
+            OllamaTimeoutError: If the last backend tried timed out
+        """
+        def operation(backend):
+            result = backend.service.chat(messages, model, temperature, keep_alive)
+            return dict(result, endpoint=backend.endpoint)
+        
+        return self._call(model or config.default_model, operation, preferred=endpoint)
+    
+    def embed(self, texts: List[str], model: str = None) -> List[List[float]]:
+        """
+        Compute embeddings on the best available backend
+        
+        Args:
+            texts: Texts to embed
+            model: Embedding model to use (defaults to config embedding model)
+        
+        Returns:
+            One embedding vector per text, in input order
+        
+        Raises:
+            OllamaConnectionError: If every backend failed
+            OllamaTimeoutError: If the last backend tried timed out
+        """
+        return self._call(model or config.embedding_model, lambda backend: backend.service.embed(texts, model))
+    
+    def get_status(self) -> List[Dict[str, Any]]:
+        """
+        Describe every backend's routing state
+        
+        Returns:
+            List of dictionaries with endpoint, circuit state, load and model listing
+        """
+        with self._lock:
+            return [{
+                'endpoint': backend.endpoint,
+                'state': backend.breaker.state,
+                'consecutive_failures': backend.breaker.failures,
+                'outstanding': backend.outstanding,
+                'latency_ms': round(backend.latency * 1000, 2) if backend.latency is not None else None,
+                'models': sorted(backend.models) if backend.models is not None else None
+            } for backend in self.backends]
+    
+    def reconfigure(self, services: List[OllamaService], strategy: str = 'least_outstanding',
+                    failure_threshold: int = 3, reset_timeout: float = 30) -> None:
+        """
+        Replace the pool's endpoints and routing settings in place
+        
+        Backends whose service is kept retain their circuit state, load and
+        latency history; requests already in flight finish on the backend
+        they started on.
+        
+        Args:
+            services: One service per endpoint
+            strategy: Routing strategy, one of OLLAMA_ROUTING_STRATEGIES
+            failure_threshold: Consecutive failures that take a backend out of rotation
+            reset_timeout: Seconds before an unhealthy backend gets a trial request
+        
+        Raises:
+            ValueError: If no services are given or the strategy is unknown
+        """
+        if not services:
+            raise ValueError("OllamaPool requires at least one service")
+        if strategy not in OLLAMA_ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown routing strategy: {strategy}. Available: {', '.join(OLLAMA_ROUTING_STRATEGIES)}")
+        
+        with self._lock:
+            existing = {id(backend.service): backend for backend in self.backends}
+            backends = []
+            for service in services:
+                backend = existing.get(id(service))
+                if backend is None:
+                    backend = OllamaBackend(service, CircuitBreaker(failure_threshold, reset_timeout))
+                backend.breaker.failure_threshold = failure_threshold
+                backend.breaker.reset_timeout = reset_timeout
+                backends.append(backend)
+            self.strategy = strategy
+            self.backends = backends
+    
+    def _call(self, model: str, operation: Callable[[OllamaBackend], Any], preferred: Optional[str] = None) -> Any:
+        tried = []
+        last_error = None
+        for _ in range(len(self.backends)):
+            backend, granted = self._acquire(model, tried, preferred)
+            tried.append(backend)
+            
+            start_time = time.perf_counter()
+            try:
+                result = operation(backend)
+            except OllamaClientError:
+                # The request itself is bad; every backend would reject it
+                self._release(backend, 'error', granted=granted)
+                raise
+            except (OllamaConnectionError, OllamaTimeoutError) as e:
+                self._release(backend, 'failure')
+                last_error = e
+                continue
+            except Exception:
+                self._release(backend, 'error', granted=granted)
+                raise
+            self._release(backend, 'success', time.perf_counter() - start_time)
+            return result
+        
+        raise last_error
+    
+    def _acquire(self, model: str, exclude: List[OllamaBackend], preferred: Optional[str] = None):
+        """
+        Pick a backend and count the request as outstanding on it
+        
+        Backends are tried in routing order until one's breaker grants the
+        request, which also claims a half-open trial. When none does, the
+        first choice is used anyway: the breaker is deliberately bypassed so
+        a pool whose every backend is out of rotation still tries one rather
+        than failing outright.
+        
+        Returns:
+            Tuple of the backend and whether its breaker granted the request
+        """
+        candidates = [backend for backend in self.backends if backend not in exclude]
+        
+        if len(self.backends) > 1:
+            # Routing reads the cached listings; stale ones are refreshed in the background
+            for backend in candidates:
+                if backend.breaker.is_available() and self._claim_refresh(backend):
+                    threading.Thread(target=self._refresh_models, args=(backend,), daemon=True).start()
+        
+        with self._lock:
+            healthy = [backend for backend in candidates if backend.breaker.is_available()]
+            # Prefer healthy backends with the model, then any backend with it;
+            # if no backend lists the model, let Ollama report the error
+            choices = ([backend for backend in healthy if backend.serves_model(model)]
+                       or [backend for backend in candidates if backend.serves_model(model)]
+                       or healthy or candidates)
+            offset = next(self._rotation) % len(choices)
+            # Rotate so ties are broken round-robin, then stick to the preferred endpoint
+            ranked = sorted(choices[offset:] + choices[:offset], key=self._score)
+            ranked.sort(key=lambda backend: not (preferred and backend.endpoint == preferred))
+            granted = next((backend for backend in ranked if backend.breaker.acquire()), None)
+            backend = granted or ranked[0]
+            backend.outstanding += 1
+        
+        metrics.ollama_backend_in_flight.inc(endpoint=backend.endpoint)
+        return backend, granted is not None
+    
+    def _release(self, backend: OllamaBackend, outcome: str, elapsed: Optional[float] = None,
+                 granted: bool = True) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            if elapsed is not None:
+                backend.record_latency(elapsed)
+        
+        if outcome == 'success':
+            backend.breaker.record_success()
+        elif outcome == 'failure':
+            backend.breaker.record_failure()
+        elif granted:
+            # A bypassed request never held the half-open trial, so it must not free it
+            backend.breaker.release()
+        
+        metrics.ollama_backend_in_flight.dec(endpoint=backend.endpoint)
+        metrics.ollama_backend_requests.inc(endpoint=backend.endpoint, outcome=outcome)
+        metrics.ollama_circuit_open.set(1 if backend.breaker.state == CircuitBreaker.OPEN else 0,
+                                        endpoint=backend.endpoint)
+    
+    def _score(self, backend: OllamaBackend):
+        # Backends without a latency sample score as fastest so they get measured
+        latency = backend.latency or 0.0
+        if self.strategy == 'latency':
+            return latency * (backend.outstanding + 1)
+        return (backend.outstanding, latency)
+    
+    def refresh_models(self) -> None:
+        """
+        Refresh every backend's model listing that is older than models_ttl
+        
+        Runs synchronously; the health monitor calls it on each probe so
+        request routing finds the listings already cached.
+        """
+        for backend in self.backends:
+            if self._claim_refresh(backend):
+                self._refresh_models(backend)
+    
+    def _claim_refresh(self, backend: OllamaBackend) -> bool:
+        # Claim a stale listing so concurrent callers do not all query /api/tags
+        now = time.monotonic()
+        with self._lock:
+            if backend.models_checked_at is not None and now - backend.models_checked_at < self.models_ttl:
+                return False
+            backend.models_checked_at = now
+            return True
+    
+    def _refresh_models(self, backend: OllamaBackend) -> None:
+        try:
+            response = backend.service._make_request('GET', 'api/tags', max_retries=1, timeout=self.probe_timeout)
+            models = {info['name'] for info in parse_models_response(response.json())}
+        except (OllamaConnectionError, OllamaTimeoutError):
+            backend.breaker.record_failure()
+            models = None
+        except ValueError:
+            models = None
+        
+        with self._lock:
+            backend.models = models
+
+
+def build_ollama_pool(app_config=None) -> OllamaPool:
+    """
+    Build a pool over the configured endpoints
+    
+    The primary ollama_endpoint comes first, followed by ollama_endpoints.
+    Services come from the shared registry and are pinned there, and every
+    backend shares the primary service's response cache (cache keys include
+    the model digest, not the endpoint).
+    
+    Args:
+        app_config: Configuration to read (defaults to the global config)
+    
+    Returns:
+        Pool with one backend per distinct endpoint
+    """
+    app_config = app_config or config
+    return OllamaPool(_configured_services(app_config), **_routing_settings(app_config))
+
+
+def reload_ollama_pool(app_config=None) -> OllamaPool:
+    """
+    Point the global pool at the configured endpoints
+    
+    The pool is reconfigured in place, so modules that imported it keep
+    routing through it.
+    
+    Args:
+        app_config: Configuration to read (defaults to the global config)
+    
+    Returns:
+        The global pool
+    """
+    app_config = app_config or config
+    ollama_pool.reconfigure(_configured_services(app_config), **_routing_settings(app_config))
+    return ollama_pool
+
+
+def _configured_services(app_config) -> List[OllamaService]:
+    services = []
+    for endpoint in [app_config.ollama_endpoint] + list(app_config.ollama_endpoints):
+        service = ollama_services.get(endpoint, pinned=True, response_cache=ollama_service.response_cache)
+        if service not in services:
+            services.append(service)
+    return services
+
+
+def _routing_settings(app_config) -> Dict[str, Any]:
+    return {
+        'strategy': app_config.ollama_routing_strategy,
+        'failure_threshold': app_config.circuit_breaker_threshold,
+        'reset_timeout': app_config.circuit_breaker_reset_seconds
+    }
+
+
+# Global pool instance
+ollama_pool = build_ollama_pool()
@@ -4,10 +4,34 @@ Handles communication with local Ollama instance for AI model interactions
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
-from typing import List, Dict, Any, Optional
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime, timedelta
 from backend.config import config
+from backend.services.response_cache import ResponseCache
+from backend.services import metrics
+
+
+# Meta-prompt for converting objectives to system prompts
+REFINE_META_PROMPT = """You are an expert prompt engineer. Your task is to convert a simple objective into a detailed, effective system prompt that will guide an AI assistant to achieve that objective.
+
+Guidelines for creating system prompts:
+1. Be specific and clear about the role and behavior expected
+2. Include relevant context and constraints
+3. Specify the desired output format if applicable
+4. Add examples or templates when helpful
+5. Include error handling or edge case instructions
+6. Make it actionable and measurable
+
+The objective to convert into a system prompt is:
+{objective}
+
+Create a comprehensive system prompt that will effectively guide an AI to accomplish this objective. Return only the system prompt text, without any additional commentary or explanation."""
 
 
 class OllamaConnectionError(Exception):
@@ -20,10 +44,84 @@ class OllamaTimeoutError(Exception):
     pass
 
 
+class OllamaClientError(OllamaConnectionError):
+    """Raised when Ollama rejects a request (4xx), e.g. for an unknown model; the server itself is healthy"""
+    pass
+
+
+def parse_models_response(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert an Ollama /api/tags payload into model information dictionaries"""
+    models = []
+    for model in data.get('models', []):
+        models.append({
+            'name': model.get('name', ''),
+            'size': model.get('size', 0),
+            'modified_at': model.get('modified_at', ''),
+            'digest': model.get('digest', ''),
+            'size_mb': round(model.get('size', 0) / (1024 * 1024), 1) if model.get('size') else 0
+        })
+    return models
+
+
+def parse_generation_stats(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract token counts and timings from a completed Ollama /api/generate response
+    
+    Ollama reports durations in nanoseconds; they are converted to seconds.
+    Prompt evaluation and generation throughput are reported separately, so
+    a slow model load, a slow prompt evaluation and slow generation can be
+    told apart. Fields Ollama did not report are None.
+    
+    Args:
+        data: Final (done) response payload
+    
+    Returns:
+        Dictionary with prompt_tokens, completion_tokens, tokens_per_second
+        (generation), prompt_tokens_per_second, load_time, prompt_eval_time,
+        eval_time and total_time
+    """
+    def seconds(field):
+        value = data.get(field)
+        return round(value / 1e9, 4) if value else None
+    
+    def rate(count_field, duration_field):
+        count, duration = data.get(count_field), data.get(duration_field)
+        return round(count / (duration / 1e9), 2) if count and duration else None
+    
+    return {
+        'prompt_tokens': data.get('prompt_eval_count'),
+        'completion_tokens': data.get('eval_count'),
+        'tokens_per_second': rate('eval_count', 'eval_duration'),
+        'prompt_tokens_per_second': rate('prompt_eval_count', 'prompt_eval_duration'),
+        'load_time': seconds('load_duration'),
+        'prompt_eval_time': seconds('prompt_eval_duration'),
+        'eval_time': seconds('eval_duration'),
+        'total_time': seconds('total_duration')
+    }
+
+
+def format_keep_alive(keep_alive: str):
+    """Send plain-number keep_alive values to Ollama as seconds rather than a duration string"""
+    try:
+        return int(keep_alive)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(keep_alive)
+    except (TypeError, ValueError):
+        return keep_alive
+
+
+def format_test_prompt(system_prompt: str, user_input: str) -> str:
+    """Combine system prompt and user input into a single generation prompt"""
+    return f"{system_prompt}\n\nUser: {user_input}\n\nAssistant:"
+
+
 class OllamaService:
     """Service for communicating with Ollama API"""
     
-    def __init__(self, endpoint: str = None, timeout: int = 30, max_retries: int = 3, cache_duration: int = 300):
+    def __init__(self, endpoint: str = None, timeout: int = 30, max_retries: int = 3, cache_duration: int = 300,
+                 pool_size: int = None, response_cache: Optional[ResponseCache] = None):
         """
         Initialize Ollama service
         
@@ -32,6 +130,10 @@ class OllamaService:
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
             cache_duration: Model cache duration in seconds (default: 5 minutes)
+            pool_size: Maximum pooled connections to keep open (defaults to
+                enough for the configured batch concurrency)
+            response_cache: Cache for deterministic (temperature 0) test
+                results; caching is disabled when omitted
         """
         self.endpoint = endpoint or config.ollama_endpoint
         self.timeout = timeout
@@ -39,39 +141,57 @@ class OllamaService:
         self.cache_duration = cache_duration
         self.session = requests.Session()
         
+        # Size the connection pool so concurrent batch workers reuse connections
+        self.pool_size = pool_size or max(10, config.batch_max_concurrency)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Release pooled connections once the last user drops the service
+        weakref.finalize(self, self.session.close)
+        
+        self.response_cache = response_cache
+        
         # Model cache
         self._models_cache = None
         self._models_cache_time = None
         
-    def _make_request(self, method: str, path: str, **kwargs) -> requests.Response:
+    def _make_request(self, method: str, path: str, max_retries: Optional[int] = None, **kwargs) -> requests.Response:
         """
         Make HTTP request to Ollama with retry logic
         
         Args:
             method: HTTP method (GET, POST, etc.)
             path: API path (without leading slash)
+            max_retries: Attempts for this call (defaults to the service setting)
             **kwargs: Additional arguments for requests
             
         Returns:
             Response object
             
         Raises:
+            OllamaClientError: If Ollama rejects the request (not retried)
             OllamaConnectionError: If connection fails after retries
             OllamaTimeoutError: If request times out
         """
         url = f"{self.endpoint.rstrip('/')}/{path.lstrip('/')}"
         kwargs.setdefault('timeout', self.timeout)
+        max_retries = max_retries or self.max_retries
         
         last_exception = None
+        start_time = time.perf_counter()
         
-        for attempt in range(self.max_retries):
+        for attempt in range(max_retries):
             try:
                 response = self.session.request(method, url, **kwargs)
                 response.raise_for_status()
+                metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                        method=method, path=path, outcome='ok')
                 return response
                 
             except requests.exceptions.Timeout as e:
-                last_exception = OllamaTimeoutError(f"Request timed out after {self.timeout} seconds")
+                metrics.ollama_timeouts.inc(path=path)
+                last_exception = OllamaTimeoutError(f"Request timed out after {kwargs['timeout']} seconds")
                 
             except requests.exceptions.ConnectionError as e:
                 last_exception = OllamaConnectionError(f"Failed to connect to Ollama at {self.endpoint}")
@@ -82,28 +202,38 @@ class OllamaService:
                     last_exception = OllamaConnectionError(f"Ollama server error: {e.response.status_code}")
                 else:
                     # Client error, don't retry
-                    raise OllamaConnectionError(f"Ollama API error: {e.response.status_code} - {e.response.text}")
+                    metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                            method=method, path=path, outcome='client_error')
+                    raise OllamaClientError(f"Ollama API error: {e.response.status_code} - {e.response.text}")
                     
             except Exception as e:
                 last_exception = OllamaConnectionError(f"Unexpected error communicating with Ollama: {str(e)}")
             
             # Wait before retry (exponential backoff)
-            if attempt < self.max_retries - 1:
+            if attempt < max_retries - 1:
+                metrics.ollama_retries.inc(path=path)
                 wait_time = 2 ** attempt
                 time.sleep(wait_time)
         
         # All retries failed
+        outcome = 'timeout' if isinstance(last_exception, OllamaTimeoutError) else 'error'
+        metrics.ollama_request_duration.observe(time.perf_counter() - start_time,
+                                                method=method, path=path, outcome=outcome)
         raise last_exception
     
-    def check_connection(self) -> Dict[str, Any]:
+    def check_connection(self, timeout: Optional[int] = None, max_retries: Optional[int] = None) -> Dict[str, Any]:
         """
         Test connection to Ollama instance
         
+        Args:
+            timeout: Request timeout for this check (defaults to the service setting)
+            max_retries: Attempts for this check (defaults to the service setting)
+        
         Returns:
             Dictionary with connection status and details
         """
         try:
-            response = self._make_request('GET', 'api/tags')
+            response = self._make_request('GET', 'api/tags', max_retries=max_retries, timeout=timeout or self.timeout)
             return {
                 'connected': True,
                 'endpoint': self.endpoint,
@@ -142,21 +272,16 @@ class OllamaService:
         """
         # Return cached models if valid and caching is enabled
         if use_cache and self._is_cache_valid():
+            metrics.model_cache_lookups.inc(result='hit')
             return self._models_cache.copy()
         
+        metrics.model_cache_lookups.inc(result='miss' if use_cache else 'bypass')
+        
         try:
             response = self._make_request('GET', 'api/tags')
             data = response.json()
             
-            models = []
-            for model in data.get('models', []):
-                models.append({
-                    'name': model.get('name', ''),
-                    'size': model.get('size', 0),
-                    'modified_at': model.get('modified_at', ''),
-                    'digest': model.get('digest', ''),
-                    'size_mb': round(model.get('size', 0) / (1024 * 1024), 1) if model.get('size') else 0
-                })
+            models = parse_models_response(data)
             
             # Update cache
             self._models_cache = models.copy()
@@ -241,34 +366,19 @@ class OllamaService:
         """
         model = target_model or config.default_model
         
-        # Meta-prompt for converting objectives to system prompts
-        meta_prompt = """You are an expert prompt engineer. Your task is to convert a simple objective into a detailed, effective system prompt that will guide an AI assistant to achieve that objective.
-
-Guidelines for creating system prompts:
-1. Be specific and clear about the role and behavior expected
-2. Include relevant context and constraints
-3. Specify the desired output format if applicable
-4. Add examples or templates when helpful
-5. Include error handling or edge case instructions
-6. Make it actionable and measurable
-
-The objective to convert into a system prompt is:
-{objective}
-
-Create a comprehensive system prompt that will effectively guide an AI to accomplish this objective. Return only the system prompt text, without any additional commentary or explanation."""
-
-        formatted_prompt = meta_prompt.format(objective=objective)
+        formatted_prompt = REFINE_META_PROMPT.format(objective=objective)
         
         try:
-            response = self._make_request('POST', 'api/generate', json={
-                'model': model,
-                'prompt': formatted_prompt,
-                'stream': False,
-                'options': {
-                    'temperature': 0.3,  # Lower temperature for more consistent refinement
-                    'top_p': 0.9
-                }
-            })
+            with metrics.generations_in_flight.track_inprogress(kind='refine'):
+                response = self._make_request('POST', 'api/generate', json={
+                    'model': model,
+                    'prompt': formatted_prompt,
+                    'stream': False,
+                    'options': {
+                        'temperature': 0.3,  # Lower temperature for more consistent refinement
+                        'top_p': 0.9
+                    }
+                })
             
             data = response.json()
             refined_prompt = data.get('response', '').strip()
@@ -304,20 +414,42 @@ Create a comprehensive system prompt that will effectively guide an AI to accomp
         temperature = temperature if temperature is not None else config.default_temperature
         
         # Combine system prompt and user input
-        full_prompt = f"{system_prompt}\n\nUser: {user_input}\n\nAssistant:"
+        full_prompt = format_test_prompt(system_prompt, user_input)
+        options = {
+            'temperature': temperature,
+            'top_p': 0.9
+        }
+        
+        # Temperature 0 output is deterministic, so it can be served from cache
+        cache_key = None
+        if self.response_cache is not None and temperature == 0:
+            lookup_start = time.perf_counter()
+            cache_key = self._get_response_cache_key(model, system_prompt, user_input, options)
+            cached = self.response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return {
+                    'response': cached['response'],
+                    'execution_time': round(time.perf_counter() - lookup_start, 4),
+                    'original_execution_time': cached['execution_time'],
+                    'stats': cached.get('stats'),
+                    'model': model,
+                    'temperature': temperature,
+                    'system_prompt': system_prompt,
+                    'user_input': user_input,
+                    'cached': True
+                }
         
         start_time = time.time()
         
         try:
-            response = self._make_request('POST', 'api/generate', json={
-                'model': model,
-                'prompt': full_prompt,
-                'stream': False,
-                'options': {
-                    'temperature': temperature,
-                    'top_p': 0.9
-                }
-            })
+            with metrics.generations_in_flight.track_inprogress(kind='test'):
+                response = self._make_request('POST', 'api/generate', json={
+                    'model': model,
+                    'prompt': full_prompt,
+                    'stream': False,
+                    'keep_alive': format_keep_alive(config.ollama_keep_alive),
+                    'options': options
+                })
             
             end_time = time.time()
             execution_time = end_time - start_time
@@ -328,9 +460,19 @@ Create a comprehensive system prompt that will effectively guide an AI to accomp
             if not ai_response:
                 raise OllamaConnectionError("Received empty response from Ollama during prompt testing")
             
+            stats = parse_generation_stats(data)
+            
+            if cache_key:
+                self.response_cache.set(cache_key, {
+                    'response': ai_response,
+                    'execution_time': round(execution_time, 2),
+                    'stats': stats
+                })
+            
             return {
                 'response': ai_response,
                 'execution_time': round(execution_time, 2),
+                'stats': stats,
                 'model': model,
                 'temperature': temperature,
                 'system_prompt': system_prompt,
@@ -341,7 +483,353 @@ Create a comprehensive system prompt that will effectively guide an AI to accomp
             if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
                 raise
             raise OllamaConnectionError(f"Failed to test prompt: {str(e)}")
+    
+    def chat(self, messages: List[Dict[str, str]], model: str = None, temperature: float = None,
+             keep_alive: str = None) -> Dict[str, Any]:
+        """
+        Send a conversation to Ollama's chat endpoint and return the assistant reply
+        
+        Unlike test_prompt, the system prompt travels as a proper system message,
+        so Ollama can reuse the already evaluated prefix of an unchanged
+        conversation while the model stays loaded for keep_alive.
+        
+        Args:
+            messages: Chat messages with 'role' (system, user or assistant) and 'content'
+            model: Model to use (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+            keep_alive: How long Ollama keeps the model loaded afterwards (defaults to config)
+            
+        Returns:
+            Dictionary containing the reply, execution time, model, temperature and stats
+            
+        Raises:
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        model = model or config.default_model
+        temperature = temperature if temperature is not None else config.default_temperature
+        
+        start_time = time.perf_counter()
+        
+        try:
+            with metrics.generations_in_flight.track_inprogress(kind='chat'):
+                response = self._make_request('POST', 'api/chat', json={
+                    'model': model,
+                    'messages': messages,
+                    'stream': False,
+                    'keep_alive': format_keep_alive(keep_alive or config.ollama_keep_alive),
+                    'options': {
+                        'temperature': temperature,
+                        'top_p': 0.9
+                    }
+                })
+            
+            execution_time = time.perf_counter() - start_time
+            
+            data = response.json()
+            reply = (data.get('message') or {}).get('content', '').strip()
+            
+            if not reply:
+                raise OllamaConnectionError("Received empty response from Ollama during chat")
+            
+            return {
+                'message': reply,
+                'execution_time': round(execution_time, 2),
+                'stats': parse_generation_stats(data),
+                'model': model,
+                'temperature': temperature
+            }
+            
+        except Exception as e:
+            if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
+                raise
+            raise OllamaConnectionError(f"Failed to chat: {str(e)}")
+    
+    def embed(self, texts: List[str], model: str = None) -> List[List[float]]:
+        """
+        Compute embedding vectors for texts with Ollama's embed endpoint
+        
+        Args:
+            texts: Texts to embed, sent in one request
+            model: Embedding model to use (defaults to config embedding model)
+            
+        Returns:
+            One embedding vector per text, in input order
+            
+        Raises:
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        model = model or config.embedding_model
+        
+        try:
+            response = self._make_request('POST', 'api/embed', json={
+                'model': model,
+                'input': list(texts),
+                'keep_alive': format_keep_alive(config.ollama_keep_alive)
+            })
+            
+            embeddings = response.json().get('embeddings') or []
+            if len(embeddings) != len(texts):
+                raise OllamaConnectionError(
+                    f"Expected {len(texts)} embeddings from Ollama, received {len(embeddings)}"
+                )
+            
+            return embeddings
+            
+        except Exception as e:
+            if isinstance(e, (OllamaConnectionError, OllamaTimeoutError)):
+                raise
+            raise OllamaConnectionError(f"Failed to compute embeddings: {str(e)}")
+    
+    def stream_test_prompt(self, system_prompt: str, user_input: str, model: str = None, temperature: float = None) -> Iterator[Dict[str, Any]]:
+        """
+        Test a system prompt, yielding response chunks as Ollama generates them
+        
+        Args:
+            system_prompt: The system prompt to test
+            user_input: User message to send with the system prompt
+            model: Model to use for testing (defaults to config default)
+            temperature: Temperature setting (defaults to config default)
+            
+        Yields:
+            Dictionaries with type 'token' carrying incremental response text,
+            followed by a single 'done' event with timing statistics
+            
+        Raises:
+            OllamaConnectionError: If unable to communicate with Ollama
+            OllamaTimeoutError: If request times out
+        """
+        model = model or config.default_model
+        temperature = temperature if temperature is not None else config.default_temperature
+        
+        full_prompt = format_test_prompt(system_prompt, user_input)
+        
+        start_time = time.perf_counter()
+        metrics.generations_in_flight.inc(kind='stream')
+        try:
+            response = self._make_request('POST', 'api/generate', json={
+                'model': model,
+                'prompt': full_prompt,
+                'stream': True,
+                'keep_alive': format_keep_alive(config.ollama_keep_alive),
+                'options': {
+                    'temperature': temperature,
+                    'top_p': 0.9
+                }
+            }, stream=True)
+        except Exception:
+            metrics.generations_in_flight.dec(kind='stream')
+            raise
+        
+        first_token_time = None
+        chunk_count = 0
+        response_length = 0
+        final_chunk = {}
+        
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    raise OllamaConnectionError(f"Failed to parse streamed response: {str(e)}")
+                
+                if chunk.get('error'):
+                    raise OllamaConnectionError(f"Ollama API error: {chunk['error']}")
+                
+                token = chunk.get('response', '')
+                if token:
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter()
+                    chunk_count += 1
+                    response_length += len(token)
+                    yield {'type': 'token', 'content': token}
+                
+                if chunk.get('done'):
+                    final_chunk = chunk
+                    break
+        except requests.exceptions.Timeout:
+            raise OllamaTimeoutError(f"Request timed out after {self.timeout} seconds")
+        except requests.exceptions.RequestException as e:
+            raise OllamaConnectionError(f"Stream from Ollama was interrupted: {str(e)}")
+        finally:
+            response.close()
+            metrics.generations_in_flight.dec(kind='stream')
+        
+        if response_length == 0:
+            raise OllamaConnectionError("Received empty response from Ollama during prompt testing")
+        
+        end_time = time.perf_counter()
+        execution_time = end_time - start_time
+        
+        # Prefer Ollama's own generation statistics, fall back to wall-clock timing
+        eval_count = final_chunk.get('eval_count') or chunk_count
+        eval_duration = (final_chunk.get('eval_duration') or 0) / 1e9
+        if not eval_duration:
+            eval_duration = end_time - first_token_time
+        tokens_per_second = eval_count / eval_duration if eval_duration > 0 else None
+        
+        yield {
+            'type': 'done',
+            'execution_time': round(execution_time, 2),
+            'time_to_first_token': round(first_token_time - start_time, 3),
+            'tokens_per_second': round(tokens_per_second, 2) if tokens_per_second else None,
+            'eval_count': eval_count,
+            'stats': parse_generation_stats(final_chunk),
+            'model': model,
+            'temperature': temperature
+        }
+    
+    def close(self) -> None:
+        """Close the HTTP session and its pooled connections"""
+        self.session.close()
+    
+    def _get_response_cache_key(self, model: str, system_prompt: str, user_input: str,
+                                options: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the response cache key for a test, including the model digest
+        
+        The digest ties cached output to the exact model weights, so pulling
+        a new version of a model invalidates its entries. Returns None when
+        the digest cannot be determined, in which case caching is skipped.
+        """
+        try:
+            models = self.get_available_models()
+        except (OllamaConnectionError, OllamaTimeoutError):
+            return None
+        
+        digest = None
+        for info in models:
+            if info['name'] in (model, f"{model}:latest"):
+                digest = info['digest']
+                break
+        
+        if not digest:
+            return None
+        
+        return ResponseCache.make_key(model, digest, system_prompt, user_input, options)
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Create the response cache described by the application config, if enabled"""
+    if not config.response_cache_enabled:
+        return None
+    return ResponseCache(
+        max_bytes=config.response_cache_max_bytes,
+        ttl=config.response_cache_ttl,
+        persist_path=config.response_cache_path or None
+    )
+
+
+class OllamaServiceRegistry:
+    """
+    Process-wide OllamaService instances keyed by endpoint
+    
+    Sharing one instance per endpoint keeps its HTTP connections pooled and
+    its model cache warm across requests. The least recently used instance
+    is dropped once more than max_instances endpoints are in use, so probing
+    arbitrary endpoints from the settings page cannot grow the registry
+    without bound. Dropped instances are not closed, since a request may
+    still be using them; their connections are closed when they are
+    garbage collected.
+    """
+    
+    def __init__(self, max_instances: int = 8):
+        """
+        Initialize registry
+        
+        Args:
+            max_instances: Maximum number of endpoints kept open at once
+        """
+        self.max_instances = max_instances
+        self._services = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(endpoint: str) -> str:
+        return endpoint.rstrip('/')
+    
+    def register(self, service: OllamaService, pinned: bool = True) -> OllamaService:
+        """
+        Add an existing service to the registry
+        
+        Args:
+            service: Service to share for its endpoint
+            pinned: Exempt the service from LRU eviction
+        
+        Returns:
+            The registered service
+        """
+        key = self._normalize(service.endpoint)
+        with self._lock:
+            self._services.pop(key, None)
+            self._services[key] = service
+            if pinned:
+                self._pinned.add(key)
+        return service
+    
+    def get(self, endpoint: Optional[str] = None, pinned: bool = False, **service_kwargs) -> OllamaService:
+        """
+        Get the shared service for an endpoint, creating it on first use
+        
+        Args:
+            endpoint: Ollama endpoint URL (defaults to config)
+            pinned: Exempt the service from LRU eviction
+            **service_kwargs: OllamaService arguments used if the service is created
+        
+        Returns:
+            Shared OllamaService instance
+        """
+        key = self._normalize(endpoint or config.ollama_endpoint)
+        with self._lock:
+            if pinned:
+                self._pinned.add(key)
+            service = self._services.get(key)
+            if service is not None:
+                self._services.move_to_end(key)
+                return service
+            
+            service = OllamaService(endpoint=key, **service_kwargs)
+            self._services[key] = service
+            
+            unpinned = [name for name in self._services if name not in self._pinned and name != key]
+            while len(self._services) > self.max_instances and unpinned:
+                self._services.pop(unpinned.pop(0))
+        
+        return service
+    
+    def endpoints(self) -> List[str]:
+        """List endpoints with a live service"""
+        with self._lock:
+            return list(self._services)
+    
+    def close_all(self) -> None:
+        """Close every registered service"""
+        with self._lock:
+            services = list(self._services.values())
+            self._services.clear()
+            self._pinned.clear()
+        for service in services:
+            service.close()
+
 
+# Global registry; the default endpoint's service also carries the response cache
+ollama_services = OllamaServiceRegistry()
+ollama_service = ollama_services.register(OllamaService(response_cache=create_response_cache()))
 
-# Global service instance
-ollama_service = OllamaService()
\ No newline at end of file
+
+def get_ollama_service(endpoint: Optional[str] = None) -> OllamaService:
+    """
+    Get the shared OllamaService for an endpoint
+    
+    Args:
+        endpoint: Ollama endpoint URL (defaults to config)
+    
+    Returns:
+        Shared OllamaService instance
+    """
+    return ollama_services.get(endpoint)
\ No newline at end of file
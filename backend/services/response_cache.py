@@ -0,0 +1,248 @@
+"""
+Prompt Test Response Cache
+LRU + TTL cache for deterministic prompt test results with an optional SQLite tier
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class ResponseCache:
+    """
+    Cache of prompt test results keyed by model, digest, prompt and options
+    
+    Entries live in an in-memory LRU bounded by total serialized size and
+    expire after a TTL. When a persist_path is given, entries are also
+    written to a SQLite file so they survive restarts; memory misses fall
+    through to that tier and hits are promoted back into memory. Hits in
+    either tier refresh the row's last_used time, which the persistent tier
+    evicts by, so it is least-recently-used rather than first-in-first-out.
+    """
+    
+    def __init__(self, max_bytes: int = 50 * 1024 * 1024, ttl: int = 3600, persist_path: Optional[str] = None):
+        """
+        Initialize response cache
+        
+        Args:
+            max_bytes: Maximum total size of cached entries per tier
+            ttl: Entry lifetime in seconds
+            persist_path: SQLite file for the persistent tier (optional)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.persist_path = persist_path
+        
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Hit times not yet written to the persistent tier, flushed on the next write
+        self._touched = {}
+        
+        self._db = None
+        if persist_path:
+            db_dir = os.path.dirname(persist_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(response_cache)")}
+            if 'last_used' not in columns:
+                # Cache files written before last_used was tracked
+                self._db.execute("ALTER TABLE response_cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE response_cache SET last_used = created_at")
+            self._db.execute("DROP INDEX IF EXISTS ix_response_cache_created")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_last_used ON response_cache (last_used)")
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(model: str, digest: str, system_prompt: str, user_input: str, options: Dict[str, Any]) -> str:
+        """
+        Build a cache key from everything that determines a test's output
+        
+        Args:
+            model: Model name
+            digest: Model digest reported by Ollama
+            system_prompt: System prompt text
+            user_input: User input text
+            options: Generation options sent to Ollama
+        
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        payload = json.dumps([model, digest, system_prompt, user_input, options], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            The cached result dictionary, or None on a miss
+        """
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._touch(key, now)
+                    self._hits += 1
+                    return dict(value)
+                self._remove(key)
+            
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = json.loads(row[0])
+                        self._store_in_memory(key, value, len(row[0].encode('utf-8')), row[1])
+                        self._touch(key, now)
+                        self._hits += 1
+                        return dict(value)
+                    self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            
+            self._misses += 1
+            return None
+    
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a result in the cache
+        
+        Args:
+            key: Cache key from make_key
+            value: JSON-serializable result dictionary
+        """
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        
+        now = time.time()
+        expires_at = now + self.ttl
+        
+        with self._lock:
+            self._store_in_memory(key, value, size, expires_at)
+            
+            if self._db is not None:
+                self._touched.pop(key, None)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, size, created_at, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, serialized, size, now, expires_at, now)
+                )
+                self._flush_touched()
+                self._prune_persistent(now)
+                self._db.commit()
+    
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._touched.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get information about the current cache state
+        
+        Returns:
+            Dictionary with entry counts, sizes and hit/miss counters
+        """
+        with self._lock:
+            stats = {
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'persistent': self._db is not None
+            }
+            if self._db is not None:
+                count, size = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+                ).fetchone()
+                stats['persistent_entries'] = count
+                stats['persistent_size_bytes'] = size
+            return stats
+    
+    def close(self) -> None:
+        """Close the persistent tier connection"""
+        with self._lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.commit()
+                self._db.close()
+                self._db = None
+    
+    def _store_in_memory(self, key, value, size, expires_at):
+        """Insert an entry into the LRU and evict until within the size cap"""
+        if key in self._entries:
+            self._remove(key)
+        
+        self._entries[key] = (expires_at, size, value)
+        self._total_bytes += size
+        
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+    
+    def _remove(self, key):
+        """Remove an entry from the in-memory tier"""
+        expires_at, size, value = self._entries.pop(key)
+        self._total_bytes -= size
+    
+    def _touch(self, key, now):
+        """Remember a hit so the persistent row's last_used can be refreshed"""
+        if self._db is not None:
+            self._touched[key] = now
+    
+    def _flush_touched(self):
+        """Write pending hit times to the persistent tier"""
+        if self._touched:
+            self._db.executemany("UPDATE response_cache SET last_used = ? WHERE key = ?",
+                                 [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+    
+    def _prune_persistent(self, now):
+        """Drop expired rows and the least recently used rows beyond the size cap"""
+        self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        excess = total - self.max_bytes
+        removed = 0
+        stale_keys = []
+        for key, size in self._db.execute("SELECT key, size FROM response_cache ORDER BY last_used"):
+            if removed >= excess:
+                break
+            stale_keys.append((key,))
+            removed += size
+        self._db.executemany("DELETE FROM response_cache WHERE key = ?", stale_keys)
@@ -0,0 +1,250 @@
+"""
+Prompt Library Full-Text Search
+SQLite FTS5 index over prompt name, description and system prompt with ranked results
+"""
+
+import html
+import re
+import weakref
+from typing import Optional
+from sqlalchemy import event, inspect, text, literal_column, table, column, bindparam
+from sqlalchemy.exc import OperationalError
+from backend.models.prompt import Prompt
+
+FTS_TABLE = 'prompts_fts'
+
+# bm25 column weights: name matches outrank description, which outrank body text
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Control characters used as snippet markers before HTML escaping
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+# Lightweight table construct for joining against the virtual table
+prompts_fts = table(FTS_TABLE, column('rowid'))
+
+# View the index reads its text from: each prompt with the body from the
+# content-addressed store and both text columns decompressed. The index
+# keeps only its token lists, not a copy of the text.
+FTS_SOURCE_VIEW = 'prompts_fts_source'
+
+_CREATE_SOURCE_VIEW = (
+    f"CREATE VIEW IF NOT EXISTS {FTS_SOURCE_VIEW} AS "
+    "SELECT prompts.id AS id, prompts.name AS name, inflate_text(prompts.description) AS description, "
+    "inflate_text(prompt_bodies.body) AS system_prompt "
+    "FROM prompts JOIN prompt_bodies ON prompt_bodies.hash = prompts.body_hash"
+)
+
+_CREATE_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, system_prompt, "
+    f"content = '{FTS_SOURCE_VIEW}', content_rowid = 'id', "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# Prompt fields whose changes require reindexing
+_INDEXED_FIELDS = ('name', 'description', 'body_hash')
+
+# Engines whose database has a usable FTS5 index
+_indexed_engines = weakref.WeakSet()
+
+
+def init_search_index(engine) -> bool:
+    """
+    Create the FTS5 index for an engine and backfill it when out of sync
+    
+    An index created by earlier versions, which stored its own copy of
+    every prompt's text, is replaced by the external-content index.
+    
+    Args:
+        engine: SQLAlchemy engine for the prompt database
+    
+    Returns:
+        True if full-text search is available, False if SQLite lacks FTS5
+    """
+    try:
+        with engine.begin() as connection:
+            definition = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+            ).scalar()
+            if definition is not None and FTS_SOURCE_VIEW not in definition:
+                connection.execute(text(f"DROP TABLE {FTS_TABLE}"))
+            
+            connection.execute(text(_CREATE_SOURCE_VIEW))
+            connection.execute(text(_CREATE_INDEX))
+            
+            # Counting the index itself would read the view; docsize has one row per indexed prompt
+            indexed = connection.execute(text(f"SELECT COUNT(*) FROM {FTS_TABLE}_docsize")).scalar()
+            total = connection.execute(text("SELECT COUNT(*) FROM prompts")).scalar()
+            if definition is None or FTS_SOURCE_VIEW not in definition or indexed != total:
+                rebuild_search_index(connection)
+    except OperationalError:
+        _indexed_engines.discard(engine)
+        return False
+    
+    _indexed_engines.add(engine)
+    return True
+
+
+def is_search_available(engine) -> bool:
+    """Check whether full-text search was initialized for an engine"""
+    return engine in _indexed_engines
+
+
+def rebuild_search_index(connection) -> None:
+    """
+    Repopulate the FTS5 index from the prompts table
+    
+    Args:
+        connection: Connection within an open transaction
+    """
+    connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def unindex_prompts(connection, prompt_ids) -> None:
+    """
+    Remove specific prompts from the FTS5 index before they are changed or deleted
+    
+    An external-content index can only drop a prompt's tokens given the
+    text that was indexed, so this must run while the prompts rows and
+    their bodies still hold that text. Changed prompts are added back with
+    index_prompts once written.
+    
+    Args:
+        connection: Connection within an open transaction
+        prompt_ids: IDs of indexed prompts about to be updated or deleted
+    """
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids or connection.engine not in _indexed_engines:
+        return
+    
+    ids = bindparam('ids', expanding=True)
+    connection.execute(text(
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, description, system_prompt) "
+        f"SELECT 'delete', id, name, description, system_prompt FROM {FTS_SOURCE_VIEW} WHERE id IN :ids"
+    ).bindparams(ids), {'ids': prompt_ids})
+
+
+def index_prompts(connection, prompt_ids) -> None:
+    """
+    Add specific prompts to the FTS5 index from the prompts table
+    
+    Bulk inserts and upserts bypass the ORM events that normally keep the
+    index in sync, so callers writing that way index the affected ids
+    afterwards, having unindexed any overwritten prompts beforehand.
+    
+    Args:
+        connection: Connection within an open transaction
+        prompt_ids: IDs of prompts that were inserted, or updated after unindex_prompts
+    """
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids or connection.engine not in _indexed_engines:
+        return
+    
+    ids = bindparam('ids', expanding=True)
+    connection.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description, system_prompt) "
+        f"SELECT id, name, description, system_prompt FROM {FTS_SOURCE_VIEW} WHERE id IN :ids"
+    ).bindparams(ids), {'ids': prompt_ids})
+
+
+def build_match_query(term: str) -> Optional[str]:
+    """
+    Convert free-form search input into a safe FTS5 prefix query
+    
+    Every word becomes a quoted prefix term, so FTS5 operators typed by the
+    user are treated as plain text and all words must match.
+    
+    Args:
+        term: Raw search input
+    
+    Returns:
+        FTS5 MATCH expression, or None if the input has no searchable words
+    """
+    tokens = re.findall(r'\w+', term)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_prompts(session, term: str):
+    """
+    Build a ranked full-text search query over the prompt library
+    
+    Args:
+        session: Database session
+        term: Raw search input
+    
+    Returns:
+        Query yielding (Prompt, snippet) rows ordered by relevance, or None
+        when full-text search is unavailable or the term has no words
+    """
+    if not is_search_available(session.get_bind()):
+        return None
+    
+    match_query = build_match_query(term)
+    if match_query is None:
+        return None
+    
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    snippet = literal_column(
+        f"snippet({FTS_TABLE}, -1, char(2), char(3), '…', 16)"
+    ).label('snippet')
+    
+    return (
+        session.query(Prompt, snippet)
+        .join(prompts_fts, prompts_fts.c.rowid == Prompt.id)
+        .filter(text(f"{FTS_TABLE} MATCH :match_query"))
+        .params(match_query=match_query)
+        .order_by(literal_column(f"bm25({FTS_TABLE}, {weights})"), Prompt.id)
+    )
+
+
+def format_snippet(snippet: Optional[str]) -> Optional[str]:
+    """
+    HTML-escape a search snippet and wrap matched terms in <mark> tags
+    
+    Args:
+        snippet: Raw snippet produced by search_prompts
+    
+    Returns:
+        Safe HTML snippet, or None if there is no snippet
+    """
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def _index_prompt(mapper, connection, target):
+    """Add a new prompt to the FTS5 index"""
+    index_prompts(connection, [target.id])
+
+
+def _index_changed(target) -> bool:
+    state = inspect(target)
+    return any(state.attrs[key].history.has_changes() for key in _INDEXED_FIELDS)
+
+
+def _unindex_changed_prompt(mapper, connection, target):
+    """Remove an updated prompt's old text from the FTS5 index while it is still stored"""
+    if _index_changed(target):
+        unindex_prompts(connection, [target.id])
+
+
+def _index_changed_prompt(mapper, connection, target):
+    """Index an updated prompt's new text"""
+    if _index_changed(target):
+        index_prompts(connection, [target.id])
+
+
+def _unindex_prompt(mapper, connection, target):
+    """Remove a deleted prompt from the FTS5 index while its row still exists"""
+    unindex_prompts(connection, [target.id])
+
+
+# Keep the index in sync with ORM writes, inside the same transaction
+event.listen(Prompt, 'after_insert', _index_prompt)
+event.listen(Prompt, 'before_update', _unindex_changed_prompt)
+event.listen(Prompt, 'after_update', _index_changed_prompt)
+event.listen(Prompt, 'before_delete', _unindex_prompt)
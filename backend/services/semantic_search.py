@@ -0,0 +1,291 @@
+"""
+Semantic Prompt Search
+Ollama embeddings of prompts stored as float32 vectors, kept in sync incrementally and searched by cosine similarity
+"""
+
+import hashlib
+import heapq
+import math
+import operator
+import struct
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only
+from backend.models.prompt import Prompt
+from backend.models.prompt_embedding import PromptEmbedding
+
+# Prompts sent to Ollama per embed request
+EMBEDDING_BATCH_SIZE = 32
+
+
+def embedding_text(name: str, description: Optional[str], system_prompt: str) -> str:
+    """Build the text embedded for a prompt from its name, description and body"""
+    return '\n\n'.join(part for part in (name, description, system_prompt) if part)
+
+
+def pack_vector(values: Sequence[float]) -> bytes:
+    """
+    Scale a vector to unit length and pack it as little-endian float32
+    
+    Args:
+        values: Embedding vector
+    
+    Returns:
+        Packed vector (all zeros stay zeros)
+    """
+    norm = math.sqrt(sum(value * value for value in values)) or 1.0
+    return struct.pack(f'<{len(values)}f', *(value / norm for value in values))
+
+
+def unpack_vector(blob: bytes) -> Tuple[float, ...]:
+    """Unpack a vector packed by pack_vector"""
+    return struct.unpack(f'<{len(blob) // 4}f', blob)
+
+
+def stale_prompts(session, model: str):
+    """
+    Query prompts whose embedding is missing, from another model or older than the prompt
+    
+    Args:
+        session: Database session
+        model: Embedding model in use
+    
+    Returns:
+        Query over Prompt
+    """
+    return (session.query(Prompt)
+            .outerjoin(PromptEmbedding, PromptEmbedding.prompt_id == Prompt.id)
+            .filter(or_(PromptEmbedding.prompt_id.is_(None),
+                        PromptEmbedding.model != model,
+                        PromptEmbedding.prompt_updated_at != Prompt.updated_at)))
+
+
+def sync_embeddings(session, embedder, model: str, limit: Optional[int] = None,
+                    batch_size: int = EMBEDDING_BATCH_SIZE,
+                    on_batch: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Embed prompts added or changed since they were last embedded
+    
+    Prompts whose embedded text is unchanged (for example after a model or
+    temperature edit) are marked current without calling Ollama. Each batch
+    is committed on its own, so an interrupted sync keeps its progress.
+    
+    Args:
+        session: Database session
+        embedder: Object with an embed(texts, model) method (OllamaService or OllamaPool)
+        model: Embedding model to use
+        limit: Maximum prompts to process (all stale prompts when None)
+        batch_size: Prompts per embed request
+        on_batch: Called with the number of prompts processed so far after each batch
+    
+    Returns:
+        dict: Counts of prompts 'embedded', left 'unchanged' and still 'pending'
+    
+    Raises:
+        OllamaConnectionError: If unable to communicate with Ollama
+        OllamaTimeoutError: If request times out
+    """
+    table = PromptEmbedding.__table__
+    upsert = sqlite_insert(table)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['prompt_id'],
+        set_={column: upsert.excluded[column] for column in
+              ('model', 'content_hash', 'prompt_updated_at', 'dimensions', 'vector', 'embedded_at')}
+    )
+    
+    embedded = unchanged = 0
+    seen = set()
+    while limit is None or embedded + unchanged < limit:
+        size = batch_size if limit is None else min(batch_size, limit - embedded - unchanged)
+        rows = (stale_prompts(session, model)
+                .with_entities(Prompt.id, Prompt.name, Prompt.description, Prompt.system_prompt, Prompt.updated_at)
+                .order_by(Prompt.id)
+                .limit(size)
+                .all())
+        # A prompt seen twice was changed again mid-sync; leave it for the next sync
+        rows = [row for row in rows if row.id not in seen]
+        if not rows:
+            break
+        seen.update(row.id for row in rows)
+        
+        current = dict(session.query(PromptEmbedding.prompt_id, PromptEmbedding.content_hash)
+                       .filter(PromptEmbedding.prompt_id.in_([row.id for row in rows]),
+                               PromptEmbedding.model == model))
+        
+        to_embed = []
+        for row in rows:
+            text = embedding_text(row.name, row.description, row.system_prompt)
+            content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if current.get(row.id) == content_hash:
+                session.query(PromptEmbedding).filter(PromptEmbedding.prompt_id == row.id).update(
+                    {PromptEmbedding.prompt_updated_at: row.updated_at}, synchronize_session=False
+                )
+                unchanged += 1
+            else:
+                to_embed.append((row, text, content_hash))
+        
+        if to_embed:
+            vectors = embedder.embed([text for _, text, _ in to_embed], model)
+            now = datetime.now(timezone.utc)
+            session.execute(upsert, [
+                {
+                    'prompt_id': row.id,
+                    'model': model,
+                    'content_hash': content_hash,
+                    'prompt_updated_at': row.updated_at,
+                    'dimensions': len(vector),
+                    'vector': pack_vector(vector),
+                    'embedded_at': now
+                }
+                for (row, _, content_hash), vector in zip(to_embed, vectors)
+            ])
+            embedded += len(to_embed)
+        
+        session.commit()
+        if on_batch:
+            on_batch(embedded + unchanged)
+    
+    return {
+        'embedded': embedded,
+        'unchanged': unchanged,
+        'pending': stale_prompts(session, model).count()
+    }
+
+
+class VectorIndex:
+    """
+    In-memory matrix of one model's prompt vectors
+    
+    Rows are unit vectors, so the cosine similarity of every prompt to a
+    query is one matrix-vector product. Uses NumPy when installed and falls
+    back to pure Python otherwise.
+    """
+    
+    def __init__(self, prompt_ids: List[int], vectors: List[bytes], dimensions: int):
+        self.prompt_ids = prompt_ids
+        self.dimensions = dimensions
+        if np is not None:
+            self.matrix = (np.frombuffer(b''.join(vectors), dtype='<f4').reshape(len(vectors), dimensions)
+                           if vectors else np.zeros((0, dimensions), dtype=np.float32))
+        else:
+            self.matrix = [unpack_vector(vector) for vector in vectors]
+    
+    def __len__(self):
+        return len(self.prompt_ids)
+    
+    def search(self, query: Sequence[float], limit: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Find the prompts most similar to a query vector
+        
+        Args:
+            query: Query embedding with the index's dimensions
+            limit: Maximum results
+            min_score: Minimum cosine similarity
+        
+        Returns:
+            (prompt_id, score) pairs, most similar first
+        """
+        if not self.prompt_ids or limit < 1:
+            return []
+        query = unpack_vector(pack_vector(query))
+        
+        if np is not None:
+            scores = self.matrix @ np.asarray(query, dtype=np.float32)
+            if limit < len(scores):
+                # Partial selection of the top rows, then sort only those
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind='stable')]
+            ranked = [(self.prompt_ids[row], float(scores[row])) for row in top]
+        else:
+            ranked = heapq.nlargest(limit, (
+                (prompt_id, sum(map(operator.mul, vector, query)))
+                for prompt_id, vector in zip(self.prompt_ids, self.matrix)
+            ), key=operator.itemgetter(1))
+        
+        return [(prompt_id, score) for prompt_id, score in ranked if score >= min_score]
+
+
+# Loaded indexes by (database URL, model), with the table state they were loaded from
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def load_vector_index(session, model: str, dimensions: int) -> VectorIndex:
+    """
+    Get the vector index of a model, reloading it only when embeddings changed
+    
+    A cheap COUNT/MAX query detects added, changed and deleted embeddings,
+    so repeated searches reuse the matrix instead of reading every vector.
+    
+    Args:
+        session: Database session
+        model: Embedding model
+        dimensions: Dimensions of the query vectors (other vectors are skipped)
+    
+    Returns:
+        VectorIndex over the model's stored vectors
+    """
+    fingerprint = tuple(session.query(func.count(PromptEmbedding.prompt_id), func.max(PromptEmbedding.embedded_at))
+                        .filter(PromptEmbedding.model == model, PromptEmbedding.dimensions == dimensions)
+                        .one())
+    key = (str(session.get_bind().url), model, dimensions)
+    
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+    
+    rows = (session.query(PromptEmbedding.prompt_id, PromptEmbedding.vector)
+            .filter(PromptEmbedding.model == model, PromptEmbedding.dimensions == dimensions)
+            .order_by(PromptEmbedding.prompt_id)
+            .all())
+    index = VectorIndex([prompt_id for prompt_id, _ in rows], [vector for _, vector in rows], dimensions)
+    
+    with _index_lock:
+        _index_cache[key] = (fingerprint, index)
+    return index
+
+
+def clear_vector_index_cache() -> None:
+    """Drop every loaded vector index (used by tests)"""
+    with _index_lock:
+        _index_cache.clear()
+
+
+def semantic_search(session, query_vector: Sequence[float], model: str, limit: int = 20,
+                    min_score: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Rank prompts by cosine similarity of their embeddings to a query embedding
+    
+    Args:
+        session: Database session
+        query_vector: Embedding of the search query from the same model
+        model: Embedding model
+        limit: Maximum prompts returned
+        min_score: Minimum cosine similarity
+    
+    Returns:
+        Prompt dictionaries (id, name, description, model) with a score, best match first
+    """
+    ranked = load_vector_index(session, model, len(query_vector)).search(query_vector, limit, min_score)
+    if not ranked:
+        return []
+    
+    prompts = {prompt.id: prompt for prompt in (
+        session.query(Prompt)
+        .options(load_only(Prompt.id, Prompt.name, Prompt.description, Prompt.model))
+        .filter(Prompt.id.in_([prompt_id for prompt_id, _ in ranked]))
+    )}
+    return [
+        dict(prompts[prompt_id].to_dict(['id', 'name', 'description', 'model']), score=round(score, 4))
+        for prompt_id, score in ranked if prompt_id in prompts
+    ]
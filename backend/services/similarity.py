@@ -0,0 +1,165 @@
+"""
+Near-Duplicate Prompt Detection
+Similar-prompt lookups and library-wide clustering over the MinHash LSH bucket index
+"""
+
+from itertools import groupby
+from typing import Dict, Any, List, Iterable
+from sqlalchemy import func
+from backend.models.prompt import Prompt
+from backend.models.prompt_body import PromptBody, PromptBodyBucket
+from backend.services.minhash import band_buckets, estimate_similarity
+
+# Default estimated Jaccard similarity for two prompts to count as near-duplicates
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+# Lowest accepted threshold; below it the LSH index misses most similar pairs
+MIN_SIMILARITY_THRESHOLD = 0.5
+
+# Values bound per IN clause when looking up many bodies
+_LOOKUP_CHUNK_SIZE = 500
+
+
+def _chunks(values: List, size: int = _LOOKUP_CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _load_signatures(session, body_hashes) -> Dict[str, bytes]:
+    signatures = {}
+    for chunk in _chunks(list(body_hashes)):
+        for body_hash, signature in (session.query(PromptBody.hash, PromptBody.minhash)
+                                     .filter(PromptBody.hash.in_(chunk), PromptBody.minhash.isnot(None))):
+            signatures[body_hash] = signature
+    return signatures
+
+
+def _load_prompts(session, body_hashes) -> Dict[str, List[Dict[str, Any]]]:
+    prompts = {}
+    for chunk in _chunks(list(body_hashes)):
+        for prompt_id, name, body_hash in (session.query(Prompt.id, Prompt.name, Prompt.body_hash)
+                                           .filter(Prompt.body_hash.in_(chunk))):
+            prompts.setdefault(body_hash, []).append({'id': prompt_id, 'name': name})
+    return prompts
+
+
+def find_similar_prompts(session, prompt: Prompt, threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                         limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Find prompts whose system prompts are similar to a prompt's
+    
+    Only bodies sharing an LSH bucket with the prompt's body are compared,
+    so the cost depends on the number of candidates, not the library size.
+    
+    Args:
+        session: Database session
+        prompt: Prompt to compare against
+        threshold: Minimum estimated similarity (0.5-1.0)
+        limit: Maximum prompts returned
+    
+    Returns:
+        Prompt dictionaries with id, name and similarity, most similar first.
+        Prompts with an identical body have similarity 1.0.
+    """
+    similar = {prompt.body_hash: 1.0}
+    signature = session.query(PromptBody.minhash).filter(PromptBody.hash == prompt.body_hash).scalar()
+    if signature is not None:
+        candidates = [body_hash for (body_hash,) in (
+            session.query(PromptBodyBucket.body_hash)
+            .filter(PromptBodyBucket.bucket.in_(band_buckets(signature)),
+                    PromptBodyBucket.body_hash != prompt.body_hash)
+            .distinct()
+        )]
+        for body_hash, other in _load_signatures(session, candidates).items():
+            similarity = estimate_similarity(signature, other)
+            if similarity >= threshold:
+                similar[body_hash] = similarity
+    
+    results = []
+    for body_hash, prompts in _load_prompts(session, similar).items():
+        for other in prompts:
+            if other['id'] != prompt.id:
+                results.append(dict(other, similarity=round(similar[body_hash], 3)))
+    
+    results.sort(key=lambda result: (-result['similarity'], result['name']))
+    return results[:limit]
+
+
+def cluster_similar_prompts(session, threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Group the whole library into clusters of near-duplicate prompts
+    
+    Candidate pairs come from bodies sharing an LSH bucket; each candidate
+    pair is verified against the threshold and verified pairs are merged
+    into clusters. Prompts are linked through chains of similar pairs, so
+    two members of a large cluster may be less similar than the threshold.
+    
+    Args:
+        session: Database session
+        threshold: Minimum estimated similarity of a linking pair (0.5-1.0)
+    
+    Returns:
+        Clusters with at least two prompts, largest first, each with its
+        prompts and the lowest similarity among the pairs that link it
+    """
+    shared_buckets = (session.query(PromptBodyBucket.bucket)
+                      .group_by(PromptBodyBucket.bucket)
+                      .having(func.count() > 1))
+    rows = (session.query(PromptBodyBucket.bucket, PromptBodyBucket.body_hash)
+            .filter(PromptBodyBucket.bucket.in_(shared_buckets.scalar_subquery()))
+            .order_by(PromptBodyBucket.bucket)
+            .all())
+    signatures = _load_signatures(session, {body_hash for _, body_hash in rows})
+    
+    parent = {}
+    
+    def find(body_hash):
+        root = parent.setdefault(body_hash, body_hash)
+        while root != parent[root]:
+            parent[root] = parent[parent[root]]
+            root = parent[root]
+        return root
+    
+    # Lowest linking similarity per cluster root
+    link_similarity = {}
+    checked = set()
+    for _, members in groupby(rows, key=lambda row: row[0]):
+        members = [body_hash for _, body_hash in members if body_hash in signatures]
+        for index, first in enumerate(members):
+            for second in members[index + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                root_first, root_second = find(first), find(second)
+                if pair in checked or root_first == root_second:
+                    continue
+                checked.add(pair)
+                
+                similarity = estimate_similarity(signatures[first], signatures[second])
+                if similarity >= threshold:
+                    parent[root_second] = root_first
+                    link_similarity[root_first] = min(
+                        similarity,
+                        link_similarity.pop(root_first, 1.0),
+                        link_similarity.pop(root_second, 1.0)
+                    )
+    
+    # Bodies shared by several prompts are clusters even without similar neighbours
+    shared_bodies = [body_hash for (body_hash,) in session.query(PromptBody.hash).filter(PromptBody.ref_count > 1)]
+    members_by_root = {}
+    for body_hash in set(parent) | set(shared_bodies):
+        members_by_root.setdefault(find(body_hash), []).append(body_hash)
+    
+    prompts_by_body = _load_prompts(session, parent.keys() | set(shared_bodies))
+    clusters = []
+    for root, body_hashes in members_by_root.items():
+        prompts = [prompt for body_hash in body_hashes for prompt in prompts_by_body.get(body_hash, [])]
+        if len(prompts) < 2:
+            continue
+        prompts.sort(key=lambda prompt: (prompt['name'], prompt['id']))
+        clusters.append({
+            'prompts': prompts,
+            'count': len(prompts),
+            'similarity': round(link_similarity.get(root, 1.0), 3)
+        })
+    
+    clusters.sort(key=lambda cluster: (-cluster['count'], cluster['prompts'][0]['name']))
+    return clusters
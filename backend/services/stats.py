@@ -0,0 +1,70 @@
+"""
+Latency Statistics Helpers
+Percentile and summary calculations shared by batch, comparison and history features
+"""
+
+import math
+from typing import Iterable, List, Dict, Any, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """
+    Compute a percentile using linear interpolation between closest ranks
+    
+    Args:
+        sorted_values: Values sorted in ascending order
+        pct: Percentile to compute (0-100)
+    
+    Returns:
+        The interpolated percentile value, or None if there are no values
+    """
+    if not sorted_values:
+        return None
+    
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    
+    rank = (len(sorted_values) - 1) * (pct / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return sorted_values[int(rank)]
+    
+    weight = rank - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize_latencies(latencies: Iterable[float]) -> Dict[str, Any]:
+    """
+    Summarize a collection of latencies in seconds
+    
+    Args:
+        latencies: Latency samples in seconds
+    
+    Returns:
+        Dictionary with count, min, max, mean and p50/p90/p95/p99 values
+    """
+    values = sorted(latencies)
+    
+    if not values:
+        return {
+            'count': 0,
+            'min': None,
+            'max': None,
+            'mean': None,
+            'p50': None,
+            'p90': None,
+            'p95': None,
+            'p99': None
+        }
+    
+    return {
+        'count': len(values),
+        'min': round(values[0], 3),
+        'max': round(values[-1], 3),
+        'mean': round(sum(values) / len(values), 3),
+        'p50': round(percentile(values, 50), 3),
+        'p90': round(percentile(values, 90), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3)
+    }
@@ -0,0 +1,200 @@
+"""
+Test Run History
+Records prompt test results to the database in batches on a background thread
+"""
+
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from backend.config import config
+from backend.services import metrics
+
+logger = logging.getLogger('promptlab')
+
+# Rows written per transaction
+BATCH_SIZE = 100
+
+# Results buffered before new ones are dropped
+MAX_PENDING = 10000
+
+
+def build_test_run(result: Dict[str, Any], system_prompt: str, user_input: str,
+                   prompt_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Convert a test_prompt result into a TestRun row mapping
+    
+    Args:
+        result: Result returned by OllamaService.test_prompt or the Ollama pool
+        system_prompt: The system prompt that was tested
+        user_input: The user message that was tested
+        prompt_id: Saved prompt the test belongs to (optional)
+    
+    Returns:
+        Dictionary of TestRun column values
+    """
+    stats = result.get('stats') or {}
+    return {
+        'prompt_id': prompt_id,
+        'model': result['model'],
+        'temperature': result['temperature'],
+        'system_prompt': system_prompt,
+        'user_input': user_input,
+        'response': result['response'],
+        'latency': result['execution_time'],
+        'prompt_tokens': stats.get('prompt_tokens'),
+        'completion_tokens': stats.get('completion_tokens'),
+        'tokens_per_second': stats.get('tokens_per_second'),
+        'prompt_tokens_per_second': stats.get('prompt_tokens_per_second'),
+        'load_time': stats.get('load_time'),
+        'total_time': stats.get('total_time'),
+        'endpoint': result.get('endpoint'),
+        'cached': bool(result.get('cached', False)),
+        'created_at': datetime.now(timezone.utc)
+    }
+
+
+class TestRunRecorder:
+    """
+    Buffer test results in memory and insert them in batches
+    
+    record() only enqueues, so the request that produced the result never
+    waits on a database write. A background thread started on first use
+    flushes the queue every flush_interval seconds with one bulk insert per
+    batch. When the queue is full, new results are dropped and counted
+    rather than blocking requests.
+    """
+    
+    # Tell pytest this is not a test class despite the name
+    __test__ = False
+    
+    def __init__(self, flush_interval: Optional[float] = None, batch_size: int = BATCH_SIZE,
+                 max_pending: int = MAX_PENDING):
+        """
+        Initialize recorder
+        
+        Args:
+            flush_interval: Seconds between background flushes (defaults to config)
+            batch_size: Rows written per transaction
+            max_pending: Results buffered before new ones are dropped
+        """
+        self.flush_interval = flush_interval or config.test_history_flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    @property
+    def pending(self) -> int:
+        """Number of results waiting to be written"""
+        return self._queue.qsize()
+    
+    def record(self, run: Dict[str, Any]) -> bool:
+        """
+        Queue a test run for writing
+        
+        Args:
+            run: Row mapping as produced by build_test_run
+        
+        Returns:
+            True if the run was queued, False if history is disabled or the queue is full
+        """
+        if not config.test_history_enabled:
+            return False
+        
+        try:
+            self._queue.put_nowait(run)
+        except queue.Full:
+            metrics.test_runs_dropped.inc()
+            return False
+        
+        self._ensure_started()
+        return True
+    
+    def flush(self) -> int:
+        """
+        Write every queued run now
+        
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        with self._write_lock:
+            while True:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    return written
+                written += self._write(batch)
+    
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the background thread and write what is still queued"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self._stop_event.clear()
+    
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='promptlab-history', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # A failing flush must never kill the writer thread
+                logger.exception("Failed to write test run history")
+    
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        from backend.database import get_db_session, close_db_session
+        from backend.models.prompt import Prompt
+        from backend.models.test_run import TestRun
+        
+        session = None
+        try:
+            session = get_db_session()
+            
+            # Runs of a prompt deleted since the test are kept as ad-hoc runs
+            prompt_ids = {row['prompt_id'] for row in rows if row.get('prompt_id') is not None}
+            if prompt_ids:
+                existing = {prompt_id for (prompt_id,) in
+                            session.query(Prompt.id).filter(Prompt.id.in_(prompt_ids))}
+                for row in rows:
+                    if row.get('prompt_id') not in existing:
+                        row['prompt_id'] = None
+            
+            session.bulk_insert_mappings(TestRun, rows)
+            session.commit()
+        except Exception as e:
+            if session is not None:
+                session.rollback()
+            metrics.test_runs_dropped.inc(len(rows))
+            logger.warning(f"Dropped {len(rows)} test run(s) from history: {e}")
+            return 0
+        finally:
+            close_db_session(session)
+        
+        metrics.test_runs_recorded.inc(len(rows))
+        return len(rows)
+
+
+# Global recorder instance
+test_run_recorder = TestRunRecorder()
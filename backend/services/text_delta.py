@@ -0,0 +1,89 @@
+"""
+Text Deltas
+Compact compressed deltas between revisions of a text, used for prompt version history
+"""
+
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+from typing import List
+
+# Sentences and lines, each with its trailing whitespace. Coarser than words,
+# so matching stays fast on 50,000 character prompts, and finer than lines,
+# so an edit inside a long single-line prompt does not store the whole line.
+_CHUNK_PATTERN = re.compile(r'[^\n.!?]*(?:[.!?]+\s*|\n|$)')
+
+_COMPRESSION_LEVEL = 9
+
+
+def split_chunks(text: str) -> List[str]:
+    """
+    Split text into the chunks deltas are computed over
+    
+    Args:
+        text: Text to split
+    
+    Returns:
+        Non-empty chunks that join back into the text
+    """
+    return [chunk for chunk in _CHUNK_PATTERN.findall(text) if chunk]
+
+
+def compress_text(text: str) -> bytes:
+    """Compress a full copy of a text"""
+    return zlib.compress(text.encode('utf-8'), _COMPRESSION_LEVEL)
+
+
+def decompress_text(data: bytes) -> str:
+    """Restore a text compressed by compress_text"""
+    return zlib.decompress(data).decode('utf-8')
+
+
+def encode_delta(old: str, new: str) -> bytes:
+    """
+    Encode the changes that turn one text into another
+    
+    The delta is a list of operations: a [start, end] pair copies that
+    range of the old text's chunks, a string inserts new text. It is
+    stored zlib-compressed JSON.
+    
+    Args:
+        old: Previous revision
+        new: Next revision
+    
+    Returns:
+        Compressed delta for apply_delta
+    """
+    old_chunks = split_chunks(old)
+    new_chunks = split_chunks(new)
+    operations = []
+    matcher = SequenceMatcher(None, old_chunks, new_chunks, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            operations.append([old_start, old_end])
+        elif tag in ('replace', 'insert'):
+            operations.append(''.join(new_chunks[new_start:new_end]))
+    return zlib.compress(json.dumps(operations, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                         _COMPRESSION_LEVEL)
+
+
+def apply_delta(old: str, delta: bytes) -> str:
+    """
+    Rebuild a revision from the previous revision and the delta between them
+    
+    Args:
+        old: Revision the delta was encoded against
+        delta: Delta from encode_delta
+    
+    Returns:
+        The next revision
+    """
+    old_chunks = split_chunks(old)
+    parts = []
+    for operation in json.loads(zlib.decompress(delta).decode('utf-8')):
+        if isinstance(operation, str):
+            parts.append(operation)
+        else:
+            parts.extend(old_chunks[operation[0]:operation[1]])
+    return ''.join(parts)
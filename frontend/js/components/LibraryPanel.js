@@ -541,22 +541,16 @@ export class LibraryPanel {
         );
         
         try {
-            exportOperation.updateProgress(1, 4, 'Preparing export...');
+            exportOperation.updateProgress(1, 2, 'Preparing export...');
             
-            // Get export data from API
-            const response = await this.apiClient.exportLibrary();
-            exportOperation.updateProgress(2, 4, 'Processing data...');
-            
-            // Extract the actual export data from the response
-            const exportData = response.export_data || response;
-            const contentType = response.content_type || 'application/json';
-            
-            // Create and download file
-            const filename = `promptlab-library-${this.formatDateForFilename(new Date())}.json`;
-            exportOperation.updateProgress(3, 4, 'Creating download...');
-            
-            this.downloadFileRaw(exportData, filename, contentType);
-            exportOperation.updateProgress(4, 4, 'Download started');
+            // The browser streams the file straight to disk instead of buffering it here
+            const link = document.createElement('a');
+            link.href = this.apiClient.getLibraryDownloadUrl('json');
+            link.download = `promptlab-library-${this.formatDateForFilename(new Date())}.json`;
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+            exportOperation.updateProgress(2, 2, 'Download started');
             
             exportOperation.complete(`Exported ${this.prompts.length} prompts successfully`);
             
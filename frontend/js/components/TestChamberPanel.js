@@ -219,7 +219,9 @@ export class TestChamberPanel {
         // Show execution metadata if available
         if (result.execution_time) {
             const executionTime = parseFloat(result.execution_time).toFixed(2);
-            this.eventBus.emit('toast:show', `Test completed in ${executionTime}s`, 'success');
+            const tokensPerSecond = result.stats && result.stats.tokens_per_second;
+            const throughput = tokensPerSecond ? ` (${parseFloat(tokensPerSecond).toFixed(1)} tokens/s)` : '';
+            this.eventBus.emit('toast:show', `Test completed in ${executionTime}s${throughput}`, 'success');
         }
         
         // Enable copy button if YAML is available
@@ -289,6 +289,11 @@ export class AppController {
             this.testChamberPanel.setLoadingState(true);
             this.testChamberPanel.resetResponseStyling();
             
+            // File the result under the open prompt's test history
+            if (this.currentPrompt && this.currentPrompt.id) {
+                testData = { ...testData, prompt_id: this.currentPrompt.id };
+            }
+            
             // Call API to run test
             const result = await this.apiClient.runTest(testData);
             
@@ -268,6 +268,15 @@ export class ApiClient {
         return this.post('/export-library', { format });
     }
     
+    /**
+     * Get the URL of the streamed library download
+     * @param {string} format - Export format ('json', 'yaml' or 'ndjson')
+     * @returns {string} Download URL
+     */
+    getLibraryDownloadUrl(format = 'json') {
+        return `${this.baseUrl}/export-library?format=${encodeURIComponent(format)}`;
+    }
+    
     /**
      * Import prompt library
      * @param {string} importData - Import data as string
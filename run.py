@@ -8,6 +8,7 @@ status display, logging, and graceful shutdown handling.
 import os
 import sys
 import signal
+import argparse
 import webbrowser
 import time
 import threading
@@ -19,6 +20,21 @@ from datetime import datetime
 # Global flag for graceful shutdown
 shutdown_requested = False
 
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Launch PromptLab")
+    parser.add_argument('--server', action='store_true',
+                        help="serve with the multi-threaded production WSGI server instead of Flask's development server")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="worker threads in --server mode (default: server_threads from config)")
+    parser.add_argument('--drain-timeout', type=int, default=None,
+                        help="seconds to let in-flight requests finish on shutdown in --server mode")
+    parser.add_argument('--no-browser', action='store_true',
+                        help="do not open a browser window on startup")
+    parser.add_argument('--convert-text-storage', action='store_true',
+                        help="rewrite stored system prompts and descriptions per text_compression_enabled, then exit")
+    return parser.parse_args(argv)
+
 def setup_logging():
     """Configure logging for startup process"""
     log_format = '%(asctime)s - %(levelname)s - %(message)s'
@@ -175,6 +191,25 @@ def open_browser_delayed(url, delay=3):
     thread = threading.Thread(target=delayed_open, daemon=True)
     thread.start()
 
+def convert_text_storage():
+    """Convert stored prompt text to the configured storage and report the size change"""
+    logger = logging.getLogger('promptlab')
+    from backend.database import init_database, convert_text_storage as convert
+    from backend.config import config
+    
+    mode = 'compressed' if config.text_compression_enabled else 'plain'
+    logger.info(f"🗜️ Converting stored prompt text to {mode} storage: {config.database_path}")
+    engine = init_database()
+    size_before = os.path.getsize(config.database_path)
+    summary = convert(engine)
+    # Closing the last connection checkpoints the WAL into the database file
+    engine.dispose()
+    size_after = os.path.getsize(config.database_path)
+    
+    logger.info(f"✓ Converted {summary['converted']} value(s); stored text "
+                f"{summary['bytes_before']:,} → {summary['bytes_after']:,} bytes")
+    logger.info(f"✓ Database file {size_before:,} → {size_after:,} bytes")
+
 def run_initialization_checks():
     """Run all initialization checks and return success status"""
     logger = logging.getLogger('promptlab')
@@ -211,12 +246,18 @@ def main():
     """Main startup function with comprehensive initialization"""
     global shutdown_requested
     
+    args = parse_args()
+    
     # Setup logging first
     logger = setup_logging()
     
     # Display banner
     print_banner()
     
+    if args.convert_text_storage:
+        convert_text_storage()
+        return
+    
     # Setup signal handlers for graceful shutdown
     setup_signal_handlers()
     
@@ -239,11 +280,23 @@ def main():
         
         app = create_app()
         
+        # Probe the database and Ollama in the background for /api/health
+        from backend.services.health_monitor import health_monitor
+        if health_monitor.start():
+            logger.info(f"✓ Health monitor probing every {health_monitor.interval}s")
+        
+        # Jobs persisted as queued or running belong to a process that is gone
+        from backend.services.job_queue import job_manager
+        interrupted = job_manager.recover_interrupted()
+        if interrupted:
+            logger.warning(f"⚠ Marked {interrupted} interrupted background job(s) as failed")
+        
         # Prepare server URL
         url = f"http://{config.flask_host}:{config.flask_port}"
         
         # Schedule browser opening
-        open_browser_delayed(url)
+        if not (args.server or args.no_browser):
+            open_browser_delayed(url)
         
         # Display startup information
         logger.info("=" * 50)
@@ -251,12 +304,26 @@ def main():
         logger.info(f"📍 URL: {url}")
         logger.info(f"🏠 Host: {config.flask_host}")
         logger.info(f"🔌 Port: {config.flask_port}")
-        logger.info(f"🐛 Debug: {config.flask_debug}")
+        if args.server:
+            logger.info(f"🏭 Mode: production server ({args.threads or config.server_threads} threads)")
+        else:
+            logger.info(f"🐛 Debug: {config.flask_debug}")
         logger.info(f"🗄️ Database: {config.database_path}")
         logger.info(f"🤖 Ollama: {config.ollama_endpoint}")
         logger.info("=" * 50)
         logger.info("✨ Server ready! Press Ctrl+C to stop")
         
+        if args.server:
+            # Serve until SIGINT/SIGTERM sets shutdown_requested, then drain
+            from backend.server import serve
+            serve(
+                app,
+                should_stop=lambda: shutdown_requested,
+                threads=args.threads,
+                drain_timeout=args.drain_timeout
+            )
+            return
+        
         # Start the Flask application
         app.run(
             host=config.flask_host,
@@ -286,6 +353,22 @@ def main():
     finally:
         # Graceful shutdown
         logger.info("🔄 Performing cleanup...")
+        try:
+            # Write queued test results before the process exits
+            from backend.services.test_history import test_run_recorder
+            test_run_recorder.stop()
+        except ImportError:
+            pass
+        try:
+            from backend.services.job_queue import job_manager
+            job_manager.shutdown()
+        except ImportError:
+            pass
+        try:
+            from backend.services.ollama_service import ollama_services
+            ollama_services.close_all()
+        except ImportError:
+            pass
         logger.info("👋 PromptLab shutdown complete")
 
 if __name__ == "__main__":
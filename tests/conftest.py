@@ -5,10 +5,13 @@ Test configuration and fixtures for PromptLab tests
 import pytest
 import tempfile
 import os
+import shutil
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from backend.database import Base
+from backend.app import create_app
+from backend.database import Base, register_sqlite_functions
 from backend.models.prompt import Prompt
+from backend.services.semantic_search import clear_vector_index_cache
 
 @pytest.fixture(scope="function")
 def test_db():
@@ -19,6 +22,7 @@ def test_db():
     
     # Create test engine
     engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    register_sqlite_functions(engine)
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
@@ -46,6 +50,39 @@ def db_session(test_db):
     
     session.close()
 
+@pytest.fixture
+def app():
+    """Create a test Flask application with a temporary database and jobs directory"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    jobs_dir = tempfile.mkdtemp()
+    
+    import backend.config
+    original_db_path = backend.config.config.database_path
+    original_jobs_dir = backend.config.config.jobs_dir
+    backend.config.config.database_path = db_path
+    backend.config.config.jobs_dir = jobs_dir
+    clear_vector_index_cache()
+    
+    app = create_app()
+    app.config['TESTING'] = True
+    
+    yield app
+    
+    clear_vector_index_cache()
+    backend.config.config.database_path = original_db_path
+    backend.config.config.jobs_dir = original_jobs_dir
+    shutil.rmtree(jobs_dir, ignore_errors=True)
+    try:
+        os.unlink(db_path)
+    except (OSError, PermissionError):
+        pass
+
+@pytest.fixture
+def client(app):
+    """Create a test client"""
+    return app.test_client()
+
 @pytest.fixture
 def sample_prompt_data():
     """Sample prompt data for testing"""
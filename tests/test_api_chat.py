@@ -0,0 +1,121 @@
+"""
+Integration tests for chat API endpoints
+Tests session lifecycle, message turns and error handling
+"""
+
+import pytest
+import json
+from unittest.mock import patch
+from backend.services.chat_sessions import chat_sessions
+from backend.services.ollama_service import OllamaConnectionError
+
+
+@pytest.fixture(autouse=True)
+def clear_chat_sessions():
+    """Drop sessions created by a test"""
+    yield
+    chat_sessions.clear()
+
+
+def fake_chat(messages, model, temperature, keep_alive, endpoint=None):
+    """Stand-in for OllamaPool.chat"""
+    return {
+        'message': f"reply {len(messages) // 2}",
+        'execution_time': 0.3,
+        'stats': {'prompt_tokens': 42, 'completion_tokens': 7, 'tokens_per_second': 35.0},
+        'model': model or 'llama2',
+        'temperature': temperature if temperature is not None else 0.7,
+        'endpoint': 'http://localhost:11434'
+    }
+
+
+class TestChatSessionEndpoints:
+    """Test cases for /api/chat/sessions endpoints"""
+    
+    @patch('backend.api.chat.ollama_pool.chat', side_effect=fake_chat)
+    def test_conversation_flow(self, mock_chat, client):
+        """Test creating a session, sending turns, reading and deleting it"""
+        response = client.post('/api/chat/sessions', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'model': 'llama2',
+            'keep_alive': '30m'
+        })
+        assert response.status_code == 201
+        session = json.loads(response.data)['session']
+        assert session['keep_alive'] == '30m'
+        assert session['turn_count'] == 0
+        
+        response = client.post(f"/api/chat/sessions/{session['id']}/messages", json={'message': 'Hi'})
+        assert response.status_code == 200
+        reply = json.loads(response.data)['reply']
+        assert reply['message'] == 'reply 1'
+        assert reply['turn'] == 1
+        assert reply['stats']['prompt_tokens'] == 42
+        
+        client.post(f"/api/chat/sessions/{session['id']}/messages", json={'message': 'And then?'})
+        messages = mock_chat.call_args[0][0]
+        assert [message['role'] for message in messages] == ['system', 'user', 'assistant', 'user']
+        assert mock_chat.call_args[1]['endpoint'] == 'http://localhost:11434'
+        
+        response = client.get(f"/api/chat/sessions/{session['id']}")
+        data = json.loads(response.data)['session']
+        assert data['turn_count'] == 2
+        assert len(data['messages']) == 5
+        
+        response = client.delete(f"/api/chat/sessions/{session['id']}")
+        assert response.status_code == 200
+        assert client.get(f"/api/chat/sessions/{session['id']}").status_code == 404
+    
+    @patch('backend.api.chat.ollama_pool.chat', side_effect=fake_chat)
+    def test_create_with_first_message(self, mock_chat, client):
+        """Test the first user message can be sent when the session is created"""
+        response = client.post('/api/chat/sessions', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'message': 'Hello'
+        })
+        
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['reply']['turn'] == 1
+        assert data['session']['turn_count'] == 1
+    
+    def test_create_validation_error(self, client):
+        """Test session creation with missing prompt and bad keep_alive"""
+        response = client.post('/api/chat/sessions', json={
+            'system_prompt': '',
+            'keep_alive': 'forever'
+        })
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['code'] == 'VALIDATION_ERROR'
+        assert 'system_prompt' in data['details']
+        assert 'keep_alive' in data['details']
+    
+    def test_unknown_session(self, client):
+        """Test messages to an unknown session return 404"""
+        response = client.post('/api/chat/sessions/missing/messages', json={'message': 'Hi'})
+        
+        assert response.status_code == 404
+        assert json.loads(response.data)['code'] == 'SESSION_NOT_FOUND'
+    
+    def test_empty_message(self, client):
+        """Test an empty message is rejected"""
+        session = chat_sessions.create('System')
+        
+        response = client.post(f'/api/chat/sessions/{session.id}/messages', json={'message': '  '})
+        
+        assert response.status_code == 400
+        assert 'message' in json.loads(response.data)['details']
+    
+    @patch('backend.api.chat.ollama_pool.chat')
+    def test_connection_error_keeps_history(self, mock_chat, client):
+        """Test a failed turn returns 503 and can be retried"""
+        mock_chat.side_effect = OllamaConnectionError("Failed to connect")
+        session = chat_sessions.create('System')
+        
+        response = client.post(f'/api/chat/sessions/{session.id}/messages', json={'message': 'Hi'})
+        
+        assert response.status_code == 503
+        assert json.loads(response.data)['code'] == 'OLLAMA_CONNECTION_ERROR'
+        assert len(session.messages) == 1
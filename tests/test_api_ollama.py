@@ -172,6 +172,39 @@ class TestRunTestEndpoint:
             None
         )
     
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_run_test_reports_generation_stats(self, mock_test, client):
+        """Test Ollama's token counts and timings reach the response and YAML"""
+        mock_test.return_value = {
+            'response': 'Hello!',
+            'execution_time': 3.1,
+            'model': 'llama2',
+            'temperature': 0.7,
+            'stats': {
+                'prompt_tokens': 120,
+                'completion_tokens': 48,
+                'tokens_per_second': 24.0,
+                'prompt_tokens_per_second': 600.0,
+                'load_time': 1.2,
+                'prompt_eval_time': 0.2,
+                'eval_time': 2.0,
+                'total_time': None
+            }
+        }
+        
+        response = client.post('/api/run-test', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'user_input': 'Hello'
+        })
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['stats']['load_time'] == 1.2
+        assert data['stats']['prompt_tokens_per_second'] == 600.0
+        assert 'performance:' in data['yaml_config']
+        assert 'tokens_per_second: 24.0' in data['yaml_config']
+        assert 'total_time' not in data['yaml_config']
+    
     @patch('backend.api.ollama.ollama_service.test_prompt')
     def test_run_test_with_custom_parameters(self, mock_test, client):
         """Test prompt testing with custom model and temperature"""
@@ -278,6 +311,207 @@ class TestRunTestEndpoint:
         assert data['code'] == 'OLLAMA_CONNECTION_ERROR'
 
 
+class TestRunTestStreamEndpoint:
+    """Test cases for /api/run-test/stream endpoint"""
+    
+    @patch('backend.api.ollama.ollama_service.stream_test_prompt')
+    def test_run_test_stream_success(self, mock_stream, client):
+        """Test streaming prompt test relays events as SSE"""
+        def events():
+            yield {'type': 'token', 'content': 'Hello'}
+            yield {'type': 'token', 'content': '!'}
+            yield {'type': 'done', 'execution_time': 0.5, 'time_to_first_token': 0.1,
+                   'tokens_per_second': 20.0, 'eval_count': 2, 'model': 'llama2', 'temperature': 0.7}
+        mock_stream.return_value = events()
+        
+        response = client.post('/api/run-test/stream', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'user_input': 'Hello'
+        })
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert body.count('event: token') == 2
+        assert 'event: done' in body
+        assert '"time_to_first_token": 0.1' in body
+        mock_stream.assert_called_once_with('You are a helpful assistant.', 'Hello', None, None)
+    
+    def test_run_test_stream_validation_error(self, client):
+        """Test streaming prompt test with missing fields"""
+        response = client.post('/api/run-test/stream', json={'system_prompt': 'Test'})
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['code'] == 'VALIDATION_ERROR'
+        assert 'user_input' in data['details']
+    
+    @patch('backend.api.ollama.ollama_service.stream_test_prompt')
+    def test_run_test_stream_connection_error(self, mock_stream, client):
+        """Test streaming prompt test when Ollama is unreachable"""
+        def events():
+            raise OllamaConnectionError("Failed to connect")
+            yield
+        mock_stream.return_value = events()
+        
+        response = client.post('/api/run-test/stream', json={
+            'system_prompt': 'Test prompt',
+            'user_input': 'Test input'
+        })
+        
+        assert response.status_code == 503
+        data = json.loads(response.data)
+        assert data['code'] == 'OLLAMA_CONNECTION_ERROR'
+
+
+class TestRunTestBatchEndpoint:
+    """Test cases for /api/run-test/batch endpoint"""
+    
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_run_test_batch_success(self, mock_test, client):
+        """Test batch streams a result per input and a summary"""
+        mock_test.side_effect = lambda system_prompt, user_input, model, temperature: {
+            'response': f'Echo {user_input}',
+            'execution_time': 0.1,
+            'model': model or 'llama2',
+            'temperature': 0.7
+        }
+        
+        response = client.post('/api/run-test/batch', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'inputs': ['one', 'two', 'three'],
+            'models': ['llama2', 'mistral'],
+            'concurrency': 2
+        })
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert body.count('event: result') == 6
+        assert 'event: summary' in body
+        assert '"p95"' in body
+        assert mock_test.call_count == 6
+    
+    def test_run_test_batch_validation_error(self, client):
+        """Test batch with invalid inputs and temperatures"""
+        response = client.post('/api/run-test/batch', json={
+            'system_prompt': 'Test',
+            'inputs': [],
+            'temperatures': [3.0]
+        })
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['code'] == 'VALIDATION_ERROR'
+        assert 'inputs' in data['details']
+        assert 'temperatures' in data['details']
+    
+    def test_run_test_batch_too_many_items(self, client):
+        """Test batch rejects requests expanding beyond the item limit"""
+        response = client.post('/api/run-test/batch', json={
+            'system_prompt': 'Test',
+            'inputs': [f'input {i}' for i in range(600)],
+            'models': ['a', 'b']
+        })
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert 'inputs' in data['details']
+
+
+class TestCompareEndpoint:
+    """Test cases for /api/compare endpoint"""
+    
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_compare_success(self, mock_test, client):
+        """Test comparison streams a result per model and a ranked summary"""
+        mock_test.side_effect = lambda system_prompt, user_input, model, temperature: {
+            'response': f'{model} says hi',
+            'execution_time': 0.1,
+            'model': model,
+            'temperature': 0.7,
+            'stats': {'prompt_tokens': 12, 'completion_tokens': 30, 'tokens_per_second': 42.5,
+                      'load_time': 0.2, 'prompt_eval_time': 0.01, 'eval_time': 0.7, 'total_time': 0.9}
+        }
+        
+        response = client.post('/api/compare', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'user_input': 'Hello',
+            'models': ['llama2', 'mistral', 'llama2']
+        })
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert body.count('event: result') == 2
+        assert '"tokens_per_second": 42.5' in body
+        
+        summary = json.loads(body.split('event: summary\ndata: ')[1].strip())
+        assert summary['succeeded'] == 2
+        assert {entry['model'] for entry in summary['ranking']} == {'llama2', 'mistral'}
+        assert summary['ranking'][0]['latency'] <= summary['ranking'][1]['latency']
+    
+    def test_compare_validation_error(self, client):
+        """Test comparison without models or user input"""
+        response = client.post('/api/compare', json={
+            'system_prompt': 'Test',
+            'models': []
+        })
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['code'] == 'VALIDATION_ERROR'
+        assert 'models' in data['details']
+        assert 'user_input' in data['details']
+    
+    def test_compare_too_many_combinations(self, client):
+        """Test comparison rejects more combinations than the limit"""
+        response = client.post('/api/compare', json={
+            'system_prompt': 'Test',
+            'user_input': 'Hello',
+            'models': [f'model-{i}' for i in range(10)],
+            'temperatures': [0.0, 0.5, 1.0, 1.5]
+        })
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert 'models' in data['details']
+
+
+class TestResponseCacheEndpoints:
+    """Test cases for /api/response-cache endpoints"""
+    
+    @patch('backend.api.ollama.ollama_service.response_cache', None)
+    def test_get_response_cache_disabled(self, client):
+        """Test cache info when caching is disabled"""
+        response = client.get('/api/response-cache')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['enabled'] is False
+    
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_run_test_reports_cache_hit(self, mock_test, client):
+        """Test run-test surfaces the cached flag from the service"""
+        mock_test.return_value = {
+            'response': 'Cached answer',
+            'execution_time': 0.0004,
+            'model': 'llama2',
+            'temperature': 0.0,
+            'cached': True
+        }
+        
+        response = client.post('/api/run-test', json={
+            'system_prompt': 'You are a helpful assistant.',
+            'user_input': 'Hello',
+            'temperature': 0
+        })
+        
+        data = json.loads(response.data)
+        assert data['cached'] is True
+        assert data['execution_time'] == 0.0004
+
+
 class TestModelsEndpoint:
     """Test cases for /api/models endpoint"""
     
@@ -376,6 +610,31 @@ class TestHealthEndpoint:
         assert data['status']['connected'] is False
 
 
+class TestBackendsEndpoint:
+    """Test cases for /api/ollama/backends endpoint"""
+    
+    @patch('backend.api.ollama.ollama_pool.get_status')
+    def test_get_backends(self, mock_status, client):
+        """Test backend routing state is reported"""
+        mock_status.return_value = [{
+            'endpoint': 'http://gpu-1:11434',
+            'state': 'closed',
+            'consecutive_failures': 0,
+            'outstanding': 1,
+            'latency_ms': 850.0,
+            'models': ['llama2:latest']
+        }]
+        
+        response = client.get('/api/ollama/backends')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] is True
+        assert data['strategy'] in ('least_outstanding', 'latency')
+        assert data['backends'][0]['endpoint'] == 'http://gpu-1:11434'
+        assert data['backends'][0]['state'] == 'closed'
+
+
 class TestOllamaAPIIntegration:
     """Integration tests for complete API workflows"""
     
@@ -9,6 +9,7 @@ from flask import Flask
 from backend.app import create_app
 from backend.database import Base, get_db_session, close_db_session
 from backend.models.prompt import Prompt
+from backend.models.prompt_version import PromptVersionSnapshot
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import tempfile
@@ -272,6 +273,24 @@ class TestPromptsAPI:
             assert data['count'] == 1
             assert data['prompts'][0]['name'] == create_test_prompt['name']
     
+    def test_search_prompts_by_system_prompt(self, client, create_test_prompt):
+        """Test searching matches system prompt text and returns a snippet"""
+        specific_data = {
+            'name': 'Legal Helper',
+            'system_prompt': 'You summarise legal documents for busy lawyers.'
+        }
+        client.post('/api/prompts', 
+                   data=json.dumps(specific_data),
+                   content_type='application/json')
+        
+        response = client.get('/api/prompts?search=lawyer')
+        assert response.status_code == 200
+        
+        data = response.get_json()
+        assert data['count'] == 1
+        assert data['prompts'][0]['name'] == 'Legal Helper'
+        assert '<mark>lawyers</mark>' in data['prompts'][0]['search_snippet']
+    
     def test_search_prompts_no_results(self, client, create_test_prompt):
         """Test searching with no matching results"""
         response = client.get('/api/prompts?search=nonexistent')
@@ -399,6 +418,83 @@ class TestPromptsAPI:
         # Verify alphabetical ordering by name
         names = [prompt['name'] for prompt in data['prompts']]
         assert names == ['Alpha Prompt', 'Beta Prompt', 'Zebra Prompt']
+    
+    def test_get_prompts_pagination(self, client):
+        """Test walking the prompt list with limit and next_cursor"""
+        for name in ['Delta Prompt', 'Alpha Prompt', 'Charlie Prompt', 'Bravo Prompt', 'Echo Prompt']:
+            client.post('/api/prompts',
+                       data=json.dumps({'name': name, 'system_prompt': 'System prompt'}),
+                       content_type='application/json')
+        
+        names = []
+        cursor = None
+        pages = 0
+        while True:
+            url = '/api/prompts?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers['X-Total-Count'] == '5'
+            
+            data = response.get_json()
+            assert data['count'] <= 2
+            names.extend(prompt['name'] for prompt in data['prompts'])
+            pages += 1
+            
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        
+        assert pages == 3
+        assert names == ['Alpha Prompt', 'Bravo Prompt', 'Charlie Prompt', 'Delta Prompt', 'Echo Prompt']
+    
+    def test_get_prompts_search_pagination(self, client):
+        """Test paginating ranked search results"""
+        for index in range(3):
+            client.post('/api/prompts',
+                       data=json.dumps({'name': f'Writer {index}', 'system_prompt': 'You write stories'}),
+                       content_type='application/json')
+        
+        response = client.get('/api/prompts?search=writer&limit=2')
+        data = response.get_json()
+        assert data['count'] == 2
+        assert response.headers['X-Total-Count'] == '3'
+        assert data['next_cursor'] is not None
+        
+        response = client.get(f"/api/prompts?search=writer&limit=2&cursor={data['next_cursor']}")
+        second_page = response.get_json()
+        assert second_page['count'] == 1
+        assert second_page['next_cursor'] is None
+        
+        seen = {prompt['id'] for prompt in data['prompts']} | {prompt['id'] for prompt in second_page['prompts']}
+        assert len(seen) == 3
+    
+    def test_get_prompts_field_projection(self, client, create_test_prompt):
+        """Test returning only the requested fields"""
+        response = client.get('/api/prompts?fields=name,model')
+        assert response.status_code == 200
+        
+        prompt = response.get_json()['prompts'][0]
+        assert set(prompt.keys()) == {'id', 'name', 'model'}
+        assert prompt['name'] == create_test_prompt['name']
+    
+    def test_get_prompts_without_pagination_params(self, client, create_test_prompt):
+        """Test that the unpaginated response keeps its original shape"""
+        response = client.get('/api/prompts')
+        data = response.get_json()
+        
+        assert 'next_cursor' not in data
+        assert response.headers['X-Total-Count'] == '1'
+        assert 'system_prompt' in data['prompts'][0]
+    
+    def test_get_prompts_invalid_list_params(self, client):
+        """Test validation of limit, cursor and fields parameters"""
+        for query in ['limit=0', 'limit=501', 'limit=abc', 'cursor=not-a-cursor', 'fields=name,secret']:
+            response = client.get(f'/api/prompts?{query}')
+            assert response.status_code == 400
+            
+            data = response.get_json()
+            assert data['error'] is True
+            assert data['code'] == 'VALIDATION_ERROR'
 
 class TestImportExportAPI:
     """Test cases for the Import/Export API endpoints"""
@@ -467,6 +563,66 @@ class TestImportExportAPI:
         assert data['error'] is True
         assert data['code'] == 'INVALID_FORMAT'
     
+    def test_download_library_json(self, client, create_test_prompt):
+        """Test the streamed JSON download"""
+        response = client.get('/api/export-library')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        assert response.headers['Content-Disposition'].startswith('attachment; filename="promptlab-library-')
+        assert response.headers['Content-Disposition'].endswith('.json"')
+        
+        export_data = json.loads(response.get_data(as_text=True))
+        assert export_data['metadata']['total_prompts'] == 1
+        assert export_data['prompts'][0]['name'] == create_test_prompt['name']
+    
+    def test_download_library_yaml(self, client, create_test_prompt):
+        """Test the streamed YAML download"""
+        response = client.get('/api/export-library?format=yaml')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-yaml'
+        
+        import yaml
+        export_data = yaml.safe_load(response.get_data(as_text=True))
+        assert export_data['metadata']['total_prompts'] == 1
+        assert export_data['prompts'][0]['system_prompt'] == create_test_prompt['system_prompt']
+    
+    def test_download_library_ndjson(self, client):
+        """Test the streamed NDJSON download with one prompt per line"""
+        for index in range(3):
+            client.post('/api/prompts', json={'name': f'Prompt {index}', 'system_prompt': f'Prompt text {index}'})
+        
+        response = client.get('/api/export-library?format=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert lines[0]['metadata']['total_prompts'] == 3
+        assert [line['name'] for line in lines[1:]] == ['Prompt 0', 'Prompt 1', 'Prompt 2']
+    
+    def test_download_library_empty(self, client):
+        """Test downloading an empty library"""
+        response = client.get('/api/export-library')
+        assert response.status_code == 200
+        
+        export_data = json.loads(response.get_data(as_text=True))
+        assert export_data['prompts'] == []
+        assert export_data['metadata']['total_prompts'] == 0
+    
+    def test_download_library_invalid_format(self, client):
+        """Test downloading the library in an unknown format"""
+        response = client.get('/api/export-library?format=xml')
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'INVALID_FORMAT'
+    
+    def test_download_import_roundtrip(self, client, create_test_prompt):
+        """Test that a streamed download can be imported unchanged"""
+        exported = client.get('/api/export-library').get_data(as_text=True)
+        client.delete(f'/api/prompts/{create_test_prompt["id"]}')
+        
+        response = client.post('/api/import-library', json={'import_data': exported})
+        assert response.status_code == 200
+        assert response.get_json()['summary']['imported'] == 1
+    
     def test_import_library_json_success(self, client):
         """Test importing library from JSON format"""
         import_data = {
@@ -792,4 +948,389 @@ class TestImportExportAPI:
         assert prompts_data['count'] == 1
         restored_prompt = prompts_data['prompts'][0]
         assert restored_prompt['name'] == create_test_prompt['name']
-        assert restored_prompt['system_prompt'] == create_test_prompt['system_prompt']
\ No newline at end of file
+        assert restored_prompt['system_prompt'] == create_test_prompt['system_prompt']
+
+def parse_events(response):
+    """Split a Server-Sent Events response into (event, data) pairs"""
+    events = []
+    for message in response.get_data(as_text=True).strip().split('\n\n'):
+        event_line, data_line = message.split('\n', 1)
+        events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+    return events
+
+class TestStreamingImportAPI:
+    """Test cases for the streaming library import endpoint"""
+    
+    def test_import_ndjson_in_batches(self, client):
+        """Test that a large NDJSON upload is written in batches with progress events"""
+        from unittest.mock import patch
+        lines = [json.dumps({'metadata': {'total_prompts': 7}})]
+        lines += [json.dumps({'name': f'Prompt {index}', 'system_prompt': f'Body {index}'}) for index in range(7)]
+        
+        with patch('backend.api.prompts.IMPORT_BATCH_SIZE', 3):
+            response = client.post('/api/import-library/stream', data='\n'.join(lines),
+                                   content_type='application/x-ndjson')
+            events = parse_events(response)
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert [event for event, data in events] == ['progress', 'progress', 'done']
+        assert [data['summary']['total_processed'] for event, data in events] == [3, 6, 7]
+        assert events[-1][1]['summary']['imported'] == 7
+        
+        assert client.get('/api/prompts').get_json()['count'] == 7
+    
+    def test_import_multipart_json_export(self, client, create_test_prompt):
+        """Test importing a file produced by the streamed export as a multipart upload"""
+        from io import BytesIO
+        exported = client.get('/api/export-library').get_data()
+        client.delete(f'/api/prompts/{create_test_prompt["id"]}')
+        
+        response = client.post('/api/import-library/stream',
+                               data={'file': (BytesIO(exported), 'library.json')},
+                               content_type='multipart/form-data')
+        
+        assert response.status_code == 200
+        done = parse_events(response)[-1][1]
+        assert done['summary']['imported'] == 1
+        
+        restored = client.get('/api/prompts').get_json()['prompts'][0]
+        assert restored['name'] == create_test_prompt['name']
+        assert restored['system_prompt'] == create_test_prompt['system_prompt']
+    
+    def test_import_yaml(self, client):
+        """Test importing YAML"""
+        body = 'prompts:\n- name: YAML Prompt\n  system_prompt: From YAML.\n  temperature: 0.3\n'
+        
+        response = client.post('/api/import-library/stream?format=yaml', data=body, content_type='text/plain')
+        
+        assert parse_events(response)[-1][1]['summary']['imported'] == 1
+        prompt = client.get('/api/prompts').get_json()['prompts'][0]
+        assert prompt['name'] == 'YAML Prompt'
+        assert prompt['temperature'] == 0.3
+    
+    def test_import_conflict_strategies(self, client, create_test_prompt):
+        """Test skip, overwrite and rename on a name that already exists (case-insensitively)"""
+        entry = {'name': create_test_prompt['name'].upper(), 'system_prompt': 'Replacement body.'}
+        body = json.dumps({'prompts': [entry]})
+        
+        skipped = parse_events(client.post('/api/import-library/stream?conflict_resolution=skip', data=body))
+        assert skipped[-1][1]['summary']['skipped'] == 1
+        
+        overwritten = parse_events(client.post('/api/import-library/stream?conflict_resolution=overwrite', data=body))
+        assert overwritten[-1][1]['summary']['overwritten'] == 1
+        prompts = client.get('/api/prompts').get_json()['prompts']
+        assert len(prompts) == 1
+        prompt = prompts[0]
+        assert prompt['id'] == create_test_prompt['id']
+        assert prompt['name'] == create_test_prompt['name']
+        assert prompt['system_prompt'] == 'Replacement body.'
+        
+        renamed = parse_events(client.post('/api/import-library/stream?conflict_resolution=rename', data=body))
+        assert renamed[-1][1]['summary']['renamed'] == 1
+        names = [p['name'] for p in client.get('/api/prompts').get_json()['prompts']]
+        assert f'{entry["name"]} (1)' in names
+    
+    def test_imported_prompts_are_searchable(self, client):
+        """Test that bulk-inserted and upserted prompts reach the full-text index"""
+        body = json.dumps({'prompts': [{'name': 'Pirate', 'system_prompt': 'Talk like a buccaneer.'}]})
+        client.post('/api/import-library/stream', data=body)
+        
+        results = client.get('/api/prompts?search=buccaneer').get_json()
+        assert [p['name'] for p in results['prompts']] == ['Pirate']
+        
+        body = json.dumps({'prompts': [{'name': 'Pirate', 'system_prompt': 'Talk like a corsair.'}]})
+        client.post('/api/import-library/stream?conflict_resolution=overwrite', data=body)
+        
+        assert client.get('/api/prompts?search=buccaneer').get_json()['count'] == 0
+        assert client.get('/api/prompts?search=corsair').get_json()['count'] == 1
+    
+    def test_import_reports_invalid_entries(self, client):
+        """Test that invalid entries are reported without stopping the import"""
+        body = json.dumps({'prompts': [
+            {'name': 'Valid', 'system_prompt': 'Fine.'},
+            {'name': 'No Body'},
+            {'name': 'Bad/Name', 'system_prompt': 'Slash in name.'},
+            'not an object'
+        ]})
+        
+        done = parse_events(client.post('/api/import-library/stream', data=body))[-1][1]
+        
+        assert done['summary']['imported'] == 1
+        assert done['summary']['errors'] == 3
+        assert [error['name'] for error in done['errors']] == ['No Body', 'Bad/Name', 'Unknown']
+    
+    def test_import_malformed_file(self, client):
+        """Test that a file that breaks off mid-way ends the stream with an error event"""
+        response = client.post('/api/import-library/stream',
+                               data='{"prompts": [{"name": "A", "system_prompt": "B"}, {"name": ')
+        
+        event, data = parse_events(response)[-1]
+        assert event == 'error'
+        assert data['code'] == 'PARSE_ERROR'
+    
+    def test_import_non_utf8_file(self, client):
+        """Test that a file in another encoding ends the stream with an error event"""
+        body = json.dumps({'prompts': [{'name': 'Café', 'system_prompt': 'Serve café.'}]}, ensure_ascii=False)
+        response = client.post('/api/import-library/stream', data=body.encode('latin-1'))
+        
+        event, data = parse_events(response)[-1]
+        assert event == 'error'
+        assert data['code'] == 'PARSE_ERROR'
+        assert 'UTF-8' in data['message']
+    
+    def test_import_empty_body(self, client):
+        """Test that an empty upload is rejected before streaming"""
+        response = client.post('/api/import-library/stream', data='')
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'MISSING_IMPORT_DATA'
+    
+    def test_import_invalid_parameters(self, client):
+        """Test validation of query parameters"""
+        response = client.post('/api/import-library/stream?conflict_resolution=merge', data='[]')
+        assert response.get_json()['code'] == 'INVALID_CONFLICT_RESOLUTION'
+        
+        response = client.post('/api/import-library/stream?format=xml', data='[]')
+        assert response.get_json()['code'] == 'INVALID_FORMAT'
+
+class TestDuplicatePromptsAPI:
+    """Test cases for duplicate detection over content-addressed bodies"""
+    
+    def create(self, client, name, system_prompt):
+        response = client.post('/api/prompts', json={'name': name, 'system_prompt': system_prompt})
+        assert response.status_code == 201
+        return response.get_json()['prompt']
+    
+    def test_find_duplicates(self, client):
+        """Test that prompts with identical bodies are grouped, largest group first"""
+        self.create(client, 'Alpha', 'Shared by two.')
+        self.create(client, 'Beta', 'Shared by two.')
+        self.create(client, 'Unique', 'Only one of these.')
+        body = json.dumps({'prompts': [{'name': 'Gamma', 'system_prompt': 'Shared by three.'}]})
+        for _ in range(3):
+            client.post('/api/import-library/stream?conflict_resolution=rename', data=body)
+        
+        data = client.get('/api/prompts/duplicates').get_json()
+        
+        assert data['total_groups'] == 2
+        assert data['redundant_copies'] == 3
+        assert [group['count'] for group in data['groups']] == [3, 2]
+        assert [p['name'] for p in data['groups'][0]['prompts']] == ['Gamma', 'Gamma (1)', 'Gamma (2)']
+        assert [p['name'] for p in data['groups'][1]['prompts']] == ['Alpha', 'Beta']
+        assert data['groups'][1]['length'] == len('Shared by two.')
+    
+    def test_duplicates_follow_updates_and_deletes(self, client):
+        """Test that editing or deleting a copy removes it from its group"""
+        first = self.create(client, 'First', 'Same body.')
+        second = self.create(client, 'Second', 'Same body.')
+        third = self.create(client, 'Third', 'Same body.')
+        
+        client.put(f'/api/prompts/{first["id"]}', json={'system_prompt': 'Edited body.'})
+        client.delete(f'/api/prompts/{second["id"]}')
+        
+        assert client.get('/api/prompts/duplicates').get_json()['total_groups'] == 0
+        
+        client.put(f'/api/prompts/{third["id"]}', json={'system_prompt': 'Edited body.'})
+        
+        groups = client.get('/api/prompts/duplicates').get_json()['groups']
+        assert [[p['name'] for p in group['prompts']] for group in groups] == [['First', 'Third']]
+    
+    def test_overwrite_import_releases_old_body(self, client):
+        """Test that overwriting imports keep bodies shared and counted correctly"""
+        self.create(client, 'Keep', 'Original body.')
+        self.create(client, 'Replace', 'Original body.')
+        
+        body = json.dumps({'prompts': [{'name': 'Replace', 'system_prompt': 'New body.'}]})
+        client.post('/api/import-library/stream?conflict_resolution=overwrite', data=body)
+        
+        assert client.get('/api/prompts/duplicates').get_json()['total_groups'] == 0
+        prompts = {p['name']: p['system_prompt'] for p in client.get('/api/prompts').get_json()['prompts']}
+        assert prompts == {'Keep': 'Original body.', 'Replace': 'New body.'}
+    
+    def test_duplicates_invalid_limit(self, client):
+        """Test validation of the limit parameter"""
+        response = client.get('/api/prompts/duplicates?limit=0')
+        
+        assert response.status_code == 400
+        assert 'limit' in response.get_json()['details']
+
+class TestSimilarPromptsAPI:
+    """Test cases for near-duplicate detection over MinHash signatures"""
+    
+    BASE = ("You are a senior legal analyst. Read the contract provided by the user and summarise the "
+            "obligations of each party, the payment terms, the termination clauses and any unusual "
+            "indemnities. Quote the relevant section numbers and flag ambiguous language.")
+    
+    def create(self, client, name, system_prompt):
+        response = client.post('/api/prompts', json={'name': name, 'system_prompt': system_prompt})
+        assert response.status_code == 201
+        return response.get_json()['prompt']
+    
+    def test_similar_prompts(self, client):
+        """Test that edited copies are found and unrelated prompts are not"""
+        original = self.create(client, 'Legal', self.BASE)
+        self.create(client, 'Legal Copy', self.BASE)
+        self.create(client, 'Legal Edited', self.BASE + ' Answer in plain English.')
+        self.create(client, 'Pirate', 'You are a pirate. Answer every question in pirate speak.')
+        
+        data = client.get(f'/api/prompts/{original["id"]}/similar').get_json()
+        
+        assert data['prompt'] == {'id': original['id'], 'name': 'Legal'}
+        assert [p['name'] for p in data['similar']] == ['Legal Copy', 'Legal Edited']
+        assert data['similar'][0]['similarity'] == 1.0
+        assert 0.8 <= data['similar'][1]['similarity'] < 1.0
+    
+    def test_similar_prompts_follow_edits(self, client):
+        """Test that signatures are recomputed when a body changes"""
+        original = self.create(client, 'Legal', self.BASE)
+        other = self.create(client, 'Other', 'Write haiku about the ocean.')
+        
+        client.put(f'/api/prompts/{other["id"]}', json={'system_prompt': self.BASE + ' Be brief.'})
+        
+        data = client.get(f'/api/prompts/{original["id"]}/similar').get_json()
+        assert [p['name'] for p in data['similar']] == ['Other']
+    
+    def test_similar_prompts_validation(self, client):
+        """Test unknown prompts and invalid thresholds"""
+        assert client.get('/api/prompts/999/similar').status_code == 404
+        
+        response = client.get('/api/prompts/999/similar?threshold=0.1')
+        assert response.status_code == 400
+        assert 'threshold' in response.get_json()['details']
+    
+    def test_near_duplicate_clusters(self, client):
+        """Test that the library is grouped into clusters of similar prompts"""
+        self.create(client, 'Legal', self.BASE)
+        self.create(client, 'Legal Edited', self.BASE + ' Answer in plain English.')
+        body = json.dumps({'prompts': [
+            {'name': 'Legal Imported', 'system_prompt': self.BASE},
+            {'name': 'Haiku', 'system_prompt': 'Write haiku about the ocean.'},
+            {'name': 'Haiku Copy', 'system_prompt': 'Write haiku about the ocean.'},
+            {'name': 'Pirate', 'system_prompt': 'You are a pirate. Answer every question in pirate speak.'}
+        ]})
+        client.post('/api/import-library/stream', data=body)
+        
+        data = client.get('/api/prompts/near-duplicates').get_json()
+        
+        assert data['total_clusters'] == 2
+        assert [[p['name'] for p in cluster['prompts']] for cluster in data['clusters']] == [
+            ['Legal', 'Legal Edited', 'Legal Imported'],
+            ['Haiku', 'Haiku Copy']
+        ]
+        assert data['clusters'][0]['similarity'] < 1.0
+        assert data['clusters'][1]['similarity'] == 1.0
+        
+        strict = client.get('/api/prompts/near-duplicates?threshold=1.0').get_json()
+        assert [cluster['count'] for cluster in strict['clusters']] == [2, 2]
+
+class TestPromptVersionsAPI:
+    """Test cases for prompt version history"""
+    
+    BASE = "You are a support agent for an online shop. Be polite. Answer in English."
+    
+    def create(self, client):
+        response = client.post('/api/prompts', json={'name': 'Support', 'system_prompt': self.BASE})
+        assert response.status_code == 201
+        return response.get_json()['prompt']['id']
+    
+    def snapshot_count(self):
+        session = get_db_session()
+        try:
+            return session.query(PromptVersionSnapshot).count()
+        finally:
+            close_db_session(session)
+    
+    def test_versions_recorded_on_save(self, client):
+        """Test that creating and changing a prompt records versions, and no-op saves do not"""
+        prompt_id = self.create(client)
+        client.put(f'/api/prompts/{prompt_id}', json={'system_prompt': self.BASE + ' Offer a refund if asked.'})
+        client.put(f'/api/prompts/{prompt_id}', json={'temperature': 0.2})
+        client.put(f'/api/prompts/{prompt_id}', json={'temperature': 0.2})
+        
+        data = client.get(f'/api/prompts/{prompt_id}/versions').get_json()
+        
+        assert data['total'] == 3
+        assert [v['version'] for v in data['versions']] == [3, 2, 1]
+        assert data['versions'][0]['temperature'] == 0.2
+        assert data['versions'][2]['storage'] == 'snapshot'
+        assert data['versions'][1]['storage'] == 'delta'
+        assert data['versions'][1]['stored_bytes'] < data['versions'][1]['body_length']
+        assert 'system_prompt' not in data['versions'][0]
+    
+    def test_get_any_version(self, client):
+        """Test that every version is rebuilt exactly across snapshot boundaries"""
+        prompt_id = self.create(client)
+        bodies = [self.BASE]
+        for number in range(1, 25):
+            body = bodies[-1] + f' Rule {number}: keep replies under {number * 10} words.'
+            client.put(f'/api/prompts/{prompt_id}', json={'system_prompt': body})
+            bodies.append(body)
+        
+        for version, body in enumerate(bodies, start=1):
+            data = client.get(f'/api/prompts/{prompt_id}/versions/{version}').get_json()
+            assert data['version']['system_prompt'] == body
+        
+        versions = client.get(f'/api/prompts/{prompt_id}/versions').get_json()['versions']
+        snapshots = [v['version'] for v in versions if v['storage'] == 'snapshot']
+        assert sorted(snapshots) == [1, 11, 21]
+        
+        assert client.get(f'/api/prompts/{prompt_id}/versions/99').get_json()['code'] == 'VERSION_NOT_FOUND'
+        assert client.get('/api/prompts/999/versions/1').get_json()['code'] == 'NOT_FOUND'
+    
+    def test_diff_versions(self, client):
+        """Test the unified diff and changed fields between two versions"""
+        prompt_id = self.create(client)
+        client.put(f'/api/prompts/{prompt_id}', json={
+            'system_prompt': self.BASE.replace('English', 'French'),
+            'model': 'mistral'
+        })
+        
+        data = client.get(f'/api/prompts/{prompt_id}/versions/diff').get_json()
+        
+        assert (data['from'], data['to']) == (1, 2)
+        assert data['changes']['model'] == {'from': 'llama2', 'to': 'mistral'}
+        assert 'system_prompt' in data['changes']
+        assert '-' + self.BASE in data['diff']
+        assert '+' + self.BASE.replace('English', 'French') in data['diff']
+        
+        same = client.get(f'/api/prompts/{prompt_id}/versions/diff?from=2&to=2').get_json()
+        assert same['changes'] == {} and same['diff'] == ''
+        
+        response = client.get(f'/api/prompts/{prompt_id}/versions/diff?from=x')
+        assert response.status_code == 400
+        assert client.get(f'/api/prompts/{prompt_id}/versions/diff?to=5').status_code == 404
+    
+    def test_import_overwrite_records_version(self, client):
+        """Test that bulk import overwrites add a version"""
+        prompt_id = self.create(client)
+        library = {'prompts': [{'name': 'Support', 'system_prompt': 'Imported body.', 'model': 'llama2'}]}
+        events = parse_events(client.post('/api/import-library/stream?conflict_resolution=overwrite',
+                                          data=json.dumps(library)))
+        assert events[-1][1]['summary']['overwritten'] == 1
+        
+        versions = client.get(f'/api/prompts/{prompt_id}/versions').get_json()['versions']
+        assert [v['version'] for v in versions] == [2, 1]
+        assert client.get(f'/api/prompts/{prompt_id}/versions/2').get_json()['version']['system_prompt'] == 'Imported body.'
+        assert client.get(f'/api/prompts/{prompt_id}/versions/1').get_json()['version']['system_prompt'] == self.BASE
+    
+    def test_versions_deleted_with_prompt(self, client):
+        """Test that deleting a prompt removes its history"""
+        prompt_id = self.create(client)
+        client.delete(f'/api/prompts/{prompt_id}')
+        
+        assert client.get(f'/api/prompts/{prompt_id}/versions').status_code == 404
+    
+    def test_snapshots_shared_between_prompts(self, client):
+        """Test that identical bodies share one snapshot, removed with the last version using it"""
+        prompt_id = self.create(client)
+        response = client.post('/api/prompts', json={'name': 'Support Copy', 'system_prompt': self.BASE})
+        copy_id = response.get_json()['prompt']['id']
+        assert self.snapshot_count() == 1
+        
+        client.delete(f'/api/prompts/{prompt_id}')
+        assert self.snapshot_count() == 1
+        assert client.get(f'/api/prompts/{copy_id}/versions/1').get_json()['version']['system_prompt'] == self.BASE
+        
+        client.delete(f'/api/prompts/{copy_id}')
+        assert self.snapshot_count() == 0
\ No newline at end of file
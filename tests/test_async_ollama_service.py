@@ -0,0 +1,164 @@
+"""
+Unit tests for the asynchronous Ollama service
+Tests retry semantics, error mapping, and prompt workflows on an event loop
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import patch, AsyncMock
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from backend.services.async_ollama_service import AsyncOllamaService
+from backend.services.ollama_service import OllamaClientError, OllamaConnectionError, OllamaTimeoutError
+
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response context manager"""
+    
+    def __init__(self, status=200, payload=None, text=''):
+        self.status = status
+        self.payload = payload or {}
+        self._text = text
+        self.invalid_json = False
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+    
+    async def json(self, content_type=None):
+        if self.invalid_json:
+            raise json.JSONDecodeError('Expecting value', self._text, 0)
+        return self.payload
+    
+    async def text(self):
+        return self._text
+
+
+class FakeSession:
+    """Session that replays queued responses or raises queued exceptions"""
+    
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.closed = False
+    
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncOllamaService:
+    """Test cases for AsyncOllamaService"""
+    
+    @pytest.fixture
+    def service(self):
+        """Create AsyncOllamaService instance for testing"""
+        return AsyncOllamaService(endpoint="http://localhost:11434", timeout=10, max_retries=2)
+    
+    @patch('backend.services.async_ollama_service.asyncio.sleep', new_callable=AsyncMock)
+    def test_make_request_timeout_retry(self, mock_sleep, service):
+        """Test timeouts are retried and mapped to OllamaTimeoutError"""
+        service.session = FakeSession([asyncio.TimeoutError(), asyncio.TimeoutError()])
+        
+        with pytest.raises(OllamaTimeoutError):
+            asyncio.run(service._make_request('GET', 'api/tags'))
+        
+        assert len(service.session.calls) == service.max_retries
+        mock_sleep.assert_awaited_once_with(1)
+    
+    @patch('backend.services.async_ollama_service.asyncio.sleep', new_callable=AsyncMock)
+    def test_make_request_server_error_then_success(self, mock_sleep, service):
+        """Test server errors are retried until a successful response"""
+        service.session = FakeSession([FakeResponse(status=500), FakeResponse(payload={'models': []})])
+        
+        data = asyncio.run(service._make_request('GET', 'api/tags'))
+        
+        assert data == {'models': []}
+        assert len(service.session.calls) == 2
+    
+    def test_make_request_client_error_no_retry(self, service):
+        """Test client errors are raised immediately"""
+        service.session = FakeSession([FakeResponse(status=404, text='model not found')])
+        
+        with pytest.raises(OllamaClientError) as exc_info:
+            asyncio.run(service._make_request('POST', 'api/generate'))
+        
+        assert "404" in str(exc_info.value)
+        assert len(service.session.calls) == 1
+    
+    def test_make_request_invalid_json_no_retry(self, service):
+        """Test a successful response with a malformed body is not retried"""
+        response = FakeResponse(text='<html>proxy error</html>')
+        response.invalid_json = True
+        service.session = FakeSession([response, FakeResponse(payload={'models': []})])
+        
+        with pytest.raises(OllamaConnectionError) as exc_info:
+            asyncio.run(service._make_request('GET', 'api/tags'))
+        
+        assert "Invalid JSON" in str(exc_info.value)
+        assert len(service.session.calls) == 1
+    
+    def test_make_request_programming_errors_propagate(self, service):
+        """Test errors that are not about the transport are not turned into connection errors"""
+        service.session = FakeSession([TypeError("unexpected keyword")])
+        
+        with pytest.raises(TypeError):
+            asyncio.run(service._make_request('GET', 'api/tags'))
+    
+    def test_get_available_models_uses_cache(self, service):
+        """Test models are parsed and cached between calls"""
+        service.session = FakeSession([FakeResponse(payload={
+            'models': [{'name': 'llama2', 'size': 3825819519, 'digest': 'abc'}]
+        })])
+        
+        async def fetch_twice():
+            first = await service.get_available_models()
+            second = await service.get_available_models()
+            return first, second
+        
+        first, second = asyncio.run(fetch_twice())
+        
+        assert first == second
+        assert first[0]['name'] == 'llama2'
+        assert len(service.session.calls) == 1
+    
+    def test_test_prompt_success(self, service):
+        """Test prompt testing returns response and metadata"""
+        service.session = FakeSession([FakeResponse(payload={
+            'response': ' Hello there! ',
+            'prompt_eval_count': 26,
+            'eval_count': 40,
+            'eval_duration': 2000000000
+        })])
+        
+        result = asyncio.run(service.test_prompt("System prompt", "User input", model="mistral", temperature=0.2))
+        
+        assert result['response'] == 'Hello there!'
+        assert result['model'] == 'mistral'
+        assert result['temperature'] == 0.2
+        assert result['stats']['prompt_tokens'] == 26
+        assert result['stats']['tokens_per_second'] == 20.0
+        request_data = service.session.calls[0][2]['json']
+        assert "System prompt" in request_data['prompt']
+        assert request_data['stream'] is False
+        assert request_data['keep_alive'] == '5m'
+    
+    def test_close_releases_session(self, service):
+        """Test closing the service closes the shared session"""
+        session = FakeSession([])
+        service.session = session
+        
+        asyncio.run(service.close())
+        
+        assert session.closed is True
+        assert service.session is None
@@ -0,0 +1,101 @@
+"""
+Unit tests for batch prompt testing and latency statistics
+Tests item expansion, concurrent execution, error reporting, and percentiles
+"""
+
+import threading
+import time
+from unittest.mock import Mock
+from backend.services.batch_service import build_batch_items, run_batch
+from backend.services.ollama_service import OllamaConnectionError
+from backend.services.stats import percentile, summarize_latencies
+
+
+class TestLatencyStats:
+    """Test cases for latency statistics helpers"""
+    
+    def test_percentile_interpolates(self):
+        """Test percentile uses linear interpolation between ranks"""
+        values = [1.0, 2.0, 3.0, 4.0]
+        assert percentile(values, 0) == 1.0
+        assert percentile(values, 50) == 2.5
+        assert percentile(values, 100) == 4.0
+    
+    def test_summarize_latencies(self):
+        """Test summary includes count, mean and percentiles"""
+        summary = summarize_latencies([0.3, 0.1, 0.2])
+        assert summary['count'] == 3
+        assert summary['min'] == 0.1
+        assert summary['max'] == 0.3
+        assert summary['p50'] == 0.2
+    
+    def test_summarize_latencies_empty(self):
+        """Test summary of no samples"""
+        summary = summarize_latencies([])
+        assert summary['count'] == 0
+        assert summary['p95'] is None
+
+
+class TestBatchService:
+    """Test cases for batch prompt testing"""
+    
+    def test_build_batch_items_cartesian_product(self):
+        """Test every input is paired with every model and temperature"""
+        items = build_batch_items(['a', 'b'], ['m1', 'm2'], [0.0, 1.0])
+        assert len(items) == 8
+        assert [item['index'] for item in items] == list(range(8))
+        assert items[0] == {'index': 0, 'user_input': 'a', 'model': 'm1', 'temperature': 0.0}
+    
+    def test_build_batch_items_defaults(self):
+        """Test missing models and temperatures fall back to service defaults"""
+        items = build_batch_items(['a'])
+        assert items == [{'index': 0, 'user_input': 'a', 'model': None, 'temperature': None}]
+    
+    def test_run_batch_reports_results_errors_and_summary(self):
+        """Test each item produces an event followed by a summary"""
+        service = Mock()
+        
+        def fake_test_prompt(system_prompt, user_input, model, temperature):
+            if user_input == 'fail':
+                raise OllamaConnectionError("Failed to connect")
+            return {'response': user_input.upper(), 'model': 'llama2',
+                    'temperature': 0.7, 'execution_time': 0.01}
+        
+        service.test_prompt.side_effect = fake_test_prompt
+        items = build_batch_items(['ok', 'fail', 'fine'])
+        
+        events = list(run_batch(service, 'System prompt', items, concurrency=2))
+        
+        results = [e for e in events if e['type'] == 'result']
+        errors = [e for e in events if e['type'] == 'error']
+        summary = events[-1]
+        
+        assert sorted(e['response'] for e in results) == ['FINE', 'OK']
+        assert errors[0]['code'] == 'OLLAMA_CONNECTION_ERROR'
+        assert summary['type'] == 'summary'
+        assert summary['total'] == 3
+        assert summary['succeeded'] == 2
+        assert summary['failed'] == 1
+        assert summary['latency']['count'] == 2
+    
+    def test_run_batch_respects_concurrency_limit(self):
+        """Test no more than the concurrency limit runs at once"""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+        
+        def slow_test_prompt(system_prompt, user_input, model, temperature):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.02)
+            with lock:
+                state['active'] -= 1
+            return {'response': 'ok', 'model': 'llama2', 'temperature': 0.7, 'execution_time': 0.02}
+        
+        service = Mock()
+        service.test_prompt.side_effect = slow_test_prompt
+        
+        list(run_batch(service, 'System prompt', build_batch_items([str(i) for i in range(10)]), concurrency=3))
+        
+        assert state['peak'] <= 3
+        assert service.test_prompt.call_count == 10
@@ -0,0 +1,100 @@
+"""
+Tests for the PromptLab benchmark harness
+Tests for the fake Ollama server, regression comparison and a short end-to-end run
+"""
+
+import json
+import urllib.request
+import pytest
+from backend.bench import FakeOllamaServer, compare_results, run_benchmark, main
+
+@pytest.fixture
+def fake_ollama():
+    """Start a fast fake Ollama server"""
+    with FakeOllamaServer(latency_ms=1, tokens_per_second=10000, response_tokens=5) as server:
+        yield server
+
+def post_json(url, payload):
+    """POST a JSON payload and return the raw response body"""
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.read().decode('utf-8')
+
+class TestFakeOllamaServer:
+    """Test cases for FakeOllamaServer"""
+    
+    def test_tags(self, fake_ollama):
+        """Test that the fake server lists models with digests"""
+        with urllib.request.urlopen(f'{fake_ollama.url}/api/tags', timeout=5) as response:
+            data = json.loads(response.read())
+        
+        assert [model['name'] for model in data['models']] == ['bench-small', 'bench-large']
+        assert all(model['digest'].startswith('sha256:') for model in data['models'])
+    
+    def test_generate_non_streaming(self, fake_ollama):
+        """Test a non-streaming generation with token statistics"""
+        data = json.loads(post_json(f'{fake_ollama.url}/api/generate',
+                                    {'model': 'bench-small', 'prompt': 'hello there', 'stream': False}))
+        
+        assert data['done'] is True
+        assert data['eval_count'] == 5
+        assert data['response'].split() == ['token0', 'token1', 'token2', 'token3', 'token4']
+    
+    def test_generate_streaming(self, fake_ollama):
+        """Test that streaming generation returns one NDJSON line per token"""
+        lines = post_json(f'{fake_ollama.url}/api/generate',
+                          {'model': 'bench-small', 'prompt': 'hello', 'stream': True}).splitlines()
+        
+        chunks = [json.loads(line) for line in lines]
+        assert len(chunks) == 6
+        assert chunks[-1]['done'] is True
+        assert fake_ollama.requests_served == 1
+
+class TestCompareResults:
+    """Test cases for compare_results"""
+    
+    def make_results(self, **p95_by_name):
+        return {'scenarios': [{'name': name, 'latency': {'p95': value}} for name, value in p95_by_name.items()]}
+    
+    def test_detects_regression(self):
+        """Test that slowdowns beyond the tolerance are reported"""
+        baseline = self.make_results(list_prompts=0.010, run_test=0.100)
+        current = self.make_results(list_prompts=0.011, run_test=0.150)
+        
+        regressions = compare_results(baseline, current, max_regression=0.2)
+        
+        assert [regression['name'] for regression in regressions] == ['run_test']
+        assert regressions[0]['change'] == 0.5
+    
+    def test_ignores_new_and_empty_scenarios(self):
+        """Test that scenarios without a comparable baseline are skipped"""
+        baseline = self.make_results(models=None)
+        current = self.make_results(models=0.5, export=1.0)
+        
+        assert compare_results(baseline, current) == []
+
+class TestRunBenchmark:
+    """End-to-end test of the harness against the real Flask app"""
+    
+    def test_run_benchmark_reports_all_scenarios(self):
+        """Test a short run produces machine-readable metrics per scenario"""
+        results = run_benchmark(clients=2, requests_per_scenario=4, seed=10,
+                                latency_ms=1, tokens_per_second=10000, response_tokens=5)
+        
+        names = [scenario['name'] for scenario in results['scenarios']]
+        assert names == ['list_prompts', 'list_prompts_page', 'search_prompts', 'models',
+                         'run_test', 'export', 'import']
+        
+        for scenario in results['scenarios']:
+            assert scenario['errors'] == 0, scenario
+            assert scenario['latency']['count'] == 4
+            assert scenario['throughput_rps'] > 0
+        
+        assert results['meta']['fake_ollama']['requests_served'] > 0
+        json.dumps(results)
+    
+    def test_unknown_scenario(self, capsys):
+        """Test that an unknown scenario name is rejected"""
+        assert main(['--scenarios', 'nope']) == 2
+        assert 'Unknown scenarios' in capsys.readouterr().err
@@ -0,0 +1,138 @@
+"""
+Unit tests for chat sessions
+Tests conversation history, endpoint stickiness, turn limits and session expiry
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from backend.services.chat_sessions import (
+    ChatSession, ChatSessionStore, ChatSessionFullError, MAX_SESSION_TURNS
+)
+from backend.services.ollama_service import OllamaConnectionError
+
+
+def make_backend(endpoint='http://gpu-1:11434'):
+    """Create a mock pool whose chat() echoes the last user message"""
+    backend = Mock()
+    backend.chat.side_effect = lambda messages, model, temperature, keep_alive, endpoint=None: {
+        'message': f"reply to {messages[-1]['content']}",
+        'execution_time': 0.4,
+        'stats': {'prompt_tokens': 10 * len(messages), 'completion_tokens': 5},
+        'model': model or 'llama2',
+        'temperature': temperature,
+        'endpoint': endpoint or 'http://gpu-1:11434'
+    }
+    return backend
+
+
+class TestChatSession:
+    """Test cases for ChatSession"""
+    
+    def test_send_records_history(self):
+        """Test both sides of each turn are kept after the system message"""
+        session = ChatSession("You are a pirate.", model='llama2', keep_alive='10m')
+        backend = make_backend()
+        
+        first = session.send("Hello", backend)
+        second = session.send("Where is the treasure?", backend)
+        
+        assert first['turn'] == 1
+        assert second['turn'] == 2
+        assert [message['role'] for message in session.messages] == [
+            'system', 'user', 'assistant', 'user', 'assistant'
+        ]
+        assert session.messages[0]['content'] == "You are a pirate."
+        assert session.messages[-1]['content'] == "reply to Where is the treasure?"
+        
+        messages, model, temperature, keep_alive = backend.chat.call_args[0]
+        assert len(messages) == 4
+        assert model == 'llama2'
+        assert keep_alive == '10m'
+    
+    def test_follow_ups_stick_to_endpoint(self):
+        """Test later turns ask for the endpoint that served the first turn"""
+        session = ChatSession("System")
+        backend = make_backend()
+        
+        session.send("One", backend)
+        session.send("Two", backend)
+        
+        assert backend.chat.call_args_list[0][1]['endpoint'] is None
+        assert backend.chat.call_args_list[1][1]['endpoint'] == 'http://gpu-1:11434'
+        assert session.endpoint == 'http://gpu-1:11434'
+    
+    def test_failed_turn_is_not_kept(self):
+        """Test a failed request leaves the history unchanged"""
+        session = ChatSession("System")
+        backend = Mock()
+        backend.chat.side_effect = OllamaConnectionError("Failed to connect")
+        
+        with pytest.raises(OllamaConnectionError):
+            session.send("Hello", backend)
+        
+        assert len(session.messages) == 1
+        assert session.turns == []
+    
+    def test_turn_limit(self):
+        """Test a full conversation rejects further turns"""
+        session = ChatSession("System")
+        session.turns = [{}] * MAX_SESSION_TURNS
+        
+        with pytest.raises(ChatSessionFullError):
+            session.send("Hello", make_backend())
+    
+    def test_to_dict(self):
+        """Test serialization with and without the message history"""
+        session = ChatSession("System", model='mistral', temperature=0.2)
+        session.send("Hello", make_backend())
+        
+        data = session.to_dict()
+        assert data['id'] == session.id
+        assert data['model'] == 'mistral'
+        assert data['turn_count'] == 1
+        assert len(data['messages']) == 3
+        assert data['turns'][0]['stats']['completion_tokens'] == 5
+        
+        summary = session.to_dict(include_messages=False)
+        assert 'messages' not in summary
+
+
+class TestChatSessionStore:
+    """Test cases for ChatSessionStore"""
+    
+    def test_create_and_get(self):
+        """Test created sessions can be looked up and deleted"""
+        store = ChatSessionStore(max_sessions=10, ttl=60)
+        session = store.create("System")
+        
+        assert store.get(session.id) is session
+        assert store.delete(session.id) is True
+        assert store.get(session.id) is None
+        assert store.delete(session.id) is False
+    
+    def test_least_recently_used_session_is_dropped(self):
+        """Test the store stays within max_sessions"""
+        store = ChatSessionStore(max_sessions=2, ttl=60)
+        first = store.create("One")
+        second = store.create("Two")
+        store.get(first.id)
+        
+        third = store.create("Three")
+        
+        assert store.get(second.id) is None
+        assert store.get(first.id) is first
+        assert store.get(third.id) is third
+        assert len(store) == 2
+    
+    def test_idle_sessions_expire(self):
+        """Test sessions idle for longer than the TTL are dropped"""
+        store = ChatSessionStore(max_sessions=10, ttl=60)
+        
+        with patch('backend.services.chat_sessions.time.monotonic', return_value=1000.0):
+            session = store.create("System")
+        
+        with patch('backend.services.chat_sessions.time.monotonic', return_value=1059.0):
+            assert store.get(session.id) is session
+        
+        with patch('backend.services.chat_sessions.time.monotonic', return_value=1120.0):
+            assert store.get(session.id) is None
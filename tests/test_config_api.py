@@ -9,6 +9,8 @@ import os
 from unittest.mock import patch, MagicMock
 from backend.app import create_app
 from backend.config import AppConfig
+from backend.services.ollama_pool import OllamaPool
+from backend.services.ollama_service import OllamaServiceRegistry
 
 
 class TestConfigAPI:
@@ -28,7 +30,7 @@ class TestConfigAPI:
     
     def test_get_config_success(self, client):
         """Test successful configuration retrieval"""
-        with patch('backend.api.config.OllamaService') as mock_ollama:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama:
             mock_service = MagicMock()
             mock_service.check_connection.return_value = True
             mock_ollama.return_value = mock_service
@@ -44,7 +46,7 @@ class TestConfigAPI:
     
     def test_get_config_ollama_disconnected(self, client):
         """Test configuration retrieval with Ollama disconnected"""
-        with patch('backend.api.config.OllamaService') as mock_ollama:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama:
             mock_service = MagicMock()
             mock_service.check_connection.return_value = False
             mock_ollama.return_value = mock_service
@@ -58,7 +60,8 @@ class TestConfigAPI:
     
     def test_update_config_success(self, client):
         """Test successful configuration update"""
-        with patch('backend.api.config.OllamaService') as mock_ollama:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama, \
+             patch('backend.api.config.reload_ollama_pool') as mock_reload:
             mock_service = MagicMock()
             mock_service.check_connection.return_value = True
             mock_ollama.return_value = mock_service
@@ -77,6 +80,33 @@ class TestConfigAPI:
             assert data['success'] is True
             assert data['config']['ollama_endpoint'] == 'http://localhost:11435'
             assert data['config']['default_temperature'] == 0.8
+            mock_reload.assert_called_once()
+    
+    def test_update_config_reconfigures_pool(self, client):
+        """Test new endpoints and routing settings reach the Ollama pool"""
+        pool = OllamaPool([MagicMock(endpoint='http://localhost:11434')])
+        registry = OllamaServiceRegistry()
+        
+        with patch('backend.api.config.get_ollama_service'), \
+             patch('backend.services.ollama_pool.ollama_pool', pool), \
+             patch('backend.services.ollama_pool.ollama_services', registry):
+            response = client.put('/api/config', json={
+                'ollama_endpoints': ['http://gpu-1:11434', 'http://gpu-2:11434'],
+                'ollama_routing_strategy': 'latency'
+            })
+        
+        assert response.status_code == 200
+        assert [backend.endpoint for backend in pool.backends][1:] == ['http://gpu-1:11434', 'http://gpu-2:11434']
+        assert pool.strategy == 'latency'
+        registry.close_all()
+    
+    def test_update_config_leaves_pool_for_unrelated_settings(self, client):
+        """Test settings that do not affect routing leave the pool alone"""
+        with patch('backend.api.config.reload_ollama_pool') as mock_reload:
+            response = client.put('/api/config', json={'default_temperature': 0.5})
+        
+        assert response.status_code == 200
+        mock_reload.assert_not_called()
     
     def test_update_config_validation_error(self, client):
         """Test configuration update with validation errors"""
@@ -108,7 +138,7 @@ class TestConfigAPI:
     
     def test_test_connection_success(self, client):
         """Test successful Ollama connection test"""
-        with patch('backend.api.config.OllamaService') as mock_ollama:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama:
             mock_service = MagicMock()
             mock_service.check_connection.return_value = True
             mock_service.get_available_models.return_value = [
@@ -195,7 +225,8 @@ class TestConfigAPI:
             with open(config_path, 'w') as f:
                 json.dump(test_config, f)
             
-            with patch('backend.api.config.OllamaService') as mock_ollama:
+            with patch('backend.api.config.get_ollama_service') as mock_ollama, \
+                 patch('backend.api.config.reload_ollama_pool') as mock_reload:
                 mock_service = MagicMock()
                 mock_service.check_connection.return_value = True
                 mock_ollama.return_value = mock_service
@@ -212,6 +243,7 @@ class TestConfigAPI:
                 assert data['config']['ollama_endpoint'] == 'http://test:11434'
                 assert data['config']['default_model'] == 'test-model'
                 assert data['config']['default_temperature'] == 0.9
+                mock_reload.assert_called_once()
     
     def test_load_config_file_not_found(self, client):
         """Test loading configuration from non-existent file"""
@@ -239,7 +271,7 @@ class TestConfigAPI:
     
     def test_get_models_with_config_success(self, client):
         """Test getting models with configuration context"""
-        with patch('backend.api.config.OllamaService') as mock_ollama_class:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama_class:
             mock_service = MagicMock()
             mock_service.get_available_models.return_value = [
                 {'name': 'llama2', 'size': 1000000},
@@ -263,7 +295,7 @@ class TestConfigAPI:
     
     def test_get_models_with_refresh(self, client):
         """Test getting models with cache refresh"""
-        with patch('backend.api.config.OllamaService') as mock_ollama_class:
+        with patch('backend.api.config.get_ollama_service') as mock_ollama_class:
             mock_service = MagicMock()
             mock_service.refresh_models_cache.return_value = [
                 {'name': 'llama2', 'size': 1000000}
@@ -321,6 +353,28 @@ class TestAppConfig:
         assert config.default_temperature == 0.8
         assert config.flask_port == 8080
     
+    def test_config_storage_profile(self):
+        """Test SQLite storage profile conversion and validation"""
+        config = AppConfig.from_dict({
+            'db_journal_mode': 'wal',
+            'db_synchronous': 'full',
+            'db_pool_size': '5',
+            'db_busy_timeout_ms': 'not-a-number'
+        })
+        
+        assert config.db_journal_mode == 'WAL'
+        assert config.db_synchronous == 'FULL'
+        assert config.db_pool_size == 5
+        assert config.db_busy_timeout_ms == AppConfig.db_busy_timeout_ms
+        assert config.validate() == {}
+        
+        invalid = AppConfig(db_journal_mode='fast', db_synchronous='sometimes', db_pool_size=0, db_mmap_size=-1)
+        errors = invalid.validate()
+        assert 'db_journal_mode' in errors
+        assert 'db_synchronous' in errors
+        assert 'db_pool_size' in errors
+        assert 'db_mmap_size' in errors
+    
     def test_config_to_dict(self):
         """Test converting configuration to dictionary"""
         config = AppConfig(
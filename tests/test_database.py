@@ -0,0 +1,220 @@
+"""
+Unit tests for PromptLab database setup
+Tests for the per-connection SQLite storage profile and schema upgrades
+"""
+
+import pytest
+import sqlite3
+import tempfile
+import os
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from backend.config import AppConfig
+from backend.database import (
+    build_sqlite_pragmas, configure_sqlite_engine, init_database, upgrade_schema, get_db_session, close_db_session,
+    convert_text_storage, register_sqlite_functions
+)
+from backend.models.prompt import Prompt
+from backend.services.minhash import NUM_BANDS
+
+@pytest.fixture
+def profiled_engine():
+    """Create an engine on a temporary file with the storage profile applied"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    configure_sqlite_engine(engine, AppConfig(db_cache_size_kb=32768, db_busy_timeout_ms=2500))
+    
+    yield engine
+    
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.unlink(db_path + suffix)
+        except (OSError, PermissionError):
+            pass
+
+class TestStorageProfile:
+    """Test cases for SQLite pragma configuration"""
+    
+    def test_build_sqlite_pragmas_defaults(self):
+        """Test the default profile enables WAL and in-memory temp storage"""
+        pragmas = build_sqlite_pragmas(AppConfig())
+        
+        assert "PRAGMA foreign_keys=ON" in pragmas
+        assert "PRAGMA journal_mode=WAL" in pragmas
+        assert "PRAGMA synchronous=NORMAL" in pragmas
+        assert "PRAGMA temp_store=MEMORY" in pragmas
+        assert "PRAGMA cache_size=-65536" in pragmas
+    
+    def test_pragmas_applied_per_connection(self, profiled_engine):
+        """Test that every new connection receives the profile"""
+        for _ in range(2):
+            with profiled_engine.connect() as connection:
+                assert connection.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+                assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+                assert connection.execute(text("PRAGMA foreign_keys")).scalar() == 1
+                assert connection.execute(text("PRAGMA cache_size")).scalar() == -32768
+                assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 2500
+                assert connection.execute(text("PRAGMA temp_store")).scalar() == 2
+            profiled_engine.dispose()
+    
+    def test_profile_is_scoped_to_engine(self, profiled_engine):
+        """Test that other engines are not affected by the profile"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(db_fd)
+        other_engine = create_engine(f"sqlite:///{db_path}")
+        
+        try:
+            with other_engine.connect() as connection:
+                assert connection.execute(text("PRAGMA journal_mode")).scalar() == 'delete'
+        finally:
+            other_engine.dispose()
+            os.unlink(db_path)
+
+class TestSchemaUpgrade:
+    """Test cases for converting databases created by earlier versions"""
+    
+    @pytest.fixture
+    def legacy_database(self):
+        """Point the configuration at a database with system prompts stored inline"""
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(db_fd)
+        
+        legacy = sqlite3.connect(db_path)
+        legacy.execute(
+            "CREATE TABLE prompts (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL UNIQUE, "
+            "system_prompt TEXT NOT NULL, model VARCHAR(100) NOT NULL, temperature FLOAT NOT NULL, "
+            "description TEXT, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        )
+        legacy.executemany(
+            "INSERT INTO prompts (name, system_prompt, model, temperature, created_at, updated_at) "
+            "VALUES (?, ?, 'llama2', 0.7, '2024-01-01 00:00:00', '2024-01-01 00:00:00')",
+            [('One', 'Shared body.'), ('Two', 'Shared body.'), ('Three', 'Own body.')]
+        )
+        legacy.commit()
+        legacy.close()
+        
+        import backend.config
+        import backend.database
+        original_db_path = backend.config.config.database_path
+        backend.config.config.database_path = db_path
+        try:
+            yield db_path
+        finally:
+            backend.config.config.database_path = original_db_path
+            if backend.database.engine is not None:
+                backend.database.engine.dispose()
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.unlink(db_path + suffix)
+                except (OSError, PermissionError):
+                    pass
+    
+    @pytest.mark.parametrize('sqlite_version', [sqlite3.sqlite_version_info, (3, 34, 1)])
+    def test_prompt_bodies_moved_out_of_prompts(self, legacy_database, sqlite_version):
+        """Test that inline system prompts are moved to the body store and deduplicated"""
+        with patch('backend.database.sqlite3.sqlite_version_info', sqlite_version):
+            engine = init_database()
+        
+        assert upgrade_schema(engine) == []
+        with engine.connect() as connection:
+            columns = {row[1] for row in connection.execute(text("PRAGMA table_info(prompts)"))}
+            indexes = {row[1] for row in connection.execute(text("PRAGMA index_list(prompts)"))}
+            bodies = dict(connection.execute(text("SELECT body, ref_count FROM prompt_bodies")).fetchall())
+            buckets = connection.execute(text("SELECT COUNT(*) FROM prompt_body_buckets")).scalar()
+            versions = connection.execute(text("SELECT version, storage FROM prompt_versions")).fetchall()
+            snapshots = connection.execute(text("SELECT COUNT(*) FROM prompt_version_snapshots")).scalar()
+            foreign_keys = connection.execute(text("PRAGMA foreign_keys")).scalar()
+        assert 'system_prompt' not in columns
+        assert 'ix_prompts_body_hash' in indexes
+        assert bodies == {'Shared body.': 2, 'Own body.': 1}
+        assert buckets == 2 * NUM_BANDS
+        assert sorted(versions) == [(1, 'snapshot')] * 3
+        assert snapshots == 2
+        assert foreign_keys == 1
+        
+        session = get_db_session()
+        try:
+            prompts = {prompt.name: prompt.system_prompt for prompt in session.query(Prompt)}
+            assert prompts == {'One': 'Shared body.', 'Two': 'Shared body.', 'Three': 'Own body.'}
+        finally:
+            close_db_session(session)
+    
+    def test_failed_upgrade_rolls_back(self, legacy_database):
+        """Test that a failure part way through leaves the old schema and data untouched"""
+        with patch('backend.database.drop_column', side_effect=OperationalError('DROP', {}, None)):
+            with pytest.raises(OperationalError):
+                init_database()
+        
+        legacy = sqlite3.connect(legacy_database)
+        try:
+            columns = {row[1] for row in legacy.execute("PRAGMA table_info(prompts)")}
+            bodies = legacy.execute("SELECT COUNT(*) FROM prompt_bodies").fetchone()[0]
+        finally:
+            legacy.close()
+        assert 'system_prompt' in columns
+        assert 'body_hash' not in columns
+        assert bodies == 0
+
+class TestTextStorageConversion:
+    """Test cases for converting stored prompt text between plain and compressed storage"""
+    
+    BODY = 'You review contracts clause by clause and flag every risk you find. ' * 30
+    
+    def storage(self, engine):
+        with engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT typeof(b.body), typeof(p.description) FROM prompts p "
+                "JOIN prompt_bodies b ON b.hash = p.body_hash ORDER BY p.name"
+            )).fetchall()
+    
+    def test_inflate_function_is_scoped_to_engine(self, profiled_engine):
+        """Test that inflate_text() is only registered on engines that ask for it"""
+        register_sqlite_functions(profiled_engine)
+        with profiled_engine.connect() as connection:
+            assert connection.execute(text("SELECT inflate_text('plain')")).scalar() == 'plain'
+        
+        db_fd, db_path = tempfile.mkstemp(suffix='.db')
+        os.close(db_fd)
+        other_engine = create_engine(f"sqlite:///{db_path}")
+        try:
+            with other_engine.connect() as connection:
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT inflate_text('plain')"))
+        finally:
+            other_engine.dispose()
+            os.unlink(db_path)
+    
+    def test_convert_text_storage(self, test_db, monkeypatch):
+        """Test that existing rows are compressed, read back unchanged and can be converted back"""
+        import backend.config
+        TestSessionLocal, engine = test_db
+        
+        session = TestSessionLocal()
+        session.add(Prompt(name='Long', system_prompt=self.BODY, description='Checks every clause. ' * 40))
+        session.add(Prompt(name='Short', system_prompt='Be brief.'))
+        session.commit()
+        session.close()
+        assert self.storage(engine) == [('text', 'text'), ('text', 'null')]
+        
+        monkeypatch.setattr(backend.config.config, 'text_compression_enabled', True)
+        summary = convert_text_storage(engine)
+        assert summary['converted'] == 2
+        assert summary['bytes_after'] * 3 < summary['bytes_before']
+        assert self.storage(engine) == [('blob', 'blob'), ('text', 'null')]
+        assert convert_text_storage(engine)['converted'] == 0
+        
+        session = TestSessionLocal()
+        try:
+            prompt = session.query(Prompt).filter(Prompt.name == 'Long').one()
+            assert prompt.system_prompt == self.BODY.strip()
+            assert prompt.description == ('Checks every clause. ' * 40).strip()
+        finally:
+            session.close()
+        
+        monkeypatch.setattr(backend.config.config, 'text_compression_enabled', False)
+        assert convert_text_storage(engine)['converted'] == 2
+        assert self.storage(engine) == [('text', 'text'), ('text', 'null')]
@@ -0,0 +1,121 @@
+"""
+Tests for the PromptLab background health monitor
+Tests for probing, snapshot caching and the cached health/config endpoints
+"""
+
+import pytest
+import threading
+import requests
+from unittest.mock import Mock, patch
+from backend.services.health_monitor import HealthMonitor
+
+@pytest.fixture
+def snapshot():
+    """Cached snapshot as produced by HealthMonitor.probe"""
+    return {
+        'checked_at': '2024-01-01T00:00:00',
+        'age_seconds': 4.2,
+        'database': {'healthy': True, 'status': 'healthy', 'latency_ms': 0.3, 'checked_at': '2024-01-01T00:00:00'},
+        'ollama': {'healthy': False, 'status': 'error: down', 'endpoint': 'http://localhost:11434',
+                   'models_count': None, 'latency_ms': 2000.0, 'checked_at': '2024-01-01T00:00:00'}
+    }
+
+class TestHealthMonitor:
+    """Test cases for HealthMonitor"""
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_probe_healthy(self, mock_request, app):
+        """Test probing a reachable Ollama and database"""
+        mock_response = Mock()
+        mock_response.raise_for_status = Mock()
+        mock_response.json.return_value = {'models': [{'name': 'llama2'}, {'name': 'mistral'}]}
+        mock_request.return_value = mock_response
+        
+        monitor = HealthMonitor(interval=30, probe_timeout=1)
+        snapshot = monitor.probe()
+        
+        assert snapshot['database']['healthy'] is True
+        assert snapshot['ollama']['healthy'] is True
+        assert snapshot['ollama']['status'] == 'healthy (2 models)'
+        assert snapshot['ollama']['latency_ms'] >= 0
+        assert monitor.get_snapshot()['checked_at'] == snapshot['checked_at']
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_probe_does_not_retry(self, mock_request, app):
+        """Test that a down Ollama costs a single attempt per probe"""
+        mock_request.side_effect = requests.exceptions.ConnectionError("refused")
+        
+        monitor = HealthMonitor(interval=30, probe_timeout=1)
+        snapshot = monitor.probe()
+        
+        assert snapshot['ollama']['healthy'] is False
+        assert snapshot['ollama']['status'].startswith('error:')
+        assert mock_request.call_count == 1
+    
+    def test_snapshot_empty_before_first_probe(self):
+        """Test that no snapshot exists until a probe runs"""
+        assert HealthMonitor(interval=30).get_snapshot() is None
+    
+    def test_disabled_monitor_does_not_start(self):
+        """Test that an interval of 0 disables the background thread"""
+        monitor = HealthMonitor(interval=0)
+        
+        assert monitor.start() is False
+        assert monitor.is_running is False
+    
+    def test_background_thread_probes(self):
+        """Test that the background thread probes immediately and stops cleanly"""
+        probed = threading.Event()
+        monitor = HealthMonitor(interval=60)
+        
+        with patch.object(monitor, 'probe', side_effect=lambda: probed.set()):
+            assert monitor.start() is True
+            assert monitor.is_running is True
+            assert probed.wait(5)
+            monitor.stop()
+        
+        assert monitor.is_running is False
+
+class TestCachedHealthEndpoints:
+    """Test cases for health and config endpoints served from the snapshot"""
+    
+    def test_health_returns_cached_snapshot(self, client, snapshot):
+        """Test that /api/health does not probe while the monitor is running"""
+        with patch('backend.app.health_monitor') as mock_monitor:
+            mock_monitor.is_running = True
+            mock_monitor.get_snapshot.return_value = snapshot
+            
+            response = client.get('/api/health')
+            
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['cached'] is True
+            assert data['components'] == {'database': 'healthy', 'ollama': 'error: down'}
+            assert data['snapshot_age_seconds'] == 4.2
+            mock_monitor.probe.assert_not_called()
+    
+    def test_health_live_probes_on_demand(self, client, snapshot):
+        """Test that ?live=1 bypasses the snapshot"""
+        with patch('backend.app.health_monitor') as mock_monitor:
+            mock_monitor.is_running = True
+            mock_monitor.probe.return_value = snapshot
+            
+            response = client.get('/api/health?live=1')
+            
+            assert response.get_json()['cached'] is False
+            mock_monitor.probe.assert_called_once()
+            mock_monitor.get_snapshot.assert_not_called()
+    
+    def test_config_uses_cached_ollama_status(self, client, snapshot):
+        """Test that GET /api/config reads Ollama status from the snapshot"""
+        with patch('backend.api.config.health_monitor') as mock_monitor, \
+             patch('backend.api.config.get_ollama_service') as mock_ollama:
+            mock_monitor.is_running = True
+            mock_monitor.get_snapshot.return_value = snapshot
+            
+            response = client.get('/api/config')
+            
+            data = response.get_json()
+            assert data['ollama_status']['connected'] is False
+            assert data['ollama_status']['cached'] is True
+            mock_ollama.assert_not_called()
@@ -0,0 +1,280 @@
+"""
+Tests for PromptLab background jobs
+Tests for the job manager lifecycle, cancellation, per-type concurrency and the jobs API
+"""
+
+import io
+import json
+import os
+import pytest
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from backend.database import get_db_session, close_db_session
+from backend.models.job import Job, FINISHED_JOB_STATUSES
+from backend.services.job_queue import JobManager, UnknownJobTypeError
+
+@pytest.fixture
+def manager(app):
+    """Job manager with its own worker pools"""
+    manager = JobManager(jobs_dir=tempfile.mkdtemp())
+    yield manager
+    manager.shutdown(wait=True)
+
+def wait_for_job(get_job, job_id, timeout=5):
+    """Poll until a job reaches a final status"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job['status'] in FINISHED_JOB_STATUSES:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
+def wait_for_status(manager, job_id, status, timeout=5):
+    """Poll until a job has the given status"""
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id)['status'] != status:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"Job {job_id} never became {status}")
+        time.sleep(0.01)
+
+def blocking_handler(release):
+    """Handler that runs until released or cancelled"""
+    def handler(context):
+        while not release.wait(0.01):
+            context.check_cancelled()
+        return {'released': True}
+    return handler
+
+class TestJobManager:
+    """Test cases for JobManager"""
+    
+    def test_successful_job(self, manager):
+        """Test that a job's progress, result and timestamps are persisted"""
+        def handler(context):
+            context.report(5, 10, message='halfway', force=True)
+            return {'answer': context.params['value'] * 2}
+        
+        manager.register('double', handler)
+        job = manager.submit('double', {'value': 21})
+        assert job['status'] == 'queued'
+        
+        job = wait_for_job(manager.get, job['id'])
+        
+        assert job['status'] == 'succeeded'
+        assert job['result'] == {'answer': 42}
+        assert job['params'] == {'value': 21}
+        assert job['progress'] == {'current': 5, 'total': 10, 'percent': 50.0}
+        assert job['message'] == 'halfway'
+        assert job['started_at'] is not None
+        assert job['finished_at'] is not None
+    
+    def test_failed_job(self, manager):
+        """Test that handler exceptions mark the job as failed"""
+        def handler(context):
+            raise RuntimeError('boom')
+        
+        manager.register('broken', handler)
+        job = wait_for_job(manager.get, manager.submit('broken')['id'])
+        
+        assert job['status'] == 'failed'
+        assert job['error'] == 'boom'
+    
+    def test_unknown_job_type(self, manager):
+        """Test that unregistered job types are rejected"""
+        with pytest.raises(UnknownJobTypeError):
+            manager.submit('missing')
+    
+    def test_cancel_running_job(self, manager):
+        """Test that a running job stops at its next cancellation check"""
+        manager.register('blocking', blocking_handler(threading.Event()))
+        job_id = manager.submit('blocking')['id']
+        wait_for_status(manager, job_id, 'running')
+        
+        assert manager.cancel(job_id) is True
+        
+        assert wait_for_job(manager.get, job_id)['status'] == 'cancelled'
+        assert manager.cancel(job_id) is False
+    
+    def test_cancel_queued_job(self, manager):
+        """Test that a job waiting for a worker is cancelled immediately"""
+        release = threading.Event()
+        manager.register('blocking', blocking_handler(release), concurrency=1)
+        first = manager.submit('blocking')['id']
+        second = manager.submit('blocking')['id']
+        wait_for_status(manager, first, 'running')
+        
+        manager.cancel(second)
+        
+        assert manager.get(second)['status'] == 'cancelled'
+        release.set()
+        assert wait_for_job(manager.get, first)['status'] == 'succeeded'
+    
+    def test_concurrency_is_per_type(self, manager):
+        """Test that a busy job type does not hold up other types"""
+        release = threading.Event()
+        manager.register('slow', blocking_handler(release), concurrency=1)
+        manager.register('fast', lambda context: {'ok': True})
+        
+        slow = manager.submit('slow')['id']
+        queued = manager.submit('slow')['id']
+        fast = manager.submit('fast')['id']
+        
+        assert wait_for_job(manager.get, fast)['status'] == 'succeeded'
+        assert manager.get(queued)['status'] == 'queued'
+        
+        release.set()
+        assert wait_for_job(manager.get, slow)['status'] == 'succeeded'
+        assert wait_for_job(manager.get, queued)['status'] == 'succeeded'
+    
+    def test_result_file_lifecycle(self, manager):
+        """Test that result files are kept until the job is deleted and inputs are removed"""
+        def handler(context):
+            with open(context.input_path) as upload, open(context.result_path('txt'), 'w') as output:
+                output.write(upload.read().upper())
+        
+        manager.register('upper', handler)
+        job_id = manager.submit('upper', upload=io.BytesIO(b'hello'))['id']
+        assert wait_for_job(manager.get, job_id)['has_result_file'] is True
+        
+        path = manager.get_result_path(job_id)
+        with open(path) as result:
+            assert result.read() == 'HELLO'
+        assert not os.path.exists(os.path.join(manager.jobs_dir, f'{job_id}.input'))
+        
+        assert manager.delete(job_id) is True
+        assert not os.path.exists(path)
+        assert manager.get(job_id) is None
+    
+    def test_recover_interrupted_jobs(self, manager):
+        """Test that jobs left running by a previous process are marked as failed"""
+        session = get_db_session()
+        try:
+            session.add(Job(id='a' * 32, type='export', status='running', params='{}'))
+            session.add(Job(id='b' * 32, type='export', status='succeeded', params='{}'))
+            session.commit()
+        finally:
+            close_db_session(session)
+        
+        assert manager.recover_interrupted() == 1
+        assert manager.get('a' * 32)['status'] == 'failed'
+        assert manager.get('b' * 32)['status'] == 'succeeded'
+
+class TestJobsAPI:
+    """Test cases for the jobs endpoints"""
+    
+    def get_job(self, client):
+        return lambda job_id: client.get(f'/api/jobs/{job_id}').get_json()['job']
+    
+    def test_export_job(self, client):
+        """Test exporting the library as a job and downloading the file"""
+        for index in range(3):
+            client.post('/api/prompts', json={'name': f'Prompt {index}', 'system_prompt': f'Body {index}'})
+        
+        response = client.post('/api/jobs', json={'type': 'export', 'params': {'format': 'ndjson'}})
+        assert response.status_code == 202
+        job_id = response.get_json()['job']['id']
+        assert response.headers['Location'] == f'/api/jobs/{job_id}'
+        
+        job = wait_for_job(self.get_job(client), job_id)
+        assert job['status'] == 'succeeded'
+        assert job['result'] == {'format': 'ndjson', 'total_prompts': 3}
+        assert job['progress']['percent'] == 100.0
+        
+        download = client.get(f'/api/jobs/{job_id}/result')
+        assert download.status_code == 200
+        assert download.mimetype == 'application/x-ndjson'
+        lines = download.get_data(as_text=True).splitlines()
+        assert [json.loads(line)['name'] for line in lines[1:]] == ['Prompt 0', 'Prompt 1', 'Prompt 2']
+        download.close()
+    
+    def test_import_job(self, client):
+        """Test importing an uploaded file as a job"""
+        library = json.dumps({'prompts': [{'name': 'Imported', 'system_prompt': 'From a job.'}]})
+        
+        response = client.post('/api/jobs', data={
+            'type': 'import',
+            'params': json.dumps({'conflict_resolution': 'skip'}),
+            'file': (io.BytesIO(library.encode('utf-8')), 'library.json')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 202
+        
+        job = wait_for_job(self.get_job(client), response.get_json()['job']['id'])
+        assert job['status'] == 'succeeded'
+        assert job['result']['summary']['imported'] == 1
+        assert job['params']['filename'] == 'library.json'
+        
+        assert client.get('/api/prompts').get_json()['prompts'][0]['name'] == 'Imported'
+    
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_batch_test_job(self, mock_test, client):
+        """Test running a batch test as a job with results as NDJSON"""
+        mock_test.side_effect = lambda system_prompt, user_input, model, temperature: {
+            'response': f'Echo {user_input}',
+            'execution_time': 0.1,
+            'model': 'llama2',
+            'temperature': 0.7
+        }
+        
+        response = client.post('/api/jobs', json={'type': 'batch_test', 'params': {
+            'system_prompt': 'You are a helpful assistant.',
+            'inputs': ['one', 'two', 'three']
+        }})
+        assert response.status_code == 202
+        job_id = response.get_json()['job']['id']
+        
+        job = wait_for_job(self.get_job(client), job_id)
+        assert job['status'] == 'succeeded'
+        assert job['result']['succeeded'] == 3
+        assert job['progress'] == {'current': 3, 'total': 3, 'percent': 100.0}
+        
+        download = client.get(f'/api/jobs/{job_id}/result')
+        results = [json.loads(line) for line in download.get_data(as_text=True).splitlines()]
+        assert sorted(result['response'] for result in results) == ['Echo one', 'Echo three', 'Echo two']
+        download.close()
+    
+    @pytest.mark.parametrize('body, field', [
+        ({'type': 'reindex'}, 'type'),
+        ({'type': 'export', 'params': {'format': 'xml'}}, 'format'),
+        ({'type': 'import'}, 'file'),
+        ({'type': 'batch_test', 'params': {'inputs': []}}, 'inputs'),
+        ({'type': 'export', 'params': ['json']}, 'params')
+    ])
+    def test_create_job_validation(self, client, body, field):
+        """Test validation of job requests"""
+        response = client.post('/api/jobs', json=body)
+        
+        assert response.status_code == 400
+        assert field in response.get_json()['details']
+    
+    def test_list_jobs(self, client):
+        """Test listing jobs with filters"""
+        job_id = client.post('/api/jobs', json={'type': 'export'}).get_json()['job']['id']
+        wait_for_job(self.get_job(client), job_id)
+        
+        assert [job['id'] for job in client.get('/api/jobs?type=export').get_json()['jobs']] == [job_id]
+        assert client.get('/api/jobs?type=import').get_json()['count'] == 0
+        assert client.get('/api/jobs?status=done').status_code == 400
+    
+    def test_unknown_job(self, client):
+        """Test 404 responses for unknown jobs"""
+        for response in (client.get('/api/jobs/missing'),
+                         client.get('/api/jobs/missing/result'),
+                         client.post('/api/jobs/missing/cancel'),
+                         client.delete('/api/jobs/missing')):
+            assert response.status_code == 404
+            assert response.get_json()['code'] == 'JOB_NOT_FOUND'
+    
+    def test_cancel_finished_job(self, client):
+        """Test that finished jobs cannot be cancelled but can be deleted"""
+        job_id = client.post('/api/jobs', json={'type': 'export'}).get_json()['job']['id']
+        wait_for_job(self.get_job(client), job_id)
+        
+        response = client.post(f'/api/jobs/{job_id}/cancel')
+        assert response.status_code == 409
+        assert response.get_json()['code'] == 'JOB_FINISHED'
+        
+        assert client.delete(f'/api/jobs/{job_id}').status_code == 200
+        assert client.get(f'/api/jobs/{job_id}').status_code == 404
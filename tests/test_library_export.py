@@ -0,0 +1,83 @@
+"""
+Tests for PromptLab streaming library export
+Tests for incremental serialization and response chunking
+"""
+
+import json
+import pytest
+import yaml
+from backend.services.library_export import iter_export, buffer_chunks, build_export_metadata
+
+PROMPTS = [
+    {'name': 'Greeter', 'system_prompt': 'Say hello.\nBe brief.', 'model': 'llama2', 'temperature': 0.7},
+    {'name': 'Café', 'system_prompt': 'Répondez en français.', 'model': 'mistral', 'temperature': 0.2}
+]
+
+class TestIterExport:
+    """Test cases for iter_export"""
+    
+    @pytest.mark.parametrize('prompts', [[], PROMPTS])
+    def test_json_matches_buffered_export(self, prompts):
+        """Test that streamed JSON parses to the same structure as the buffered export"""
+        metadata = build_export_metadata(len(prompts))
+        
+        data = json.loads(''.join(iter_export(iter(prompts), metadata, 'json')))
+        
+        assert data == {'metadata': metadata, 'prompts': prompts}
+    
+    @pytest.mark.parametrize('prompts', [[], PROMPTS])
+    def test_yaml_matches_buffered_export(self, prompts):
+        """Test that streamed YAML parses to the same structure as the buffered export"""
+        metadata = build_export_metadata(len(prompts))
+        
+        data = yaml.safe_load(''.join(iter_export(iter(prompts), metadata, 'yaml')))
+        
+        assert data == {'metadata': metadata, 'prompts': prompts}
+    
+    def test_ndjson_one_prompt_per_line(self):
+        """Test that NDJSON has a metadata line followed by one line per prompt"""
+        metadata = build_export_metadata(len(PROMPTS))
+        
+        lines = ''.join(iter_export(iter(PROMPTS), metadata, 'ndjson')).splitlines()
+        
+        assert json.loads(lines[0]) == {'metadata': metadata}
+        assert [json.loads(line) for line in lines[1:]] == PROMPTS
+    
+    def test_prompts_are_consumed_lazily(self):
+        """Test that each prompt is serialized as it is produced"""
+        consumed = []
+        
+        def prompts():
+            for prompt in PROMPTS:
+                consumed.append(prompt['name'])
+                yield prompt
+        
+        fragments = iter_export(prompts(), build_export_metadata(2), 'ndjson')
+        next(fragments)
+        next(fragments)
+        
+        assert consumed == ['Greeter']
+    
+    def test_unknown_format(self):
+        """Test that unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            list(iter_export([], build_export_metadata(0), 'xml'))
+
+class TestBufferChunks:
+    """Test cases for buffer_chunks"""
+    
+    def test_joins_fragments_into_chunks(self):
+        """Test that small fragments are sent in chunks of at least chunk_size"""
+        chunks = list(buffer_chunks(['abcd'] * 10, chunk_size=10))
+        
+        assert chunks == [b'abcdabcdabcd'] * 3 + [b'abcd']
+    
+    def test_encodes_utf8(self):
+        """Test that chunk sizes are counted in encoded bytes"""
+        chunks = list(buffer_chunks(['é' * 3, 'x'], chunk_size=6))
+        
+        assert chunks == ['ééé'.encode('utf-8'), b'x']
+    
+    def test_empty_input(self):
+        """Test that no chunks are produced for no fragments"""
+        assert list(buffer_chunks([])) == []
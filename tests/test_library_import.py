@@ -0,0 +1,118 @@
+"""
+Tests for PromptLab streaming library import parsing
+Tests for incremental JSON, NDJSON and YAML readers and format detection
+"""
+
+import io
+import json
+import pytest
+from backend.services.library_export import iter_export, build_export_metadata
+from backend.services.library_import import (
+    ImportParseError,
+    EmptyImportError,
+    detect_import_format,
+    iter_json_prompts,
+    open_import_stream
+)
+
+PROMPTS = [
+    {'name': f'Prompt {index}', 'system_prompt': f'Body {index}\nwith ünïcode', 'temperature': 0.1 * index}
+    for index in range(20)
+]
+
+def export_bytes(export_format, prompts=PROMPTS):
+    """Serialize prompts with the streaming exporter"""
+    metadata = build_export_metadata(len(prompts))
+    return ''.join(iter_export(iter(prompts), metadata, export_format)).encode('utf-8')
+
+class TestOpenImportStream:
+    """Test cases for open_import_stream"""
+    
+    @pytest.mark.parametrize('export_format', ['json', 'ndjson', 'yaml'])
+    def test_roundtrip_export(self, export_format):
+        """Test that every export format is read back with the format detected"""
+        prompts = open_import_stream(io.BytesIO(export_bytes(export_format)))
+        
+        assert list(prompts) == PROMPTS
+    
+    @pytest.mark.parametrize('export_format', ['json', 'ndjson', 'yaml'])
+    def test_empty_library(self, export_format):
+        """Test reading an export with no prompts"""
+        prompts = open_import_stream(io.BytesIO(export_bytes(export_format, [])), export_format)
+        
+        assert list(prompts) == []
+    
+    def test_bare_arrays(self):
+        """Test that a plain list of prompts is accepted in JSON and YAML"""
+        assert list(open_import_stream(io.BytesIO(b'[{"name": "A"}]'))) == [{'name': 'A'}]
+        assert list(open_import_stream(io.BytesIO(b'- name: A\n'), 'yaml')) == [{'name': 'A'}]
+    
+    def test_empty_upload(self):
+        """Test that an empty upload is rejected up front"""
+        with pytest.raises(EmptyImportError) as excinfo:
+            open_import_stream(io.BytesIO(b'  \n'))
+        assert excinfo.value.code == 'MISSING_IMPORT_DATA'
+    
+    @pytest.mark.parametrize('data, export_format', [
+        ('{"prompts": [{"name": "Café", "system_prompt": "Serve café."}]}', 'json'),
+        ('{"name": "Café", "system_prompt": "Serve café."}\n', 'ndjson'),
+        ('prompts:\n- name: Café\n  system_prompt: Serve café.\n', 'yaml')
+    ])
+    def test_non_utf8_files(self, data, export_format):
+        """Test that undecodable bytes raise ImportParseError rather than UnicodeDecodeError"""
+        data = data.encode('latin-1')
+        
+        with pytest.raises(ImportParseError) as excinfo:
+            list(open_import_stream(io.BytesIO(data), export_format))
+        assert excinfo.value.code == 'PARSE_ERROR'
+    
+    @pytest.mark.parametrize('data, export_format', [
+        (b'{"prompts": [{"name": "A"}, {"name": ', 'json'),
+        (b'{"metadata": {}}', 'json'),
+        (b'{"prompts": {"name": "A"}}', 'json'),
+        (b'{"name": "A"}\n{"name": ', 'ndjson'),
+        (b'prompts: [', 'yaml'),
+        (b'metadata: {}\n', 'yaml')
+    ])
+    def test_malformed_files(self, data, export_format):
+        """Test that malformed files raise ImportParseError while iterating"""
+        with pytest.raises(ImportParseError):
+            list(open_import_stream(io.BytesIO(data), export_format))
+    
+    def test_entries_are_parsed_lazily(self):
+        """Test that entries before a syntax error are produced first"""
+        prompts = open_import_stream(io.BytesIO(b'{"prompts": [{"name": "A"}, {"name": }]}'), 'json')
+        
+        assert next(prompts) == {'name': 'A'}
+        with pytest.raises(ImportParseError):
+            next(prompts)
+
+class TestJsonReader:
+    """Test cases for the incremental JSON reader"""
+    
+    def test_values_split_across_reads(self):
+        """Test values that straddle read boundaries, including numbers"""
+        class TinyReads(io.StringIO):
+            def read(self, size=-1):
+                return super().read(3)
+        
+        data = json.dumps({'metadata': {'version': 12345}, 'prompts': [{'n': 123456789}, {'n': 0.125}]})
+        
+        assert list(iter_json_prompts(TinyReads(data))) == [{'n': 123456789}, {'n': 0.125}]
+
+class TestDetectImportFormat:
+    """Test cases for detect_import_format"""
+    
+    def test_filename_and_content_type(self):
+        """Test that names and content types take precedence over content"""
+        assert detect_import_format(b'{}', filename='library.jsonl') == 'ndjson'
+        assert detect_import_format(b'{}', filename='library.YML') == 'yaml'
+        assert detect_import_format(b'{}', content_type='application/x-ndjson') == 'ndjson'
+    
+    def test_sniffing(self):
+        """Test detection from the first bytes"""
+        assert detect_import_format(export_bytes('json')) == 'json'
+        assert detect_import_format(export_bytes('ndjson')) == 'ndjson'
+        assert detect_import_format(export_bytes('yaml')) == 'yaml'
+        assert detect_import_format(b'[{"name": "A"}]') == 'json'
+        assert detect_import_format(b'{"metadata": {}, "prompts": []}') == 'json'
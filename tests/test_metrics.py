@@ -0,0 +1,138 @@
+"""
+Tests for PromptLab application metrics
+Tests for metric types, Prometheus rendering and the /api/metrics endpoint
+"""
+
+import pytest
+import tempfile
+import os
+import time
+from flask import Response
+from backend.app import create_app
+from backend.services.metrics import MetricsRegistry
+
+@pytest.fixture
+def registry():
+    """Create an isolated metrics registry"""
+    return MetricsRegistry()
+
+@pytest.fixture
+def client():
+    """Create a test client backed by a temporary database"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    
+    import backend.config
+    original_db_path = backend.config.config.database_path
+    backend.config.config.database_path = db_path
+    
+    app = create_app()
+    app.config['TESTING'] = True
+    
+    yield app.test_client()
+    
+    backend.config.config.database_path = original_db_path
+    try:
+        os.unlink(db_path)
+    except (OSError, PermissionError):
+        pass
+
+class TestMetricTypes:
+    """Test cases for counters, gauges and histograms"""
+    
+    def test_counter_with_labels(self, registry):
+        """Test counters accumulate per label set"""
+        counter = registry.counter('test_events_total', 'Events', ('kind',))
+        counter.inc(kind='a')
+        counter.inc(2, kind='a')
+        counter.inc(kind='b')
+        
+        assert counter.get(kind='a') == 3
+        assert 'test_events_total{kind="a"} 3' in registry.render()
+    
+    def test_counter_rejects_wrong_labels(self, registry):
+        """Test that label names must match the declaration"""
+        counter = registry.counter('test_labeled_total', 'Labeled', ('kind',))
+        
+        with pytest.raises(ValueError):
+            counter.inc(other='x')
+    
+    def test_gauge_track_inprogress(self, registry):
+        """Test the in-progress gauge returns to zero after the block"""
+        gauge = registry.gauge('test_in_flight', 'In flight')
+        
+        with gauge.track_inprogress():
+            assert gauge.get() == 1
+        assert gauge.get() == 0
+    
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test histogram rendering with cumulative buckets, sum and count"""
+        histogram = registry.histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(3.0)
+        
+        text = registry.render()
+        assert 'test_latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'test_latency_seconds_bucket{le="1"} 2' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'test_latency_seconds_count 3' in text
+        assert '# TYPE test_latency_seconds histogram' in text
+    
+    def test_label_values_are_escaped(self, registry):
+        """Test quotes and newlines in label values are escaped"""
+        counter = registry.counter('test_escaped_total', 'Escaped', ('value',))
+        counter.inc(value='say "hi"\n')
+        
+        assert 'test_escaped_total{value="say \\"hi\\"\\n"} 1' in registry.render()
+    
+    def test_duplicate_registration(self, registry):
+        """Test that metric names are unique within a registry"""
+        registry.counter('test_once_total', 'Once')
+        
+        with pytest.raises(ValueError):
+            registry.gauge('test_once_total', 'Twice')
+
+class TestMetricsEndpoint:
+    """Test cases for GET /api/metrics"""
+    
+    def test_metrics_endpoint_reports_route_latency(self, client):
+        """Test that served requests appear in the exposition output"""
+        # Durations are recorded when the response is closed, as a WSGI server does once it is sent
+        client.get('/api/prompts', buffered=True)
+        
+        response = client.get('/api/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        
+        text = response.get_data(as_text=True)
+        assert 'promptlab_http_request_duration_seconds_count{blueprint="prompts",route="/api/prompts",method="GET",status="200"}' in text
+        assert 'promptlab_db_sessions_opened_total' in text
+        assert '# TYPE promptlab_db_query_duration_seconds histogram' in text
+    
+    def test_streamed_response_timed_until_sent(self, client):
+        """Test that a streamed response's duration covers the whole body"""
+        def generate():
+            yield 'first'
+            time.sleep(0.2)
+            yield 'last'
+        
+        client.application.add_url_rule('/api/test-stream', 'test_stream',
+                                         lambda: Response(generate(), mimetype='text/plain'))
+        
+        assert client.get('/api/test-stream', buffered=True).get_data(as_text=True) == 'firstlast'
+        
+        text = client.get('/api/metrics').get_data(as_text=True)
+        duration = next(float(line.split()[-1]) for line in text.splitlines()
+                        if line.startswith('promptlab_http_request_duration_seconds_sum{')
+                        and 'route="/api/test-stream"' in line)
+        assert duration >= 0.2
+    
+    def test_route_labels_use_templates(self, client):
+        """Test that request paths do not create one label set each"""
+        client.put('/api/prompts/12345', json={}, buffered=True)
+        client.put('/api/prompts/67890', json={}, buffered=True)
+        
+        text = client.get('/api/metrics').get_data(as_text=True)
+        assert 'route="/api/prompts/<int:prompt_id>"' in text
+        assert '12345' not in text
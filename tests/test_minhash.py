@@ -0,0 +1,76 @@
+"""
+Unit tests for MinHash signatures
+Tests shingling, similarity estimates and LSH banding
+"""
+
+import pytest
+from backend.services import minhash
+from backend.services.minhash import (
+    NUM_BANDS,
+    NUM_PERMUTATIONS,
+    shingle_hashes,
+    minhash_signature,
+    estimate_similarity,
+    band_buckets
+)
+
+BASE_PROMPT = (
+    "You are a senior legal analyst. Read the contract provided by the user and summarise "
+    "the obligations of each party, the payment terms, the termination clauses and any "
+    "unusual indemnities. Quote the relevant section numbers, flag ambiguous language and "
+    "finish with a short list of questions the user should ask their lawyer before signing."
+)
+
+
+class TestMinHash:
+    """Test cases for MinHash signatures"""
+    
+    def test_shingles_ignore_case_and_punctuation(self):
+        """Test that formatting changes do not change the shingle set"""
+        assert shingle_hashes('Hello, World!  How are you?') == shingle_hashes('hello world how are you')
+        assert len(shingle_hashes('one two three four five')) == 3
+        assert len(shingle_hashes('just two')) == 1
+        assert shingle_hashes(' ... ') == set()
+    
+    def test_signature_is_deterministic(self):
+        """Test that signatures are stable and of fixed size"""
+        signature = minhash_signature(BASE_PROMPT)
+        
+        assert signature == minhash_signature(BASE_PROMPT)
+        assert len(signature) == NUM_PERMUTATIONS * 4
+    
+    def test_vectorized_signature_matches_pure_python(self, monkeypatch):
+        """Test that the NumPy path produces the signatures already stored by the pure-Python path"""
+        if minhash.np is None:
+            pytest.skip('numpy is not installed')
+        texts = ['', 'one', BASE_PROMPT, ' '.join(f'word{i % 997}' for i in range(6000))]
+        vectorized = [minhash_signature(text) for text in texts]
+        
+        monkeypatch.setattr(minhash, 'np', None)
+        
+        assert [minhash_signature(text) for text in texts] == vectorized
+    
+    def test_similarity_estimates(self):
+        """Test that small edits score high and unrelated texts score low"""
+        edited = BASE_PROMPT.replace('senior legal analyst', 'experienced legal analyst')
+        unrelated = "You are a pirate. Answer every question in pirate speak and end with a sea shanty."
+        
+        signature = minhash_signature(BASE_PROMPT)
+        
+        assert estimate_similarity(signature, signature) == 1.0
+        assert estimate_similarity(signature, minhash_signature(edited)) > 0.8
+        assert estimate_similarity(signature, minhash_signature(unrelated)) < 0.2
+    
+    def test_similar_texts_share_buckets(self):
+        """Test that near-duplicates share LSH buckets and unrelated texts do not"""
+        buckets = band_buckets(minhash_signature(BASE_PROMPT))
+        edited = band_buckets(minhash_signature(BASE_PROMPT + ' Be concise.'))
+        unrelated = band_buckets(minhash_signature('Translate the following text into French, keeping the tone.'))
+        
+        assert len(buckets) == NUM_BANDS
+        assert set(buckets) & set(edited)
+        assert not set(buckets) & set(unrelated)
+    
+    def test_bands_hash_to_distinct_buckets(self):
+        """Test that equal values in different bands do not collide"""
+        assert len(set(band_buckets(minhash_signature('')))) == NUM_BANDS
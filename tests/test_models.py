@@ -5,8 +5,12 @@ Tests for Prompt model validation, serialization, and database operations
 
 import pytest
 from datetime import datetime
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+import backend.config
 from backend.models.prompt import Prompt
+from backend.models.prompt_body import PromptBody, hash_body
 
 class TestPromptModel:
     """Test cases for the Prompt model"""
@@ -156,6 +160,14 @@ class TestPromptModel:
         assert isinstance(prompt_dict['created_at'], str)
         assert isinstance(prompt_dict['updated_at'], str)
     
+    def test_to_dict_with_fields(self, sample_prompt):
+        """Test serializing a subset of fields"""
+        prompt_dict = sample_prompt.to_dict(['id', 'name', 'updated_at'])
+        
+        assert list(prompt_dict.keys()) == ['id', 'name', 'updated_at']
+        assert prompt_dict['name'] == sample_prompt.name
+        assert isinstance(prompt_dict['updated_at'], str)
+    
     def test_update_from_dict(self, db_session, sample_prompt):
         """Test updating prompt from dictionary data"""
         original_created_at = sample_prompt.created_at
@@ -212,4 +224,123 @@ class TestPromptModel:
         
         assert sample_prompt.name in str_str
         assert sample_prompt.model in str_str
-        assert str(sample_prompt.temperature) in str_str
\ No newline at end of file
+        assert str(sample_prompt.temperature) in str_str
+
+class TestPromptBodies:
+    """Test cases for content-addressed prompt body storage"""
+    
+    def bodies(self, db_session):
+        return {body.hash: (body.body, body.ref_count) for body in db_session.query(PromptBody)}
+    
+    def test_identical_bodies_are_stored_once(self, db_session):
+        """Test that prompts with the same system prompt share one body row"""
+        for name in ('First', 'Second', 'Third'):
+            db_session.add(Prompt(name=name, system_prompt='  You are a shared assistant.  '))
+        db_session.add(Prompt(name='Other', system_prompt='You are a different assistant.'))
+        db_session.commit()
+        
+        shared_hash = hash_body('You are a shared assistant.')
+        bodies = self.bodies(db_session)
+        
+        assert len(bodies) == 2
+        assert bodies[shared_hash] == ('You are a shared assistant.', 3)
+        assert {prompt.body_hash for prompt in db_session.query(Prompt).filter(Prompt.name != 'Other')} == {shared_hash}
+    
+    def test_system_prompt_is_read_from_the_body_store(self, db_session, sample_prompt):
+        """Test that the body text is read back through the body store"""
+        db_session.expire_all()
+        
+        prompt = db_session.query(Prompt).filter(Prompt.id == sample_prompt.id).one()
+        
+        assert prompt.system_prompt == 'You are a helpful assistant for testing purposes.'
+    
+    def test_update_moves_reference(self, db_session, sample_prompt):
+        """Test that changing a body releases the old one and purges it when unused"""
+        old_hash = sample_prompt.body_hash
+        
+        sample_prompt.update_from_dict({'system_prompt': 'A brand new body.'})
+        db_session.commit()
+        
+        bodies = self.bodies(db_session)
+        assert old_hash not in bodies
+        assert bodies[hash_body('A brand new body.')] == ('A brand new body.', 1)
+        assert sample_prompt.body_hash == hash_body('A brand new body.')
+    
+    def test_update_without_body_change_keeps_count(self, db_session, sample_prompt):
+        """Test that updating other fields leaves reference counts alone"""
+        sample_prompt.update_from_dict({'description': 'Changed', 'system_prompt': sample_prompt.system_prompt})
+        db_session.commit()
+        
+        assert self.bodies(db_session)[sample_prompt.body_hash][1] == 1
+    
+    def test_delete_releases_body(self, db_session):
+        """Test that a shared body survives until its last prompt is deleted"""
+        first = Prompt(name='First', system_prompt='Shared body.')
+        second = Prompt(name='Second', system_prompt='Shared body.')
+        db_session.add_all([first, second])
+        db_session.commit()
+        
+        db_session.delete(first)
+        db_session.commit()
+        assert self.bodies(db_session)[hash_body('Shared body.')][1] == 1
+        
+        db_session.delete(second)
+        db_session.commit()
+        assert self.bodies(db_session) == {}
+
+class TestCompressedText:
+    """Test cases for compressed storage of system prompts and descriptions"""
+    
+    LONG_BODY = 'You review contracts clause by clause and flag every risk you find. ' * 30
+    LONG_DESCRIPTION = 'Checks each clause for liability, termination and payment terms. ' * 10
+    
+    @pytest.fixture
+    def compression(self, monkeypatch):
+        monkeypatch.setattr(backend.config.config, 'text_compression_enabled', True)
+        monkeypatch.setattr(backend.config.config, 'text_compression_min_bytes', 256)
+        return monkeypatch
+    
+    def storage(self, db_session):
+        return db_session.execute(text(
+            "SELECT p.name, typeof(b.body), typeof(p.description) FROM prompts p "
+            "JOIN prompt_bodies b ON b.hash = p.body_hash ORDER BY p.name"
+        )).fetchall()
+    
+    def test_large_text_is_stored_compressed(self, db_session, compression):
+        """Test that only values over the threshold are compressed and all read back as text"""
+        db_session.add(Prompt(name='Long', system_prompt=self.LONG_BODY, description=self.LONG_DESCRIPTION))
+        db_session.add(Prompt(name='Short', system_prompt='Be brief.', description='Short one'))
+        db_session.commit()
+        
+        assert self.storage(db_session) == [('Long', 'blob', 'blob'), ('Short', 'text', 'text')]
+        
+        db_session.expire_all()
+        prompt = db_session.query(Prompt).filter(Prompt.name == 'Long').one()
+        assert prompt.system_prompt == self.LONG_BODY.strip()
+        assert prompt.description == self.LONG_DESCRIPTION.strip()
+    
+    def test_compressed_text_readable_after_disabling(self, db_session, compression):
+        """Test that compressed rows stay readable and new writes are plain once disabled"""
+        prompt = Prompt(name='Long', system_prompt=self.LONG_BODY)
+        db_session.add(prompt)
+        db_session.commit()
+        
+        compression.setattr(backend.config.config, 'text_compression_enabled', False)
+        db_session.add(Prompt(name='Plain', system_prompt=self.LONG_BODY + ' Plainly.'))
+        db_session.commit()
+        db_session.expire_all()
+        
+        assert self.storage(db_session) == [('Long', 'blob', 'null'), ('Plain', 'text', 'null')]
+        assert db_session.query(Prompt).filter(Prompt.name == 'Long').one().system_prompt == self.LONG_BODY.strip()
+    
+    def test_system_prompt_is_deferred(self, db_session, sample_prompt):
+        """Test that the body is only loaded on access or when undeferred"""
+        db_session.expire_all()
+        
+        prompt = db_session.query(Prompt).filter(Prompt.id == sample_prompt.id).one()
+        assert 'system_prompt' not in inspect(prompt).dict
+        assert prompt.system_prompt == 'You are a helpful assistant for testing purposes.'
+        
+        db_session.expire_all()
+        prompt = db_session.query(Prompt).options(undefer(Prompt.system_prompt)).filter(Prompt.id == sample_prompt.id).one()
+        assert 'system_prompt' in inspect(prompt).dict
\ No newline at end of file
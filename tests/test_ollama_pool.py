@@ -0,0 +1,394 @@
+"""
+Unit tests for the Ollama backend pool
+Tests circuit breaking, load-based routing, model-aware routing and failover
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from backend.config import AppConfig
+from backend.services.ollama_pool import CircuitBreaker, OllamaPool, build_ollama_pool, reload_ollama_pool
+from backend.services.ollama_service import OllamaConnectionError, OllamaClientError, OllamaServiceRegistry
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_service(endpoint, models=None):
+    """Create a mock OllamaService whose test_prompt reports its endpoint"""
+    service = Mock()
+    service.endpoint = endpoint
+    service.test_prompt.side_effect = lambda system_prompt, user_input, model, temperature: {
+        'response': f'answer from {endpoint}',
+        'execution_time': 0.1,
+        'model': model or 'llama2',
+        'temperature': temperature
+    }
+    
+    def stream_test_prompt(system_prompt, user_input, model, temperature):
+        yield {'type': 'token', 'content': f'answer from {endpoint}'}
+        yield {'type': 'done', 'execution_time': 0.1}
+    
+    service.stream_test_prompt.side_effect = stream_test_prompt
+    tags = Mock()
+    tags.json.return_value = {'models': [{'name': name} for name in (models or ['llama2:latest'])]}
+    service._make_request.return_value = tags
+    return service
+
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker"""
+    
+    def test_opens_after_threshold(self):
+        """Test the circuit opens after consecutive failures"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=FakeClock())
+        
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.is_available() is False
+        assert breaker.acquire() is False
+    
+    def test_success_resets_failures(self):
+        """Test a success clears the consecutive failure count"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=FakeClock())
+        
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.failures == 1
+    
+    def test_half_open_allows_single_trial(self):
+        """Test only one trial request is let through after the reset timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        
+        clock.now += 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.acquire() is True
+        assert breaker.acquire() is False
+        assert breaker.is_available() is False
+        
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_failed_trial_reopens(self):
+        """Test a failed trial opens the circuit for another timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(3):
+            breaker.record_failure()
+        
+        clock.now += 10
+        assert breaker.acquire() is True
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now += 9
+        assert breaker.state == CircuitBreaker.OPEN
+
+
+class TestOllamaPool:
+    """Test cases for OllamaPool routing"""
+    
+    def test_requires_services(self):
+        """Test an empty pool is rejected"""
+        with pytest.raises(ValueError):
+            OllamaPool([])
+    
+    def test_rejects_unknown_strategy(self):
+        """Test an unknown routing strategy is rejected"""
+        with pytest.raises(ValueError):
+            OllamaPool([make_service('http://a:11434')], strategy='random')
+    
+    def test_least_outstanding_prefers_idle_backend(self):
+        """Test requests go to the backend with the fewest outstanding requests"""
+        pool = OllamaPool([make_service('http://a:11434'), make_service('http://b:11434')])
+        pool.backends[0].outstanding = 2
+        
+        result = pool.test_prompt('System', 'Hello')
+        
+        assert result['endpoint'] == 'http://b:11434'
+        assert pool.backends[1].outstanding == 0
+    
+    def test_ties_are_spread_across_backends(self):
+        """Test idle backends with equal scores take turns"""
+        pool = OllamaPool([make_service('http://a:11434'), make_service('http://b:11434')])
+        
+        endpoints = {pool.test_prompt('System', 'Hello')['endpoint'] for _ in range(2)}
+        
+        assert endpoints == {'http://a:11434', 'http://b:11434'}
+    
+    def test_latency_strategy_prefers_faster_backend(self):
+        """Test latency routing weights the moving average by load"""
+        pool = OllamaPool([make_service('http://a:11434'), make_service('http://b:11434')], strategy='latency')
+        pool.backends[0].latency = 4.0
+        pool.backends[1].latency = 1.0
+        
+        assert pool.test_prompt('System', 'Hello')['endpoint'] == 'http://b:11434'
+        
+        pool.backends[1].latency = 1.0
+        pool.backends[1].outstanding = 4
+        assert pool.test_prompt('System', 'Hello')['endpoint'] == 'http://a:11434'
+    
+    def test_failover_to_next_backend(self):
+        """Test a failed request is retried on another backend"""
+        failing = make_service('http://a:11434')
+        failing.test_prompt.side_effect = OllamaConnectionError("Failed to connect")
+        pool = OllamaPool([failing, make_service('http://b:11434')])
+        pool.backends[1].outstanding = 1
+        
+        result = pool.test_prompt('System', 'Hello')
+        
+        assert result['endpoint'] == 'http://b:11434'
+        assert pool.backends[0].breaker.failures == 1
+        assert pool.backends[1].outstanding == 1
+    
+    def test_open_circuit_is_skipped(self):
+        """Test backends with an open circuit are taken out of rotation"""
+        first = make_service('http://a:11434')
+        pool = OllamaPool([first, make_service('http://b:11434')], failure_threshold=1)
+        pool.backends[0].breaker.record_failure()
+        
+        for _ in range(3):
+            assert pool.test_prompt('System', 'Hello')['endpoint'] == 'http://b:11434'
+        first.test_prompt.assert_not_called()
+    
+    def test_all_backends_failing_raises(self):
+        """Test the last error is raised once every backend failed"""
+        services = [make_service('http://a:11434'), make_service('http://b:11434')]
+        for service in services:
+            service.test_prompt.side_effect = OllamaConnectionError("Failed to connect")
+        pool = OllamaPool(services)
+        
+        with pytest.raises(OllamaConnectionError):
+            pool.test_prompt('System', 'Hello')
+        
+        assert all(backend.outstanding == 0 for backend in pool.backends)
+    
+    def test_client_error_is_not_retried(self):
+        """Test a request Ollama rejects is raised at once without tripping the breaker"""
+        rejecting = make_service('http://a:11434')
+        rejecting.test_prompt.side_effect = OllamaClientError("Ollama API error: 404 - model 'nope' not found")
+        other = make_service('http://b:11434')
+        pool = OllamaPool([rejecting, other], failure_threshold=1)
+        pool.backends[1].outstanding = 1
+        
+        with pytest.raises(OllamaClientError):
+            pool.test_prompt('System', 'Hello', model='nope')
+        
+        other.test_prompt.assert_not_called()
+        assert pool.backends[0].breaker.state == CircuitBreaker.CLOSED
+        assert pool.backends[0].breaker.failures == 0
+        assert pool.backends[0].outstanding == 0
+    
+    def test_stream_fails_over_before_first_event(self):
+        """Test a stream that fails to start moves to another backend and holds it until finished"""
+        failing = make_service('http://a:11434')
+        failing.stream_test_prompt.side_effect = OllamaConnectionError("Failed to connect")
+        pool = OllamaPool([failing, make_service('http://b:11434')])
+        
+        events = pool.stream_test_prompt('System', 'Hello')
+        
+        assert next(events) == {'type': 'token', 'content': 'answer from http://b:11434'}
+        assert pool.backends[0].breaker.failures == 1
+        assert pool.backends[1].outstanding == 1
+        assert next(events)['endpoint'] == 'http://b:11434'
+        assert list(events) == []
+        assert pool.backends[1].outstanding == 0
+    
+    def test_stream_interrupted_after_first_event(self):
+        """Test a stream that fails after producing output is not retried elsewhere"""
+        def interrupted(system_prompt, user_input, model, temperature):
+            yield {'type': 'token', 'content': 'partial'}
+            raise OllamaConnectionError("Stream from Ollama was interrupted")
+        
+        first = make_service('http://a:11434')
+        first.stream_test_prompt.side_effect = interrupted
+        second = make_service('http://b:11434')
+        pool = OllamaPool([first, second])
+        pool.backends[1].outstanding = 1
+        
+        events = pool.stream_test_prompt('System', 'Hello')
+        assert next(events)['content'] == 'partial'
+        with pytest.raises(OllamaConnectionError):
+            next(events)
+        
+        second.stream_test_prompt.assert_not_called()
+        assert pool.backends[0].breaker.failures == 1
+        assert pool.backends[0].outstanding == 0
+    
+    def test_routes_when_every_circuit_is_open(self):
+        """Test a single unhealthy backend is still tried instead of failing outright"""
+        service = make_service('http://a:11434')
+        pool = OllamaPool([service], failure_threshold=1)
+        pool.backends[0].breaker.record_failure()
+        
+        result = pool.test_prompt('System', 'Hello')
+        
+        assert result['endpoint'] == 'http://a:11434'
+        assert pool.backends[0].breaker.state == CircuitBreaker.CLOSED
+    
+    def test_backend_refused_by_breaker_is_skipped(self):
+        """Test a backend whose breaker refuses the request is passed over for the next choice"""
+        pool = OllamaPool([make_service('http://a:11434'), make_service('http://b:11434')])
+        pool.backends[1].outstanding = 3
+        
+        with patch.object(pool.backends[0].breaker, 'acquire', return_value=False):
+            assert pool.test_prompt('System', 'Hello')['endpoint'] == 'http://b:11434'
+    
+    def test_bypassed_request_keeps_trial_claim(self):
+        """Test a request routed past a taken half-open trial does not free that trial"""
+        clock = FakeClock()
+        service = make_service('http://a:11434')
+        service.test_prompt.side_effect = RuntimeError("boom")
+        pool = OllamaPool([service], failure_threshold=1, reset_timeout=10)
+        breaker = pool.backends[0].breaker
+        breaker._clock = clock
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.acquire() is True
+        
+        with pytest.raises(RuntimeError):
+            pool.test_prompt('System', 'Hello')
+        
+        assert breaker.is_available() is False
+    
+    def test_model_aware_routing(self):
+        """Test requests go to a backend whose model listing has the model"""
+        pool = OllamaPool([
+            make_service('http://a:11434', models=['mistral:latest']),
+            make_service('http://b:11434', models=['llama2:latest', 'codellama:7b'])
+        ])
+        pool.refresh_models()
+        
+        for _ in range(3):
+            assert pool.test_prompt('System', 'Hello', model='llama2')['endpoint'] == 'http://b:11434'
+        assert pool.test_prompt('System', 'Hello', model='mistral')['endpoint'] == 'http://a:11434'
+        assert pool.get_status()[1]['models'] == ['codellama:7b', 'llama2:latest']
+    
+    def test_unlisted_model_uses_any_backend(self):
+        """Test a model no backend lists is still routed"""
+        pool = OllamaPool([
+            make_service('http://a:11434', models=['mistral:latest']),
+            make_service('http://b:11434', models=['llama2:latest'])
+        ])
+        pool.refresh_models()
+        
+        result = pool.test_prompt('System', 'Hello', model='phi3')
+        
+        assert result['endpoint'] in ('http://a:11434', 'http://b:11434')
+    
+    def test_model_listing_refreshed_off_request_path(self):
+        """Test a slow /api/tags never holds up routing"""
+        listing_requested = threading.Event()
+        unblock = threading.Event()
+        services = [make_service('http://a:11434'), make_service('http://b:11434')]
+        
+        def slow_tags(*args, **kwargs):
+            listing_requested.set()
+            unblock.wait(5)
+            raise OllamaConnectionError("unreachable")
+        
+        for service in services:
+            service._make_request.side_effect = slow_tags
+        pool = OllamaPool(services)
+        
+        result = pool.test_prompt('System', 'Hello', model='llama2')
+        
+        assert result['response'].startswith('answer from')
+        assert listing_requested.wait(5)
+        assert all(backend.models is None for backend in pool.backends)
+        unblock.set()
+    
+    def test_chat_sticks_to_preferred_endpoint(self):
+        """Test chat turns return to the endpoint that served the conversation"""
+        services = [make_service('http://a:11434'), make_service('http://b:11434')]
+        for service in services:
+            service.chat.return_value = {'message': 'Hi', 'execution_time': 0.1}
+        pool = OllamaPool(services)
+        pool.backends[1].outstanding = 3
+        
+        result = pool.chat([{'role': 'user', 'content': 'Hi'}], endpoint='http://b:11434')
+        
+        assert result['endpoint'] == 'http://b:11434'
+        services[0].chat.assert_not_called()
+    
+    def test_chat_leaves_unhealthy_preferred_endpoint(self):
+        """Test a conversation moves on when its endpoint's circuit is open"""
+        services = [make_service('http://a:11434'), make_service('http://b:11434')]
+        for service in services:
+            service.chat.return_value = {'message': 'Hi', 'execution_time': 0.1}
+        pool = OllamaPool(services, failure_threshold=1)
+        pool.backends[1].breaker.record_failure()
+        
+        result = pool.chat([{'role': 'user', 'content': 'Hi'}], endpoint='http://b:11434')
+        
+        assert result['endpoint'] == 'http://a:11434'
+    
+    def test_refine_prompt_routed(self):
+        """Test refinement goes through the pool"""
+        service = make_service('http://a:11434')
+        service.refine_prompt.return_value = 'Refined prompt'
+        pool = OllamaPool([service])
+        
+        assert pool.refine_prompt('Objective', 'llama2') == 'Refined prompt'
+        service.refine_prompt.assert_called_once_with('Objective', 'llama2')
+    
+    def test_build_pool_from_config(self):
+        """Test the pool has one backend per distinct configured endpoint"""
+        app_config = AppConfig(
+            ollama_endpoint='http://a:11434',
+            ollama_endpoints=['http://b:11434', 'http://a:11434/'],
+            ollama_routing_strategy='latency'
+        )
+        registry = OllamaServiceRegistry(max_instances=1)
+        
+        with patch('backend.services.ollama_pool.ollama_services', registry):
+            pool = build_ollama_pool(app_config)
+        
+        assert [backend.endpoint for backend in pool.backends] == ['http://a:11434', 'http://b:11434']
+        assert pool.strategy == 'latency'
+        assert sorted(registry.endpoints()) == ['http://a:11434', 'http://b:11434']
+        registry.close_all()
+    
+    def test_reconfigure_keeps_surviving_backends(self):
+        """Test reconfiguring keeps state for endpoints that stay in the pool"""
+        services = [make_service('http://a:11434'), make_service('http://b:11434')]
+        pool = OllamaPool(services, failure_threshold=1)
+        pool.backends[1].breaker.record_failure()
+        kept = pool.backends[1]
+        
+        pool.reconfigure([services[1], make_service('http://c:11434')], strategy='latency',
+                         failure_threshold=5, reset_timeout=10)
+        
+        assert [backend.endpoint for backend in pool.backends] == ['http://b:11434', 'http://c:11434']
+        assert pool.backends[0] is kept
+        assert kept.breaker.state == CircuitBreaker.OPEN
+        assert all(backend.breaker.failure_threshold == 5 for backend in pool.backends)
+        assert pool.strategy == 'latency'
+    
+    def test_reload_reconfigures_global_pool_in_place(self):
+        """Test reloading updates the pool other modules already imported"""
+        pool = OllamaPool([make_service('http://a:11434')])
+        registry = OllamaServiceRegistry()
+        app_config = AppConfig(ollama_endpoint='http://a:11434', ollama_endpoints=['http://b:11434'])
+        
+        with patch('backend.services.ollama_pool.ollama_pool', pool), \
+             patch('backend.services.ollama_pool.ollama_services', registry):
+            assert reload_ollama_pool(app_config) is pool
+        
+        assert [backend.endpoint for backend in pool.backends] == ['http://a:11434', 'http://b:11434']
+        registry.close_all()
@@ -3,12 +3,17 @@ Integration tests for Ollama service
 Tests Ollama communication, prompt refinement, and testing workflows
 """
 
+import gc
 import pytest
 import requests
 import json
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
-from backend.services.ollama_service import OllamaService, OllamaConnectionError, OllamaTimeoutError
+from backend.services.ollama_service import (
+    OllamaService, OllamaServiceRegistry, OllamaConnectionError, OllamaTimeoutError, OllamaClientError,
+    parse_generation_stats
+)
+from backend.services.response_cache import ResponseCache
 
 
 class TestOllamaService:
@@ -68,6 +73,22 @@ class TestOllamaService:
         assert "Request timed out" in str(exc_info.value)
         assert mock_request.call_count == ollama_service.max_retries
     
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_make_request_records_metrics(self, mock_request, ollama_service):
+        """Test that timeouts and retries are counted in the metrics registry"""
+        from backend.services import metrics
+        timeouts_before = metrics.ollama_timeouts.get(path='api/tags')
+        retries_before = metrics.ollama_retries.get(path='api/tags')
+        calls_before = metrics.ollama_request_duration.get_count(method='GET', path='api/tags', outcome='timeout')
+        mock_request.side_effect = requests.exceptions.Timeout("Timeout")
+        
+        with pytest.raises(OllamaTimeoutError):
+            ollama_service._make_request('GET', 'api/tags')
+        
+        assert metrics.ollama_timeouts.get(path='api/tags') == timeouts_before + ollama_service.max_retries
+        assert metrics.ollama_retries.get(path='api/tags') == retries_before + ollama_service.max_retries - 1
+        assert metrics.ollama_request_duration.get_count(method='GET', path='api/tags', outcome='timeout') == calls_before + 1
+    
     @patch('backend.services.ollama_service.requests.Session.request')
     def test_make_request_connection_error_retry(self, mock_request, ollama_service):
         """Test connection error with retry logic"""
@@ -102,7 +123,7 @@ class TestOllamaService:
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
         mock_request.return_value = mock_response
         
-        with pytest.raises(OllamaConnectionError) as exc_info:
+        with pytest.raises(OllamaClientError) as exc_info:
             ollama_service._make_request('GET', 'api/tags')
         
         assert "Ollama API error: 404" in str(exc_info.value)
@@ -293,6 +314,100 @@ class TestOllamaService:
         
         assert "empty response" in str(exc_info.value)
     
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_test_prompt_includes_generation_stats(self, mock_request, ollama_service, mock_response):
+        """Test Ollama's token counts and timings are returned with the result"""
+        mock_response.json.return_value = {
+            'response': 'Hi there!',
+            'done': True,
+            'prompt_eval_count': 26,
+            'prompt_eval_duration': 130000000,
+            'eval_count': 40,
+            'eval_duration': 2000000000,
+            'load_duration': 500000000,
+            'total_duration': 2700000000
+        }
+        mock_request.return_value = mock_response
+        
+        result = ollama_service.test_prompt("System prompt", "User input")
+        
+        assert result['stats']['prompt_tokens'] == 26
+        assert result['stats']['completion_tokens'] == 40
+        assert result['stats']['tokens_per_second'] == 20.0
+        assert result['stats']['prompt_tokens_per_second'] == 200.0
+        assert result['stats']['load_time'] == 0.5
+        assert result['stats']['prompt_eval_time'] == 0.13
+        assert result['stats']['total_time'] == 2.7
+        assert mock_request.call_args[1]['json']['keep_alive'] == '5m'
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_chat_sends_system_message_and_keep_alive(self, mock_request, ollama_service, mock_response):
+        """Test chat posts the conversation to api/chat with keep_alive"""
+        mock_response.json.return_value = {
+            'message': {'role': 'assistant', 'content': 'Ahoy!'},
+            'done': True,
+            'prompt_eval_count': 3,
+            'eval_count': 4
+        }
+        mock_request.return_value = mock_response
+        messages = [
+            {'role': 'system', 'content': 'You are a pirate.'},
+            {'role': 'user', 'content': 'Hello'}
+        ]
+        
+        result = ollama_service.chat(messages, model='llama2', keep_alive='-1')
+        
+        assert result['message'] == 'Ahoy!'
+        assert result['stats']['prompt_tokens'] == 3
+        url = mock_request.call_args[0][1]
+        request_data = mock_request.call_args[1]['json']
+        assert url.endswith('/api/chat')
+        assert request_data['messages'] == messages
+        assert request_data['keep_alive'] == -1
+        assert request_data['stream'] is False
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_chat_empty_response(self, mock_request, ollama_service, mock_response):
+        """Test chat with an empty assistant message"""
+        mock_response.json.return_value = {'message': {'role': 'assistant', 'content': ''}, 'done': True}
+        mock_request.return_value = mock_response
+        
+        with pytest.raises(OllamaConnectionError):
+            ollama_service.chat([{'role': 'user', 'content': 'Hello'}])
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_embed(self, mock_request, ollama_service, mock_response):
+        """Test embed posts every text in one api/embed request"""
+        mock_response.json.return_value = {'model': 'nomic-embed-text', 'embeddings': [[0.1, 0.2], [0.3, 0.4]]}
+        mock_request.return_value = mock_response
+        
+        embeddings = ollama_service.embed(['first', 'second'], model='nomic-embed-text')
+        
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4]]
+        url = mock_request.call_args[0][1]
+        request_data = mock_request.call_args[1]['json']
+        assert url.endswith('/api/embed')
+        assert request_data['input'] == ['first', 'second']
+        assert request_data['model'] == 'nomic-embed-text'
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_embed_count_mismatch(self, mock_request, ollama_service, mock_response):
+        """Test embed fails when Ollama returns the wrong number of vectors"""
+        mock_response.json.return_value = {'embeddings': [[0.1, 0.2]]}
+        mock_request.return_value = mock_response
+        
+        with pytest.raises(OllamaConnectionError):
+            ollama_service.embed(['first', 'second'])
+    
+    def test_parse_generation_stats_missing_fields(self):
+        """Test stats Ollama did not report are None"""
+        stats = parse_generation_stats({'response': 'Hi', 'done': True})
+        
+        assert stats['completion_tokens'] is None
+        assert stats['tokens_per_second'] is None
+        assert stats['prompt_tokens_per_second'] is None
+        assert stats['load_time'] is None
+    
     @patch('backend.services.ollama_service.requests.Session.request')
     def test_test_prompt_with_custom_parameters(self, mock_request, ollama_service, mock_response):
         """Test prompt testing with custom model and temperature"""
@@ -328,6 +443,90 @@ class TestOllamaService:
         with pytest.raises(OllamaTimeoutError):
             ollama_service.test_prompt("System prompt", "User input")
 
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_stream_test_prompt_yields_tokens_and_stats(self, mock_request, ollama_service, mock_response):
+        """Test streaming prompt test relays chunks and reports final statistics"""
+        mock_response.iter_lines.return_value = [
+            json.dumps({'response': 'Hello', 'done': False}).encode(),
+            b'',
+            json.dumps({'response': ' there', 'done': False}).encode(),
+            json.dumps({'response': '', 'done': True, 'eval_count': 10, 'eval_duration': 2000000000}).encode()
+        ]
+        mock_request.return_value = mock_response
+        
+        events = list(ollama_service.stream_test_prompt("System prompt", "User input"))
+        
+        assert [e['content'] for e in events if e['type'] == 'token'] == ['Hello', ' there']
+        done = events[-1]
+        assert done['type'] == 'done'
+        assert done['tokens_per_second'] == 5.0
+        assert done['time_to_first_token'] >= 0
+        
+        call_args = mock_request.call_args
+        assert call_args[1]['json']['stream'] is True
+        assert call_args[1]['stream'] is True
+        mock_response.close.assert_called_once()
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_stream_test_prompt_empty_response(self, mock_request, ollama_service, mock_response):
+        """Test streaming prompt test with no generated text"""
+        mock_response.iter_lines.return_value = [json.dumps({'response': '', 'done': True}).encode()]
+        mock_request.return_value = mock_response
+        
+        with pytest.raises(OllamaConnectionError) as exc_info:
+            list(ollama_service.stream_test_prompt("System prompt", "User input"))
+        
+        assert "empty response" in str(exc_info.value)
+
+
+class TestOllamaServiceResponseCache:
+    """Test response caching of deterministic prompt tests"""
+    
+    @pytest.fixture
+    def service(self):
+        """Create OllamaService instance with an in-memory response cache"""
+        return OllamaService(endpoint="http://localhost:11434", max_retries=1, response_cache=ResponseCache())
+    
+    @staticmethod
+    def _responses(*payloads):
+        responses = []
+        for payload in payloads:
+            mock_resp = Mock(status_code=200)
+            mock_resp.json.return_value = payload
+            mock_resp.raise_for_status = Mock()
+            responses.append(mock_resp)
+        return responses
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_zero_temperature_result_is_cached(self, mock_request, service):
+        """Test a repeated temperature 0 test is served from cache"""
+        mock_request.side_effect = self._responses(
+            {'models': [{'name': 'llama2:latest', 'digest': 'sha256:abc'}]},
+            {'response': 'Deterministic answer'}
+        )
+        
+        first = service.test_prompt("System prompt", "User input", model="llama2", temperature=0)
+        second = service.test_prompt("System prompt", "User input", model="llama2", temperature=0)
+        
+        assert 'cached' not in first
+        assert second['cached'] is True
+        assert second['response'] == 'Deterministic answer'
+        assert second['original_execution_time'] == first['execution_time']
+        assert mock_request.call_count == 2  # tags + one generation
+    
+    @patch('backend.services.ollama_service.requests.Session.request')
+    def test_nonzero_temperature_bypasses_cache(self, mock_request, service):
+        """Test sampled generations are never cached"""
+        mock_request.side_effect = self._responses({'response': 'One'}, {'response': 'Two'})
+        
+        service.test_prompt("System prompt", "User input", model="llama2", temperature=0.7)
+        result = service.test_prompt("System prompt", "User input", model="llama2", temperature=0.7)
+        
+        assert result['response'] == 'Two'
+        assert 'cached' not in result
+        assert mock_request.call_count == 2
+
 
 class TestOllamaServiceIntegration:
     """Integration tests that test the complete workflow"""
@@ -555,4 +754,77 @@ class TestOllamaServiceCaching:
         assert cache_info['cache_age_seconds'] >= 0
         assert cache_info['cache_valid'] is True
         assert cache_info['models_count'] == 2
-        assert cache_info['cache_duration_seconds'] == service.cache_duration
\ No newline at end of file
+        assert cache_info['cache_duration_seconds'] == service.cache_duration
+
+
+class TestOllamaServiceRegistry:
+    """Test cases for the shared per-endpoint service registry"""
+    
+    @pytest.fixture
+    def registry(self):
+        """Create a small registry for testing"""
+        registry = OllamaServiceRegistry(max_instances=2)
+        yield registry
+        registry.close_all()
+    
+    def test_same_instance_per_endpoint(self, registry):
+        """Test that repeated lookups share one service"""
+        first = registry.get("http://localhost:11434")
+        second = registry.get("http://localhost:11434/")
+        
+        assert first is second
+        assert registry.endpoints() == ["http://localhost:11434"]
+    
+    def test_distinct_endpoints(self, registry):
+        """Test that different endpoints get different services"""
+        first = registry.get("http://localhost:11434")
+        second = registry.get("http://remote:11434")
+        
+        assert first is not second
+        assert second.endpoint == "http://remote:11434"
+    
+    def test_least_recently_used_is_evicted(self, registry):
+        """Test that the oldest unpinned service is dropped, not closed, when the registry is full"""
+        first = registry.get("http://a:11434")
+        registry.get("http://b:11434")
+        registry.get("http://a:11434")
+        
+        with patch.object(OllamaService, 'close') as mock_close:
+            registry.get("http://c:11434")
+        
+        assert registry.endpoints() == ["http://a:11434", "http://c:11434"]
+        assert registry.get("http://a:11434") is first
+        mock_close.assert_not_called()
+    
+    def test_evicted_service_closed_once_released(self, registry):
+        """Test that an evicted service stays usable until its last user drops it"""
+        with patch.object(requests.Session, 'close') as mock_close:
+            in_use = registry.get("http://a:11434")
+            registry.get("http://b:11434")
+            registry.get("http://c:11434")
+            
+            assert "http://a:11434" not in registry.endpoints()
+            mock_close.assert_not_called()
+            
+            del in_use
+            gc.collect()
+            mock_close.assert_called_once()
+    
+    def test_pinned_service_is_not_evicted(self, registry):
+        """Test that registered services survive eviction"""
+        default = registry.register(OllamaService(endpoint="http://default:11434"))
+        registry.get("http://a:11434")
+        registry.get("http://b:11434")
+        
+        assert "http://a:11434" not in registry.endpoints()
+        assert registry.get("http://default:11434") is default
+    
+    def test_close_all(self, registry):
+        """Test that close_all closes and forgets every service"""
+        service = registry.get("http://localhost:11434")
+        
+        with patch.object(service, 'close') as mock_close:
+            registry.close_all()
+        
+        mock_close.assert_called_once()
+        assert registry.endpoints() == []
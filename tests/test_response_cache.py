@@ -0,0 +1,141 @@
+"""
+Unit tests for the prompt test response cache
+Tests key construction, LRU and TTL eviction, size caps, and the SQLite tier
+"""
+
+import os
+import sqlite3
+import tempfile
+import pytest
+from unittest.mock import patch
+from backend.services.response_cache import ResponseCache
+
+
+@pytest.fixture
+def persist_path():
+    """Temporary SQLite file for the persistent tier"""
+    db_fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(db_fd)
+    os.unlink(db_path)
+    yield db_path
+    try:
+        os.unlink(db_path)
+    except (OSError, PermissionError):
+        pass
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache"""
+    
+    def test_make_key_depends_on_every_component(self):
+        """Test keys change with model, digest, prompt, input and options"""
+        base = ResponseCache.make_key('llama2', 'sha256:a', 'System', 'Hi', {'temperature': 0})
+        
+        assert base == ResponseCache.make_key('llama2', 'sha256:a', 'System', 'Hi', {'temperature': 0})
+        assert base != ResponseCache.make_key('llama2', 'sha256:b', 'System', 'Hi', {'temperature': 0})
+        assert base != ResponseCache.make_key('llama2', 'sha256:a', 'System', 'Hello', {'temperature': 0})
+        assert base != ResponseCache.make_key('llama2', 'sha256:a', 'System', 'Hi', {'temperature': 0, 'top_p': 0.5})
+    
+    def test_get_and_set(self):
+        """Test stored values are returned and counted as hits"""
+        cache = ResponseCache()
+        assert cache.get('key') is None
+        
+        cache.set('key', {'response': 'Hello', 'execution_time': 1.2})
+        
+        assert cache.get('key') == {'response': 'Hello', 'execution_time': 1.2}
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+    
+    def test_lru_eviction_by_size(self):
+        """Test least recently used entries are evicted past the byte cap"""
+        cache = ResponseCache(max_bytes=120)
+        cache.set('a', {'response': 'x' * 30})
+        cache.set('b', {'response': 'y' * 30})
+        cache.get('a')  # Mark 'a' as recently used
+        cache.set('c', {'response': 'z' * 30})
+        
+        assert cache.get('a') is not None
+        assert cache.get('b') is None
+        assert cache.get('c') is not None
+        assert cache.get_stats()['size_bytes'] <= 120
+    
+    def test_oversized_entry_not_cached(self):
+        """Test entries larger than the cap are skipped"""
+        cache = ResponseCache(max_bytes=10)
+        cache.set('big', {'response': 'x' * 100})
+        assert cache.get('big') is None
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = ResponseCache(ttl=60)
+        with patch('backend.services.response_cache.time.time', return_value=1000.0):
+            cache.set('key', {'response': 'Hello'})
+        with patch('backend.services.response_cache.time.time', return_value=1059.0):
+            assert cache.get('key') is not None
+        with patch('backend.services.response_cache.time.time', return_value=1061.0):
+            assert cache.get('key') is None
+        assert cache.get_stats()['entries'] == 0
+    
+    def test_persistent_tier_survives_restart(self, persist_path):
+        """Test entries written to SQLite are visible to a new cache instance"""
+        cache = ResponseCache(persist_path=persist_path)
+        cache.set('key', {'response': 'Persisted'})
+        cache.close()
+        
+        reopened = ResponseCache(persist_path=persist_path)
+        assert reopened.get('key') == {'response': 'Persisted'}
+        assert reopened.get_stats()['entries'] == 1  # Promoted into memory
+        reopened.close()
+    
+    def test_persistent_tier_evicts_least_recently_used(self, persist_path):
+        """Test the SQLite tier keeps entries that are hit over newer but idle ones"""
+        cache = ResponseCache(max_bytes=120, persist_path=persist_path)
+        for now, action in enumerate([lambda: cache.set('a', {'response': 'x' * 30}),
+                                      lambda: cache.set('b', {'response': 'y' * 30}),
+                                      lambda: cache.get('a'),
+                                      lambda: cache.set('c', {'response': 'z' * 30})]):
+            with patch('backend.services.response_cache.time.time', return_value=1000.0 + now):
+                action()
+        cache.close()
+        
+        db = sqlite3.connect(persist_path)
+        try:
+            keys = {row[0] for row in db.execute("SELECT key FROM response_cache")}
+        finally:
+            db.close()
+        assert keys == {'a', 'c'}
+    
+    def test_persistent_tier_upgrades_old_files(self, persist_path):
+        """Test cache files without last_used get it from created_at"""
+        db = sqlite3.connect(persist_path)
+        db.execute(
+            "CREATE TABLE response_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        db.execute("INSERT INTO response_cache VALUES ('key', '{\"response\": \"Old\"}', 19, 500.0, 9e12)")
+        db.commit()
+        db.close()
+        
+        ResponseCache(persist_path=persist_path).close()
+        
+        db = sqlite3.connect(persist_path)
+        try:
+            assert db.execute("SELECT last_used FROM response_cache").fetchone()[0] == 500.0
+        finally:
+            db.close()
+        cache = ResponseCache(persist_path=persist_path)
+        assert cache.get('key') == {'response': 'Old'}
+        cache.close()
+    
+    def test_clear_empties_both_tiers(self, persist_path):
+        """Test clear removes memory and persistent entries"""
+        cache = ResponseCache(persist_path=persist_path)
+        cache.set('key', {'response': 'Hello'})
+        cache.clear()
+        
+        assert cache.get('key') is None
+        assert cache.get_stats()['persistent_entries'] == 0
+        cache.close()
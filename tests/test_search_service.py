@@ -0,0 +1,139 @@
+"""
+Unit tests for the prompt library full-text search index
+Tests index synchronization, ranking, prefix matching, and snippet formatting
+"""
+
+import pytest
+from sqlalchemy import text
+from backend.config import config
+from backend.models.prompt import Prompt
+from backend.models.prompt_body import hash_body, acquire_bodies
+from backend.services.search_service import (
+    FTS_TABLE,
+    init_search_index,
+    index_prompts,
+    build_match_query,
+    search_prompts,
+    format_snippet
+)
+
+
+@pytest.fixture
+def search_session(test_db):
+    """Database session with the FTS5 index initialized"""
+    TestSessionLocal, engine = test_db
+    assert init_search_index(engine) is True
+    session = TestSessionLocal()
+    yield session
+    session.close()
+
+
+def add_prompt(session, name, system_prompt, description=None):
+    """Create and commit a prompt"""
+    prompt = Prompt(name=name, system_prompt=system_prompt, description=description)
+    session.add(prompt)
+    session.commit()
+    return prompt
+
+
+class TestSearchService:
+    """Test cases for full-text search"""
+    
+    def test_build_match_query_quotes_tokens(self):
+        """Test user input becomes quoted prefix terms"""
+        assert build_match_query('legal docs') == '"legal"* "docs"*'
+        assert build_match_query('name: OR "x"') == '"name"* "OR"* "x"*'
+        assert build_match_query('  !!! ') is None
+    
+    def test_search_matches_system_prompt(self, search_session):
+        """Test body text is searchable, not just name and description"""
+        add_prompt(search_session, 'Reviewer', 'You review pull requests carefully.')
+        add_prompt(search_session, 'Writer', 'You write documentation.')
+        
+        results = search_prompts(search_session, 'pull').all()
+        
+        assert [prompt.name for prompt, snippet in results] == ['Reviewer']
+    
+    def test_search_prefix_and_ranking(self, search_session):
+        """Test prefix matching and that name matches rank above body matches"""
+        add_prompt(search_session, 'Generic Helper', 'You help with summarization tasks.')
+        add_prompt(search_session, 'Summary Writer', 'You write things.')
+        
+        results = search_prompts(search_session, 'summ').all()
+        
+        assert [prompt.name for prompt, snippet in results] == ['Summary Writer', 'Generic Helper']
+    
+    def test_index_follows_updates_and_deletes(self, search_session):
+        """Test ORM writes keep the index in sync"""
+        prompt = add_prompt(search_session, 'Original', 'Talk like a pirate.')
+        
+        prompt.update_from_dict({'system_prompt': 'Talk like a robot.'})
+        search_session.commit()
+        assert search_prompts(search_session, 'pirate').all() == []
+        assert len(search_prompts(search_session, 'robot').all()) == 1
+        
+        search_session.delete(prompt)
+        search_session.commit()
+        assert search_prompts(search_session, 'robot').all() == []
+    
+    def test_init_backfills_existing_rows(self, test_db):
+        """Test prompts created before the index existed are indexed"""
+        TestSessionLocal, engine = test_db
+        session = TestSessionLocal()
+        add_prompt(session, 'Legacy', 'Existing prompt body.')
+        
+        init_search_index(engine)
+        
+        assert len(search_prompts(session, 'legacy').all()) == 1
+        session.close()
+    
+    def test_reindex_after_bulk_insert(self, search_session):
+        """Test rows written without ORM events are indexed on request"""
+        bodies = [(hash_body(body), body) for body in ('Translate to Klingon.', 'Speak Elvish.')]
+        acquire_bodies(search_session.connection(), bodies)
+        search_session.execute(Prompt.__table__.insert(), [
+            {'name': 'Bulk One', 'body_hash': bodies[0][0], 'model': 'llama2', 'temperature': 0.7},
+            {'name': 'Bulk Two', 'body_hash': bodies[1][0], 'model': 'llama2', 'temperature': 0.7}
+        ])
+        assert search_prompts(search_session, 'klingon').all() == []
+        
+        ids = [prompt_id for (prompt_id,) in search_session.query(Prompt.id)]
+        index_prompts(search_session.connection(), ids)
+        search_session.commit()
+        
+        assert [prompt.name for prompt, snippet in search_prompts(search_session, 'klingon')] == ['Bulk One']
+        assert len(search_prompts(search_session, 'bulk').all()) == 2
+    
+    def test_index_reads_compressed_text(self, search_session, monkeypatch):
+        """Test the index stores no text of its own and snippets come from compressed bodies"""
+        monkeypatch.setattr(config, 'text_compression_enabled', True)
+        monkeypatch.setattr(config, 'text_compression_min_bytes', 16)
+        body = 'You answer questions about astronomy. ' * 20
+        add_prompt(search_session, 'Stargazer', body, description='Answers astronomy questions. ' * 5)
+        
+        tables = {name for (name,) in search_session.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        assert f'{FTS_TABLE}_content' not in tables
+        
+        [(prompt, snippet)] = search_prompts(search_session, 'astronomy').all()
+        assert prompt.name == 'Stargazer'
+        assert '<mark>astronomy</mark>' in format_snippet(snippet)
+    
+    def test_init_replaces_self_contained_index(self, test_db):
+        """Test an index holding its own copy of the text is rebuilt as external content"""
+        TestSessionLocal, engine = test_db
+        session = TestSessionLocal()
+        add_prompt(session, 'Legacy', 'Existing prompt body.')
+        session.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, description, system_prompt)"))
+        session.commit()
+        
+        assert init_search_index(engine) is True
+        
+        tables = {name for (name,) in session.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        assert f'{FTS_TABLE}_content' not in tables
+        assert len(search_prompts(session, 'existing').all()) == 1
+        session.close()
+    
+    def test_format_snippet_escapes_html(self):
+        """Test snippets are HTML-escaped with matches wrapped in mark tags"""
+        assert format_snippet('\x02Test\x03 <b>') == '<mark>Test</mark> &lt;b&gt;'
+        assert format_snippet(None) is None
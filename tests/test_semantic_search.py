@@ -0,0 +1,185 @@
+"""
+Tests for semantic prompt search
+Tests vector scoring, incremental embedding sync and the semantic search endpoint
+"""
+
+import math
+import pytest
+from unittest.mock import patch
+from backend.config import config
+from backend.database import get_db_session, close_db_session
+from backend.models.prompt_embedding import PromptEmbedding
+from backend.services.ollama_service import OllamaConnectionError
+from backend.services.semantic_search import (
+    VectorIndex, pack_vector, unpack_vector, sync_embeddings
+)
+
+VOCABULARY = ('legal', 'contract', 'summar', 'code', 'python', 'review', 'pirate', 'poem')
+
+
+class FakeEmbedder:
+    """Stand-in for OllamaPool.embed that counts vocabulary stems"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def embed(self, texts, model=None):
+        self.calls.append(list(texts))
+        return [[text.lower().count(stem) + 0.01 for stem in VOCABULARY] for text in texts]
+
+
+@pytest.fixture
+def session(app):
+    """Open a database session on the test database"""
+    session = get_db_session()
+    yield session
+    close_db_session(session)
+
+
+def create_prompts(client):
+    prompts = {}
+    for name, description, system_prompt in (
+        ('Contract Summary', 'Summarise legal contracts', 'You summarise legal contracts for busy lawyers.'),
+        ('Code Review', 'Review Python code', 'You review Python code and point out bugs.'),
+        ('Pirate', None, 'You answer every question like a pirate.'),
+    ):
+        response = client.post('/api/prompts', json={
+            'name': name, 'description': description, 'system_prompt': system_prompt
+        })
+        assert response.status_code == 201
+        prompts[name] = response.get_json()['prompt']
+    return prompts
+
+
+class TestVectorIndex:
+    """Test cases for vector packing and scoring"""
+    
+    def test_pack_vector_normalizes(self):
+        """Test that packed vectors are unit length float32"""
+        blob = pack_vector([3.0, 4.0])
+        assert len(blob) == 8
+        assert unpack_vector(blob) == pytest.approx((0.6, 0.8))
+        assert unpack_vector(pack_vector([0.0, 0.0])) == (0.0, 0.0)
+    
+    def test_search_ranks_by_cosine(self):
+        """Test ordering, limit and minimum score"""
+        index = VectorIndex([1, 2, 3], [pack_vector(v) for v in ([1, 0], [1, 1], [0, 1])], 2)
+        
+        results = index.search([1, 0.1], limit=3)
+        assert [prompt_id for prompt_id, _ in results] == [1, 2, 3]
+        assert results[0][1] == pytest.approx(1 / math.sqrt(1.01), abs=1e-5)
+        
+        assert [prompt_id for prompt_id, _ in index.search([1, 0.1], limit=1)] == [1]
+        assert [prompt_id for prompt_id, _ in index.search([1, 0.1], limit=3, min_score=0.5)] == [1, 2]
+    
+    def test_search_empty_index(self):
+        """Test that an empty index returns no results"""
+        assert VectorIndex([], [], 2).search([1, 0], limit=5) == []
+
+
+class TestSyncEmbeddings:
+    """Test cases for incremental embedding sync"""
+    
+    def test_sync_embeds_only_changed_prompts(self, client, session):
+        """Test that only new prompts and prompts with changed text are embedded"""
+        prompts = create_prompts(client)
+        embedder = FakeEmbedder()
+        
+        summary = sync_embeddings(session, embedder, 'test-embed')
+        assert summary == {'embedded': 3, 'unchanged': 0, 'pending': 0}
+        assert session.query(PromptEmbedding).count() == 3
+        
+        assert sync_embeddings(session, embedder, 'test-embed') == {'embedded': 0, 'unchanged': 0, 'pending': 0}
+        assert len(embedder.calls) == 1
+        
+        # A temperature change does not change the embedded text
+        client.put(f"/api/prompts/{prompts['Pirate']['id']}", json={'temperature': 1.2})
+        client.put(f"/api/prompts/{prompts['Code Review']['id']}", json={'description': 'Review Rust code'})
+        
+        summary = sync_embeddings(session, embedder, 'test-embed')
+        assert summary == {'embedded': 1, 'unchanged': 1, 'pending': 0}
+        assert len(embedder.calls) == 2
+        assert 'Review Rust code' in embedder.calls[1][0]
+    
+    def test_sync_limit_and_model_change(self, client, session):
+        """Test partial syncs and re-embedding after switching models"""
+        create_prompts(client)
+        embedder = FakeEmbedder()
+        
+        summary = sync_embeddings(session, embedder, 'test-embed', limit=2, batch_size=1)
+        assert summary == {'embedded': 2, 'unchanged': 0, 'pending': 1}
+        assert [len(texts) for texts in embedder.calls] == [1, 1]
+        
+        sync_embeddings(session, embedder, 'test-embed')
+        assert sync_embeddings(session, embedder, 'other-embed')['embedded'] == 3
+    
+    def test_embeddings_deleted_with_prompt(self, client, session):
+        """Test that deleting a prompt deletes its embedding"""
+        prompts = create_prompts(client)
+        sync_embeddings(session, FakeEmbedder(), 'test-embed')
+        
+        client.delete(f"/api/prompts/{prompts['Pirate']['id']}")
+        
+        assert session.query(PromptEmbedding).filter(
+            PromptEmbedding.prompt_id == prompts['Pirate']['id']).count() == 0
+
+
+class TestSemanticSearchAPI:
+    """Test cases for GET /api/prompts/semantic-search"""
+    
+    def test_semantic_search(self, client, session):
+        """Test that prompts are ranked by meaning rather than by name"""
+        create_prompts(client)
+        embedder = FakeEmbedder()
+        sync_embeddings(session, embedder, config.embedding_model)
+        
+        with patch('backend.api.prompts.ollama_pool.embed', side_effect=embedder.embed):
+            response = client.get('/api/prompts/semantic-search?query=summarise legal docs&limit=2')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['pending'] == 0
+        assert data['count'] == 2
+        assert data['results'][0]['name'] == 'Contract Summary'
+        assert data['results'][0]['score'] > data['results'][1]['score']
+        assert 'system_prompt' not in data['results'][0]
+    
+    def test_semantic_search_only_embeds_query(self, client, session):
+        """Test that changed prompts are reported as pending rather than embedded by the search"""
+        create_prompts(client)
+        embedder = FakeEmbedder()
+        sync_embeddings(session, embedder, config.embedding_model)
+        client.post('/api/prompts', json={'name': 'Poet', 'system_prompt': 'You write a poem about anything.'})
+        embedder.calls.clear()
+        
+        with patch('backend.api.prompts.ollama_pool.embed', side_effect=embedder.embed):
+            data = client.get('/api/prompts/semantic-search?query=poem&min_score=0.5').get_json()
+        
+        assert embedder.calls == [['poem']]
+        assert data['pending'] == 1
+        assert data['results'] == []
+        
+        sync_embeddings(session, embedder, config.embedding_model)
+        with patch('backend.api.prompts.ollama_pool.embed', side_effect=embedder.embed):
+            data = client.get('/api/prompts/semantic-search?query=poem&min_score=0.5').get_json()
+        
+        assert data['pending'] == 0
+        assert [result['name'] for result in data['results']] == ['Poet']
+    
+    def test_semantic_search_validation(self, client):
+        """Test missing query and out of range parameters"""
+        response = client.get('/api/prompts/semantic-search')
+        assert response.status_code == 400
+        assert 'query' in response.get_json()['details']
+        
+        response = client.get('/api/prompts/semantic-search?query=x&limit=0&min_score=2')
+        details = response.get_json()['details']
+        assert set(details) == {'limit', 'min_score'}
+    
+    def test_semantic_search_ollama_unavailable(self, client):
+        """Test that Ollama errors are reported"""
+        with patch('backend.api.prompts.ollama_pool.embed', side_effect=OllamaConnectionError('down')):
+            response = client.get('/api/prompts/semantic-search?query=legal')
+        
+        assert response.status_code == 503
+        assert response.get_json()['code'] == 'OLLAMA_CONNECTION_ERROR'
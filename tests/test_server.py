@@ -0,0 +1,95 @@
+"""
+Unit tests for the PromptLab production server
+Tests for in-flight request tracking and graceful drain
+"""
+
+import threading
+from backend.server import DrainingMiddleware
+
+def make_app(body_chunks, started=None, release=None):
+    """Create a WSGI app that optionally blocks while streaming"""
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        
+        def body():
+            for chunk in body_chunks:
+                if started is not None:
+                    started.set()
+                if release is not None:
+                    release.wait(5)
+                yield chunk
+        
+        return body()
+    return app
+
+def call(middleware):
+    """Invoke a WSGI app and return (status, body)"""
+    statuses = []
+    
+    def start_response(status, headers):
+        statuses.append(status)
+    
+    result = middleware({}, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return statuses[0], body
+
+class TestDrainingMiddleware:
+    """Test cases for DrainingMiddleware"""
+    
+    def test_passes_requests_through(self):
+        """Test that responses are unchanged and counted back to zero"""
+        middleware = DrainingMiddleware(make_app([b'hello ', b'world']))
+        
+        status, body = call(middleware)
+        
+        assert status == '200 OK'
+        assert body == b'hello world'
+        assert middleware.in_flight == 0
+    
+    def test_refuses_requests_while_draining(self):
+        """Test that new requests get a 503 after draining starts"""
+        middleware = DrainingMiddleware(make_app([b'ok']))
+        middleware.start_draining()
+        
+        status, body = call(middleware)
+        
+        assert status.startswith('503')
+        assert b'SHUTTING_DOWN' in body
+        assert middleware.in_flight == 0
+    
+    def test_wait_for_drain_waits_for_streaming_response(self):
+        """Test that a streamed response keeps the drain open until closed"""
+        started = threading.Event()
+        release = threading.Event()
+        middleware = DrainingMiddleware(make_app([b'chunk'], started, release))
+        
+        worker = threading.Thread(target=call, args=(middleware,))
+        worker.start()
+        assert started.wait(5)
+        
+        middleware.start_draining()
+        assert middleware.in_flight == 1
+        assert middleware.wait_for_drain(0.05) is False
+        
+        release.set()
+        assert middleware.wait_for_drain(5) is True
+        worker.join(5)
+        assert middleware.in_flight == 0
+    
+    def test_app_exception_releases_slot(self):
+        """Test that an exception in the app does not leak an in-flight slot"""
+        def failing_app(environ, start_response):
+            raise RuntimeError("boom")
+        
+        middleware = DrainingMiddleware(failing_app)
+        
+        try:
+            middleware({}, lambda status, headers: None)
+        except RuntimeError:
+            pass
+        
+        assert middleware.in_flight == 0
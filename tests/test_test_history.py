@@ -0,0 +1,348 @@
+"""
+Tests for PromptLab test-run history
+Tests for the batched history recorder and the history/statistics endpoints
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from sqlalchemy import text
+from backend.config import config
+from backend.database import get_db_session, close_db_session
+from backend.models.test_run import TestRun
+from backend.services import metrics
+from backend.services.test_history import TestRunRecorder, build_test_run
+
+@pytest.fixture
+def recorder():
+    """Recorder whose background thread never flushes on its own during a test"""
+    recorder = TestRunRecorder(flush_interval=3600)
+    yield recorder
+    recorder.stop()
+
+@pytest.fixture
+def prompt_id(client):
+    """Saved prompt to attach test runs to"""
+    response = client.post('/api/prompts', json={'name': 'History Prompt', 'system_prompt': 'Be brief.'})
+    return response.get_json()['prompt']['id']
+
+def make_result(latency=1.0, model='llama2', tokens_per_second=20.0):
+    """Build a test_prompt result as returned by the Ollama service"""
+    return {
+        'response': 'Hello!',
+        'execution_time': latency,
+        'model': model,
+        'temperature': 0.7,
+        'stats': {
+            'prompt_tokens': 12,
+            'completion_tokens': 40,
+            'tokens_per_second': tokens_per_second,
+            'prompt_tokens_per_second': 300.0,
+            'load_time': 0.01,
+            'prompt_eval_time': 0.04,
+            'eval_time': 2.0,
+            'total_time': latency
+        },
+        'cached': False,
+        'endpoint': 'http://localhost:11434'
+    }
+
+def count_runs():
+    session = get_db_session()
+    try:
+        return session.query(TestRun).count()
+    finally:
+        close_db_session(session)
+
+class TestBuildTestRun:
+    """Test cases for converting test results into rows"""
+    
+    def test_flattens_stats(self):
+        """Test that Ollama stats become columns"""
+        row = build_test_run(make_result(latency=1.5), 'Be brief.', 'Hi', prompt_id=3)
+        
+        assert row['prompt_id'] == 3
+        assert row['latency'] == 1.5
+        assert row['prompt_tokens'] == 12
+        assert row['completion_tokens'] == 40
+        assert row['tokens_per_second'] == 20.0
+        assert row['endpoint'] == 'http://localhost:11434'
+        assert row['created_at'] is not None
+        assert 'eval_time' not in row
+    
+    def test_missing_stats(self):
+        """Test results from servers that report no stats"""
+        result = make_result()
+        del result['stats']
+        del result['endpoint']
+        
+        row = build_test_run(result, 'Be brief.', 'Hi')
+        
+        assert row['prompt_id'] is None
+        assert row['prompt_tokens'] is None
+        assert row['tokens_per_second'] is None
+        assert row['endpoint'] is None
+
+class TestTestRunRecorder:
+    """Test cases for TestRunRecorder"""
+    
+    def test_record_is_deferred_until_flush(self, app, recorder, prompt_id):
+        """Test that recording only queues and flush writes the batch"""
+        for _ in range(3):
+            assert recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi', prompt_id))
+        
+        assert recorder.pending == 3
+        assert count_runs() == 0
+        
+        assert recorder.flush() == 3
+        assert recorder.pending == 0
+        assert count_runs() == 3
+    
+    def test_large_system_prompt_stored_compressed(self, app, recorder, monkeypatch):
+        """Test that long system prompts are compressed in history and read back as text"""
+        monkeypatch.setattr(config, 'text_compression_enabled', True)
+        system_prompt = 'Answer briefly and cite your sources. ' * 50
+        recorder.record(build_test_run(make_result(), system_prompt, 'Hi'))
+        recorder.flush()
+        
+        session = get_db_session()
+        try:
+            stored = session.execute(text("SELECT system_prompt FROM test_runs")).scalar()
+            assert isinstance(stored, bytes) and len(stored) < len(system_prompt)
+            assert session.query(TestRun).one().system_prompt == system_prompt
+        finally:
+            close_db_session(session)
+    
+    def test_flush_writes_in_batches(self, app, prompt_id):
+        """Test that large backlogs are split into several transactions"""
+        recorder = TestRunRecorder(flush_interval=3600, batch_size=2)
+        try:
+            for _ in range(5):
+                recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi', prompt_id))
+            
+            with patch.object(recorder, '_write', wraps=recorder._write) as mock_write:
+                assert recorder.flush() == 5
+            
+            assert [len(call.args[0]) for call in mock_write.call_args_list] == [2, 2, 1]
+        finally:
+            recorder.stop()
+    
+    def test_unknown_prompt_id_is_cleared(self, app, recorder, prompt_id):
+        """Test that runs of a deleted prompt are kept as ad-hoc runs"""
+        recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi', prompt_id + 100))
+        recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi', prompt_id))
+        
+        assert recorder.flush() == 2
+        
+        session = get_db_session()
+        try:
+            assert sorted(run.prompt_id or 0 for run in session.query(TestRun)) == [0, prompt_id]
+        finally:
+            close_db_session(session)
+    
+    def test_full_queue_drops_runs(self, app):
+        """Test that recording never blocks when the queue is full"""
+        metrics.registry.clear()
+        recorder = TestRunRecorder(flush_interval=3600, max_pending=2)
+        try:
+            results = [recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi')) for _ in range(3)]
+            
+            assert results == [True, True, False]
+            assert metrics.test_runs_dropped.get() == 1
+        finally:
+            recorder.stop()
+    
+    def test_disabled_history(self, app, recorder):
+        """Test that nothing is queued when history is disabled"""
+        import backend.config
+        backend.config.config.test_history_enabled = False
+        try:
+            assert not recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi'))
+            assert recorder.pending == 0
+        finally:
+            backend.config.config.test_history_enabled = True
+    
+    def test_stop_flushes_pending_runs(self, app, prompt_id):
+        """Test that stopping the recorder writes what is still queued"""
+        recorder = TestRunRecorder(flush_interval=3600)
+        recorder.record(build_test_run(make_result(), 'Be brief.', 'Hi', prompt_id))
+        
+        recorder.stop()
+        
+        assert count_runs() == 1
+
+class TestRunTestRecording:
+    """Test cases for recording /api/run-test results"""
+    
+    @patch('backend.api.ollama.test_run_recorder.record')
+    @patch('backend.api.ollama.ollama_service.test_prompt')
+    def test_run_test_records_result(self, mock_test_prompt, mock_record, client):
+        """Test that a completed prompt test is queued for history"""
+        mock_test_prompt.return_value = make_result()
+        
+        response = client.post('/api/run-test', json={
+            'system_prompt': 'Be brief.',
+            'user_input': 'Hi',
+            'prompt_id': 7
+        })
+        
+        assert response.status_code == 200
+        row = mock_record.call_args[0][0]
+        assert row['prompt_id'] == 7
+        assert row['user_input'] == 'Hi'
+        assert row['latency'] == 1.0
+    
+    def test_run_test_invalid_prompt_id(self, client):
+        """Test that prompt_id must be a positive integer"""
+        response = client.post('/api/run-test', json={
+            'system_prompt': 'Be brief.',
+            'user_input': 'Hi',
+            'prompt_id': 'abc'
+        })
+        
+        assert response.status_code == 400
+        assert 'prompt_id' in response.get_json()['details']
+
+class TestHistoryEndpoints:
+    """Test cases for the test history endpoints"""
+    
+    @pytest.fixture
+    def runs(self, app, prompt_id):
+        """Insert runs for two models spread over three days"""
+        now = datetime.now(timezone.utc)
+        rows = []
+        for index in range(6):
+            row = build_test_run(make_result(latency=float(index + 1), model='llama2' if index % 2 else 'mistral',
+                                             tokens_per_second=10.0 * (index + 1)), 'Be brief.', f'Input {index}',
+                                 prompt_id)
+            row['created_at'] = now - timedelta(days=index // 2, seconds=index)
+            rows.append(row)
+        
+        session = get_db_session()
+        try:
+            session.bulk_insert_mappings(TestRun, rows)
+            session.commit()
+        finally:
+            close_db_session(session)
+        return rows
+    
+    def test_history_newest_first(self, client, runs):
+        """Test that history is returned newest first"""
+        response = client.get('/api/test-runs')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 6
+        assert [run['user_input'] for run in data['test_runs']] == [f'Input {index}' for index in range(6)]
+        assert data['next_cursor'] is None
+    
+    def test_history_pagination(self, client, runs):
+        """Test walking the history with keyset cursors"""
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/test-runs?limit=4' + (f'&cursor={cursor}' if cursor else '')
+            data = client.get(url).get_json()
+            seen.extend(run['id'] for run in data['test_runs'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        
+        assert len(seen) == 6
+        assert len(set(seen)) == 6
+    
+    def test_history_filters(self, client, runs, prompt_id):
+        """Test filtering history by prompt and model"""
+        data = client.get(f'/api/test-runs?prompt_id={prompt_id}&model=llama2').get_json()
+        
+        assert data['count'] == 3
+        assert all(run['model'] == 'llama2' for run in data['test_runs'])
+        
+        data = client.get(f'/api/test-runs?prompt_id={prompt_id + 1}').get_json()
+        assert data['count'] == 0
+    
+    def test_history_shows_runs_once_flushed(self, client, prompt_id):
+        """Test that queued runs appear once the recorder has written them"""
+        from backend.services.test_history import test_run_recorder
+        test_run_recorder.record(build_test_run(make_result(), 'Be brief.', 'Queued', prompt_id))
+        test_run_recorder.flush()
+        
+        data = client.get('/api/test-runs').get_json()
+        
+        assert [run['user_input'] for run in data['test_runs']] == ['Queued']
+    
+    @pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'cursor=garbage', 'prompt_id=-1'])
+    def test_history_invalid_parameters(self, client, query):
+        """Test validation of history query parameters"""
+        response = client.get(f'/api/test-runs?{query}')
+        
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+    
+    def test_stats_per_model(self, client, runs, prompt_id):
+        """Test latency percentiles grouped by prompt and model"""
+        response = client.get(f'/api/test-runs/stats?prompt_id={prompt_id}')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        stats = {entry['model']: entry for entry in data['stats']}
+        assert set(stats) == {'llama2', 'mistral'}
+        
+        llama = stats['llama2']
+        assert llama['prompt_id'] == prompt_id
+        assert llama['runs'] == 3
+        assert llama['latency']['min'] == 2.0
+        assert llama['latency']['max'] == 6.0
+        assert llama['latency']['p50'] == 4.0
+        assert llama['tokens_per_second'] == 40.0
+        assert 'by_day' not in llama
+    
+    def test_stats_exclude_cached_runs(self, client, prompt_id):
+        """Test cache hits are counted separately and kept out of the latency figures"""
+        rows = [build_test_run(make_result(latency=latency), 'Be brief.', 'Hi', prompt_id)
+                for latency in (2.0, 4.0, 0.01, 0.02)]
+        rows[2]['cached'] = rows[3]['cached'] = True
+        session = get_db_session()
+        try:
+            session.bulk_insert_mappings(TestRun, rows)
+            session.commit()
+        finally:
+            close_db_session(session)
+        
+        data = client.get('/api/test-runs/stats?by_day=1').get_json()
+        
+        entry = data['stats'][0]
+        assert entry['runs'] == 2
+        assert entry['cached_runs'] == 2
+        assert entry['latency']['min'] == 2.0
+        assert entry['latency']['p50'] == 3.0
+        assert entry['by_day'][0]['cached_runs'] == 2
+    
+    def test_stats_by_day(self, client, runs):
+        """Test the per-day breakdown used to spot drift"""
+        data = client.get('/api/test-runs/stats?model=mistral&by_day=1').get_json()
+        
+        assert data['count'] == 1
+        by_day = data['stats'][0]['by_day']
+        assert len(by_day) == 3
+        assert [day['runs'] for day in by_day] == [1, 1, 1]
+        assert [day['latency']['p50'] for day in by_day] == [5.0, 3.0, 1.0]
+    
+    def test_stats_days_window(self, client, runs):
+        """Test restricting statistics to recent runs"""
+        data = client.get('/api/test-runs/stats?days=1').get_json()
+        
+        assert sum(entry['runs'] for entry in data['stats']) == 2
+    
+    def test_stats_invalid_days(self, client):
+        """Test validation of the days parameter"""
+        response = client.get('/api/test-runs/stats?days=0')
+        
+        assert response.status_code == 400
+        assert 'days' in response.get_json()['details']
+    
+    def test_prompt_deletion_removes_runs(self, client, runs, prompt_id):
+        """Test that history of a deleted prompt is deleted with it"""
+        client.delete(f'/api/prompts/{prompt_id}')
+        
+        assert client.get('/api/test-runs').get_json()['count'] == 0
@@ -0,0 +1,55 @@
+"""
+Unit tests for text deltas
+Tests chunking, delta round trips and delta size
+"""
+
+import random
+from backend.services.text_delta import split_chunks, compress_text, decompress_text, encode_delta, apply_delta
+
+
+class TestTextDelta:
+    """Test cases for delta encoding of prompt revisions"""
+    
+    def test_chunks_join_back(self):
+        """Test that chunking never loses text"""
+        for text in ('', 'One line', 'First. Second!\n\nThird?', 'Trailing newline\n', '...!!', 'a.b. c'):
+            chunks = split_chunks(text)
+            assert ''.join(chunks) == text
+            assert all(chunks)
+    
+    def test_compress_round_trip(self):
+        """Test that snapshots restore the exact text"""
+        text = 'You are a helpful assistant. ' * 100 + 'Ünïcode ✓'
+        data = compress_text(text)
+        assert decompress_text(data) == text
+        assert len(data) < len(text) // 10
+    
+    def test_delta_round_trip(self):
+        """Test that applying a delta rebuilds the new revision"""
+        cases = [
+            ('', 'New prompt.'),
+            ('Old prompt.', ''),
+            ('Be concise. Answer in English.', 'Be concise. Answer in French. Cite sources.'),
+            ('Line one\nLine two\n', 'Line zero\nLine one\nLine two\n'),
+        ]
+        for old, new in cases:
+            assert apply_delta(old, encode_delta(old, new)) == new
+        
+        rng = random.Random(7)
+        words = ['You', 'are', 'a', 'legal', 'analyst', 'summarise.', 'Quote!', 'sections?', '\n']
+        for _ in range(100):
+            old = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+            new = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+            assert apply_delta(old, encode_delta(old, new)) == new
+    
+    def test_small_edit_gives_small_delta(self):
+        """Test that editing one sentence of a long prompt stores far less than a snapshot"""
+        rng = random.Random(3)
+        sentences = [f'Rule {i}: ' + ' '.join(rng.choice(['always', 'never', 'cite', 'explain', 'the', 'source'])
+                                              for _ in range(12)) + '. ' for i in range(400)]
+        old = ''.join(sentences)
+        new = old.replace(sentences[200], 'Rule 200: answer in plain English. ')
+        
+        delta = encode_delta(old, new)
+        assert apply_delta(old, delta) == new
+        assert len(delta) < len(compress_text(new)) // 20